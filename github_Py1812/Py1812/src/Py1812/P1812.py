@@ -8,13 +8,13 @@ Created on Tue 27 Sep 2022
 
 import os
 import datetime
+from bisect import bisect_left
+from collections import OrderedDict
 import numpy as np
 from importlib.resources import files
 
+# Digital maps DN50 and N050, loaded on first use by digital_maps()
 DigitalMaps = {}
-with np.load(files("Py1812").joinpath("P1812.npz")) as DigitalMapsNpz:
-    for k in DigitalMapsNpz.files:
-        DigitalMaps[k] = DigitalMapsNpz[k].copy()
 
 
 def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, **kwargs):
@@ -35,7 +35,9 @@ def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
     f       -   Frequency (GHz)
     p       -   Required time percentage for which the calculated basic
                 transmission loss is not exceeded
-    d       -   vector of distances di of the i-th profile point (km)
+    d       -   vector of distances di of the i-th profile point (km), or a
+                ProfileBatch of a single profile (h, R, Ct, zone, phi_t, phi_r,
+                lam_t, lam_r, dct and dcr are then taken from it)
     h       -   vector of heights hi of the i-th profile point (meters
                 above mean sea level.
     R       -   vector of representative clutter height Ri of the i-th profile point (m)
@@ -78,10 +80,13 @@ def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
     fid_log  -   if debug == 1, a file identifier of the log file can be
                 provided, if not, the default file with a file
                 containing a timestamp will be created
+    return_details - Set to True to also return the intermediate results
+                as a PathDetails record (no file output), default False
 
 
     Output parameters:
     Lb     -   basic  transmission loss according to P.1812-6
+    details -   PathDetails record, only if return_details is True
 
     Example:
     1) Call with required input parameters
@@ -119,14 +124,25 @@ def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
     flag4 = kwargs.get("flag4", 0)
     debug = kwargs.get("debug", 0)
     fid_log = kwargs.get("fid_log", [])
+    return_details = kwargs.get("return_details", False)
+
+    # A ProfileBatch holds a profile that has already been validated and normalized
+    validated = isinstance(d, ProfileBatch)
+    if validated:
+        if len(d) != 1:
+            raise ValueError("bt_loss evaluates a single path profile, use bt_loss_batch for a ProfileBatch of several profiles.")
+        profile = d
+        NN = profile.n[0]
+        d, h, R, Ct, zone = (x[0, 0:NN] for x in (profile.d, profile.h, profile.R, profile.Ct, profile.zone))
+        phi_t, phi_r, lam_t, lam_r, dct, dcr = (float(x[0]) for x in (profile.phi_t, profile.phi_r, profile.lam_t, profile.lam_r, profile.dct, profile.dcr))
+    else:
+        # Ensure that vector d is ascending
+        if not issorted(d):
+            raise ValueError("The array of path profile points d(i) must be in ascending order.")
 
-    # Ensure that vector d is ascending
-    if not issorted(d):
-        raise ValueError("The array of path profile points d(i) must be in ascending order.")
-
-    # Ensure that d[0] = 0 (Tx position)
-    if d[0] > 0.0:
-        raise ValueError("The first path profile point d[0] = " + str(d[0]) + " must be zero.")
+        # Ensure that d[0] = 0 (Tx position)
+        if d[0] > 0.0:
+            raise ValueError("The first path profile point d[0] = " + str(d[0]) + " must be zero.")
 
     # verify input argument values and limits
 
@@ -146,62 +162,63 @@ def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
     if not (pol == 1 or pol == 2):
         raise ValueError("The polarization pol can be either 1 (horizontal) or 2 (vertical).")
 
-    # make sure that there is enough points in the path profile
-    if len(d) <= 4:
-        raise ValueError("The number of points in path profile should be larger than 4")
-
-    xx = np.logical_or(zone == 1, np.logical_or(zone == 3, zone == 4))
-    if np.any(xx == False):
-        raise ValueError("The vector of radio-climatic zones zone may only contain integers 1, 3, or 4.")
-
     if not (pL > 0 and pL < 100):
         raise ValueError("The location percentage must be in the range (0, 100)%")
 
     if not (Ptx > 0):
         raise ValueError("The Tx power must be positive.")
 
-    if dct < 0 or dcr < 0:
-        raise ValueError("Distances dct and dcr must be positive.")
-
     if sigmaL < 0:
         raise ValueError("Standard deviation in location variability must be positive.")
 
     if not (flag4 == 0 or flag4 == 1):
         raise ValueError("The parameter flag4 can be either 0 or 1.")
 
-    NN = len(d)
+    if not validated:
+        # make sure that there is enough points in the path profile
+        if len(d) <= 4:
+            raise ValueError("The number of points in path profile should be larger than 4")
 
-    # the number of elements in d and path need to be the same
-    if not (len(h) == NN):
-        raise ValueError("The number of elements in the array d and the array h must be the same.")
+        xx = np.logical_or(zone == 1, np.logical_or(zone == 3, zone == 4))
+        if np.any(xx == False):
+            raise ValueError("The vector of radio-climatic zones zone may only contain integers 1, 3, or 4.")
 
-    if isempty(R):
-        R = np.zeros(h.shape)  # default is clutter height zero
-    elif not (len(R) == NN):
-        raise ValueError("The number of elements in the array d and the array R must be the same.")
+        if dct < 0 or dcr < 0:
+            raise ValueError("Distances dct and dcr must be positive.")
 
-    if isempty(Ct):
-        Ct = 2 * np.ones(h.shape)  # default is Open/rural clutter type
+        NN = len(d)
 
-    elif Ct.any() == 0:
-        Ct = 2 * np.ones(h.shape)
-        # default is Open/rural clutter type
-    else:
-        if not (len(Ct) == NN):
-            raise ValueError("The number of elements in the array d and the array Ct must be the same.")
+        # the number of elements in d and path need to be the same
+        if not (len(h) == NN):
+            raise ValueError("The number of elements in the array d and the array h must be the same.")
 
-    if isempty(zone):
-        zone = 4 * np.ones(h.shape)  # default is Inland radio-meteorological zone
-    else:
-        if not (len(zone) == NN):
-            raise ValueError("The array d and the array zone must be of the same size.")
+        if isempty(R):
+            R = np.zeros(h.shape)  # default is clutter height zero
+        elif not (len(R) == NN):
+            raise ValueError("The number of elements in the array d and the array R must be the same.")
 
-    if zone[0] == 1:  # Tx at sea
-        dct = 0
+        if isempty(Ct):
+            Ct = 2 * np.ones(h.shape)  # default is Open/rural clutter type
+
+        elif Ct.any() == 0:
+            Ct = 2 * np.ones(h.shape)
+            # default is Open/rural clutter type
+        else:
+            if not (len(Ct) == NN):
+                raise ValueError("The number of elements in the array d and the array Ct must be the same.")
+
+        if isempty(zone):
+            zone = 4 * np.ones(h.shape)  # default is Inland radio-meteorological zone
+        else:
+            if not (len(zone) == NN):
+                raise ValueError("The array d and the array zone must be of the same size.")
+
+        if zone[0] == 1:  # Tx at sea
+            dct = 0
+
+        if zone[-1] == 1:  # Rx at sea
+            dcr = 0
 
-    if zone[-1] == 1:  # Rx at sea
-        dcr = 0
-        
     # Path center latitude
     Re = 6371
     dpnt = 0.5 * (d[-1] - d[0])
@@ -210,13 +227,13 @@ def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
     if isempty(DN):
         # Find radio-refractivity lapse rate dN 
         # using the digital maps at phim_e (lon), phim_n (lat) - as a bilinear interpolation
-        DN50 = DigitalMaps["DN50"]
+        DN50 = digital_maps()["DN50"]
         DN = interp2(DN50, lam_path, phi_path, 1.5, 1.5)
 
     if isempty(N0):
         # Find radio-refractivity 
         # using the digital maps at phim_e (lon), phim_n (lat) - as a bilinear interpolation
-        N050 = DigitalMaps["N050"]
+        N050 = digital_maps()["N050"]
         N0 = interp2(N050, lam_path, phi_path, 1.5, 1.5)
 
     # handle number fidlog is reserved here for writing the files
@@ -385,7 +402,7 @@ def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
     # Calculate a notional basic transmission loss associated with diffraction
     # and LoS or ducting/layer reflection enhancements
 
-    Lbda = Lbd
+    Lbda = Lbd.copy()
 
     if Lminbap <= Lbd[0]:
         Lbda[0] = Lminbap + (Lbd[0] - Lminbap) * Fk
@@ -460,804 +477,3491 @@ def bt_loss(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
         
     Ep = EpPtx
 
+    if return_details:
+        k = int(pol - 1)
+        details = PathDetails(
+            DN=DN, N0=N0, dct=dct, dcr=dcr, dtot=dtot, dlt=dlt, dlr=dlr, theta_t=theta_t, theta_r=theta_r, theta=theta, pathtype=pathtype,
+            hts=hts, hrs=hrs, omega=omega, dtm=dtm, dlm=dlm, phi_path=phi_path, b0=b0, ae=ae,
+            hst_n=hst_n, hsr_n=hsr_n, hst=hst, hsr=hsr, hstd=hstd, hsrd=hsrd, hte=hte, hre=hre, hm=hm,
+            Fi=Fi, Fj=Fj, Fk=Fk, Lbfs=Lbfs, Lb0p=Lb0p, Lb0b=Lb0b, Lbulla=Lbulla50, Lbulls=Lbulls50, Ldsph=Ldsph50[k],
+            Ld50=Ld50[k], Ldb=Ldb[k], Ldp=Ldp[k], Lbd50=Lbd50[k], Lbd=Lbd[k], Lminb0p=Lminb0p[k], Lba=Lba, Lminbap=Lminbap,
+            Lbda=Lbda[k], Lbam=Lbam[k], Lbs=Lbs, Lbc=Lbc, Lloc=Lloc, Lb=Lb, Ep=Ep,
+        )
+        return Lb, Ep, details
+
     return Lb, Ep
 
 
-def tl_tropo(dtot, theta, f, p, N0):
+class PathDetails:
+    """
+    P1812.PathDetails intermediate results of bt_loss for one path
+    details = PathDetails(**values)
+
+    Lightweight record (without per-instance dictionary) of the quantities
+    that bt_loss writes to the log file when debug = 1. It is returned by
+    bt_loss with return_details = True. bt_loss_batch with return_details =
+    True returns the same fields as a dictionary of arrays, one value per
+    path. The polarization dependent losses are those for pol.
+
+    Ep is the field strength returned by bt_loss, i.e., scaled to the
+    transmitter power Ptx (logged as "Ep (dBuV/m) w.r.t. Ptx"), not the
+    field strength for 1 kW of eq (70).
     """
-    tl_tropo Basic transmission loss due to troposcatterer to P.1812-6
-    Lbs = tl_tropo(dtot, theta, f, p, N0)
-
-    This function computes the basic transmission loss due to troposcatterer
-    not exceeded for p% of time
-    as defined in ITU-R P.1812-6 (Section 4.4)
 
-        Input parameters:
-        dtot    -   Great-circle path distance (km)
-        theta   -   Path angular distance (mrad)
-        f       -   frequency expressed in GHz
-        p       -   percentage of time
-        N0      -   path centre sea-level surface refractivity derived from Fig. 6
+    __slots__ = (
+        "DN", "N0", "dct", "dcr", "dtot", "dlt", "dlr", "theta_t", "theta_r", "theta", "pathtype",
+        "hts", "hrs", "omega", "dtm", "dlm", "phi_path", "b0", "ae",
+        "hst_n", "hsr_n", "hst", "hsr", "hstd", "hsrd", "hte", "hre", "hm",
+        "Fi", "Fj", "Fk", "Lbfs", "Lb0p", "Lb0b", "Lbulla", "Lbulls", "Ldsph",
+        "Ld50", "Ldb", "Ldp", "Lbd50", "Lbd", "Lminb0p", "Lba", "Lminbap",
+        "Lbda", "Lbam", "Lbs", "Lbc", "Lloc", "Lb", "Ep",
+    )
 
-        Output parameters:
-        Lbs    -   the basic transmission loss due to troposcatterer
-                    not exceeded for p% of time
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values[name])
 
-        Example:
-        Lbs = tl_tropo(dtot, theta, f, p, N0)
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
 
 
-        Rev   Date        Author                          Description
-        -------------------------------------------------------------------------------
-        v0    29SEP22    Ivica Stevanovic, OFCOM         Initial version
+class ProfileBatch:
     """
+    P1812.ProfileBatch path profiles validated and normalized once
+    profiles = P1812.ProfileBatch(d, h, R, Ct, zone, phi_t, phi_r, lam_t, lam_r)
+
+    Holds one or N path profiles as stacked float arrays (see
+    stack_profiles), after the checks and defaults that bt_loss and
+    PreparedPath otherwise apply on every call: ascending d starting at
+    zero, more than 4 points, matching lengths of d, h, R, Ct and zone,
+    valid zone values, clutter height zero and Inland zone when R and zone
+    are empty, Open/rural clutter when Ct is empty or all zeros, and dct
+    (dcr) set to zero for a Tx (Rx) at sea.
+
+    bt_loss, bt_loss_batch and PreparedPath accept a ProfileBatch in place
+    of d, in which case h, R, Ct, zone, phi_t, phi_r, lam_t, lam_r and the
+    keywords dct and dcr are taken from it (the arguments passed are
+    ignored) and the profile checks are skipped. bt_loss requires a batch
+    of a single profile, e.g., profiles[k].
 
-    # Frequency dependent loss
+    Input parameters:
+    d, h, R, Ct, zone, phi_t, phi_r, lam_t, lam_r - as in bt_loss for a single path,
+                                                    or as in bt_loss_batch for N paths
 
-    Lf = 25 * np.log10(f) - 2.5 * (np.log10(f / 2.0)) ** 2  # eq (45)
+    Optional input parameters (using keywords):
+    dct, dcr - as in bt_loss_batch
 
-    # the basic transmission loss due to troposcatter not exceeded for any time
-    # percentage p, below 50# is given
+    Example:
+    profiles = ProfileBatch([d1, d2], [h1, h2], [R1, R2], [], [], phi_t, [phi_r1, phi_r2], lam_t, [lam_r1, lam_r2])
+    Lb, Ep = bt_loss_batch(f, p, profiles, [], [], [], [], htg, hrg, pol, [], [], [], [])
+    Lb1, Ep1 = bt_loss(f, p, profiles[1], [], [], [], [], htg, hrg, pol, [], [], [], [])
+    """
 
-    Lbs = 190.1 + Lf + 20 * np.log10(dtot) + 0.573 * theta - 0.15 * N0 - 10.125 * (np.log10(50.0 / p)) ** (0.7)
+    def __init__(self, d, h, R, Ct, zone, phi_t, phi_r, lam_t, lam_r, **kwargs):
+        dct = kwargs.get("dct", 500.0)
+        dcr = kwargs.get("dcr", 500.0)
 
-    return Lbs
+        # a single path profile is handled as a batch of one
+        single = np.ndim(d[0]) == 0
+        if single:
+            d = [d]
+            h = [h]
+            R = [R] if len(R) > 0 else R
+            Ct = [Ct] if len(Ct) > 0 else Ct
+            zone = [zone] if len(zone) > 0 else zone
 
+        d, n = stack_profiles(d)
+        h, nh = stack_profiles(h)
+        NP = d.shape[0]
 
-def tl_anomalous(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0):
-    """
-    tl_anomalous Basic transmission loss due to anomalous propagation according to P.452-17
-    Lba = tl_anomalous(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0)
+        # Ensure that all vectors d are ascending and start at the Tx position
+        if np.any(np.diff(d, axis=1) < 0):
+            raise ValueError("The array of path profile points d(i) must be in ascending order.")
 
-    This function computes the basic transmission loss occuring during
-    periods of anomalous propagation (ducting and layer reflection)
-    as defined in ITU-R P.1812-6 (Section 4.5)
+        if np.any(d[:, 0] > 0.0):
+            raise ValueError("The first path profile point d[0] must be zero.")
 
-        Input parameters:
-        dtot         -   Great-circle path distance (km)
-        dlt          -   interfering antenna horizon distance (km)
-        dlr          -   Interfered-with antenna horizon distance (km)
-        dct, dcr     -   Distance over land from the transmit and receive
-                         antennas tothe coast along the great-circle interference path (km).
-                         Set to zero for a terminal on a ship or sea platform
-        dlm          -   the longest continuous inland section of the great-circle path (km)
-        hts, hrs     -   Tx and Rx antenna heights aobe mean sea level amsl (m)
-        hte, hre     -   Tx and Rx terminal effective heights for the ducting/layer reflection model (m)
-        hm           -   The terrain roughness parameter (m)
-        theta_t      -   Interfering antenna horizon elevation angle (mrad)
-        theta_r      -   Interfered-with antenna horizon elevation angle (mrad)
-        f            -   frequency expressed in GHz
-        p            -   percentage of time
-        omega        -   fraction of the total path over water
-        ae           -   the median effective Earth radius (km)
-        b0           -   the time percentage that the refractivity gradient (DELTA-N) exceeds 100 N-units/km in the first 100m of the lower atmosphere
+        # make sure that there is enough points in the path profiles
+        if np.any(n <= 4):
+            raise ValueError("The number of points in path profile should be larger than 4")
 
-        Output parameters:
-        Lba    -   the basic transmission loss due to anomalous propagation
-                (ducting and layer reflection)
+        if not (h.shape[0] == NP and np.array_equal(nh, n)):
+            raise ValueError("The number of elements in the array d and the array h must be the same.")
 
-        Example:
-        Lba = tl_anomalous(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, b0)
+        if len(R) == 0:
+            R = np.zeros(h.shape)  # default is clutter height zero
+        else:
+            R, nR = stack_profiles(R)
+            if not (R.shape[0] == NP and np.array_equal(nR, n)):
+                raise ValueError("The number of elements in the array d and the array R must be the same.")
 
+        if len(Ct) == 0:
+            Ct = 2 * np.ones(h.shape)  # default is Open/rural clutter type
+        else:
+            Ct, nC = stack_profiles(Ct)
+            if not (Ct.shape[0] == NP and np.array_equal(nC, n)):
+                raise ValueError("The number of elements in the array d and the array Ct must be the same.")
+            # default is Open/rural clutter type for the profiles with all zeros
+            Ct[~Ct.any(axis=1)] = 2
+
+        if len(zone) == 0:
+            zone = 4 * np.ones(h.shape)  # default is Inland radio-meteorological zone
+        else:
+            zone, nz = stack_profiles(zone)
+            if not (zone.shape[0] == NP and np.array_equal(nz, n)):
+                raise ValueError("The array d and the array zone must be of the same size.")
 
-        Rev   Date        Author                          Description
-        -------------------------------------------------------------------------------
-        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+        xx = np.logical_or(zone == 1, np.logical_or(zone == 3, zone == 4))
+        if np.any(xx == False):
+            raise ValueError("The vector of radio-climatic zones zone may only contain integers 1, 3, or 4.")
 
+        rows = np.arange(NP)
 
-    """
+        dct = np.broadcast_to(np.asarray(dct, dtype=float), (NP,)).copy()
+        dcr = np.broadcast_to(np.asarray(dcr, dtype=float), (NP,)).copy()
 
-    # empirical correction to account for the increasing attenuation with
-    # wavelength inducted propagation (47a)
+        if np.any(dct < 0) or np.any(dcr < 0):
+            raise ValueError("Distances dct and dcr must be positive.")
 
-    Alf = 0
+        dct[zone[:, 0] == 1] = 0  # Tx at sea
+        dcr[zone[rows, n - 1] == 1] = 0  # Rx at sea
 
-    if f < 0.5:
-        Alf = 45.375 - 137.0 * f + 92.5 * f * f
+        phi_t, phi_r, lam_t, lam_r = (np.asarray(x, dtype=float) * np.ones(NP) for x in (phi_t, phi_r, lam_t, lam_r))
 
-    # site-shielding diffraction losses for the interfering and interfered-with
-    # stations (48)
+        # leading dimensions of the results: none for a single path, N for N paths
+        self.shape = () if single else (NP,)
 
-    theta_t2 = theta_t - 0.1 * dlt  # eq (48a)
-    theta_r2 = theta_r - 0.1 * dlr
+        self.d = d
+        self.h = h
+        self.R = R
+        self.Ct = Ct
+        self.zone = zone
+        self.n = n
+        self.phi_t = phi_t
+        self.phi_r = phi_r
+        self.lam_t = lam_t
+        self.lam_r = lam_r
+        self.dct = dct
+        self.dcr = dcr
 
-    Ast = 0
-    Asr = 0
+    def __len__(self):
+        return self.d.shape[0]
 
-    if theta_t2 > 0:
-        Ast = 20 * np.log10(1 + 0.361 * theta_t2 * np.sqrt(f * dlt)) + 0.264 * theta_t2 * f ** (1.0 / 3.0)
+    def __getitem__(self, k):
+        """
+        profiles[k] is the k-th profile as a ProfileBatch of a single path, without padding
+        """
+        NN = self.n[k]
 
-    if theta_r2 > 0:
-        Asr = 20 * np.log10(1 + 0.361 * theta_r2 * np.sqrt(f * dlr)) + 0.264 * theta_r2 * f ** (1.0 / 3.0)
+        profile = ProfileBatch.__new__(ProfileBatch)
+        profile.shape = ()
+        for name in ("d", "h", "R", "Ct", "zone"):
+            setattr(profile, name, getattr(self, name)[k : k + 1, 0:NN])
+        for name in ("n", "phi_t", "phi_r", "lam_t", "lam_r", "dct", "dcr"):
+            setattr(profile, name, getattr(self, name)[k : k + 1])
 
-    # over-sea surface duct coupling correction for the interfering and
-    # interfered-with stations (49) and (49a)
+        return profile
 
-    Act = 0
-    Acr = 0
 
-    if dct <= 5:
-        if dct <= dlt:
-            if omega >= 0.75:
-                Act = -3 * np.exp(-0.25 * dct * dct) * (1 + np.tanh(0.07 * (50 - hts)))
+def bt_loss_batch(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, **kwargs):
+    """
+    P1812.bt_loss_batch basic transmission loss according to P.1812-6 for a batch of profiles
+    Lb, Ep = P1812.bt_loss_batch(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r)
+
+    This function computes the same quantities as bt_loss for N path
+    profiles at once. The profile-dependent steps (smooth-Earth heights,
+    Bullington and spherical-Earth diffraction, anomalous propagation and
+    troposcatter) are evaluated as array operations across all profiles,
+    so that the per-path interpreter overhead of bt_loss is paid only once
+    per batch. The results are identical to calling bt_loss in a loop.
+    The path profile analysis is done by PreparedPath, which can be used
+    directly to evaluate the same paths for several f, p and pol.
 
-    if dcr <= 5:
-        if dcr <= dlr:
-            if omega >= 0.75:
-                Acr = -3 * np.exp(-0.25 * dcr * dcr) * (1 + np.tanh(0.07 * (50 - hrs)))
+    Input parameters:
+    f       -   Frequency (GHz), shared by all profiles
+    p       -   Required time percentage for which the calculated basic
+                transmission loss is not exceeded, shared by all profiles
+    d       -   distances of the profile points (km), either a 2D array (N x n)
+                of N profiles with n points, or a list of N 1D arrays
+                (profiles of different lengths), or a ProfileBatch
+                (h, R, Ct, zone, phi_t, phi_r, lam_t, lam_r, dct and dcr are then taken from it)
+    h       -   terrain heights amsl (m), same layout as d
+    R       -   representative clutter heights (m), same layout as d
+                if empty, clutter height zero is used for all profiles
+    Ct      -   representative clutter types, same layout as d
+                if empty, the default clutter used is Open/rural
+    zone    -   radio-climatic zones, same layout as d: Inland (4), Coastal land (3), or Sea (1)
+                if empty, Inland is used for all profiles
+    htg     -   Tx Antenna center heigth above ground level (m), shared
+    hrg     -   Rx Antenna center heigth above ground level (m), shared
+    pol     -   polarization of the signal (1) horizontal, (2) vertical, shared
+    phi_t    - latitude of Tx station (degrees), scalar or array of N values
+    phi_r    - latitude of Rx station (degrees), scalar or array of N values
+    lam_t    - longitude of Tx station (degrees), scalar or array of N values
+    lam_r    - longitude of Rx station (degrees), scalar or array of N values
 
-    # specific attenuation (51)
+    Optional input parameters (using keywords):
+    pL, sigmaL, Ptx, flag4 - as in bt_loss, shared by all profiles
+    DN, N0, dct, dcr       - as in bt_loss, scalar or array of N values
+    refractivity           - RefractivityCache serving DN and N0 when they are not given
+    return_details         - Set to True to also return the intermediate results
 
-    gamma_d = 5e-5 * ae * f ** (1.0 / 3.0)
+    Output parameters:
+    Lb      -   array of N basic transmission losses according to P.1812-6
+    Ep      -   array of N field strengths w.r.t. Ptx
+    details -   dictionary of arrays of N values with the fields of PathDetails,
+                only if return_details is True
 
-    # angular distance (corrected where appropriate) (52-52a)
+    Example:
+    Lb, Ep = bt_loss_batch(f, p, [d1, d2], [h1, h2], [R1, R2], [], [], htg, hrg, pol, phi_t, [phi_r1, phi_r2], lam_t, [lam_r1, lam_r2])
+    """
 
-    theta_t1 = theta_t
-    theta_r1 = theta_r
+    # Set default values for optional arguments
 
-    if theta_t > 0.1 * dlt:
-        theta_t1 = 0.1 * dlt
+    pL = kwargs.get("pL", 50.0)
+    sigmaL = kwargs.get("sigmaL", 0.0)
+    Ptx = kwargs.get("Ptx", 1.0)
 
-    if theta_r > 0.1 * dlr:
-        theta_r1 = 0.1 * dlr
+    return_details = kwargs.get("return_details", False)
 
-    theta1 = 1e3 * dtot / ae + theta_t1 + theta_r1
+    path = PreparedPath(d, h, R, Ct, zone, htg, hrg, phi_t, phi_r, lam_t, lam_r, **kwargs)
 
-    dI = min(dtot - dlt - dlr, 40)  # eq (56a)
+    return path.bt_loss(f, p, pol, pL=pL, sigmaL=sigmaL, Ptx=Ptx, return_details=return_details)
 
-    mu3 = 1
 
-    if hm > 10:
-        mu3 = np.exp(-4.6e-5 * (hm - 10) * (43 + 6 * dI))  # eq (56)
+class PreparedPath:
+    """
+    P1812.PreparedPath path profile analysis according to P.1812-6 prepared for sweeps over f, p and pol
+    path = P1812.PreparedPath(d, h, R, Ct, zone, htg, hrg, phi_t, phi_r, lam_t, lam_r)
+    Lb, Ep = path.bt_loss(f, p, pol)
 
-    tau = 1 - np.exp(-(4.12e-4 * dlm**2.41))  # eq (3)
+    Most of bt_loss depends only on the path profile and the antenna
+    heights: the path centre and its DN and N0, the zone statistics, b0 and
+    the effective Earth radii are computed once when the object is built.
+    The smooth-Earth heights and the diffraction losses for the median and
+    b0% effective Earth radii are computed once per frequency and reused
+    for all time percentages and both polarizations.
 
-    epsilon = 3.5
+    The profile arguments are those of bt_loss for a single path, or those
+    of bt_loss_batch for N paths, or a ProfileBatch passed as d.
 
-    alpha = -0.6 - epsilon * 1e-9 * dtot ** (3.1) * tau  # eq (55a)
+    Input parameters:
+    d, h, R, Ct, zone, htg, hrg, phi_t, phi_r, lam_t, lam_r - as in bt_loss or bt_loss_batch
 
-    if alpha < -3.4:
-        alpha = -3.4
+    Optional input parameters (using keywords):
+    DN, N0, dct, dcr, flag4, refractivity - as in bt_loss_batch
 
-    # correction for path geometry:
+    Example:
+    path = PreparedPath(d, h, R, Ct, zone, htg, hrg, phi_t, phi_r, lam_t, lam_r)
+    Lb, Ep = path.bt_loss([0.1, 0.6, 2.1], [1, 10, 50], (1, 2))
+    """
 
-    mu2 = (500 / ae * dtot**2 / (np.sqrt(hte) + np.sqrt(hre)) ** 2) ** alpha  # eq (55)
+    def __init__(self, d, h, R, Ct, zone, htg, hrg, phi_t, phi_r, lam_t, lam_r, **kwargs):
+        # Set default values for optional arguments
 
-    if mu2 > 1:
-        mu2 = 1
+        DN = kwargs.get("DN", [])
+        N0 = kwargs.get("N0", [])
+        dct = kwargs.get("dct", 500.0)
+        dcr = kwargs.get("dcr", 500.0)
+        flag4 = kwargs.get("flag4", 0)
+        refractivity = kwargs.get("refractivity", None)
 
-    beta = b0 * mu2 * mu3  # eq (54)
+        if isinstance(d, ProfileBatch):
+            # profiles already validated and normalized
+            profiles = d
+        else:
+            profiles = ProfileBatch(d, h, R, Ct, zone, phi_t, phi_r, lam_t, lam_r, dct=dct, dcr=dcr)
+
+        # verify input argument values and limits
+
+        if not (htg >= 1 and htg <= 3000):
+            raise ValueError("The Tx antenna height must be in the range [1, 3000] m")
+
+        if not (hrg >= 1 and hrg <= 3000):
+            raise ValueError("The Rx antenna height must be in the range [1, 3000] m")
+
+        if not (flag4 == 0 or flag4 == 1):
+            raise ValueError("The parameter flag4 can be either 0 or 1.")
+
+        d = profiles.d
+        h = profiles.h
+        zone = profiles.zone
+        n = profiles.n
+        dct = profiles.dct
+        dcr = profiles.dcr
+
+        NP = d.shape[0]
+        rows = np.arange(NP)
+        last = n - 1
+
+        # Path center latitude
+        Re = 6371
+        dtot = d[rows, last] - d[:, 0]
+        phi_t, phi_r, lam_t, lam_r = profiles.phi_t, profiles.phi_r, profiles.lam_t, profiles.lam_r
+        lam_path, phi_path, _, _ = great_circle_path_batch(lam_r, lam_t, phi_r, phi_t, Re, 0.5 * dtot)
+
+        if refractivity is not None and (isempty(DN) or isempty(N0)):
+            # Path-centre values served by a RefractivityCache
+            DNc, N0c = refractivity.lookup(lam_path, phi_path)
+            if isempty(DN):
+                DN = DNc
+            if isempty(N0):
+                N0 = N0c
+
+        if isempty(DN):
+            # Find radio-refractivity lapse rate dN
+            # using the digital maps at phim_e (lon), phim_n (lat) - as a bilinear interpolation
+            DN50 = digital_maps()["DN50"]
+            DN = interp2_batch(DN50, lam_path, phi_path, 1.5, 1.5)
+
+        if isempty(N0):
+            # Find radio-refractivity
+            # using the digital maps at phim_e (lon), phim_n (lat) - as a bilinear interpolation
+            N050 = digital_maps()["N050"]
+            N0 = interp2_batch(N050, lam_path, phi_path, 1.5, 1.5)
+
+        DN = np.broadcast_to(np.asarray(DN, dtype=float), (NP,))
+        N0 = np.broadcast_to(np.asarray(N0, dtype=float), (NP,))
+
+        # Compute the path profile parameters
+
+        # Compute  dtm     -   the longest continuous land (inland + coastal =34) section of the great-circle path (km)
+        dtm = longest_cont_dist_batch(d, zone, 34)
+
+        # Compute  dlm     -   the longest continuous inland section (4) of the great-circle path (km)
+        dlm = longest_cont_dist_batch(d, zone, 4)
+
+        # Compute b0
+        b0 = beta0(phi_path, dtm, dlm)
+
+        ae, ab = earth_rad_eff(DN)
+
+        # Compute the path fraction over see Eq (1)
+
+        omega = path_fraction_batch(d, zone, 1)
+
+        # Tx and Rx antenna heights above mean sea level amsl (m)
+        hts = h[:, 0] + htg
+        hrs = h[rows, last] + hrg
+
+        # Modify the path by adding representative clutter, according to Section 3.2
+        # excluding the first and the last point
+        g = h + profiles.R
+        g[:, 0] = h[:, 0]
+        g = np.where(np.arange(d.shape[1])[np.newaxis, :] >= last[:, np.newaxis], h[rows, last][:, np.newaxis], g)
+
+        # leading dimensions of the results: none for a single path, N for N paths
+        self.shape = profiles.shape
+
+        self.d = d
+        self.h = h
+        self.R = profiles.R
+        self.g = g
+        self.n = n
+        self.zone_r = zone[rows, last]
+        self.htg = htg
+        self.hrg = hrg
+        self.flag4 = flag4
+        self.dtot = dtot
+        self.hts = hts
+        self.hrs = hrs
+        self.DN = DN
+        self.N0 = N0
+        self.dct = dct
+        self.dcr = dcr
+        self.dtm = dtm
+        self.dlm = dlm
+        self.phi_path = phi_path
+        self.b0 = b0
+        self.ae = ae
+        self.omega = omega
+
+        # frequency dependent intermediates, computed on first use
+        self.geometry = {}
+        self.diffraction = {}
+
+    def path_geometry(self, f):
+        """
+        Smooth-Earth heights and horizon parameters of the paths at the frequency f (GHz),
+        i.e., the output of smooth_earth_heights_batch
+        """
+        f = float(f)  # the same key for a Python or NumPy scalar
+        if f not in self.geometry:
+            self.geometry[f] = smooth_earth_heights_batch(self.d, self.h, self.R, self.htg, self.hrg, self.ae, f, self.n)
+
+        return self.geometry[f]
+
+    def path_diffraction(self, f):
+        """
+        Diffraction losses of the paths at the frequency f (GHz) for the
+        median and b0% effective Earth radii, i.e., the output of dl_50b_batch
+        """
+        f = float(f)  # the same key for a Python or NumPy scalar
+        if f not in self.diffraction:
+            hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, pathtype = self.path_geometry(f)
+            self.diffraction[f] = dl_50b_batch(self.d, self.g, self.hts, self.hrs, hstd, hsrd, f, self.omega, self.DN, self.flag4, self.n)
+
+        return self.diffraction[f]
+
+    def bt_loss(self, f, p, pol=(1, 2), **kwargs):
+        """
+        Lb, Ep = path.bt_loss(f, p, pol) basic transmission loss and field strength of the paths
 
-    # beta = max(beta, eps)      # to avoid division by zero
+        Input parameters:
+        f       -   Frequency (GHz), scalar or array
+        p       -   Time percentage, scalar or array
+        pol     -   polarization (1) horizontal, (2) vertical, or a sequence
+                    of polarizations, default (1, 2)
 
-    Gamma = 1.076 / (2.0058 - np.log10(beta)) ** 1.012 * np.exp(-(9.51 - 4.8 * np.log10(beta) + 0.198 * (np.log10(beta)) ** 2) * 1e-6 * dtot ** (1.13))  # eq (53a)
+        Optional input parameters (using keywords):
+        pL, sigmaL, Ptx - as in bt_loss
+        return_details  -   Set to True to also return the intermediate results
+                            (scalar f, p and pol only)
 
-    # time percentage variablity (cumulative distribution):
+        Output parameters:
+        Lb, Ep  -   arrays of shape shape(f) + shape(p) + shape(pol), preceded
+                    by the number of paths N if the object was built for N paths
+        details -   dictionary of arrays with the fields of PathDetails, one
+                    value per path, only if return_details is True
+        """
+        pL = kwargs.get("pL", 50.0)
+        sigmaL = kwargs.get("sigmaL", 0.0)
+        Ptx = kwargs.get("Ptx", 1.0)
+        return_details = kwargs.get("return_details", False)
 
-    Ap = -12 + (1.2 + 3.7e-3 * dtot) * np.log10(p / beta) + 12 * (p / beta) ** Gamma  # eq (53)
+        # verify input argument values and limits
 
-    # time percentage and angular-distance dependent losses within the
-    # anomalous propagation mechanism
+        if not (np.all(np.asarray(f) >= 0.03) and np.all(np.asarray(f) <= 6.0)):
+            print("Warning: frequency must be in the range [0.03, 6] GHz. ")
+            print("Computation will continue but the parameters are outside of the valid domain.")
 
-    Adp = gamma_d * theta1 + Ap  # eq (50)
+        if not (np.all(np.asarray(p) >= 1) and np.all(np.asarray(p) <= 50)):
+            raise ValueError("The time percentage must be in the range [1, 50]%")
 
-    # total of fixed coupling losses (except for local clutter losses) between
-    # the antennas and the anomalous propagation structure within the
-    # atmosphere (47)
+        if not np.all(np.logical_or(np.asarray(pol) == 1, np.asarray(pol) == 2)):
+            raise ValueError("The polarization pol can be either 1 (horizontal) or 2 (vertical).")
 
-    Af = 102.45 + 20 * np.log10(f) + 20 * np.log10(dlt + dlr) + Alf + Ast + Asr + Act + Acr
+        if not (pL > 0 and pL < 100):
+            raise ValueError("The location percentage must be in the range (0, 100)%")
 
-    # total basic transmission loss occuring during periods of anomalaous
-    # propagation (46)
+        if not (Ptx > 0):
+            raise ValueError("The Tx power must be positive.")
 
-    Lba = Af + Adp
+        if sigmaL < 0:
+            raise ValueError("Standard deviation in location variability must be positive.")
 
-    return Lba
+        if return_details:
+            if not (np.ndim(f) == 0 and np.ndim(p) == 0 and np.ndim(pol) == 0):
+                raise ValueError("The intermediate results are only returned for scalar f, p and pol.")
 
+            details = {}
+            hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, pathtype = self.path_geometry(f)
+            Lb, Ep = combine_losses_batch(f, p, self.d, self.g, self.dtot, self.hts, self.hrs, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, self.omega, self.b0, self.DN, self.N0, self.dct, self.dcr, self.dlm, self.zone_r, pol, pL, sigmaL, Ptx, self.flag4, self.n, self.path_diffraction(f), details)
 
-def smooth_earth_heights(d, h, R, htg, hrg, ae, f):
-    """
-    smooth_earth_heights smooth-Earth effective antenna heights according to ITU-R P.1812-6
-    hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype = smooth_earth_heights(d, h, R, htg, hrg, ae, f)
-    This function derives smooth-Earth effective antenna heights according to
-    Sections 4 and 5 of the Attachment 1 to Annex 1 of ITU-R P.1812-6
+            columns = dict(
+                DN=self.DN, N0=self.N0, dct=self.dct, dcr=self.dcr, dtot=self.dtot, dlt=dlt, dlr=dlr, theta_t=theta_t, theta_r=theta_r, theta=theta, pathtype=pathtype,
+                hts=self.hts, hrs=self.hrs, omega=self.omega, dtm=self.dtm, dlm=self.dlm, phi_path=self.phi_path, b0=self.b0, ae=self.ae,
+                hst_n=hst_n, hsr_n=hsr_n, hst=hst, hsr=hsr, hstd=hstd, hsrd=hsrd, hte=hte, hre=hre, hm=hm,
+            )
+            columns.update(details)
+            details = {name: np.asarray(columns[name]) for name in PathDetails.__slots__}
 
-    Input parameters:
-    d         -   vector of terrain profile distances from Tx [0,dtot] (km)
-    h         -   vector of terrain profile heigths amsl (m)
-    R         -   vector of representative clutter heights (m)
-    htg, hrg  -   Tx and Rx antenna heights above ground level (m)
-    ae        -   median effective Earth's radius (c.f. Eq (6a))
-    f         -   frequency (GHz)
+            return np.reshape(Lb, self.shape), np.reshape(Ep, self.shape), details
 
-    Output parameters:
+        NP = self.d.shape[0]
+        fs = np.ravel(f)
+        ps = np.ravel(p)
+        pols = np.ravel(pol)
 
-    hst_n, hsr_n -   Not corrected Tx and Rx antenna heigts of the smooth-Earth surface amsl (m)
-    hst, hsr     -   Tx and Rx antenna heigts of the smooth-Earth surface amsl (m)
-    hstd, hsrd   -   Tx and Rx effective antenna heigts for the diffraction model (m)
-    hte, hre     -   Tx and Rx terminal effective heights for the ducting/layer reflection model (m)
-    hm           -   The terrain roughness parameter (m)
-    dlt          -   interfering antenna horizon distance (km)
-    dlr          -   Interfered-with antenna horizon distance (km)
-    theta_t      -   Interfering antenna horizon elevation angle (mrad)
-    theta_r      -   Interfered-with antenna horizon elevation angle (mrad)
-    theta_tot    -   Angular distance (mrad)
-    pathtype     -   1 = 'los', 2 = 'transhorizon'
+        Lb = np.zeros((NP, fs.size, ps.size, pols.size))
+        Ep = np.zeros((NP, fs.size, ps.size, pols.size))
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22    Ivica Stevanovic, OFCOM         First implementation in python
-    """
-    n = len(d)
+        for i in range(0, fs.size):
+            fi = float(fs[i])
+            hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, pathtype = self.path_geometry(fi)
+            diffraction = self.path_diffraction(fi)
+            for j in range(0, ps.size):
+                Lb[:, i, j, :], Ep[:, i, j, :] = combine_losses_batch(fi, float(ps[j]), self.d, self.g, self.dtot, self.hts, self.hrs, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, self.omega, self.b0, self.DN, self.N0, self.dct, self.dcr, self.dlm, self.zone_r, pols, pL, sigmaL, Ptx, self.flag4, self.n, diffraction)
 
-    dtot = d[-1]
+        shape = self.shape + np.shape(f) + np.shape(p) + np.shape(pol)
 
-    # Tx and Rx antenna heights above mean sea level amsl (m)
-    hts = h[0] + htg
-    hrs = h[-1] + hrg
+        return np.reshape(Lb, shape), np.reshape(Ep, shape)
 
-    g = h + R
-    g[0] = h[0]
-    g[-1] = h[-1]
+    def at_heights(self, htg, hrg):
+        """
+        path.at_heights(htg, hrg) the same paths evaluated for M pairs of antenna heights
 
-    htc = hts
-    hrc = hrs
+        Input parameters:
+        htg     -   Tx Antenna center heigth above ground level (m), scalar or array of M values
+        hrg     -   Rx Antenna center heigth above ground level (m), scalar or array of M values
 
-    # Section 5.6.1 Deriving the smooth-Earth surface
-    ii = np.arange(1,n)
-    v1 = ((d[ii] - d[ii - 1]) * (h[ii] + h[ii - 1])).sum()   # Eq (85)
-    v2 = ((d[ii] - d[ii - 1]) * (h[ii] * (2 * d[ii] + d[ii - 1]) + h[ii - 1] * (d[ii] + 2 * d[ii - 1]))).sum()  # Eq (86)
+        Output parameters:
+        path    -   PreparedPath for the M heights of each path, whose results
+                    have the additional dimension M after the paths. The
+                    terrain analysis (clutter profile, zone statistics, b0,
+                    DN and N0) is shared, only the height-dependent terms
+                    are evaluated for each height.
+        """
+        htg, hrg = np.broadcast_arrays(np.ravel(np.asarray(htg, dtype=float)), np.ravel(np.asarray(hrg, dtype=float)))
 
-    hst = (2 * v1 * dtot - v2) / dtot**2  # Eq (87)
-    hsr = (v2 - v1 * dtot) / dtot**2  # Eq (88)
+        if not (np.all(htg >= 1) and np.all(htg <= 3000)):
+            raise ValueError("The Tx antenna height must be in the range [1, 3000] m")
 
-    hst_n = hst
-    hsr_n = hsr
+        if not (np.all(hrg >= 1) and np.all(hrg <= 3000)):
+            raise ValueError("The Rx antenna height must be in the range [1, 3000] m")
 
-    # Section 5.6.2 Smooth-surface heights for the diffraction model
+        NP = self.d.shape[0]
+        M = htg.size
 
-    HH = h - (htc * (dtot - d) + hrc * d) / dtot  # Eq (89d)
+        path = PreparedPath.__new__(PreparedPath)
+        path.__dict__.update(self.__dict__)
 
-    hobs = max(HH[1:-1])  # Eq (89a)
+        for name in ("d", "h", "R", "g", "n", "zone_r", "dtot", "DN", "N0", "dct", "dcr", "dtm", "dlm", "phi_path", "b0", "ae", "omega"):
+            setattr(path, name, np.repeat(getattr(self, name), M, axis=0))
 
-    alpha_obt = max(HH[1:-1] / d[1:-1])  # Eq (89b)
+        rows = np.arange(NP * M)
 
-    alpha_obr = max(HH[1:-1] / (dtot - d[1:-1]))  # Eq (89c)
+        path.shape = self.shape + (M,)
+        path.htg = np.tile(htg, NP)
+        path.hrg = np.tile(hrg, NP)
+        path.hts = path.h[:, 0] + path.htg
+        path.hrs = path.h[rows, path.n - 1] + path.hrg
+        path.geometry = {}
+        path.diffraction = {}
 
-    # Calculate provisional values for the Tx and Rx smooth surface heights
+        return path
 
-    gt = alpha_obt / (alpha_obt + alpha_obr)  # Eq (90e)
-    gr = alpha_obr / (alpha_obt + alpha_obr)  # Eq (90f)
 
-    if hobs <= 0:
-        hstp = hst  # Eq (90a)
-        hsrp = hsr  # Eq (90b)
-    else:
-        hstp = hst - hobs * gt  # Eq (90c)
-        hsrp = hsr - hobs * gr  # Eq (90d)
+def bt_loss_heights(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, **kwargs):
+    """
+    P1812.bt_loss_heights basic transmission loss according to P.1812-6 for several antenna heights
+    Lb, Ep = P1812.bt_loss_heights(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r)
 
-    # calculate the final values as required by the diffraction model
+    This function computes the same quantities as bt_loss for M pairs of
+    Tx and Rx antenna heights over one path profile. The terrain analysis
+    is done once and only the height-dependent terms (smooth-Earth heights,
+    diffraction and anomalous propagation) are evaluated for each height,
+    see PreparedPath.at_heights.
 
-    if hstp >= h[0]:
-        hstd = h[0]  # Eq (91a)
-    else:
-        hstd = hstp  # Eq (91b)
+    Input parameters:
+    f, p, d, h, R, Ct, zone, pol, phi_t, phi_r, lam_t, lam_r - as in bt_loss
+    htg     -   Tx Antenna center heigth above ground level (m), scalar or array of M values
+    hrg     -   Rx Antenna center heigth above ground level (m), scalar or array of M values
 
-    if hsrp > h[-1]:
-        hsrd = h[-1]  # Eq (91c)
-    else:
+    Optional input parameters (using keywords):
+    pL, sigmaL, Ptx, DN, N0, dct, dcr, flag4 - as in bt_loss
+    refractivity                             - as in bt_loss_batch
+
+    Output parameters:
+    Lb     -   array of M basic transmission losses according to P.1812-6
+    Ep     -   array of M field strengths w.r.t. Ptx
+
+    Example:
+    Lb, Ep = bt_loss_heights(f, p, d, h, R, Ct, zone, htg, [1.5, 10, 30], pol, phi_t, phi_r, lam_t, lam_r)
+    """
+
+    # Set default values for optional arguments
+
+    pL = kwargs.get("pL", 50.0)
+    sigmaL = kwargs.get("sigmaL", 0.0)
+    Ptx = kwargs.get("Ptx", 1.0)
+
+    htg, hrg = np.broadcast_arrays(np.ravel(np.asarray(htg, dtype=float)), np.ravel(np.asarray(hrg, dtype=float)))
+
+    path = PreparedPath(d, h, R, Ct, zone, htg[0], hrg[0], phi_t, phi_r, lam_t, lam_r, **kwargs)
+
+    Lb, Ep = path.at_heights(htg, hrg).bt_loss(f, p, pol, pL=pL, sigmaL=sigmaL, Ptx=Ptx)
+
+    return Lb, Ep
+
+
+def bt_loss_radial(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, **kwargs):
+    """
+    P1812.bt_loss_radial basic transmission loss according to P.1812-6 for all receivers along a radial
+    Lb, Ep = P1812.bt_loss_radial(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r)
+
+    This function computes the basic transmission loss and field strength
+    for a receiver placed at each profile point d[k], k = 4, ..., n-1, of a
+    single path profile starting at the transmitter, i.e., the same values
+    as calling bt_loss with the profile truncated at d[k] for every k.
+    The quantities that only accumulate along the path (the sums v1 and v2
+    of the smooth-Earth surface, and the zone lengths of the path fraction
+    and the longest continuous land and inland sections) are computed once
+    as running totals along the profile. The terrain maxima of the path
+    analysis are found along the profile as well, by one sweep that keeps
+    the upper envelope or the upper convex hull of the points passed so far
+    (see prefix_line_argmax and prefix_hull_tangent): the Tx horizon angle
+    of Eq (76), hobs, alpha_obt and alpha_obr of Eq (89), and the Tx slope
+    Stim of the Bullington diffraction (Eq 13). The Rx horizon angle of
+    Eq (82a) and the Rx slope Srim (Eq 17) depend on the effective Earth
+    radius of each receiver (DN from the maps): the point of each receiver
+    lies between the hull points for the smallest and the largest Earth
+    curvature of a group of receivers, and the groups are halved in
+    curvature until these windows are short (see prefix_curved_tangent).
+    The terrain roughness hm of Eq (95) is the highest of the lines
+    h_i - m*d_i up to the Rx horizon (prefix_line_argmax) unless that point
+    lies before the Tx horizon. In the second Bullington evaluation over
+    the smooth profile, Stim, Srim and numax of Eq (15) are unimodal along
+    the path and found by bisection (see unimodal_argmax).
+
+    The maxima that remain over each receiver's own part of the profile,
+    evaluated in blocks of receivers, are the diffraction parameters of LoS
+    paths over the terrain (Eqs 15 and 81), and hm between the horizon
+    points of the transhorizon paths whose highest line up to the Rx
+    horizon lies before the Tx horizon. Their cost grows with the number of
+    such receivers times their path length, the rest with n log n. Measured
+    for a radial of n = 100 / 367 / 1000 / 3000 points, in multiples of
+    one bt_loss call on the full profile:
+        DN scalar:            9 / 11 / 11 / 14
+        DN from the maps:    10 / 12 / 13 / 17
+        all maxima per path:  7 / 24 / 65 / 264
+
+    Input parameters:
+    f       -   Frequency (GHz)
+    p       -   Required time percentage for which the calculated basic
+                transmission loss is not exceeded
+    d       -   vector of n distances di of the i-th profile point (km)
+    h       -   vector of heights hi of the i-th profile point (meters
+                above mean sea level.
+    R       -   vector of representative clutter height Ri of the i-th profile point (m)
+                if empty, clutter height zero is used
+    Ct      -   vector of representative clutter type Cti of the i-th profile point
+                if empty, the default clutter used is Open/rural
+    zone    -   vector of radio-climatic zone types: Inland (4), Coastal land (3), or Sea (1)
+                if empty, Inland is used
+    htg     -   Tx Antenna center heigth above ground level (m)
+    hrg     -   Rx Antenna center heigth above ground level (m), the same at all receivers
+    pol     -   polarization of the signal (1) horizontal, (2) vertical
+    phi_t    - latitude of Tx station (degrees)
+    phi_r    - latitude of the last profile point (degrees), or vector of
+               latitudes of all n profile points
+    lam_t    - longitude of Tx station (degrees)
+    lam_r    - longitude of the last profile point (degrees), or vector of
+               longitudes of all n profile points
+
+    Optional input parameters (using keywords):
+    pL, sigmaL, Ptx, flag4, dct - as in bt_loss
+    DN, N0, dcr                 - as in bt_loss, scalar or vector of n-4 values (one per receiver)
+    refractivity - RefractivityCache serving DN and N0 when they are not given
+    block   -   number of receivers evaluated at once, limits the size of the
+                (block x n) intermediate arrays, default value 256
+
+    Output parameters:
+    Lb     -   vector of n-4 basic transmission losses, Lb[j] for the receiver at d[j+4]
+    Ep     -   vector of n-4 field strengths w.r.t. Ptx
+
+    Example:
+    Lb, Ep = bt_loss_radial(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r)
+    """
+
+    # Set default values for optional arguments
+
+    pL = kwargs.get("pL", 50.0)
+    sigmaL = kwargs.get("sigmaL", 0.0)
+    Ptx = kwargs.get("Ptx", 1.0)
+    DN = kwargs.get("DN", [])
+    N0 = kwargs.get("N0", [])
+    dct = kwargs.get("dct", 500.0)
+    dcr = kwargs.get("dcr", 500.0)
+    flag4 = kwargs.get("flag4", 0)
+    refractivity = kwargs.get("refractivity", None)
+    block = kwargs.get("block", 256)
+
+    d = np.asarray(d, dtype=float).ravel()
+    h = np.asarray(h, dtype=float).ravel()
+    n = d.size
+
+    # verify input argument values and limits
+
+    if not (f >= 0.03 and f <= 6.0):
+        print("Warning: frequency must be in the range [0.03, 6] GHz. ")
+        print("Computation will continue but the parameters are outside of the valid domain.")
+
+    if not (p >= 1 and p <= 50):
+        raise ValueError("The time percentage must be in the range [1, 50]%")
+
+    if not (htg >= 1 and htg <= 3000):
+        raise ValueError("The Tx antenna height must be in the range [1, 3000] m")
+
+    if not (hrg >= 1 and hrg <= 3000):
+        raise ValueError("The Rx antenna height must be in the range [1, 3000] m")
+
+    if not (pol == 1 or pol == 2):
+        raise ValueError("The polarization pol can be either 1 (horizontal) or 2 (vertical).")
+
+    if not (pL > 0 and pL < 100):
+        raise ValueError("The location percentage must be in the range (0, 100)%")
+
+    if not (Ptx > 0):
+        raise ValueError("The Tx power must be positive.")
+
+    if sigmaL < 0:
+        raise ValueError("Standard deviation in location variability must be positive.")
+
+    if not (flag4 == 0 or flag4 == 1):
+        raise ValueError("The parameter flag4 can be either 0 or 1.")
+
+    if not (block >= 1):
+        raise ValueError("The number of receivers per block must be positive.")
+
+    # Ensure that vector d is ascending and starts at the Tx position
+    if not issorted(d):
+        raise ValueError("The array of path profile points d(i) must be in ascending order.")
+
+    if d[0] > 0.0:
+        raise ValueError("The first path profile point d[0] must be zero.")
+
+    # make sure that there is enough points in the path profile
+    if n <= 4:
+        raise ValueError("The number of points in path profile should be larger than 4")
+
+    if not (h.size == n):
+        raise ValueError("The number of elements in the array d and the array h must be the same.")
+
+    if isempty(R):
+        R = np.zeros(n)  # default is clutter height zero
+    else:
+        R = np.asarray(R, dtype=float).ravel()
+        if not (R.size == n):
+            raise ValueError("The number of elements in the array d and the array R must be the same.")
+
+    if isempty(zone):
+        zone = 4 * np.ones(n)  # default is Inland radio-meteorological zone
+    else:
+        zone = np.asarray(zone).ravel()
+        if not (zone.size == n):
+            raise ValueError("The array d and the array zone must be of the same size.")
+
+    xx = np.logical_or(zone == 1, np.logical_or(zone == 3, zone == 4))
+    if np.any(xx == False):
+        raise ValueError("The vector of radio-climatic zones zone may only contain integers 1, 3, or 4.")
+
+    # Ct is only used in the debug output of bt_loss, check its size only
+    if not isempty(Ct) and not (np.size(Ct) == n):
+        raise ValueError("The number of elements in the array d and the array Ct must be the same.")
+
+    # receivers at the profile points k = 4, ..., n-1
+
+    k = np.arange(4, n)
+    NP = k.size
+
+    dct = np.asarray(dct, dtype=float) * np.ones(NP)
+    dcr = np.asarray(dcr, dtype=float) * np.ones(NP)
+
+    if np.any(dct < 0) or np.any(dcr < 0):
+        raise ValueError("Distances dct and dcr must be positive.")
+
+    if zone[0] == 1:  # Tx at sea
+        dct[:] = 0
+
+    dcr[zone[k] == 1] = 0  # Rx at sea
+
+    # Path center latitude, the centre of the path to d[k] lies at d[k]/2
+    # along the great circle towards the end of the profile
+    Re = 6371
+    dtot = d[k] - d[0]
+    phi_r = np.asarray(phi_r, dtype=float) * np.ones(n)
+    lam_r = np.asarray(lam_r, dtype=float) * np.ones(n)
+    if np.size(phi_r) != n or np.size(lam_r) != n:
+        raise ValueError("The Rx coordinates phi_r and lam_r must be scalars or arrays of the same size as d.")
+
+    lam_path, phi_path, _, _ = great_circle_path_batch(lam_r[k], lam_t, phi_r[k], phi_t, Re, 0.5 * dtot)
+
+    if refractivity is not None and (isempty(DN) or isempty(N0)):
+        # Path-centre values served by a RefractivityCache
+        DNc, N0c = refractivity.lookup(lam_path, phi_path)
+        if isempty(DN):
+            DN = DNc
+        if isempty(N0):
+            N0 = N0c
+
+    if isempty(DN):
+        # Find radio-refractivity lapse rate dN
+        # using the digital maps at phim_e (lon), phim_n (lat) - as a bilinear interpolation
+        DN50 = digital_maps()["DN50"]
+        DN = interp2_batch(DN50, lam_path, phi_path, 1.5, 1.5)
+
+    if isempty(N0):
+        # Find radio-refractivity
+        # using the digital maps at phim_e (lon), phim_n (lat) - as a bilinear interpolation
+        N050 = digital_maps()["N050"]
+        N0 = interp2_batch(N050, lam_path, phi_path, 1.5, 1.5)
+
+    DN = np.asarray(DN, dtype=float) * np.ones(NP)
+    N0 = np.asarray(N0, dtype=float) * np.ones(NP)
+
+    # Compute the path profile parameters
+
+    # Compute  dtm     -   the longest continuous land (inland + coastal =34) section of the great-circle path (km)
+    dtm = longest_cont_dist_radial(d, zone, 34, k)
+
+    # Compute  dlm     -   the longest continuous inland section (4) of the great-circle path (km)
+    dlm = longest_cont_dist_radial(d, zone, 4, k)
+
+    # Compute b0
+    b0 = beta0(phi_path, dtm, dlm)
+
+    ae, ab = earth_rad_eff(DN)
+
+    # Compute the path fraction over see Eq (1)
+
+    omega = path_fraction_radial(d, zone, 1, k)
+
+    # Sums v1 and v2 of the smooth-Earth surface for all receivers
+
+    v1, v2 = smooth_earth_sums_radial(d, h, k)
+
+    # Modify the path by adding representative clutter, according to Section 3.2
+    # excluding the first point, the last point of each path only enters
+    # the maxima over the intermediate points of the longer paths
+    g = h + R
+    g[0] = h[0]
+
+    # Derive parameters for the path profile analysis
+
+    hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, pathtype = smooth_earth_heights_radial(d, h, htg, hrg, ae, f, k, v1, v2, block)
+
+    # Tx and Rx antenna heights above mean sea level amsl (m)
+    hts = h[0] + htg * np.ones(NP)
+    hrs = h[k] + hrg
+
+    # Bullington losses for the actual terrain profile with ae and ab, and for
+    # the smooth profile with ae and ab (Section 4.3.3)
+
+    ab = ab * np.ones(NP)
+
+    Lbull = [dl_bull_radial(d, g, k, hts, hrs, ae, f, block), dl_bull_radial(d, g, k, hts, hrs, ab, f, block)]
+    if flag4 == 0:
+        Lbull += [dl_bull_radial(d, None, k, hts - hstd, hrs - hsrd, ae, f, block), dl_bull_radial(d, None, k, hts - hstd, hrs - hsrd, ab, f, block)]
+
+    # the remaining diffraction and loss terms only depend on the path
+    # lengths, passed as the end points of the paths
+
+    dp = np.stack((d[0] * np.ones(NP), d[k]), axis=1)
+    n2 = 2 * np.ones(NP, dtype=int)
+
+    diffraction = dl_50b_batch(dp, None, hts, hrs, hstd, hsrd, f, omega, DN, flag4, n2, Lbull=np.array(Lbull))
+
+    Lb, Ep = combine_losses_batch(f, p, dp, None, dtot, hts, hrs, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, omega, b0, DN, N0, dct, dcr, dlm, zone[k], pol, pL, sigmaL, Ptx, flag4, n2, diffraction=diffraction)
+
+    return Lb, Ep
+
+
+def tl_tropo(dtot, theta, f, p, N0):
+    """
+    tl_tropo Basic transmission loss due to troposcatterer to P.1812-6
+    Lbs = tl_tropo(dtot, theta, f, p, N0)
+
+    This function computes the basic transmission loss due to troposcatterer
+    not exceeded for p% of time
+    as defined in ITU-R P.1812-6 (Section 4.4)
+
+        Input parameters:
+        dtot    -   Great-circle path distance (km)
+        theta   -   Path angular distance (mrad)
+        f       -   frequency expressed in GHz
+        p       -   percentage of time
+        N0      -   path centre sea-level surface refractivity derived from Fig. 6
+
+        Output parameters:
+        Lbs    -   the basic transmission loss due to troposcatterer
+                    not exceeded for p% of time
+
+        Example:
+        Lbs = tl_tropo(dtot, theta, f, p, N0)
+
+
+        Rev   Date        Author                          Description
+        -------------------------------------------------------------------------------
+        v0    29SEP22    Ivica Stevanovic, OFCOM         Initial version
+    """
+
+    # Frequency dependent loss
+
+    Lf = 25 * np.log10(f) - 2.5 * (np.log10(f / 2.0)) ** 2  # eq (45)
+
+    # the basic transmission loss due to troposcatter not exceeded for any time
+    # percentage p, below 50# is given
+
+    Lbs = 190.1 + Lf + 20 * np.log10(dtot) + 0.573 * theta - 0.15 * N0 - 10.125 * (np.log10(50.0 / p)) ** (0.7)
+
+    return Lbs
+
+
+def tl_anomalous(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0):
+    """
+    tl_anomalous Basic transmission loss due to anomalous propagation according to P.452-17
+    Lba = tl_anomalous(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0)
+
+    This function computes the basic transmission loss occuring during
+    periods of anomalous propagation (ducting and layer reflection)
+    as defined in ITU-R P.1812-6 (Section 4.5)
+
+        Input parameters:
+        dtot         -   Great-circle path distance (km)
+        dlt          -   interfering antenna horizon distance (km)
+        dlr          -   Interfered-with antenna horizon distance (km)
+        dct, dcr     -   Distance over land from the transmit and receive
+                         antennas tothe coast along the great-circle interference path (km).
+                         Set to zero for a terminal on a ship or sea platform
+        dlm          -   the longest continuous inland section of the great-circle path (km)
+        hts, hrs     -   Tx and Rx antenna heights aobe mean sea level amsl (m)
+        hte, hre     -   Tx and Rx terminal effective heights for the ducting/layer reflection model (m)
+        hm           -   The terrain roughness parameter (m)
+        theta_t      -   Interfering antenna horizon elevation angle (mrad)
+        theta_r      -   Interfered-with antenna horizon elevation angle (mrad)
+        f            -   frequency expressed in GHz
+        p            -   percentage of time
+        omega        -   fraction of the total path over water
+        ae           -   the median effective Earth radius (km)
+        b0           -   the time percentage that the refractivity gradient (DELTA-N) exceeds 100 N-units/km in the first 100m of the lower atmosphere
+
+        Output parameters:
+        Lba    -   the basic transmission loss due to anomalous propagation
+                (ducting and layer reflection)
+
+        Example:
+        Lba = tl_anomalous(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, b0)
+
+
+        Rev   Date        Author                          Description
+        -------------------------------------------------------------------------------
+        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+
+
+    """
+
+    # empirical correction to account for the increasing attenuation with
+    # wavelength inducted propagation (47a)
+
+    Alf = 0
+
+    if f < 0.5:
+        Alf = 45.375 - 137.0 * f + 92.5 * f * f
+
+    # site-shielding diffraction losses for the interfering and interfered-with
+    # stations (48)
+
+    theta_t2 = theta_t - 0.1 * dlt  # eq (48a)
+    theta_r2 = theta_r - 0.1 * dlr
+
+    Ast = 0
+    Asr = 0
+
+    if theta_t2 > 0:
+        Ast = 20 * np.log10(1 + 0.361 * theta_t2 * np.sqrt(f * dlt)) + 0.264 * theta_t2 * f ** (1.0 / 3.0)
+
+    if theta_r2 > 0:
+        Asr = 20 * np.log10(1 + 0.361 * theta_r2 * np.sqrt(f * dlr)) + 0.264 * theta_r2 * f ** (1.0 / 3.0)
+
+    # over-sea surface duct coupling correction for the interfering and
+    # interfered-with stations (49) and (49a)
+
+    Act = 0
+    Acr = 0
+
+    if dct <= 5:
+        if dct <= dlt:
+            if omega >= 0.75:
+                Act = -3 * np.exp(-0.25 * dct * dct) * (1 + np.tanh(0.07 * (50 - hts)))
+
+    if dcr <= 5:
+        if dcr <= dlr:
+            if omega >= 0.75:
+                Acr = -3 * np.exp(-0.25 * dcr * dcr) * (1 + np.tanh(0.07 * (50 - hrs)))
+
+    # specific attenuation (51)
+
+    gamma_d = 5e-5 * ae * f ** (1.0 / 3.0)
+
+    # angular distance (corrected where appropriate) (52-52a)
+
+    theta_t1 = theta_t
+    theta_r1 = theta_r
+
+    if theta_t > 0.1 * dlt:
+        theta_t1 = 0.1 * dlt
+
+    if theta_r > 0.1 * dlr:
+        theta_r1 = 0.1 * dlr
+
+    theta1 = 1e3 * dtot / ae + theta_t1 + theta_r1
+
+    dI = min(dtot - dlt - dlr, 40)  # eq (56a)
+
+    mu3 = 1
+
+    if hm > 10:
+        mu3 = np.exp(-4.6e-5 * (hm - 10) * (43 + 6 * dI))  # eq (56)
+
+    tau = 1 - np.exp(-(4.12e-4 * dlm**2.41))  # eq (3)
+
+    epsilon = 3.5
+
+    alpha = -0.6 - epsilon * 1e-9 * dtot ** (3.1) * tau  # eq (55a)
+
+    if alpha < -3.4:
+        alpha = -3.4
+
+    # correction for path geometry:
+
+    mu2 = (500 / ae * dtot**2 / (np.sqrt(hte) + np.sqrt(hre)) ** 2) ** alpha  # eq (55)
+
+    if mu2 > 1:
+        mu2 = 1
+
+    beta = b0 * mu2 * mu3  # eq (54)
+
+    # beta = max(beta, eps)      # to avoid division by zero
+
+    Gamma = 1.076 / (2.0058 - np.log10(beta)) ** 1.012 * np.exp(-(9.51 - 4.8 * np.log10(beta) + 0.198 * (np.log10(beta)) ** 2) * 1e-6 * dtot ** (1.13))  # eq (53a)
+
+    # time percentage variablity (cumulative distribution):
+
+    Ap = -12 + (1.2 + 3.7e-3 * dtot) * np.log10(p / beta) + 12 * (p / beta) ** Gamma  # eq (53)
+
+    # time percentage and angular-distance dependent losses within the
+    # anomalous propagation mechanism
+
+    Adp = gamma_d * theta1 + Ap  # eq (50)
+
+    # total of fixed coupling losses (except for local clutter losses) between
+    # the antennas and the anomalous propagation structure within the
+    # atmosphere (47)
+
+    Af = 102.45 + 20 * np.log10(f) + 20 * np.log10(dlt + dlr) + Alf + Ast + Asr + Act + Acr
+
+    # total basic transmission loss occuring during periods of anomalaous
+    # propagation (46)
+
+    Lba = Af + Adp
+
+    return Lba
+
+
+def smooth_earth_heights(d, h, R, htg, hrg, ae, f):
+    """
+    smooth_earth_heights smooth-Earth effective antenna heights according to ITU-R P.1812-6
+    hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype = smooth_earth_heights(d, h, R, htg, hrg, ae, f)
+    This function derives smooth-Earth effective antenna heights according to
+    Sections 4 and 5 of the Attachment 1 to Annex 1 of ITU-R P.1812-6
+
+    Input parameters:
+    d         -   vector of terrain profile distances from Tx [0,dtot] (km)
+    h         -   vector of terrain profile heigths amsl (m)
+    R         -   vector of representative clutter heights (m)
+    htg, hrg  -   Tx and Rx antenna heights above ground level (m)
+    ae        -   median effective Earth's radius (c.f. Eq (6a))
+    f         -   frequency (GHz)
+
+    Output parameters:
+
+    hst_n, hsr_n -   Not corrected Tx and Rx antenna heigts of the smooth-Earth surface amsl (m)
+    hst, hsr     -   Tx and Rx antenna heigts of the smooth-Earth surface amsl (m)
+    hstd, hsrd   -   Tx and Rx effective antenna heigts for the diffraction model (m)
+    hte, hre     -   Tx and Rx terminal effective heights for the ducting/layer reflection model (m)
+    hm           -   The terrain roughness parameter (m)
+    dlt          -   interfering antenna horizon distance (km)
+    dlr          -   Interfered-with antenna horizon distance (km)
+    theta_t      -   Interfering antenna horizon elevation angle (mrad)
+    theta_r      -   Interfered-with antenna horizon elevation angle (mrad)
+    theta_tot    -   Angular distance (mrad)
+    pathtype     -   1 = 'los', 2 = 'transhorizon'
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22    Ivica Stevanovic, OFCOM         First implementation in python
+    """
+    n = len(d)
+
+    dtot = d[-1]
+
+    # Tx and Rx antenna heights above mean sea level amsl (m)
+    hts = h[0] + htg
+    hrs = h[-1] + hrg
+
+    g = h + R
+    g[0] = h[0]
+    g[-1] = h[-1]
+
+    htc = hts
+    hrc = hrs
+
+    # Section 5.6.1 Deriving the smooth-Earth surface
+    ii = np.arange(1,n)
+    v1 = ((d[ii] - d[ii - 1]) * (h[ii] + h[ii - 1])).sum()   # Eq (85)
+    v2 = ((d[ii] - d[ii - 1]) * (h[ii] * (2 * d[ii] + d[ii - 1]) + h[ii - 1] * (d[ii] + 2 * d[ii - 1]))).sum()  # Eq (86)
+
+    hst = (2 * v1 * dtot - v2) / dtot**2  # Eq (87)
+    hsr = (v2 - v1 * dtot) / dtot**2  # Eq (88)
+
+    hst_n = hst
+    hsr_n = hsr
+
+    # Section 5.6.2 Smooth-surface heights for the diffraction model
+
+    HH = h - (htc * (dtot - d) + hrc * d) / dtot  # Eq (89d)
+
+    hobs = max(HH[1:-1])  # Eq (89a)
+
+    alpha_obt = max(HH[1:-1] / d[1:-1])  # Eq (89b)
+
+    alpha_obr = max(HH[1:-1] / (dtot - d[1:-1]))  # Eq (89c)
+
+    # Calculate provisional values for the Tx and Rx smooth surface heights
+
+    gt = alpha_obt / (alpha_obt + alpha_obr)  # Eq (90e)
+    gr = alpha_obr / (alpha_obt + alpha_obr)  # Eq (90f)
+
+    if hobs <= 0:
+        hstp = hst  # Eq (90a)
+        hsrp = hsr  # Eq (90b)
+    else:
+        hstp = hst - hobs * gt  # Eq (90c)
+        hsrp = hsr - hobs * gr  # Eq (90d)
+
+    # calculate the final values as required by the diffraction model
+
+    if hstp >= h[0]:
+        hstd = h[0]  # Eq (91a)
+    else:
+        hstd = hstp  # Eq (91b)
+
+    if hsrp > h[-1]:
+        hsrd = h[-1]  # Eq (91c)
+    else:
         hsrd = hsrp  # Eq (91d)
 
-    # Interfering antenna horizon elevation angle and distance
+    # Interfering antenna horizon elevation angle and distance
+
+    ii = range(1, n - 1)
+
+    theta = 1000 * np.arctan((h[ii] - hts) / (1000 * d[ii]) - d[ii] / (2 * ae))  # Eq (77)
+
+    # theta(theta < 0) = 0  # condition below equation (152)
+
+    theta_td = 1000 * np.arctan((hrs - hts) / (1000 * dtot) - dtot / (2 * ae))  # Eq (78)
+    theta_rd = 1000 * np.arctan((hts - hrs) / (1000 * dtot) - dtot / (2 * ae))  # Eq (81)
+
+    theta_max = max(theta)  # Eq (76)
+    if theta_max > theta_td:  # Eq (150): test for the trans-horizon path
+        pathtype = 2  # transhorizon
+    else:
+        pathtype = 1  # los
+
+    theta_t = max(theta_max, theta_td)  # Eq (79)
+
+    if pathtype == 2:  # transhorizon
+        (kindex,) = np.where(theta == theta_max)
+
+        lt = kindex[0] + 1  # in order to map back to path d indices, as theta takes path indices 2 to n-1,
+
+        dlt = d[lt]  # Eq (80)
+
+        # Interfered-with antenna horizon elevation angle and distance
+
+        theta = 1000 * np.arctan((h[ii] - hrs) / (1000 * (dtot - d[ii])) - (dtot - d[ii]) / (2 * ae))  # Eq (82a)
+
+        theta_r = max(theta)
+
+        (kindex,) = np.where(theta == theta_r)
+
+        lr = kindex[-1] + 1  # in order to map back to path d indices, as theta takes path indices 2 to n-1,
+
+        dlr = dtot - d[lr]  # Eq (83)
+
+    else:  # pathtype == 1 (LoS)
+        theta_r = theta_rd  # Eq (81)
+
+        ii = range(1, n - 1)
+
+        # speed of light as per ITU.R P.2001
+        lam = 0.2998 / f
+        Ce = 1.0 / ae  # Section 4.3.1 supposing median effective Earth radius
+
+        nu = (h[ii] + 500 * Ce * d[ii] * (dtot - d[ii]) - (hts * (dtot - d[ii]) + hrs * d[ii]) / dtot) * np.sqrt(0.002 * dtot / (lam * d[ii] * (dtot - d[ii])))  # Eq (81)
+        numax = max(nu)
+
+        (kindex,) = np.where(nu == numax)
+        lt = kindex[-1] + 1  # in order to map back to path d indices, as theta takes path indices 2 to n-1,
+        dlt = d[lt]  # Eq (80)
+        dlr = dtot - dlt  # Eq  (83a)
+        lr = lt
+
+    # Angular distance
+
+    theta_tot = 1e3 * dtot / ae + theta_t + theta_r  # Eq (84)
+
+    # Section 5.6.3 Ducting/layer-reflection model
+
+    # Calculate the smooth-Earth heights at transmitter and receiver as
+    # required for the roughness factor
+
+    hst = min(hst, h[0])  # Eq (92a)
+    hsr = min(hsr, h[-1])  # Eq (92b)
+
+    # Slope of the smooth-Earth surface
+
+    m = (hsr - hst) / dtot  # Eq (93)
+
+    # The terminal effective heigts for the ducting/layer-reflection model
+
+    hte = htg + h[0] - hst  # Eq (94a)
+    hre = hrg + h[-1] - hsr  # Eq (94b)
+
+    ii = range(lt, lr + 1)
+
+    hm = max(h[ii] - (hst + m * d[ii]))  # Eq (95)
+
+    return hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype
+
+
+def pl_los(d, hts, hrs, f, p, b0, dlt, dlr):
+    """
+    pl_los Line-of-sight transmission loss according to ITU-R P.1812-6
+    This function computes line-of-sight transmission loss (including short-term effects)
+    as defined in ITU-R P.1812-67.
+
+    Input parameters:
+    d       -   Great-circle path distance (km)
+    f       -   Frequency (GHz)
+    hts     -   Tx antenna height above sea level (masl)
+    hrs     -   Rx antenna height above sea level (masl)
+    p       -   Required time percentage(s) for which the calculated basic
+                transmission loss is not exceeded (%)
+    b0      -   Point incidence of anomalous propagation for the path
+                central location (%)
+    w       -   Fraction of the total path over water (%)
+    temp    -   Temperature (degrees C)
+    press   -   Dry air pressure (hPa)
+    dlt     -   For a transhorizon path, distance from the transmit antenna to
+                its horizon (km). For a LoS path, each is set to the distance
+                from the terminal to the profile point identified as the Bullington
+                point in the diffraction method for 50% time
+    dlr     -   For a transhorizon path, distance from the receive antenna to
+                its horizon (km). The same note as for dlt applies here.
+
+    Output parameters:
+    Lbfs    -   Basic transmission loss due to free-space propagation
+    Lb0p    -   Basic transmission loss not exceeded for time percentage, p%, due to LoS propagation
+    Lb0b    -   Basic transmission loss not exceedd for time percentage, b0%, due to LoS propagation
+
+    Example:
+    Lbfs, Lb0p, Lb0b = pl_los(d, f, p, b0, dlt, dlr)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22     Ivica Stevanovic, OFCOM         First implementation
+
+    """
+
+    # Basic transmission loss due to free-space propagation
+    dfs2 = d**2 + ((hts - hrs) / 1000.0) ** 2  # (8a)
+
+    Lbfs = 92.4 + 20.0 * np.log10(f) + 10.0 * np.log10(dfs2)  # (8)
+
+    # Corrections for multipath and focusing effects at p and b0
+    Esp = 2.6 * (1 - np.exp(-0.1 * (dlt + dlr))) * np.log10(p / 50)  # (9a)
+    Esb = 2.6 * (1 - np.exp(-0.1 * (dlt + dlr))) * np.log10(b0 / 50)  # (9b)
+
+    # Basic transmission loss not exceeded for time percentage p# due to
+    # LoS propagation
+    Lb0p = Lbfs + Esp  # (10)
+
+    # Basic transmission loss not exceeded for time percentage b0% due to
+    # LoS propagation
+    Lb0b = Lbfs + Esb  # (11)
+
+    return Lbfs, Lb0p, Lb0b
+
+
+def path_fraction(d, zone, zone_r):
+    """
+    path_fraction Path fraction belonging to a given zone_r
+    omega = path_fraction(d, zone, zone_r)
+    This function computes the path fraction belonging to a given zone_r
+    of the great-circle path (km)
+
+    Input arguments:
+    d       -   vector of distances in the path profile
+    zone    -   vector of zones in the path profile
+    zone_r  -   reference zone for which the fraction is computed
+
+    Output arguments:
+    omega   -   path fraction belonging to the given zone_r
+
+    Example:
+    omega = path_fraction(d, zone, zone_r)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    17MAR22     Ivica Stevanovic, OFCOM         First implementation in python
+    v1    11NOV22     Ivica Stevanovic, OFCOM         Corrected a bug in the second if clause (suggested by Martin-Pierre Lussier @mplussier)
+    """
+    dm = 0
+
+    start, stop = find_intervals((zone == zone_r))
+
+    n = len(start)
+
+    for i in range(0, n):
+        delta = 0
+        if d[stop[i]] < d[-1]:
+            delta = delta + (d[stop[i] + 1] - d[stop[i]]) / 2.0
+
+        if d[start[i]] > 0:
+            delta = delta + (d[start[i]] - d[start[i] - 1]) / 2.0
+
+        dm = dm + d[stop[i]] - d[start[i]] + delta
+
+    omega = dm / (d[-1] - d[0])
+
+    return omega
+
+
+def longest_cont_dist(d, zone, zone_r):
+    """
+    longest_cont_dist Longest continuous path belonging to the zone_r
+    dm = longest_cont_dist(d, zone, zone_r)
+    This function computes the longest continuous section of the
+    great-circle path (km) for a given zone_r
+
+    Input arguments:
+    d       -   vector of distances in the path profile
+    zone    -   vector of zones in the path profile
+    zone_r  -   reference zone for which the longest continuous section
+                is computed
+
+    Output arguments:
+    dm      -   the longest continuous section of the great-circle path (km) for a given zone_r
+
+    Example:
+    dm = longest_cont_dist(d, zone, zone_r)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+    v1    11NOV22     Ivica Stevanovic, OFCOM         Corrected a bug in the second if clause for delta (suggested by Martin-Pierre Lussier @mplussier)
+
+    """
+    dm = 0
+
+    if zone_r == 34:  # inland + coastal land
+        start, stop = find_intervals((zone == 3) + (zone == 4))
+    else:
+        start, stop = find_intervals((zone == zone_r))
+
+    n = len(start)
+
+    for i in range(0, n):
+        delta = 0
+        if d[stop[i]] < d[-1]:
+            delta = delta + (d[stop[i] + 1] - d[stop[i]]) / 2.0
+
+        if d[start[i]] > 0:
+            delta = delta + (d[start[i]] - d[start[i] - 1]) / 2.0
+
+        dm = max(d[stop[i]] - d[start[i]] + delta, dm)
+
+    return dm
+
+
+def inv_cum_norm(x):
+    """
+    inv_cum_norm approximation to the inverse cummulative normal distribution
+    I = inv_cum_norm( x )
+    This function implements an approximation to the inverse cummulative
+    normal distribution function for 0< x < 1 as defined in Attachment 2 to
+    Annex 1 of the ITU-R P.1812-6
+    x can be a scalar or an array, the result has the same shape
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+    """
+    x = np.clip(x, 0.000001, 0.999999)
+
+    lower = x <= 0.5
+    y = np.where(lower, x, 1 - x)
+    I = T(y) - C(y)
+    I = np.where(lower, I, -I)  # (96a), (96b)
+
+    return I[()]
+
+
+def T(y):
+    return np.sqrt(-2.0 * np.log(y))  # eq (97a)
+
+
+def C(z):  # eq (97)
+    C0 = 2.515516698
+    C1 = 0.802853
+    C2 = 0.010328
+    D1 = 1.432788
+    D2 = 0.189269
+    D3 = 0.001308
+
+    return (((C2 * T(z) + C1) * T(z)) + C0) / (((D3 * T(z) + D2) * T(z) + D1) * T(z) + 1)  # eq (97b)
+
+
+def great_circle_path(Phire, Phite, Phirn, Phitn, Re, dpnt):
+    """
+    great_circle_path Great-circle path calculations according to Attachment H
+    This function computes the great-circle intermediate points on the
+    radio path as defined in ITU-R P.2001-4 Attachment H
+
+        Input parameters:
+        Phire   -   Receiver longitude, positive to east (deg)
+        Phite   -   Transmitter longitude, positive to east (deg)
+        Phirn   -   Receiver latitude, positive to north (deg)
+        Phitn   -   Transmitter latitude, positive to north (deg)
+        Re      -   Average Earth radius (km)
+        dpnt    -   Distance from the transmitter to the intermediate point (km)
+
+        Output parameters:
+        Phipnte -   Longitude of the intermediate point (deg)
+        Phipntn -   Latitude of the intermediate point (deg)
+        Bt2r    -   Bearing of the great-circle path from Tx towards the Rx (deg)
+        dgc     -   Great-circle path length (km)
+
+        Example:
+        [Bt2r, Phipnte, Phipntn, dgc] = great_circle_path(Phire, Phite, Phirn, Phitn, Re, dpnt)
+
+        Rev   Date        Author                          Description
+        -------------------------------------------------------------------------------
+        v0    05SEP22     Ivica Stevanovic, OFCOM         Initial version
+    """
+    ## H.2 Path length and bearing
+
+    # Difference (deg) in longitude between the terminals (H.2.1)
+
+    Dlon = Phire - Phite
+
+    # Calculate quantity r (H.2.2)
+
+    r = sind(Phitn) * sind(Phirn) + cosd(Phitn) * cosd(Phirn) * cosd(Dlon)
+
+    # Calculate the path length as the angle subtended at the center of
+    # average-radius Earth (H.2.3)
+
+    Phid = np.arccos(r)  # radians
+
+    # Calculate the great-circle path length (H.2.4)
+
+    dgc = Phid * Re  # km
+
+    # Calculate the quantity x1 (H.2.5a)
+
+    x1 = sind(Phirn) - r * sind(Phitn)
+
+    # Calculate the quantity y1 (H.2.5b)
+
+    y1 = cosd(Phitn) * cosd(Phirn) * sind(Dlon)
+
+    # Calculate the bearing of the great-circle path for Tx to Rx (H.2.6)
+
+    if abs(x1) < 1e-9 and abs(y1) < 1e-9:
+        Bt2r = Phire
+    else:
+        Bt2r = atan2d(y1, x1)
+
+    ## H.3 Calculation of intermediate path point
+
+    # Calculate the distance to the point as the angle subtended at the center
+    # of average-radius Earth (H.3.1)
+
+    Phipnt = dpnt / Re  # radians
+
+    # Calculate quantity s (H.3.2)
+
+    s = sind(Phitn) * np.cos(Phipnt) + cosd(Phitn) * np.sin(Phipnt) * cosd(Bt2r)
+
+    # The latitude of the intermediate point is now given by (H.3.3)
+
+    Phipntn = asind(s)  # degs
+
+    # Calculate the quantity x2 (H.3.4a)
+
+    x2 = np.cos(Phipnt) - s * sind(Phitn)
+
+    # Calculate the quantity y2 (H.3.4b)
+
+    y2 = cosd(Phitn) * np.sin(Phipnt) * sind(Bt2r)
+
+    # Calculate the longitude of the intermediate point Phipnte (H.3.5)
+
+    if x2 < 1e-9 and y2 < 1e-9:
+        Phipnte = Bt2r
+    else:
+        Phipnte = Phite + atan2d(y2, x2)
+
+    return Phipnte, Phipntn, Bt2r, dgc
+
+
+def great_circle_path_batch(Phire, Phite, Phirn, Phitn, Re, dpnt):
+    """
+    great_circle_path_batch Great-circle path calculations according to Attachment H for many paths
+    Phipnte, Phipntn, Bt2r, dgc = great_circle_path_batch(Phire, Phite, Phirn, Phitn, Re, dpnt)
+
+    This function computes the same quantities as great_circle_path for
+    arrays of Tx and Rx coordinates in one call, e.g., for all receivers of
+    a site or for all Tx/Rx pairs of an interference matrix. The inputs are
+    broadcast against each other and the special cases of great_circle_path
+    (coincident terminals, intermediate point at the pole) are handled
+    element-wise.
+
+    Input parameters:
+    Phire, Phite, Phirn, Phitn, Re, dpnt - as in great_circle_path, scalars or arrays
+
+    Output parameters:
+    Phipnte, Phipntn, Bt2r, dgc - as in great_circle_path, arrays of the broadcast shape
+
+    Example:
+    lam_path, phi_path, Bt2r, dgc = great_circle_path_batch(lam_r, lam_t, phi_r, phi_t, 6371, 0.5 * dtot)
+    """
+    Phire, Phite, Phirn, Phitn, dpnt = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (Phire, Phite, Phirn, Phitn, dpnt)])
+
+    ## H.2 Path length and bearing
+
+    Dlon = Phire - Phite  # (H.2.1)
+
+    r = sind(Phitn) * sind(Phirn) + cosd(Phitn) * cosd(Phirn) * cosd(Dlon)  # (H.2.2)
+
+    Phid = np.arccos(r)  # radians (H.2.3)
+
+    dgc = Phid * Re  # km (H.2.4)
+
+    x1 = sind(Phirn) - r * sind(Phitn)  # (H.2.5a)
+
+    y1 = cosd(Phitn) * cosd(Phirn) * sind(Dlon)  # (H.2.5b)
+
+    # Bearing of the great-circle path for Tx to Rx (H.2.6)
+    Bt2r = np.where(np.logical_and(np.abs(x1) < 1e-9, np.abs(y1) < 1e-9), Phire, atan2d(y1, x1))
+
+    ## H.3 Calculation of intermediate path point
+
+    Phipnt = dpnt / Re  # radians (H.3.1)
+
+    s = sind(Phitn) * np.cos(Phipnt) + cosd(Phitn) * np.sin(Phipnt) * cosd(Bt2r)  # (H.3.2)
+
+    Phipntn = asind(s)  # degs (H.3.3)
+
+    x2 = np.cos(Phipnt) - s * sind(Phitn)  # (H.3.4a)
+
+    y2 = cosd(Phitn) * np.sin(Phipnt) * sind(Bt2r)  # (H.3.4b)
+
+    # Longitude of the intermediate point Phipnte (H.3.5)
+    Phipnte = np.where(np.logical_and(x2 < 1e-9, y2 < 1e-9), Bt2r, Phite + atan2d(y2, x2))
+
+    return Phipnte, Phipntn, Bt2r, dgc
+
+
+def isempty(x):
+    if np.size(x) == 0:
+        return True
+    else:
+        return False
+
+
+def issorted(a):
+    if np.all(np.diff(a) >= 0):
+        return True
+    else:
+        return False
+
+
+def sind(x):
+    return np.sin(x * np.pi / 180.0)
+
+
+def cosd(x):
+    return np.cos(x * np.pi / 180.0)
+
+
+def asind(x):
+    return np.arcsin(x) * 180.0 / np.pi
+
+
+def atan2d(y, x):
+    return np.arctan2(y, x) * 180.0 / np.pi
+
+
+def find_intervals(series):
+    """
+    find_intervals Find all intervals with consecutive 1's
+    [k1, k2] = find_intervals(series)
+    This function finds all 1's intervals, namely, the indices when the
+    intervals start and where they end
+
+    For example, for the input indices
+            0 0 1 1 1 1 0 0 0 1 1 0 0
+    this function will give back
+        k1 = 3, 10
+        k2 = 6, 11
+
+    Input arguments:
+    indices -   vector containing zeros and ones
+
+    Output arguments:
+    k1      -   vector of start-indices of the found intervals
+    k2      -   vector of end-indices of the found intervals
+
+    Example:
+    [k1, k2] = find_intervals(indices)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    18MAR22     Ivica Stevanovic, OFCOM         First implementation in python
+
+    """
+    k1 = []
+    k2 = []
+    series_int = 1 * series
+
+    if max(series_int) == 1:
+        (k1,) = np.where(np.diff(np.append(0, series_int)) == 1)
+        (k2,) = np.where(np.diff(np.append(series_int, 0)) == -1)
+
+    return k1, k2
+
+
+def earth_rad_eff(DN):
+    """
+    earth_rad_eff Median value of the effective Earth radius
+    [ae, ab] = earth_rad_eff(DN)
+    This function computes the median value of the effective earth
+    radius, and the effective Earth radius exceeded for beta0% of time
+    as defined in ITU-R P.1812-6.
+
+    Input arguments:
+    DN      -   the average radio refractivity lapse-rate through the
+                lowest 1 km of the atmosphere (N-units/km)
+
+    Output arguments:
+    ae      -   the median effective Earth radius (km)
+    ab      -   the effective Earth radius exceeded for beta0 % of time
+
+    Example:
+    ae, ab = earth_rad_eff(DN)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22   Ivica Stevanovic, OFCOM         Initial implementation
+    """
+
+    k50 = 157 / (157 - DN)  # (6)
+
+    ae = 6371 * k50  # (7a)
+
+    kbeta = 3
+
+    ab = 6371 * kbeta  # (7b)
+
+    return ae, ab
+
+
+def dl_se_ft_inner(epsr, sigma, d, hte, hre, adft, f):
+    """
+    dl_se_ft_inner The inner routine of the first-term spherical diffraction loss
+    This function computes the first-term part of Spherical-Earth diffraction
+    loss exceeded for p% time for antenna heights
+    as defined in Sec. 4.3.3 of the ITU-R P.1812-4, equations (29-36)
+
+        Input parameters:
+        epsr    -   Relative permittivity
+        sigma   -   Conductivity (S/m)
+        d       -   Great-circle path distance (km)
+        hte     -   Effective height of interfering antenna (m)
+        hre     -   Effective height of interfered-with antenna (m)
+        adft    -   effective Earth radius (km)
+        f       -   frequency (GHz)
+
+        Output parameters:
+        Ldft   -   The first-term spherical-Earth diffraction loss not exceeded for p% time
+                    implementing equations (29-36), Ldft(1) is for horizontal
+                    and Ldft(2) for the vertical polarization
+
+        Example:
+        Ldft = dl_se_ft_inner(epsr, sigma, d, hte, hre, adft, f)
+
+        Rev   Date        Author                          Description
+        -------------------------------------------------------------------------------
+        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial implementation
+    """
+
+    # Normalized factor for surface admittance for horizontal (1) and vertical
+    # (2) polarizations
+
+    K = np.zeros(2)
+
+    K[0] = 0.036 * (adft * f) ** (-1.0 / 3.0) * ((epsr - 1) ** 2 + (18 * sigma / f) ** 2.0) ** (-1.0 / 4.0)  # Eq (29a)
+
+    K[1] = K[0] * (epsr**2 + (18 * sigma / f) ** 2) ** (1.0 / 2.0)  # Eq (29b)
+
+    # Earth ground/polarization parameter
+
+    beta_dft = (1 + 1.6 * K**2 + 0.67 * K**4) / (1 + 4.5 * K**2 + 1.53 * K**4)  # Eq (30)
+
+    # Normalized distance
+
+    X = 21.88 * beta_dft * (f / adft**2) ** (1.0 / 3.0) * d  # Eq (31)
+
+    # Normalized transmitter and receiver heights
+
+    Yt = 0.9575 * beta_dft * (f**2 / adft) ** (1 / 3) * hte  # Eq (32a)
+
+    Yr = 0.9575 * beta_dft * (f**2 / adft) ** (1 / 3) * hre  # Eq (32b)
+
+    # Calculate the distance term given by:
+
+    Fx = np.zeros(2)
+
+    for ii in range(0, 2):
+        if X[ii] >= 1.6:
+            Fx[ii] = 11 + 10 * np.log10(X[ii]) - 17.6 * X[ii]
+        else:
+            Fx[ii] = -20 * np.log10(X[ii]) - 5.6488 * (X[ii]) ** 1.425  # Eq (33)
+
+    Bt = beta_dft * Yt  # Eq (35)
+
+    Br = beta_dft * Yr  # Eq (35)
+
+    GYt = np.zeros(2)
+    GYr = np.zeros(2)
+
+    for ii in range(0, 2):
+        if Bt[ii] > 2:
+            GYt[ii] = 17.6 * (Bt[ii] - 1.1) ** 0.5 - 5 * np.log10(Bt[ii] - 1.1) - 8
+        else:
+            GYt[ii] = 20 * np.log10(Bt[ii] + 0.1 * Bt[ii] ** 3)
+
+        if Br[ii] > 2:
+            GYr[ii] = 17.6 * (Br[ii] - 1.1) ** 0.5 - 5 * np.log10(Br[ii] - 1.1) - 8
+        else:
+            GYr[ii] = 20 * np.log10(Br[ii] + 0.1 * Br[ii] ** 3)
+
+        if GYr[ii] < 2 + 20 * np.log10(K[ii]):
+            GYr[ii] = 2 + 20 * np.log10(K[ii])
+
+        if GYt[ii] < 2 + 20 * np.log10(K[ii]):
+            GYt[ii] = 2 + 20 * np.log10(K[ii])
+
+    Ldft = -Fx - GYt - GYr  # Eq (36)
+
+    return Ldft
+
+
+def dl_se_ft(d, hte, hre, adft, f, omega):
+    """
+    dl_se_ft First-term part of spherical-Earth diffraction according to ITU-R P.1812-6
+    This function computes the first-term part of Spherical-Earth diffraction
+    loss exceeded for p% time for antenna heights
+    as defined in Sec. 4.3.3 of the ITU-R P.1812-6
+
+    Input parameters:
+    d       -   Great-circle path distance (km)
+    hte     -   Effective height of interfering antenna (m)
+    hre     -   Effective height of interfered-with antenna (m)
+    adft    -   effective Earth radius (km)
+    f       -   frequency (GHz)
+    omega   -   fraction of the path over sea
+
+    Output parameters:
+    Ldft   -   The first-term spherical-Earth diffraction loss not exceeded for p% time
+                Ldft(1) is for the horizontal polarization
+                Ldft(2) is for the vertical polarization
+
+    Example:
+    Ldft = dl_se_ft(d, hte, hre, adft, f, omega)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial implementation
+    """
+
+    # First-term part of the spherical-Earth diffraction loss over land
+
+
+    Ldft_land = dl_se_ft_inner(22, 0.003, d, hte, hre, adft, f)
+
+    # First-term part of the spherical-Earth diffraction loss over sea
+
+    Ldft_sea = dl_se_ft_inner(80, 5, d, hte, hre, adft, f)
+
+    # First-term spherical diffraction loss
+
+    Ldft = omega * Ldft_sea + (1 - omega) * Ldft_land  # Eq (28)
+
+    return Ldft
+
+
+def dl_se(d, hte, hre, ap, f, omega):
+    """
+    dl_se spherical-Earth diffraction loss exceeded for p% time according to ITU-R P.1812-6
+    This function computes the Spherical-Earth diffraction loss exceeded
+    for p% time for antenna heights hte and hre (m)
+    as defined in Sec. 4.3.2 of the ITU-R P.1812-6
+
+    Input parameters:
+    d       -   Great-circle path distance (km)
+    hte     -   Effective height of interfering antenna (m)
+    hre     -   Effective height of interfered-with antenna (m)
+    ap      -   the effective Earth radius in kilometers
+    f       -   frequency expressed in GHz
+    omega   -   the fraction of the path over sea
+
+    Output parameters:
+    Ldsph   -   The spherical-Earth diffraction loss not exceeded for p% time
+                Ldsph(1) is for the horizontal polarization
+                Ldsph(2) is for the vertical polarization
+
+    Example:
+    Ldsph = dl_se(d, hte, hre, ap, f, omega)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+    """
+
+    # Wavelength in meters
+    # speed of light as per ITU.R P.2001
+    lam = 0.2998 / f
+
+    # Calculate the marginal LoS distance for a smooth path
+
+    dlos = np.sqrt(2.0 * ap) * (np.sqrt(0.001 * hte) + np.sqrt(0.001 * hre))  # Eq (22)
+
+    if d >= dlos:
+        # calculate diffraction loss Ldft using the method in Sec. Sec. 4.3.3 for
+        # adft = ap and set Ldsph to Ldft
+
+        Ldsph = dl_se_ft(d, hte, hre, ap, f, omega)
+
+        return Ldsph
+    else:
+        # calculate the smallest clearance between the curved-Earth path and
+        # the ray between the antennas, hse
+
+        c = (hte - hre) / (hte + hre)  # Eq (24d)
+        m = 250 * d * d / (ap * (hte + hre))  # Eq (24e)
+
+        b = 2 * np.sqrt((m + 1.0) / (3.0 * m)) * np.cos(np.pi / 3 + 1.0 / 3.0 * np.arccos(3 * c / 2.0 * np.sqrt(3.0 * m / (m + 1.0) ** 3)))  # Eq (24c)
+
+        dse1 = d / 2.0 * (1.0 + b)  # Eq (24a)
+        dse2 = d - dse1  # Eq (24b)
+
+        hse = (hte - 500 * dse1 * dse1 / ap) * dse2 + (hre - 500 * dse2 * dse2 / ap) * dse1
+        hse = hse / d  # Eq (23)
+
+        # Calculate the required clearance for zero diffraction loss
+
+        hreq = 17.456 * np.sqrt(dse1 * dse2 * lam / d)  # Eq (25)
+
+        if hse > hreq:
+            Ldsph = np.zeros(2)
+            return Ldsph
+        else:
+            # calculate the modified effective Earth radius aem, which gives
+            # marginal LoS at distance d
+
+            aem = 500 * (d / (np.sqrt(hte) + np.sqrt(hre))) ** 2  # Eq (26)
+
+            # Use the method in Sec. 4.2.2.1 for adft ) aem to obtain Ldft
+
+            Ldft = dl_se_ft(d, hte, hre, aem, f, omega)
+            Ldft[Ldft < 0.0] = 0.0
+            Ldsph = (1 - hse / hreq) * Ldft  # Eq (27)
+
+    return Ldsph
+
+
+def dl_p(d, g, hts, hrs, hstd, hsrd, f, omega, p, b0, DN, flag4):
+    """
+    dl_p Diffraction loss model not exceeded for p% of time according to P.1812-6
+
+    This function computes the diffraction loss not exceeded for p% of time
+    as defined in ITU-R P.1812-6 (Section 4.3-5) and Attachment 4 to Annex 1
+
+        Input parameters:
+        d       -   vector of distances di of the i-th profile point (km)
+        g       -   vector gi of heights of the i-th profile point (meters
+                    above mean sea level) + Representative clutter height.
+                    Both vectors g and d contain n+1 profile points
+        hts     -   transmitter antenna height in meters above sea level (i=0)
+        hrs     -   receiver antenna height in meters above sea level (i=n)
+        hstd    -   Effective height of interfering antenna (m amsl) c.f. 5.1.6.3
+        hsrd    -   Effective height of interfered-with antenna (m amsl) c.f. 5.1.6.3
+        f       -   frequency expressed in GHz
+        omega   -   the fraction of the path over sea
+        p       -   percentage of time
+        b0      -   the time percentage that the refractivity gradient (DELTA-N) exceeds 100 N-units/km in the first 100m of the lower atmosphere
+        DN      -   the average radio-refractivity lapse-rate through the
+                    lowest 1 km of the atmosphere. Note that DN is positive
+                    quantity in this procedure
+        flag4   -   Set to 1 if the alternative method is used to calculate Lbulls
+                    without using terrain profile analysis (Attachment 4 to Annex 1)
+
+        Output parameters:
+        Ldp      -   diffraction loss for the general path not exceeded for p % of the time
+                     according to Section 4.3.4 of ITU-R P.1812-6.
+                     Ldp(1) is for the horizontal polarization
+                     Ldp(2) is for the vertical polarization
+        Ldb      -   diffraction loss for p = beta_0%
+        Ld50     -   diffraction loss for p = 50%
+        Lbulla50 -   Bullington diffraction (4.3.1) for actual terrain profile g and antenna heights
+        Lbulls50 -   Bullington diffraction (4.3.1) with all profile heights g set to zero and modified antenna heights
+        Ldshp50  -   Spherical diffraction (4.3.2) for the actual path d and modified antenna heights
+
+        Example:
+        Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_p( d, h, hts, hrs, hstd, hsrd, ap, f, omega, p, b0, DN, flag4 )
+
+
+        Rev   Date        Author                          Description
+        -------------------------------------------------------------------------------
+        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+
+    """
+
+    # Use the method in 4.3.4 to calculate diffraction loss Ld for median effective
+    # Earth radius ap = ae as given by equation (7a). Set median diffraction
+    # loss to Ldp50
+
+    ae, ab = earth_rad_eff(DN)
+
+    # Bullington losses for the actual terrain profile (Lbulla) and the
+    # smooth profile (Lbulls) for both ae and ab evaluated in one pass
+
+    if flag4 == 1:
+        Lbulla = dl_bull_fused(d, g, [hts, hts], [hrs, hrs], [ae, ab], f)
+        Lbulls = [None, None]
+    else:
+        h1 = np.zeros(g.shape)
+        Lbull = dl_bull_fused(d, np.stack((g, g, h1, h1)), [hts, hts, hts - hstd, hts - hstd], [hrs, hrs, hrs - hsrd, hrs - hsrd], [ae, ab, ae, ab], f)
+        Lbulla = Lbull[0:2]
+        Lbulls = Lbull[2:4]
+
+    ap = ae
+
+    Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4, Lbulla=Lbulla[0], Lbulls=Lbulls[0])
+
+    if p == 50:
+        Ldp = Ld50
+        ap = ab
+        Ldb, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4, Lbulla=Lbulla[1], Lbulls=Lbulls[1])
+        return Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50
+
+    if p < 50:
+        # Use the method in 4.3.4  to calculate diffraction loss Ld for effective
+        # Earth radius ap = abeta, as given in equation (7b). Set diffraction loss
+        # not exceeded for beta0# time Ldb = Ld
+
+        ap = ab
+
+        Ldb, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4, Lbulla=Lbulla[1], Lbulls=Lbulls[1])
+
+        # Compute the interpolation factor Fi
+
+        if p > b0:
+            Fi = inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100)  # eq (40a)
+
+        else:
+            Fi = 1
+
+        # The diffraction loss Ldp not exceeded for p% of time is now given by
+
+        Ldp = Ld50 + Fi * (Ldb - Ld50)  # eq (41)
+
+    return Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50
+
+
+def dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4, Lbulla=None, Lbulls=None):
+    """
+    dl_delta_bull Complete 'delta-Bullington' diffraction loss model P.1812-6
+
+    This function computes the complete 'delta-Bullington' diffraction loss
+    as defined in ITU-R P.1812.6 (Section 4.3.4)
+
+        Input parameters:
+        d       -   vector of distances di of the i-th profile point (km)
+        g       -   vector of heights hi of the i-th profile point (meters
+                    above mean sea level) + Representative clutter height.
+                    Both vectors d, g contain n+1 profile points
+        hts     -   transmitter antenna height in meters above sea level (i=0)
+        hrs     -   receiver antenna height in meters above sea level (i=n)
+        hstd    -   Effective height of interfering antenna (m amsl) c.f. 5.1.6.3
+        hsrd    -   Effective height of interfered-with antenna (m amsl) c.f. 5.1.6.3
+        ap      -   the effective Earth radius in kilometers
+        f       -   frequency expressed in GHz
+        omega   -   the fraction of the path over sea
+        flag4   -   Set to 1 if the alternative method is used to calculate Lbulls
+                    without using terrain profile analysis (Attachment 4 to Annex 1)
+        Lbulla  -   (optional) Bullington diffraction loss for the actual
+        Lbulls      and the smooth profile when already computed (see dl_bull_fused)
+
+        Output parameters:
+        Ld     -   diffraction loss for the general path according to
+                   Section 4.3.3 of ITU-R P.1812-4.
+                   Ld(1) is for the horizontal polarization
+                   Ld(2) is for the vertical polarization
+        Lbulla -   Bullington diffraction (4.3.1) for actual terrain profile g and antenna heights
+        Lbulls -   Bullington diffraction (4.3.1) with all profile heights g set to zero and modified antenna heights
+        Ldshp  -   Spherical diffraction (4.3.2) for the actual path d and modified antenna heights
+
+        Example:
+        Ld, Lbulla, Lbulls, Ldsph = dl_delta_bull( d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4)
+
+
+        Rev   Date        Author                          Description
+        -------------------------------------------------------------------------------
+        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+    """
+
+    # Use the method in 4.3.1 for the actual terrain profile and antenna
+    # heights. Set the resulting Bullington diffraction loss for the actual
+    # path to Lbulla
+
+    if Lbulla is None:
+        Lbulla = dl_bull(d, g, hts, hrs, ap, f)
+
+    # Use the method in 4.3.1 for a second time, with all profile heights hi
+    # set to zero and modified antenna heights given by
+
+    hts1 = hts - hstd  # eq (37a)
+    hrs1 = hrs - hsrd  # eq (7b)
+    h1 = np.zeros(g.shape)
+    dtot = d[-1] - d[0]
+
+    # where hstd and hsrd are given in 5.6.2 of Attachment 1. Set the
+    # resulting Bullington diffraction loss for this smooth path to Lbulls
+
+    if Lbulls is None:
+        if flag4 == 1:
+            # compute the spherical earth diffraction Lbuls using an
+            # alternative method w/o terrain profile analysis
+            # as defined in Attachment 4 to Annex 1 of ITU-R P.1812-6
+
+            Lbulls = dl_bull_att4(dtot, hts1, hrs1, ap, f)
+        else:
+            # Compute Lbuls using §4.3.1
+
+            Lbulls = dl_bull(d, h1, hts1, hrs1, ap, f)
+
+    # Use the method in 4.3.2 to calculate the spherical-Earth diffraction loss
+    # for the actual path length (dtot) with
+
+    hte = hts1  # eq (38a)
+    hre = hrs1  # eq (38b)
+
+    Ldsph = dl_se(dtot, hte, hre, ap, f, omega)
+
+    # Diffraction loss for the general paht is now given by
+
+    Ld = np.zeros(2)
+
+    Ld[0] = Lbulla + max(Ldsph[0] - Lbulls, 0)  # eq (39)
+    Ld[1] = Lbulla + max(Ldsph[1] - Lbulls, 0)  # eq (39)
+
+    return Ld, Lbulla, Lbulls, Ldsph
+
+
+def dl_bull(d, g, hts, hrs, ap, f):
+    """
+    dl_bull Bullington part of the diffraction loss according to P.1812-6
+    This function computes the Bullington part of the diffraction loss
+    as defined in ITU-R P.1812-6 in 4.3.1
+
+        Input parameters:
+        d       -   vector of distances di of the i-th profile point (km)
+        g       -   vector of heights hi of the i-th profile point (meters
+                    above mean sea level) + representative clutter height
+                    Both vectors d and g contain n+1 profile points
+        hts     -   transmitter antenna height in meters above sea level (i=0)
+        hrs     -   receiver antenna height in meters above sea level (i=n)
+        ap      -   the effective earth radius in kilometers
+        f       -   frequency expressed in GHz
+
+        Output parameters:
+        Lbull   -   Bullington diffraction loss for a given path
+
+        Example:
+        Lbull = dl_bull(d, g, hts, hrs, ap, f)
+
+        Rev   Date        Author                          Description
+        -------------------------------------------------------------------------------
+        v0    29SEP22     Ivica Stevanovic, OFCOM         First implementation in matlab
+    """
+
+    # Effective Earth curvature Ce (km^-1)
+
+    Ce = 1.0 / ap
+
+    # Wavelength in meters
+    # speed of light as per ITU.R P.2001
+    lam = 0.2998 / f
+
+    # Complete path length
+
+    dtot = d[-1] - d[0]
+
+    # Find the intermediate profile point with the highest slope of the line
+    # from the transmitter to the point
+
+    di = d[1:-1]
+    gi = g[1:-1]
+
+    Stim = max((gi + 500 * Ce * di * (dtot - di) - hts) / di)  # Eq (13)
+
+    # Calculate the slope of the line from transmitter to receiver assuming a
+    # LoS path
+
+    Str = (hrs - hts) / dtot  # Eq (14)
+
+    if Stim < Str:  # Case 1, Path is LoS
+        # Find the intermediate profile point with the highest diffraction
+        # parameter nu:
+
+        numax = max((gi + 500 * Ce * di * (dtot - di) - (hts * (dtot - di) + hrs * di) / dtot) * np.sqrt(0.002 * dtot / (lam * di * (dtot - di))))  # Eq (15)
+
+        Luc = 0
+        if numax > -0.78:
+            Luc = 6.9 + 20 * np.log10(np.sqrt((numax - 0.1) ** 2 + 1) + numax - 0.1)  # Eq (12), (16)
+
+    else:
+        # Path is transhorizon
+
+        # Find the intermediate profile point with the highest slope of the
+        # line from the receiver to the point
+
+        Srim = max((gi + 500 * Ce * di * (dtot - di) - hrs) / (dtot - di))  # Eq (17)
+
+        # Calculate the distance of the Bullington point from the transmitter:
+
+        dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)  # Eq (18)
+
+        # Calculate the diffraction parameter, nub, for the Bullington point
+
+        nub = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * np.sqrt(0.002 * dtot / (lam * dbp * (dtot - dbp)))  # Eq (20)
+
+        # The knife-edge loss for the Bullington point is given by
+
+        Luc = 0
+        if nub > -0.78:
+            Luc = 6.9 + 20 * np.log10(np.sqrt((nub - 0.1) ** 2 + 1) + nub - 0.1)  # Eq (12), (20)
+
+    # For Luc calculated using either (16) or (20), Bullington diffraction loss
+    # for the path is given by
+
+    Lbull = Luc + (1 - np.exp(-Luc / 6.0)) * (10 + 0.02 * dtot)  # Eq (21)
+    return Lbull
+
+
+def dl_bull_fused(d, g, hts, hrs, ap, f):
+    """
+    dl_bull_fused Bullington part of the diffraction loss for several variants of a path according to P.1812-6
+    Lbull = dl_bull_fused(d, g, hts, hrs, ap, f)
+
+    This function evaluates dl_bull for K variants of the same path profile
+    d in one vectorized pass. The terms that only depend on the distances,
+    di*(dtot-di) and the scale sqrt(0.002*dtot/(lam*di*(dtot-di))) of the
+    diffraction parameter, are computed once for all variants. dl_p uses it
+    to evaluate the actual and the smooth profile for both ae and ab.
+
+        Input parameters:
+        d       -   vector of distances di of the i-th profile point (km)
+        g       -   array (K x n) of the profile heights of the K variants
+        hts     -   array of K transmitter antenna heights (m amsl)
+        hrs     -   array of K receiver antenna heights (m amsl)
+        ap      -   array of K effective earth radii (km)
+        f       -   frequency expressed in GHz
+
+        Output parameters:
+        Lbull   -   array of K Bullington diffraction losses
+
+        Example:
+        Lbull = dl_bull_fused(d, np.stack((g, g)), [hts, hts], [hrs, hrs], [ae, ab], f)
+    """
+
+    # Effective Earth curvature Ce (km^-1)
+
+    Ce = 1.0 / np.reshape(np.asarray(ap, dtype=float), (-1, 1))
+    hts = np.reshape(np.asarray(hts, dtype=float), (-1, 1))
+    hrs = np.reshape(np.asarray(hrs, dtype=float), (-1, 1))
+
+    # Wavelength in meters
+    # speed of light as per ITU.R P.2001
+    lam = 0.2998 / f
+
+    # Complete path length
+
+    dtot = d[-1] - d[0]
+
+    # Terms shared by all variants
+
+    di = d[1:-1]
+    gi = np.atleast_2d(g)[:, 1:-1]
+
+    ddi = dtot - di
+    dd = di * ddi
+    scale = np.sqrt(0.002 * dtot / (lam * dd))
+
+    # Profile heights with the Earth curvature
+
+    ge = gi + 500 * Ce * dd
+
+    # Find the intermediate profile point with the highest slope of the line
+    # from the transmitter to the point
+
+    Stim = np.max((ge - hts) / di, axis=1)  # Eq (13)
+
+    # Calculate the slope of the line from transmitter to receiver assuming a
+    # LoS path
+
+    Str = (hrs - hts)[:, 0] / dtot  # Eq (14)
+
+    # Case 1, Path is LoS: find the intermediate profile point with the
+    # highest diffraction parameter nu
+
+    numax = np.max((ge - (hts * ddi + hrs * di) / dtot) * scale, axis=1)  # Eq (15)
+
+    # Path is transhorizon: find the intermediate profile point with the
+    # highest slope of the line from the receiver to the point
+
+    Srim = np.max((ge - hrs) / ddi, axis=1)  # Eq (17)
+
+    hts = hts[:, 0]
+    hrs = hrs[:, 0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Calculate the distance of the Bullington point from the transmitter:
+
+        dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)  # Eq (18)
+
+        # Calculate the diffraction parameter, nub, for the Bullington point
+
+        nub = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * np.sqrt(0.002 * dtot / (lam * dbp * (dtot - dbp)))  # Eq (20)
+
+        nu = np.where(Stim < Str, numax, nub)
+
+        # The knife-edge loss for the Bullington point is given by
+
+        Luc = np.where(nu > -0.78, 6.9 + 20 * np.log10(np.sqrt((nu - 0.1) ** 2 + 1) + nu - 0.1), 0)  # Eq (12), (16), (20)
+
+    # For Luc calculated using either (16) or (20), Bullington diffraction loss
+    # for the path is given by
+
+    Lbull = Luc + (1 - np.exp(-Luc / 6.0)) * (10 + 0.02 * dtot)  # Eq (21)
+    return Lbull
+
+
+def dl_bull_att4(dtot, hte, hre, ap, f):
+    """dl_bull_att4 Bullington part of the diffraction loss for smooth path according to Attachment 4 to Annex 1 of P.1812-6
+    %   This function computes the spherical earth diffraction Lbuls using an
+    %   alternative method w/o terrain profile analysis
+    %   as defined in Attachment 4 to Annex 1 of ITU-R P.1812-5
+    %
+    %     Input parameters:
+    %     dtot    -   Great-circle path distance (km)
+    %     hte     -   Effective height of interfering antenna (m)
+    %     hre     -   Effective height of interfered-with antenna (m)
+    %     ap      -   the effective earth radius in kilometers
+    %     f       -   frequency expressed in GHz
+    %
+    %     Output parameters:
+    %     Lbulls   -   Bullington diffraction loss for a given path
+    %
+    %     Example:
+    %     Lbulls = dl_bull_att4(d, hte, hre, ap, f)
+    %
+    %     Rev   Date        Author                          Description
+    %     -------------------------------------------------------------------------------
+    %     v1    28JUL20     Ivica Stevanovic, OFCOM         First implementation for P.1812-5
+    """
+
+    # Effective Earth curvature Ce (km^-1)
+
+    Ce = 1.0 / ap
+
+    # Wavelength in meters
+    # speed of light as per ITU.R P.2001
+
+    lam = 0.2998 / f
+
+    # Calculate the marginal LoS distance for a smooth path
+
+    dlos = np.sqrt(2.0 * ap) * (np.sqrt(0.001 * hte) + np.sqrt(0.001 * hre))  # Eq (22)
+
+    if dtot < dlos:  # LoS
+        # calculate the smallest clearance between the curved-Earth path and
+        # the ray between the antennas, hse
+
+        c = (hte - hre) / (hte + hre)  # Eq (24d)
+        m = 250 * dtot * dtot / (ap * (hte + hre))  # Eq (24e)
+
+        b = 2 * np.sqrt((m + 1.0) / (3.0 * m)) * np.cos(np.pi / 3.0 + 1.0 / 3.0 * np.arccos(3.0 * c / 2.0 * np.sqrt(3.0 * m / ((m + 1.0) ** 3))))  # Eq (24c)
+
+        dse1 = dtot / 2.0 * (1.0 + b)  # Eq (24a)
+        dse2 = dtot - dse1  # Eq (24b)
+
+        hse = (hte - 500 * dse1 * dse1 / ap) * dse2 + (hre - 500 * dse2 * dse2 / ap) * dse1
+        hse = hse / dtot  # Eq (23)
+
+        # calculate the difraction parameter for the smallest clearance height hse
+        # between the curved-Earth path and the ray between the antennas with the
+        # distance dse1
+
+        numax = -hse * np.sqrt(0.002 * dtot / (lam * dse1 * (dtot - dse1)))  # Eq (105)
+
+        Lus = 0
+        if numax > -0.78:
+            Lus = 6.9 + 20 * np.log10(np.sqrt((numax - 0.1) ** 2 + 1) + numax - 0.1)  # Eq (12), (106)
+
+    else:  # d>=dlos, NLoS
+        # Find the highest slope of the line from the transmitter antenna to the curved-Earth path.
+
+        Stm = 500 * Ce * dtot - 2 * np.sqrt(500.0 * Ce * hte)  # Eq (107)
+
+        # find the highest slope of the line from the receiver antenna to the curved-Earth path
+
+        Srm = 500 * Ce * dtot - 2 * np.sqrt(500.0 * Ce * hre)  # Eq (108)
+
+        # Use these two slopes to calculate the Bullington point as:
+
+        ds = (hre - hte + Srm * dtot) / (Stm + Srm)
+        # Eq (109)
+
+        # Calculate the diffraction parameter nus for the Bullington point:
+
+        nus = hte + Stm * ds - (hte * (dtot - ds) + hre * ds) / dtot
+        nus = nus * np.sqrt(0.002 * dtot / (lam * ds * (dtot - ds)))  # Eq (110)
+
+        Lus = 0
+        if nus > -0.78:
+            Lus = 6.9 + 20 * np.log10(np.sqrt((nus - 0.1) ** 2 + 1) + nus - 0.1)  # Eq (12), (111)
+
+    # For Luc calculated using either (106) or (111), Bullington diffraction loss
+    # for the path is given by
+
+    Lbulls = Lus + (1 - np.exp(-Lus / 6.0)) * (10 + 0.02 * dtot)  # Eq (112)
+    return Lbulls
+
+
+def beta0(phi, dtm, dlm):
+    """
+    This function computes the time percentage for which refractivity
+    lapse-rates exceeding 100 N-units/km can be expected in the first 100
+    m of the lower atmosphere
+    as defined in ITU-R P.1812-6.
+
+    Input arguments:
+    phi     -   path centre latitude (deg)
+    dtm     -   the longest continuous land (inland + coastal) section of the great-circle path (km)
+    dlm     -   the longest continuous inland section of the great-circle path (km)
+    phi, dtm and dlm can be scalars or arrays that broadcast against each other
+
+    Output arguments:
+    b0      -   the time percentage that the refractivity gradient (DELTA-N) exceeds 100 N-units/km in the first 100 m of the lower atmosphere
+
+    Example:
+    b0 = beta0(phi, dtm, dlm)
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial implementation
+    """
+
+    tau = 1 - np.exp(-(4.12 * 1e-4 * dlm**2.41))  # (3)
+
+    mu1 = (10 ** (-dtm / (16 - 6.6 * tau)) + 10 ** (-5 * (0.496 + 0.354 * tau))) ** 0.2  # (2)
+
+    mu1 = np.minimum(mu1, 1)
+
+    phi = np.abs(phi)
+    low = phi <= 70
+
+    mu4 = np.where(low, mu1 ** (-0.935 + 0.0176 * phi), mu1**0.3)  # (4)
+
+    b0 = np.where(low, 10 ** (-0.015 * phi + 1.67), 4.17) * mu1 * mu4  # (5)
+
+    return b0[()]
+
+
+def stdDev(f, h, R, wa):
+    """stdDev computes standard deviation of location variability
+    sigmaLoc = stdDev(f, h, R, wa)
+    This function computes the standard deviation according to ITU-R
+    P.1812-6, Annex 1, §4.8 and §4.10
+
+    Input parameters:
+    f       -   Frequency (GHz)
+    h       -   receiver/mobile antenna height above the ground (m)
+    R       -   height of representative clutter at the receiver/mobile location (m)
+    wa      -   prediction resolution, i.e., the width of the square area over which the variability applies
+
+    Rev   Date        Author                          Description
+    -------------------------------------------------------------------------------
+    v0    29SEP22    Ivica Stevanovic, OFCOM         Initial version
+    """
+    sigmaLoc = (0.52 + 0.024 * f) * wa**0.28
+
+    if h < R:
+        uh = 1
+    else:
+        if h >= R + 10:
+            uh = 0
+        else:
+            uh = 1 - (h - R) / 10.0
+
+    sigmaLoc = sigmaLoc * uh
+
+    return sigmaLoc
+
+def interp2(matrix_map, lon, lat, lon_spacing, lat_spacing):
+    """
+    Bi-linear interpolation of data contained in 2D matrix map at point (lon,lat)
+    It assumes that the grid is rectangular with spacing of 1.5 deg in both lon and lat
+    It assumes that lon goes from 0 to 360 deg and lat goes from 90 to -90 deg
+    """
+
+    
+    latitudeOffset = 90.0 - lat
+    longitudeOffset = lon
+    
+    if (lon < 0.0):
+        longitudeOffset = lon + 360.0
+
+    
+    sizeY, sizeX = matrix_map.shape
+
+    latitudeIndex = int(latitudeOffset / lat_spacing)
+    longitudeIndex = int(longitudeOffset / lon_spacing)
+
+    latitudeFraction = (latitudeOffset / lat_spacing) - latitudeIndex
+    longitudeFraction = (longitudeOffset / lon_spacing) - longitudeIndex
+
+    value_ul = matrix_map[latitudeIndex][longitudeIndex]
+    value_ur = matrix_map[latitudeIndex][(longitudeIndex + 1) % sizeX]
+    value_ll = matrix_map[(latitudeIndex + 1) % sizeY][longitudeIndex]
+    value_lr = matrix_map[(latitudeIndex + 1) % sizeY][(longitudeIndex + 1) % sizeX]
+
+    interpolatedHeight1 = (longitudeFraction * (value_ur - value_ul)) + value_ul
+    interpolatedHeight2 = (longitudeFraction * (value_lr - value_ll)) + value_ll
+    interpolatedHeight3 = latitudeFraction * (interpolatedHeight2 - interpolatedHeight1) + interpolatedHeight1
+
+    return interpolatedHeight3
+
+
+def digital_maps():
+    """
+    digital_maps Digital maps DN50 and N050 used for the path-centre values of DN and N0
+    maps = digital_maps()
+
+    The maps are loaded on the first call and kept in the module dictionary
+    DigitalMaps, so that importing P1812 does not read the maps and calls
+    with DN and N0 given as input arguments never load them. See
+    load_digital_maps for the file formats.
+    """
+    if not DigitalMaps:
+        DigitalMaps.update(load_digital_maps())
+
+    return DigitalMaps
+
+
+def load_digital_maps():
+    """
+    load_digital_maps Read the digital maps DN50 and N050
+    maps = load_digital_maps()
+
+    If the uncompressed side files P1812_DN50.npy and P1812_N050.npy written
+    by save_digital_maps_npy are found next to P1812.npz, they are memory
+    mapped (read-only), so that all processes using the maps share one copy
+    in the page cache. Otherwise the maps are read from P1812.npz.
+    """
+    folder = files("Py1812")
+    maps = {}
+
+    npy = {key: folder.joinpath("P1812_" + key + ".npy") for key in ("DN50", "N050")}
+    if all(path.is_file() for path in npy.values()):
+        for key, path in npy.items():
+            maps[key] = np.load(path, mmap_mode="r")
+        return maps
+
+    with np.load(folder.joinpath("P1812.npz")) as DigitalMapsNpz:
+        for k in DigitalMapsNpz.files:
+            maps[k] = DigitalMapsNpz[k].copy()
+
+    return maps
+
+
+def save_digital_maps_npy():
+    """
+    save_digital_maps_npy Write the digital maps as uncompressed .npy side files
+    save_digital_maps_npy()
+
+    The maps in P1812.npz are written to P1812_DN50.npy and P1812_N050.npy
+    in the package folder, which load_digital_maps then memory maps instead
+    of decompressing P1812.npz in every process.
+    """
+    folder = files("Py1812")
+
+    with np.load(folder.joinpath("P1812.npz")) as DigitalMapsNpz:
+        for k in DigitalMapsNpz.files:
+            np.save(folder.joinpath("P1812_" + k + ".npy"), DigitalMapsNpz[k])
+
+
+def interp2_batch(matrix_map, lon, lat, lon_spacing, lat_spacing):
+    """
+    interp2_batch Bi-linear interpolation of data contained in 2D matrix map at the points (lon, lat)
+    Array counterpart of interp2, lon and lat are arrays of the same size.
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+
+    latitudeOffset = 90.0 - lat
+    longitudeOffset = np.where(lon < 0.0, lon + 360.0, lon)
+
+    sizeY, sizeX = matrix_map.shape
+
+    latitudeIndex = (latitudeOffset / lat_spacing).astype(int)
+    longitudeIndex = (longitudeOffset / lon_spacing).astype(int)
+
+    latitudeFraction = (latitudeOffset / lat_spacing) - latitudeIndex
+    longitudeFraction = (longitudeOffset / lon_spacing) - longitudeIndex
+
+    value_ul = matrix_map[latitudeIndex, longitudeIndex]
+    value_ur = matrix_map[latitudeIndex, (longitudeIndex + 1) % sizeX]
+    value_ll = matrix_map[(latitudeIndex + 1) % sizeY, longitudeIndex]
+    value_lr = matrix_map[(latitudeIndex + 1) % sizeY, (longitudeIndex + 1) % sizeX]
+
+    interpolatedHeight1 = (longitudeFraction * (value_ur - value_ul)) + value_ul
+    interpolatedHeight2 = (longitudeFraction * (value_lr - value_ll)) + value_ll
+    interpolatedHeight3 = latitudeFraction * (interpolatedHeight2 - interpolatedHeight1) + interpolatedHeight1
+
+    return interpolatedHeight3
+
+
+class RefractivityCache:
+    """
+    RefractivityCache Memoized path-centre values of DN and N0 from the digital maps
+    cache = RefractivityCache(resolution=0.01, maxsize=65536)
+    DN, N0 = cache.lookup(lon, lat)
+
+    The path centres of the radials from one site lie within a few km of
+    each other. The cache quantizes the path-centre coordinates to a grid
+    with the given resolution and keeps the values of DN and N0 for the
+    maxsize most recently used grid points. The values are interpolated at
+    the quantized coordinates, so that they do not depend on the order of
+    the lookups. The cache can be passed to bt_loss_batch and bt_loss_radial
+    as the keyword argument refractivity.
+
+    Input parameters:
+    resolution  -   Grid spacing of the quantized coordinates (deg), default
+                    0.01 deg (the maps have a spacing of 1.5 deg). If 0, the
+                    coordinates are used as they are.
+    maxsize     -   Maximum number of cached grid points, default 65536
+
+    Attributes:
+    hits, misses -  Number of path centres served from the cache and
+                    interpolated from the maps since the last clear()
+    hit_rate     -   hits / (hits + misses)
+    """
+
+    def __init__(self, resolution=0.01, maxsize=65536):
+        if resolution < 0:
+            raise ValueError("The resolution of the refractivity cache must be positive or zero.")
+
+        if maxsize < 1:
+            raise ValueError("The size of the refractivity cache must be positive.")
+
+        self.resolution = resolution
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, lon, lat):
+        """
+        DN, N0 = lookup(lon, lat) returns the arrays of DN and N0 at the
+        path centres with longitudes lon and latitudes lat (deg)
+        """
+        lon, lat = np.broadcast_arrays(np.atleast_1d(np.asarray(lon, dtype=float)), np.atleast_1d(np.asarray(lat, dtype=float)))
+
+        if self.resolution > 0:
+            keys = np.round(np.stack((lon.ravel(), lat.ravel()), axis=1) / self.resolution)
+        else:
+            keys = np.stack((lon.ravel(), lat.ravel()), axis=1)
+
+        keys, index, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+        index = np.reshape(index, (-1,))
+
+        values = np.zeros((keys.shape[0], 2))
+        new = []
+        for i in range(0, keys.shape[0]):
+            key = (keys[i, 0], keys[i, 1])
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                values[i] = self.cache[key]
+                self.hits = self.hits + int(counts[i])
+            else:
+                new.append(i)
+                self.misses = self.misses + 1
+                self.hits = self.hits + int(counts[i]) - 1
+
+        if new:
+            new = np.array(new)
+            coords = keys[new] * self.resolution if self.resolution > 0 else keys[new]
+            maps = digital_maps()
+            values[new, 0] = interp2_batch(maps["DN50"], coords[:, 0], coords[:, 1], 1.5, 1.5)
+            values[new, 1] = interp2_batch(maps["N050"], coords[:, 0], coords[:, 1], 1.5, 1.5)
+            for i in new:
+                self.cache[(keys[i, 0], keys[i, 1])] = values[i].copy()
+
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+        DN = np.reshape(values[index, 0], lon.shape)
+        N0 = np.reshape(values[index, 1], lon.shape)
+
+        return DN, N0
+
+
+def stack_profiles(x):
+    """
+    stack_profiles Stack a set of path profile vectors into a 2D array
+    xs, n = stack_profiles(x)
+
+    This function stacks N profile vectors of possibly different lengths
+    into an (N x nmax) array. Shorter profiles are padded by repeating their
+    last value, so that the padded segments have zero length and do not
+    contribute to the sums over the path profile.
+
+    Input arguments:
+    x       -   2D array (N x n) or list of N 1D arrays
 
-    ii = range(1, n - 1)
+    Output arguments:
+    xs      -   2D array (N x nmax) of stacked and padded profiles
+    n       -   array of N profile lengths
+    """
+    if isinstance(x, np.ndarray) and x.ndim == 2:
+        xs = x.astype(float)
+        n = np.full(xs.shape[0], xs.shape[1], dtype=int)
+        return xs, n
 
-    theta = 1000 * np.arctan((h[ii] - hts) / (1000 * d[ii]) - d[ii] / (2 * ae))  # Eq (77)
+    # profiles are converted to float while they are copied into the stack
+    x = [np.ravel(xi) for xi in x]
+    n = np.array([len(xi) for xi in x], dtype=int)
+    nmax = max(n)
+    xs = np.empty((len(x), nmax))
+    for k in range(0, len(x)):
+        xs[k, 0 : n[k]] = x[k]
+        xs[k, n[k] :] = x[k][-1]
 
-    # theta(theta < 0) = 0  # condition below equation (152)
+    return xs, n
 
-    theta_td = 1000 * np.arctan((hrs - hts) / (1000 * dtot) - dtot / (2 * ae))  # Eq (78)
-    theta_rd = 1000 * np.arctan((hts - hrs) / (1000 * dtot) - dtot / (2 * ae))  # Eq (81)
 
-    theta_max = max(theta)  # Eq (76)
-    if theta_max > theta_td:  # Eq (150): test for the trans-horizon path
-        pathtype = 2  # transhorizon
-    else:
-        pathtype = 1  # los
+def column(x):
+    """
+    column Reshape a scalar or an array of N values into a column that broadcasts against (N x nmax) arrays
+    """
+    return np.reshape(np.asarray(x, dtype=float), (-1, 1))
 
-    theta_t = max(theta_max, theta_td)  # Eq (79)
 
-    if pathtype == 2:  # transhorizon
-        (kindex,) = np.where(theta == theta_max)
+def inner_mask(n, nmax):
+    """
+    inner_mask Mask of the intermediate profile points 1..n-2 of stacked profiles
+    """
+    ii = np.arange(nmax)[np.newaxis, :]
+    return (ii >= 1) & (ii < (n - 1)[:, np.newaxis])
 
-        lt = kindex[0] + 1  # in order to map back to path d indices, as theta takes path indices 2 to n-1,
 
-        dlt = d[lt]  # Eq (80)
+def masked_max(x, mask):
+    """
+    masked_max Row-wise maximum of x over the points where mask is True
+    """
+    return np.max(np.where(mask, x, -np.inf), axis=-1)
 
-        # Interfered-with antenna horizon elevation angle and distance
 
-        theta = 1000 * np.arctan((h[ii] - hrs) / (1000 * (dtot - d[ii])) - (dtot - d[ii]) / (2 * ae))  # Eq (82a)
+def first_argmax(x, mask):
+    """
+    first_argmax Row-wise index of the first maximum of x over the points where mask is True
+    """
+    return np.argmax(np.where(mask, x, -np.inf), axis=1)
 
-        theta_r = max(theta)
 
-        (kindex,) = np.where(theta == theta_r)
+def last_argmax(x, mask):
+    """
+    last_argmax Row-wise index of the last maximum of x over the points where mask is True
+    """
+    nmax = x.shape[1]
+    return nmax - 1 - np.argmax(np.where(mask, x, -np.inf)[:, ::-1], axis=1)
 
-        lr = kindex[-1] + 1  # in order to map back to path d indices, as theta takes path indices 2 to n-1,
 
-        dlr = dtot - d[lr]  # Eq (83)
+def cell_widths(d):
+    """
+    cell_widths Length of the path section represented by each profile point
+    w = cell_widths(d)
+
+    Each point represents the path from half-way to its predecessor up to
+    half-way to its successor. The first and the last point represent only
+    the half-interval towards the inside of the path. Summing w over a
+    continuous zone interval gives the interval length as computed in
+    path_fraction and longest_cont_dist. d is a 2D array (N x n).
+    """
+    dp = np.concatenate((d[:, 0:1], d[:, :-1]), axis=1)
+    dn = np.concatenate((d[:, 1:], d[:, -1:]), axis=1)
+    return (dn - dp) / 2.0
 
-    else:  # pathtype == 1 (LoS)
-        theta_r = theta_rd  # Eq (81)
 
-        ii = range(1, n - 1)
+def zone_mask(zone, zone_r):
+    if zone_r == 34:  # inland + coastal land
+        return (zone == 3) + (zone == 4)
+    return zone == zone_r
 
-        # speed of light as per ITU.R P.2001
-        lam = 0.2998 / f
-        Ce = 1.0 / ae  # Section 4.3.1 supposing median effective Earth radius
 
-        nu = (h[ii] + 500 * Ce * d[ii] * (dtot - d[ii]) - (hts * (dtot - d[ii]) + hrs * d[ii]) / dtot) * np.sqrt(0.002 * dtot / (lam * d[ii] * (dtot - d[ii])))  # Eq (81)
-        numax = max(nu)
+def path_fraction_batch(d, zone, zone_r):
+    """
+    path_fraction_batch Path fraction belonging to a given zone_r for stacked profiles
+    omega = path_fraction_batch(d, zone, zone_r)
 
-        (kindex,) = np.where(nu == numax)
-        lt = kindex[-1] + 1  # in order to map back to path d indices, as theta takes path indices 2 to n-1,
-        dlt = d[lt]  # Eq (80)
-        dlr = dtot - dlt  # Eq  (83a)
-        lr = lt
+    Array counterpart of path_fraction for 2D arrays d and zone (N x n)
+    as returned by stack_profiles.
+    """
+    w = cell_widths(d)
+    dm = np.sum(w * zone_mask(zone, zone_r), axis=1)
 
-    # Angular distance
+    return dm / (d[:, -1] - d[:, 0])
 
-    theta_tot = 1e3 * dtot / ae + theta_t + theta_r  # Eq (84)
 
-    # Section 5.6.3 Ducting/layer-reflection model
+def longest_cont_dist_batch(d, zone, zone_r):
+    """
+    longest_cont_dist_batch Longest continuous path belonging to the zone_r for stacked profiles
+    dm = longest_cont_dist_batch(d, zone, zone_r)
 
-    # Calculate the smooth-Earth heights at transmitter and receiver as
-    # required for the roughness factor
+    Array counterpart of longest_cont_dist for 2D arrays d and zone (N x n)
+    as returned by stack_profiles. The length of each continuous interval is
+    obtained from the cumulative sum of the cell widths, restarted at every
+    point outside of the zone.
+    """
+    mask = zone_mask(zone, zone_r)
+    cs = np.cumsum(cell_widths(d) * mask, axis=1)
+    start = np.maximum.accumulate(np.where(mask, 0.0, cs), axis=1)
+    dm = np.max((cs - start) * mask, axis=1)
 
-    hst = min(hst, h[0])  # Eq (92a)
-    hsr = min(hsr, h[-1])  # Eq (92b)
+    return dm
 
-    # Slope of the smooth-Earth surface
 
-    m = (hsr - hst) / dtot  # Eq (93)
+def smooth_earth_sums_radial(d, h, k):
+    """
+    smooth_earth_sums_radial Sums v1 and v2 of Eqs (85, 86) for the paths from the transmitter to the points k
+    v1, v2 = smooth_earth_sums_radial(d, h, k)
 
-    # The terminal effective heigts for the ducting/layer-reflection model
+    The sums over the path profile are accumulated once along the whole
+    profile (d, h), so that the sums for every path d[0..k] are read off
+    the running totals.
+    """
+    dd = d[1:] - d[:-1]
+    v1 = np.concatenate(([0.0], np.cumsum(dd * (h[1:] + h[:-1]))))  # Eq (85)
+    v2 = np.concatenate(([0.0], np.cumsum(dd * (h[1:] * (2 * d[1:] + d[:-1]) + h[:-1] * (d[1:] + 2 * d[:-1])))))  # Eq (86)
 
-    hte = htg + h[0] - hst  # Eq (94a)
-    hre = hrg + h[-1] - hsr  # Eq (94b)
+    return v1[k], v2[k]
 
-    ii = range(lt, lr + 1)
 
-    hm = max(h[ii] - (hst + m * d[ii]))  # Eq (95)
+def path_fraction_radial(d, zone, zone_r, k):
+    """
+    path_fraction_radial Path fraction belonging to a given zone_r for the paths from the transmitter to the points k
+    omega = path_fraction_radial(d, zone, zone_r, k)
+
+    Counterpart of path_fraction for all paths d[0..k] along a single
+    profile. The intermediate points of the path d[0..k] represent the same
+    path sections as in the whole profile, only the end point k represents
+    the half-interval towards k-1, so that the zone lengths follow from the
+    running sum of the cell widths.
+    """
+    mask = zone_mask(zone, zone_r)
+    cs = np.cumsum(cell_widths(d[np.newaxis, :])[0] * mask)
+    dm = cs[k - 1] + mask[k] * (d[k] - d[k - 1]) / 2.0
 
-    return hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype
+    return dm / (d[k] - d[0])
 
 
-def pl_los(d, hts, hrs, f, p, b0, dlt, dlr):
+def longest_cont_dist_radial(d, zone, zone_r, k):
     """
-    pl_los Line-of-sight transmission loss according to ITU-R P.1812-6
-    This function computes line-of-sight transmission loss (including short-term effects)
-    as defined in ITU-R P.1812-67.
-
-    Input parameters:
-    d       -   Great-circle path distance (km)
-    f       -   Frequency (GHz)
-    hts     -   Tx antenna height above sea level (masl)
-    hrs     -   Rx antenna height above sea level (masl)
-    p       -   Required time percentage(s) for which the calculated basic
-                transmission loss is not exceeded (%)
-    b0      -   Point incidence of anomalous propagation for the path
-                central location (%)
-    w       -   Fraction of the total path over water (%)
-    temp    -   Temperature (degrees C)
-    press   -   Dry air pressure (hPa)
-    dlt     -   For a transhorizon path, distance from the transmit antenna to
-                its horizon (km). For a LoS path, each is set to the distance
-                from the terminal to the profile point identified as the Bullington
-                point in the diffraction method for 50% time
-    dlr     -   For a transhorizon path, distance from the receive antenna to
-                its horizon (km). The same note as for dlt applies here.
+    longest_cont_dist_radial Longest continuous path belonging to the zone_r for the paths from the transmitter to the points k
+    dm = longest_cont_dist_radial(d, zone, zone_r, k)
 
-    Output parameters:
-    Lbfs    -   Basic transmission loss due to free-space propagation
-    Lb0p    -   Basic transmission loss not exceeded for time percentage, p%, due to LoS propagation
-    Lb0b    -   Basic transmission loss not exceedd for time percentage, b0%, due to LoS propagation
+    Counterpart of longest_cont_dist for all paths d[0..k] along a single
+    profile. The length of the zone interval ending at each point is
+    tracked along the profile, the longest interval of the path d[0..k] is
+    the running maximum up to k-1 or the interval closed by the end point k.
+    """
+    mask = zone_mask(zone, zone_r)
+    cs = np.cumsum(cell_widths(d[np.newaxis, :])[0] * mask)
+    start = np.maximum.accumulate(np.where(mask, 0.0, cs))
+    run = (cs - start) * mask
+    dm = np.maximum(np.maximum.accumulate(run)[k - 1], mask[k] * (run[k - 1] + (d[k] - d[k - 1]) / 2.0))
 
-    Example:
-    Lbfs, Lb0p, Lb0b = pl_los(d, f, p, b0, dlt, dlr)
+    return dm
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22     Ivica Stevanovic, OFCOM         First implementation
 
+def prefix_line_argmax(a, b, x, k):
+    """
+    prefix_line_argmax Highest of the lines a[i] + b[i]*x over the points 1..k-1 of a single profile
+    i = prefix_line_argmax(a, b, x, k)
+
+    For each path d[0..k[j]] this function returns the first index i in
+    1..k[j]-1 that maximizes a[i] + b[i]*x[j]. The slopes b must not
+    increase along the profile. If x is the same for all paths, the maximum
+    is a running maximum along the profile. Otherwise the upper envelope of
+    the lines is built once along the profile and searched for each x[j]
+    (convex hull trick), so that the cost is O(n log n) instead of O(n**2).
     """
+    k = np.asarray(k)
+    x = np.asarray(x, dtype=float) * np.ones(k.size)
+
+    if np.all(x == x[0]):
+        v = a + b * x[0]
+        v[0] = -np.inf
+        prev = np.concatenate(([-np.inf], np.maximum.accumulate(v)[:-1]))
+        first = np.maximum.accumulate(np.where(v > prev, np.arange(v.size), 0))
+        return first[k - 1]
+
+    a = a.tolist()
+    b = b.tolist()
+    order = np.argsort(k, kind="stable")
+
+    # hull: indices of the lines of the upper envelope, from the largest to
+    # the smallest slope; line hull[j] is the highest for -x <= brk[j]
+    hull = []
+    brk = []
+    found = []
+    i = 0
+    for kq, xq in zip(k[order].tolist(), x[order].tolist()):
+        while i < kq - 1:
+            i = i + 1
+            ai = a[i]
+            bi = b[i]
+            if hull and b[hull[-1]] == bi:
+                if ai <= a[hull[-1]]:
+                    continue  # never higher than the earlier line of the same slope
+                hull.pop()
+                if brk:
+                    brk.pop()
+            while brk:
+                t = hull[-1]
+                if -(ai - a[t]) / (b[t] - bi) <= brk[-1]:
+                    hull.pop()
+                    brk.pop()
+                else:
+                    break
+            if hull:
+                t = hull[-1]
+                brk.append(-(ai - a[t]) / (b[t] - bi))
+            hull.append(i)
 
-    # Basic transmission loss due to free-space propagation
-    dfs2 = d**2 + ((hts - hrs) / 1000.0) ** 2  # (8a)
+        found.append(hull[bisect_left(brk, -xq)])
 
-    Lbfs = 92.4 + 20.0 * np.log10(f) + 10.0 * np.log10(dfs2)  # (8)
+    out = np.zeros(k.size, dtype=int)
+    out[order] = found
 
-    # Corrections for multipath and focusing effects at p and b0
-    Esp = 2.6 * (1 - np.exp(-0.1 * (dlt + dlr))) * np.log10(p / 50)  # (9a)
-    Esb = 2.6 * (1 - np.exp(-0.1 * (dlt + dlr))) * np.log10(b0 / 50)  # (9b)
+    return out
 
-    # Basic transmission loss not exceeded for time percentage p# due to
-    # LoS propagation
-    Lb0p = Lbfs + Esp  # (10)
 
-    # Basic transmission loss not exceeded for time percentage b0% due to
-    # LoS propagation
-    Lb0b = Lbfs + Esb  # (11)
+def prefix_hull_tangent(d, y, k, yq):
+    """
+    prefix_hull_tangent Highest slope from the end point of the paths d[0..k] back to their intermediate points
+    i = prefix_hull_tangent(d, y, k, yq)
+
+    For each path d[0..k[j]] this function returns the last index i in
+    1..k[j]-1 that maximizes (y[i] - yq[j]) / (d[k[j]] - d[i]), the slope
+    of the line from the point (d[k[j]], yq[j]) to the point (d[i], y[i]).
+    The maximum lies on the upper convex hull of the points 1..k[j]-1,
+    which is built once along the profile (monotone chain) and searched by
+    bisection for each path, so that the cost is O(n log n).
+    """
+    k = np.asarray(k)
+    order = np.argsort(k, kind="stable")
+
+    x = d.tolist()
+    y = y.tolist()
+
+    hull = []
+    found = []
+    i = 0
+    for kq, yqj in zip(k[order].tolist(), (np.asarray(yq, dtype=float) * np.ones(k.size))[order].tolist()):
+        while i < kq - 1:
+            i = i + 1
+            while len(hull) >= 2:
+                o = hull[-2]
+                a = hull[-1]
+                if (x[a] - x[o]) * (y[i] - y[o]) - (y[a] - y[o]) * (x[i] - x[o]) >= 0:
+                    hull.pop()
+                else:
+                    break
+            hull.append(i)
+
+        # the slope from the end point is unimodal along the hull
+        xq = x[kq]
+        lo = 0
+        hi = len(hull) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            a = hull[mid]
+            b = hull[mid + 1]
+            if (y[b] - yqj) / (xq - x[b]) >= (y[a] - yqj) / (xq - x[a]):
+                lo = mid + 1
+            else:
+                hi = mid
+        found.append(hull[lo])
+
+    out = np.zeros(k.size, dtype=int)
+    out[order] = found
+
+    return out
+
+
+def prefix_curved_tangent(d, y, k, yr, c, fun, rows, block=256, budget=16):
+    """
+    prefix_curved_tangent Highest slope from the end point of the paths d[0..k] back to their intermediate points over a curved Earth
+    i = prefix_curved_tangent(d, y, k, yr, c, fun, rows)
+
+    For each path d[0..k[j]] selected by the boolean mask rows this
+    function returns the last index i in 1..k[j]-1 that maximizes
+
+        F_j(i) = (y[i] - yr[j]) / (d[k[j]] - d[i]) - 500 * c[j] * (d[k[j]] - d[i])
+
+    where fun(jj, i) evaluates a function increasing with F_j(i) for the
+    paths jj (column) at the points i (one row per path); the other entries
+    of the result are zero. For a common c, F_j(i) is the slope from the
+    end point to the points (d[i], y[i] - 500*c*d[i]**2) plus a constant,
+    found by prefix_hull_tangent. As a function of c, F_j(i) is a line
+    whose slope decreases with i, so that the last maximizing point does
+    not decrease with c: the point of each path lies between the points
+    found by prefix_hull_tangent for the smallest and the largest c of a
+    group of paths. The groups are halved in c until these windows hold on
+    average at most budget points, which are then searched with fun.
+    """
+    k = np.asarray(k)
+    c = np.asarray(c, dtype=float) * np.ones(k.size)
+    yr = np.asarray(yr, dtype=float) * np.ones(k.size)
+    dt = d[k]
 
-    return Lbfs, Lb0p, Lb0b
+    def tangent(jj, cq):
+        return prefix_hull_tangent(d, y - 500 * cq * d**2, k[jj], yr[jj] - 500 * cq * dt[jj] ** 2)
 
+    out = np.zeros(k.size, dtype=int)
+    jj = np.flatnonzero(rows)
+    if jj.size == 0:
+        return out
 
-def path_fraction(d, zone, zone_r):
+    clo = c[jj].min()
+    chi = c[jj].max()
+    lo = tangent(jj, clo)
+    groups = [(jj, clo, chi, lo, lo if chi == clo else tangent(jj, chi))]
+
+    while groups:
+        jj, clo, chi, lo, hi = groups.pop()
+        cm = 0.5 * (clo + chi)
+        if np.sum(hi - lo + 1) > budget * jj.size and clo < cm < chi:
+            mid = tangent(jj, cm)
+            low = c[jj] <= cm
+            for part, cpart, lpart, hpart in ((low, (clo, cm), lo, mid), (~low, (cm, chi), mid, hi)):
+                if np.any(part):
+                    groups.append((jj[part], cpart[0], cpart[1], lpart[part], hpart[part]))
+            continue
+
+        # one point on either side against rounding in the hull searches
+        lo, hi = np.maximum(np.minimum(lo, hi) - 1, 1), np.minimum(np.maximum(lo, hi) + 1, k[jj] - 1)
+        for j0 in range(0, jj.size, int(block)):
+            jb = jj[j0 : j0 + int(block)]
+            lb = lo[j0 : j0 + int(block)]
+            hb = hi[j0 : j0 + int(block)]
+            ii = lb[:, np.newaxis] + np.arange(np.max(hb - lb) + 1)[np.newaxis, :]
+            window = ii <= hb[:, np.newaxis]
+            ii = np.minimum(ii, hb[:, np.newaxis])
+            out[jb] = ii[np.arange(jb.size), last_argmax(fun(jb, ii), window)]
+
+    return out
+
+
+def unimodal_argmax(fun, k):
     """
-    path_fraction Path fraction belonging to a given zone_r
-    omega = path_fraction(d, zone, zone_r)
-    This function computes the path fraction belonging to a given zone_r
-    of the great-circle path (km)
+    unimodal_argmax Point of the maximum of a unimodal function over the intermediate points of the paths d[0..k]
+    i = unimodal_argmax(fun, k)
 
-    Input arguments:
-    d       -   vector of distances in the path profile
-    zone    -   vector of zones in the path profile
-    zone_r  -   reference zone for which the fraction is computed
+    fun(i) evaluates the function of each path at one point i[j] per path.
+    If the function increases up to its maximum over the points 1..k-1 and
+    decreases after it, the maximum is found by bisection, in O(log n)
+    evaluations for all paths at once.
+    """
+    lo = np.ones(np.size(k), dtype=int)
+    hi = np.asarray(k) - 1
 
-    Output arguments:
-    omega   -   path fraction belonging to the given zone_r
+    while np.any(lo < hi):
+        active = lo < hi
+        mid = (lo + hi) // 2
+        up = fun(np.minimum(mid + 1, hi)) >= fun(mid)
+        lo = np.where(active & up, mid + 1, lo)
+        hi = np.where(active & ~up, mid, hi)
 
-    Example:
-    omega = path_fraction(d, zone, zone_r)
+    return lo
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    17MAR22     Ivica Stevanovic, OFCOM         First implementation in python
-    v1    11NOV22     Ivica Stevanovic, OFCOM         Corrected a bug in the second if clause (suggested by Martin-Pierre Lussier @mplussier)
+
+def prefix_blocks(d, k, rows, block):
     """
-    dm = 0
+    prefix_blocks Blocks of the paths from the transmitter to the points k of a single path profile
+    for jj, dk, inner in prefix_blocks(d, k, rows, block):
+
+    Yields the indices jj of at most block of the paths d[0..k] selected by
+    the boolean mask rows, the distances dk = d[0..max(k[jj])] as a row that
+    broadcasts against the paths of the block and the mask of the
+    intermediate points of each path. dk extends beyond the end of the
+    shorter paths of the block, so that it only serves for maxima over the
+    masked points.
+    """
+    jj = np.flatnonzero(rows)
+    for j0 in range(0, jj.size, int(block)):
+        kk = k[jj[j0 : j0 + int(block)]]
+        yield jj[j0 : j0 + int(block)], d[np.newaxis, 0 : kk[-1] + 1], inner_mask(kk + 1, kk[-1] + 1)
 
-    start, stop = find_intervals((zone == zone_r))
 
-    n = len(start)
+def smooth_earth_heights_batch(d, h, R, htg, hrg, ae, f, n, v1=None, v2=None):
+    """
+    smooth_earth_heights_batch smooth-Earth effective antenna heights for stacked profiles
+    hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype = smooth_earth_heights_batch(d, h, R, htg, hrg, ae, f, n)
+
+    Array counterpart of smooth_earth_heights. The profiles d, h and R are
+    2D arrays (N x nmax) as returned by stack_profiles, n are the profile
+    lengths and ae is an array of N median effective Earth radii. All
+    outputs are arrays of N values. The sums v1 and v2 of Eqs (85, 86) may
+    be passed in when they are already known (see smooth_earth_sums_radial).
+    """
+    NP, nmax = d.shape
+    rows = np.arange(NP)
+    last = n - 1
+    inner = inner_mask(n, nmax)
 
-    for i in range(0, n):
-        delta = 0
-        if d[stop[i]] < d[-1]:
-            delta = delta + (d[stop[i] + 1] - d[stop[i]]) / 2.0
+    dtot = d[rows, last][:, np.newaxis]
+    ae = column(ae)
+    htg = column(htg)
+    hrg = column(hrg)
 
-        if d[start[i]] > 0:
-            delta = delta + (d[start[i]] - d[start[i] - 1]) / 2.0
+    # Tx and Rx antenna heights above mean sea level amsl (m)
+    hts = h[:, 0:1] + htg
+    hrs = h[rows, last][:, np.newaxis] + hrg
 
-        dm = dm + d[stop[i]] - d[start[i]] + delta
+    htc = hts
+    hrc = hrs
 
-    omega = dm / (d[-1] - d[0])
+    # Section 5.6.1 Deriving the smooth-Earth surface
+    # (padded segments have zero length and do not contribute)
+    if v1 is None or v2 is None:
+        dd = d[:, 1:] - d[:, :-1]
+        v1 = (dd * (h[:, 1:] + h[:, :-1])).sum(axis=1)  # Eq (85)
+        v2 = (dd * (h[:, 1:] * (2 * d[:, 1:] + d[:, :-1]) + h[:, :-1] * (d[:, 1:] + 2 * d[:, :-1]))).sum(axis=1)  # Eq (86)
 
-    return omega
+    v1 = column(v1)
+    v2 = column(v2)
 
+    hst = (2 * v1 * dtot - v2) / dtot**2  # Eq (87)
+    hsr = (v2 - v1 * dtot) / dtot**2  # Eq (88)
 
-def longest_cont_dist(d, zone, zone_r):
-    """
-    longest_cont_dist Longest continuous path belonging to the zone_r
-    dm = longest_cont_dist(d, zone, zone_r)
-    This function computes the longest continuous section of the
-    great-circle path (km) for a given zone_r
+    hst_n = hst
+    hsr_n = hsr
 
-    Input arguments:
-    d       -   vector of distances in the path profile
-    zone    -   vector of zones in the path profile
-    zone_r  -   reference zone for which the longest continuous section
-                is computed
+    # Section 5.6.2 Smooth-surface heights for the diffraction model
 
-    Output arguments:
-    dm      -   the longest continuous section of the great-circle path (km) for a given zone_r
+    with np.errstate(divide="ignore", invalid="ignore"):
+        HH = h - (htc * (dtot - d) + hrc * d) / dtot  # Eq (89d)
 
-    Example:
-    dm = longest_cont_dist(d, zone, zone_r)
+        hobs = masked_max(HH, inner)[:, np.newaxis]  # Eq (89a)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
-    v1    11NOV22     Ivica Stevanovic, OFCOM         Corrected a bug in the second if clause for delta (suggested by Martin-Pierre Lussier @mplussier)
+        alpha_obt = masked_max(HH / d, inner)[:, np.newaxis]  # Eq (89b)
 
+        alpha_obr = masked_max(HH / (dtot - d), inner)[:, np.newaxis]  # Eq (89c)
+
+    # Calculate provisional values for the Tx and Rx smooth surface heights
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gt = alpha_obt / (alpha_obt + alpha_obr)  # Eq (90e)
+        gr = alpha_obr / (alpha_obt + alpha_obr)  # Eq (90f)
+
+    hstp = np.where(hobs <= 0, hst, hst - hobs * gt)  # Eq (90a, 90c)
+    hsrp = np.where(hobs <= 0, hsr, hsr - hobs * gr)  # Eq (90b, 90d)
+
+    # calculate the final values as required by the diffraction model
+
+    h0 = h[:, 0:1]
+    hn = h[rows, last][:, np.newaxis]
+
+    hstd = np.where(hstp >= h0, h0, hstp)  # Eq (91a, 91b)
+    hsrd = np.where(hsrp > hn, hn, hsrp)  # Eq (91c, 91d)
+
+    # Interfering antenna horizon elevation angle and distance
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta = 1000 * np.arctan((h - hts) / (1000 * d) - d / (2 * ae))  # Eq (77)
+
+    theta_td = 1000 * np.arctan((hrs - hts) / (1000 * dtot) - dtot / (2 * ae))  # Eq (78)
+    theta_rd = 1000 * np.arctan((hts - hrs) / (1000 * dtot) - dtot / (2 * ae))  # Eq (81)
+
+    theta_max = masked_max(theta, inner)[:, np.newaxis]  # Eq (76)
+
+    trans = theta_max > theta_td  # Eq (150): test for the trans-horizon path
+    pathtype = np.where(trans, 2, 1)
+
+    theta_t = np.maximum(theta_max, theta_td)  # Eq (79)
+
+    # transhorizon: Interfered-with antenna horizon elevation angle and distance
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta_rr = 1000 * np.arctan((h - hrs) / (1000 * (dtot - d)) - (dtot - d) / (2 * ae))  # Eq (82a)
+
+    lt_th = first_argmax(theta, inner)  # Eq (80)
+    lr_th = last_argmax(theta_rr, inner)  # Eq (83)
+    theta_r_th = masked_max(theta_rr, inner)[:, np.newaxis]
+
+    # LoS: the point with the highest diffraction parameter nu
+
+    # speed of light as per ITU.R P.2001
+    lam = 0.2998 / f
+    Ce = 1.0 / ae  # Section 4.3.1 supposing median effective Earth radius
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nu = (h + 500 * Ce * d * (dtot - d) - (hts * (dtot - d) + hrs * d) / dtot) * np.sqrt(0.002 * dtot / (lam * d * (dtot - d)))  # Eq (81)
+
+    lt_los = last_argmax(nu, inner)
+
+    theta_r = np.where(trans, theta_r_th, theta_rd)  # Eq (81)
+
+    lt = np.where(trans[:, 0], lt_th, lt_los)
+    lr = np.where(trans[:, 0], lr_th, lt_los)
+
+    dlt = d[rows, lt][:, np.newaxis]  # Eq (80)
+    dlr = dtot - d[rows, lr][:, np.newaxis]  # Eq (83, 83a)
+
+    # Angular distance
+
+    theta_tot = 1e3 * dtot / ae + theta_t + theta_r  # Eq (84)
+
+    # Section 5.6.3 Ducting/layer-reflection model
+
+    # Calculate the smooth-Earth heights at transmitter and receiver as
+    # required for the roughness factor
+
+    hst = np.minimum(hst, h0)  # Eq (92a)
+    hsr = np.minimum(hsr, hn)  # Eq (92b)
+
+    # Slope of the smooth-Earth surface
+
+    m = (hsr - hst) / dtot  # Eq (93)
+
+    # The terminal effective heigts for the ducting/layer-reflection model
+
+    hte = htg + h0 - hst  # Eq (94a)
+    hre = hrg + hn - hsr  # Eq (94b)
+
+    ii = np.arange(nmax)[np.newaxis, :]
+    hm = masked_max(h - (hst + m * d), (ii >= lt[:, np.newaxis]) & (ii <= lr[:, np.newaxis]))  # Eq (95)
+
+    out = [hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype]
+
+    return tuple(np.reshape(x, (NP,)) for x in out)
+
+
+def smooth_earth_heights_radial(d, h, htg, hrg, ae, f, k, v1, v2, block=256):
     """
-    dm = 0
+    smooth_earth_heights_radial smooth-Earth effective antenna heights for the paths from the transmitter to the points k
+    hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype = smooth_earth_heights_radial(d, h, htg, hrg, ae, f, k, v1, v2)
+
+    Counterpart of smooth_earth_heights_batch for all paths d[0..k] along a
+    single profile (d, h), with the sums v1 and v2 from
+    smooth_earth_sums_radial and ae an array of values, one per path. Most
+    maxima over the intermediate points are found along the profile: the
+    Tx horizon angle of Eq (76) and hobs of Eq (89a) with
+    prefix_line_argmax, alpha_obt of Eq (89b) as a running maximum, and
+    alpha_obr of Eq (89c) with prefix_hull_tangent, and the Rx horizon
+    angle of Eq (82a) with prefix_curved_tangent. The terrain roughness hm
+    of Eq (95) of transhorizon paths is found with prefix_line_argmax over
+    the points up to the Rx horizon, and only searched between the horizon
+    points of the paths where that maximum lies before the Tx horizon. The
+    diffraction parameter nu of LoS paths is evaluated over the points of
+    each path in blocks of at most block paths.
+    """
+    NP = k.size
+    ae = np.asarray(ae, dtype=float) * np.ones(NP)
 
-    if zone_r == 34:  # inland + coastal land
-        start, stop = find_intervals((zone == 3) + (zone == 4))
-    else:
-        start, stop = find_intervals((zone == zone_r))
+    dtot = d[k]
 
-    n = len(start)
+    # Tx and Rx antenna heights above mean sea level amsl (m)
+    hts = h[0] + htg
+    hrs = h[k] + hrg
 
-    for i in range(0, n):
-        delta = 0
-        if d[stop[i]] < d[-1]:
-            delta = delta + (d[stop[i] + 1] - d[stop[i]]) / 2.0
+    h0 = h[0]
+    hn = h[k]
 
-        if d[start[i]] > 0:
-            delta = delta + (d[start[i]] - d[start[i] - 1]) / 2.0
+    # Section 5.6.1 Deriving the smooth-Earth surface
 
-        dm = max(d[stop[i]] - d[start[i]] + delta, dm)
+    hst = (2 * v1 * dtot - v2) / dtot**2  # Eq (87)
+    hsr = (v2 - v1 * dtot) / dtot**2  # Eq (88)
 
-    return dm
+    hst_n = hst
+    hsr_n = hsr
 
+    # Interfering antenna horizon elevation angle and distance, the arctan in
+    # Eq (77) is increasing, so that the horizon point (80) is the highest of
+    # the lines (h_i - hts)/(1000 d_i) - d_i/2 * (1/ae)
 
-def inv_cum_norm(x):
-    """
-    inv_cum_norm approximation to the inverse cummulative normal distribution
-    I = inv_cum_norm( x )
-    This function implements an approximation to the inverse cummulative
-    normal distribution function for 0< x < 1 as defined in Attachment 2 to
-    Annex 1 of the ITU-R P.1812-6
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lt_th = prefix_line_argmax((h - hts) / (1000 * d), -d / 2, 1.0 / ae, k)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
-    """
-    if x < 0.000001:
-        x = 0.000001
+    dl = d[lt_th]
+    theta_max = 1000 * np.arctan((h[lt_th] - hts) / (1000 * dl) - dl / (2 * ae))  # Eq (76, 77)
 
-    if x > 0.999999:
-        x = 0.999999
+    theta_td = 1000 * np.arctan((hrs - hts) / (1000 * dtot) - dtot / (2 * ae))  # Eq (78)
+    theta_rd = 1000 * np.arctan((hts - hrs) / (1000 * dtot) - dtot / (2 * ae))  # Eq (81)
 
-    if x <= 0.5:
-        I = T(x) - C(x)  # (96a)
-    else:
-        I = -(T(1 - x) - C(1 - x))  # (96b)
+    trans = theta_max > theta_td  # Eq (150): test for the trans-horizon path
+    pathtype = np.where(trans, 2, 1)
 
-    return I
+    theta_t = np.maximum(theta_max, theta_td)  # Eq (79)
 
+    # transhorizon: Interfered-with antenna horizon elevation angle and distance
 
-def T(y):
-    return np.sqrt(-2.0 * np.log(y))  # eq (97a)
+    # 1000 times the arctan argument of Eq (82a) is (h_i - hrs)/(dtot - d_i)
+    # less 500*(dtot - d_i)/ae, a curved-Earth slope from the Rx
 
+    def theta_rr(jj, i):
+        ddi = column(dtot[jj]) - d[i]
+        return 1000 * np.arctan((h[i] - column(hrs[jj])) / (1000 * ddi) - ddi / (2 * column(ae[jj])))  # Eq (82a)
 
-def C(z):  # eq (97)
-    C0 = 2.515516698
-    C1 = 0.802853
-    C2 = 0.010328
-    D1 = 1.432788
-    D2 = 0.189269
-    D3 = 0.001308
+    lr_th = prefix_curved_tangent(d, h, k, hrs, 1.0 / ae, theta_rr, trans, block)  # Eq (83)
+    ddi = dtot - d[lr_th]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta_r_th = 1000 * np.arctan((h[lr_th] - hrs) / (1000 * ddi) - ddi / (2 * ae))  # Eq (82a)
 
-    return (((C2 * T(z) + C1) * T(z)) + C0) / (((D3 * T(z) + D2) * T(z) + D1) * T(z) + 1)  # eq (97b)
+    # LoS: the point with the highest diffraction parameter nu
 
+    # speed of light as per ITU.R P.2001
+    lam = 0.2998 / f
+    Ce = 1.0 / ae  # Section 4.3.1 supposing median effective Earth radius
 
-def great_circle_path(Phire, Phite, Phirn, Phitn, Re, dpnt):
-    """
-    great_circle_path Great-circle path calculations according to Attachment H
-    This function computes the great-circle intermediate points on the
-    radio path as defined in ITU-R P.2001-4 Attachment H
+    lt_los = np.zeros(NP, dtype=int)
 
-        Input parameters:
-        Phire   -   Receiver longitude, positive to east (deg)
-        Phite   -   Transmitter longitude, positive to east (deg)
-        Phirn   -   Receiver latitude, positive to north (deg)
-        Phitn   -   Transmitter latitude, positive to north (deg)
-        Re      -   Average Earth radius (km)
-        dpnt    -   Distance from the transmitter to the intermediate point (km)
+    for jj, dk, inner in prefix_blocks(d, k, ~trans, block):
+        hk = h[np.newaxis, 0 : dk.shape[1]]
+        dt = column(dtot[jj])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nu = (hk + 500 * column(Ce[jj]) * dk * (dt - dk) - (hts * (dt - dk) + column(hrs[jj]) * dk) / dt) * np.sqrt(0.002 * dt / (lam * dk * (dt - dk)))  # Eq (81)
 
-        Output parameters:
-        Phipnte -   Longitude of the intermediate point (deg)
-        Phipntn -   Latitude of the intermediate point (deg)
-        Bt2r    -   Bearing of the great-circle path from Tx towards the Rx (deg)
-        dgc     -   Great-circle path length (km)
+        lt_los[jj] = last_argmax(nu, inner)
 
-        Example:
-        [Bt2r, Phipnte, Phipntn, dgc] = great_circle_path(Phire, Phite, Phirn, Phitn, Re, dpnt)
+    theta_r = np.where(trans, theta_r_th, theta_rd)  # Eq (81)
 
-        Rev   Date        Author                          Description
-        -------------------------------------------------------------------------------
-        v0    05SEP22     Ivica Stevanovic, OFCOM         Initial version
-    """
-    ## H.2 Path length and bearing
+    lt = np.where(trans, lt_th, lt_los)
+    lr = np.where(trans, lr_th, lt_los)
 
-    # Difference (deg) in longitude between the terminals (H.2.1)
+    dlt = d[lt]  # Eq (80)
+    dlr = dtot - d[lr]  # Eq (83, 83a)
 
-    Dlon = Phire - Phite
+    # Angular distance
 
-    # Calculate quantity r (H.2.2)
+    theta_tot = 1e3 * dtot / ae + theta_t + theta_r  # Eq (84)
 
-    r = sind(Phitn) * sind(Phirn) + cosd(Phitn) * cosd(Phirn) * cosd(Dlon)
+    # Section 5.6.3 Ducting/layer-reflection model
 
-    # Calculate the path length as the angle subtended at the center of
-    # average-radius Earth (H.2.3)
+    # Calculate the smooth-Earth heights at transmitter and receiver as
+    # required for the roughness factor
 
-    Phid = np.arccos(r)  # radians
+    hst = np.minimum(hst, h0)  # Eq (92a)
+    hsr = np.minimum(hsr, hn)  # Eq (92b)
 
-    # Calculate the great-circle path length (H.2.4)
+    # Slope of the smooth-Earth surface
 
-    dgc = Phid * Re  # km
+    m = (hsr - hst) / dtot  # Eq (93)
 
-    # Calculate the quantity x1 (H.2.5a)
+    # The terminal effective heigts for the ducting/layer-reflection model
 
-    x1 = sind(Phirn) - r * sind(Phitn)
+    hte = htg + h0 - hst  # Eq (94a)
+    hre = hrg + hn - hsr  # Eq (94b)
 
-    # Calculate the quantity y1 (H.2.5b)
+    # The terrain roughness, over the points between the horizon points, a
+    # single point for LoS paths. The highest of the lines h_i - d_i*m over
+    # the points up to lr is found along the profile, and is the maximum of
+    # Eq (95) unless it lies before lt: only those paths are searched over
+    # the points lt..lr
 
-    y1 = cosd(Phitn) * cosd(Phirn) * sind(Dlon)
+    im = np.where(trans, prefix_line_argmax(h, -d, m, lr + 1), lt)
+    jj = np.flatnonzero(im < lt)
+    for j0 in range(0, jj.size, int(block)):
+        jb = jj[j0 : j0 + int(block)]
+        ii = lt[jb, np.newaxis] + np.arange(np.max(lr[jb] - lt[jb]) + 1)[np.newaxis, :]
+        window = ii <= lr[jb, np.newaxis]
+        ii = np.minimum(ii, lr[jb, np.newaxis])
+        im[jb] = ii[np.arange(jb.size), last_argmax(h[ii] - column(m[jb]) * d[ii], window)]
 
-    # Calculate the bearing of the great-circle path for Tx to Rx (H.2.6)
+    hm = h[im] - (hst + m * d[im])  # Eq (95)
 
-    if abs(x1) < 1e-9 and abs(y1) < 1e-9:
-        Bt2r = Phire
-    else:
-        Bt2r = atan2d(y1, x1)
+    # Section 5.6.2 Smooth-surface heights for the diffraction model
 
-    ## H.3 Calculation of intermediate path point
+    # Eq (89d) is the height of the points above the line h_i = hts + s*d_i
+    # from the Tx to the Rx antenna, so that the highest point (89a) is the
+    # highest of the lines (h_i - hts) - d_i*s, the highest slope from the
+    # Tx (89b) a running maximum
 
-    # Calculate the distance to the point as the angle subtended at the center
-    # of average-radius Earth (H.3.1)
+    s = (hrs - hts) / dtot
 
-    Phipnt = dpnt / Re  # radians
+    with np.errstate(divide="ignore", invalid="ignore"):
+        io = prefix_line_argmax(h - hts, -d, s, k)
+        it = prefix_line_argmax((h - hts) / d, np.zeros(d.size), 0.0, k)
 
-    # Calculate quantity s (H.3.2)
+    hobs = h[io] - (hts * (dtot - d[io]) + hrs * d[io]) / dtot  # Eq (89a, 89d)
 
-    s = sind(Phitn) * np.cos(Phipnt) + cosd(Phitn) * np.sin(Phipnt) * cosd(Bt2r)
+    alpha_obt = (h[it] - (hts * (dtot - d[it]) + hrs * d[it]) / dtot) / d[it]  # Eq (89b)
 
-    # The latitude of the intermediate point is now given by (H.3.3)
+    # and the highest slope from the Rx (89c) the highest slope from the
+    # point (dtot, hrs) to the terrain, plus s
 
-    Phipntn = asind(s)  # degs
+    ir = prefix_hull_tangent(d, h, k, hrs)
 
-    # Calculate the quantity x2 (H.3.4a)
+    alpha_obr = (h[ir] - (hts * (dtot - d[ir]) + hrs * d[ir]) / dtot) / (dtot - d[ir])  # Eq (89c)
 
-    x2 = np.cos(Phipnt) - s * sind(Phitn)
+    # Calculate provisional values for the Tx and Rx smooth surface heights
 
-    # Calculate the quantity y2 (H.3.4b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gt = alpha_obt / (alpha_obt + alpha_obr)  # Eq (90e)
+        gr = alpha_obr / (alpha_obt + alpha_obr)  # Eq (90f)
 
-    y2 = cosd(Phitn) * np.sin(Phipnt) * sind(Bt2r)
+    hstp = np.where(hobs <= 0, hst_n, hst_n - hobs * gt)  # Eq (90a, 90c)
+    hsrp = np.where(hobs <= 0, hsr_n, hsr_n - hobs * gr)  # Eq (90b, 90d)
 
-    # Calculate the longitude of the intermediate point Phipnte (H.3.5)
+    # calculate the final values as required by the diffraction model
 
-    if x2 < 1e-9 and y2 < 1e-9:
-        Phipnte = Bt2r
-    else:
-        Phipnte = Phite + atan2d(y2, x2)
+    hstd = np.where(hstp >= h0, h0, hstp)  # Eq (91a, 91b)
+    hsrd = np.where(hsrp > hn, hn, hsrp)  # Eq (91c, 91d)
 
-    return Phipnte, Phipntn, Bt2r, dgc
+    return hst_n, hsr_n, hst, hsr, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta_tot, pathtype
 
 
-def isempty(x):
-    if np.size(x) == 0:
-        return True
-    else:
-        return False
+def tl_anomalous_batch(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0):
+    """
+    tl_anomalous_batch Basic transmission loss due to anomalous propagation for arrays of paths
+    Lba = tl_anomalous_batch(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0)
 
+    Array counterpart of tl_anomalous. All path parameters are arrays of N
+    values, f and p are shared scalars.
+    """
 
-def issorted(a):
-    if np.all(np.diff(a) >= 0):
-        return True
-    else:
-        return False
+    # empirical correction to account for the increasing attenuation with
+    # wavelength inducted propagation (47a)
 
+    Alf = 0
 
-def sind(x):
-    return np.sin(x * np.pi / 180.0)
+    if f < 0.5:
+        Alf = 45.375 - 137.0 * f + 92.5 * f * f
 
+    # site-shielding diffraction losses for the interfering and interfered-with
+    # stations (48)
 
-def cosd(x):
-    return np.cos(x * np.pi / 180.0)
+    theta_t2 = theta_t - 0.1 * dlt  # eq (48a)
+    theta_r2 = theta_r - 0.1 * dlr
 
+    with np.errstate(invalid="ignore"):
+        Ast = np.where(theta_t2 > 0, 20 * np.log10(1 + 0.361 * theta_t2 * np.sqrt(f * dlt)) + 0.264 * theta_t2 * f ** (1.0 / 3.0), 0)
+        Asr = np.where(theta_r2 > 0, 20 * np.log10(1 + 0.361 * theta_r2 * np.sqrt(f * dlr)) + 0.264 * theta_r2 * f ** (1.0 / 3.0), 0)
 
-def asind(x):
-    return np.arcsin(x) * 180.0 / np.pi
+    # over-sea surface duct coupling correction for the interfering and
+    # interfered-with stations (49) and (49a)
 
+    Act = np.where((dct <= 5) & (dct <= dlt) & (omega >= 0.75), -3 * np.exp(-0.25 * dct * dct) * (1 + np.tanh(0.07 * (50 - hts))), 0)
+    Acr = np.where((dcr <= 5) & (dcr <= dlr) & (omega >= 0.75), -3 * np.exp(-0.25 * dcr * dcr) * (1 + np.tanh(0.07 * (50 - hrs))), 0)
 
-def atan2d(y, x):
-    return np.arctan2(y, x) * 180.0 / np.pi
+    # specific attenuation (51)
 
+    gamma_d = 5e-5 * ae * f ** (1.0 / 3.0)
 
-def find_intervals(series):
-    """
-    find_intervals Find all intervals with consecutive 1's
-    [k1, k2] = find_intervals(series)
-    This function finds all 1's intervals, namely, the indices when the
-    intervals start and where they end
+    # angular distance (corrected where appropriate) (52-52a)
 
-    For example, for the input indices
-            0 0 1 1 1 1 0 0 0 1 1 0 0
-    this function will give back
-        k1 = 3, 10
-        k2 = 6, 11
+    theta_t1 = np.where(theta_t > 0.1 * dlt, 0.1 * dlt, theta_t)
+    theta_r1 = np.where(theta_r > 0.1 * dlr, 0.1 * dlr, theta_r)
 
-    Input arguments:
-    indices -   vector containing zeros and ones
+    theta1 = 1e3 * dtot / ae + theta_t1 + theta_r1
 
-    Output arguments:
-    k1      -   vector of start-indices of the found intervals
-    k2      -   vector of end-indices of the found intervals
+    dI = np.minimum(dtot - dlt - dlr, 40)  # eq (56a)
 
-    Example:
-    [k1, k2] = find_intervals(indices)
+    mu3 = np.where(hm > 10, np.exp(-4.6e-5 * (hm - 10) * (43 + 6 * dI)), 1)  # eq (56)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    18MAR22     Ivica Stevanovic, OFCOM         First implementation in python
+    tau = 1 - np.exp(-(4.12e-4 * dlm**2.41))  # eq (3)
 
-    """
-    k1 = []
-    k2 = []
-    series_int = 1 * series
+    epsilon = 3.5
 
-    if max(series_int) == 1:
-        (k1,) = np.where(np.diff(np.append(0, series_int)) == 1)
-        (k2,) = np.where(np.diff(np.append(series_int, 0)) == -1)
+    alpha = -0.6 - epsilon * 1e-9 * dtot ** (3.1) * tau  # eq (55a)
 
-    return k1, k2
+    alpha = np.maximum(alpha, -3.4)
 
+    # correction for path geometry:
 
-def earth_rad_eff(DN):
-    """
-    earth_rad_eff Median value of the effective Earth radius
-    [ae, ab] = earth_rad_eff(DN)
-    This function computes the median value of the effective earth
-    radius, and the effective Earth radius exceeded for beta0% of time
-    as defined in ITU-R P.1812-6.
+    mu2 = (500 / ae * dtot**2 / (np.sqrt(hte) + np.sqrt(hre)) ** 2) ** alpha  # eq (55)
 
-    Input arguments:
-    DN      -   the average radio refractivity lapse-rate through the
-                lowest 1 km of the atmosphere (N-units/km)
+    mu2 = np.minimum(mu2, 1)
 
-    Output arguments:
-    ae      -   the median effective Earth radius (km)
-    ab      -   the effective Earth radius exceeded for beta0 % of time
+    beta = b0 * mu2 * mu3  # eq (54)
 
-    Example:
-    ae, ab = earth_rad_eff(DN)
+    Gamma = 1.076 / (2.0058 - np.log10(beta)) ** 1.012 * np.exp(-(9.51 - 4.8 * np.log10(beta) + 0.198 * (np.log10(beta)) ** 2) * 1e-6 * dtot ** (1.13))  # eq (53a)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22   Ivica Stevanovic, OFCOM         Initial implementation
-    """
+    # time percentage variablity (cumulative distribution):
 
-    k50 = 157 / (157 - DN)  # (6)
+    Ap = -12 + (1.2 + 3.7e-3 * dtot) * np.log10(p / beta) + 12 * (p / beta) ** Gamma  # eq (53)
 
-    ae = 6371 * k50  # (7a)
+    # time percentage and angular-distance dependent losses within the
+    # anomalous propagation mechanism
 
-    kbeta = 3
+    Adp = gamma_d * theta1 + Ap  # eq (50)
 
-    ab = 6371 * kbeta  # (7b)
+    # total of fixed coupling losses (except for local clutter losses) between
+    # the antennas and the anomalous propagation structure within the
+    # atmosphere (47)
 
-    return ae, ab
+    Af = 102.45 + 20 * np.log10(f) + 20 * np.log10(dlt + dlr) + Alf + Ast + Asr + Act + Acr
 
+    # total basic transmission loss occuring during periods of anomalaous
+    # propagation (46)
 
-def dl_se_ft_inner(epsr, sigma, d, hte, hre, adft, f):
-    """
-    dl_se_ft_inner The inner routine of the first-term spherical diffraction loss
-    This function computes the first-term part of Spherical-Earth diffraction
-    loss exceeded for p% time for antenna heights
-    as defined in Sec. 4.3.3 of the ITU-R P.1812-4, equations (29-36)
+    Lba = Af + Adp
 
-        Input parameters:
-        epsr    -   Relative permittivity
-        sigma   -   Conductivity (S/m)
-        d       -   Great-circle path distance (km)
-        hte     -   Effective height of interfering antenna (m)
-        hre     -   Effective height of interfered-with antenna (m)
-        adft    -   effective Earth radius (km)
-        f       -   frequency (GHz)
+    return Lba
 
-        Output parameters:
-        Ldft   -   The first-term spherical-Earth diffraction loss not exceeded for p% time
-                    implementing equations (29-36), Ldft(1) is for horizontal
-                    and Ldft(2) for the vertical polarization
 
-        Example:
-        Ldft = dl_se_ft_inner(epsr, sigma, d, hte, hre, adft, f)
+def dl_se_ft_inner_batch(epsr, sigma, d, hte, hre, adft, f):
+    """
+    dl_se_ft_inner_batch The inner routine of the first-term spherical diffraction loss for arrays of paths
+    Ldft = dl_se_ft_inner_batch(epsr, sigma, d, hte, hre, adft, f)
 
-        Rev   Date        Author                          Description
-        -------------------------------------------------------------------------------
-        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial implementation
+    Array counterpart of dl_se_ft_inner. d, hte, hre and adft are arrays of
+    N values, the output is an (N x 2) array with the horizontal (column 0)
+    and the vertical (column 1) polarization.
     """
+    d = column(d)
+    hte = column(hte)
+    hre = column(hre)
+    adft = column(adft)
 
     # Normalized factor for surface admittance for horizontal (1) and vertical
     # (2) polarizations
 
-    K = np.zeros(2)
+    K0 = 0.036 * (adft * f) ** (-1.0 / 3.0) * ((epsr - 1) ** 2 + (18 * sigma / f) ** 2.0) ** (-1.0 / 4.0)  # Eq (29a)
 
-    K[0] = 0.036 * (adft * f) ** (-1.0 / 3.0) * ((epsr - 1) ** 2 + (18 * sigma / f) ** 2.0) ** (-1.0 / 4.0)  # Eq (29a)
+    K1 = K0 * (epsr**2 + (18 * sigma / f) ** 2) ** (1.0 / 2.0)  # Eq (29b)
 
-    K[1] = K[0] * (epsr**2 + (18 * sigma / f) ** 2) ** (1.0 / 2.0)  # Eq (29b)
+    K = np.concatenate((K0, K1), axis=1)
 
     # Earth ground/polarization parameter
 
@@ -1275,113 +3979,60 @@ def dl_se_ft_inner(epsr, sigma, d, hte, hre, adft, f):
 
     # Calculate the distance term given by:
 
-    Fx = np.zeros(2)
-
-    for ii in range(0, 2):
-        if X[ii] >= 1.6:
-            Fx[ii] = 11 + 10 * np.log10(X[ii]) - 17.6 * X[ii]
-        else:
-            Fx[ii] = -20 * np.log10(X[ii]) - 5.6488 * (X[ii]) ** 1.425  # Eq (33)
-
-    Bt = beta_dft * Yt  # Eq (35)
-
-    Br = beta_dft * Yr  # Eq (35)
-
-    GYt = np.zeros(2)
-    GYr = np.zeros(2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Fx = np.where(X >= 1.6, 11 + 10 * np.log10(X) - 17.6 * X, -20 * np.log10(X) - 5.6488 * (X) ** 1.425)  # Eq (33)
 
-    for ii in range(0, 2):
-        if Bt[ii] > 2:
-            GYt[ii] = 17.6 * (Bt[ii] - 1.1) ** 0.5 - 5 * np.log10(Bt[ii] - 1.1) - 8
-        else:
-            GYt[ii] = 20 * np.log10(Bt[ii] + 0.1 * Bt[ii] ** 3)
+    Bt = beta_dft * Yt  # Eq (35)
 
-        if Br[ii] > 2:
-            GYr[ii] = 17.6 * (Br[ii] - 1.1) ** 0.5 - 5 * np.log10(Br[ii] - 1.1) - 8
-        else:
-            GYr[ii] = 20 * np.log10(Br[ii] + 0.1 * Br[ii] ** 3)
+    Br = beta_dft * Yr  # Eq (35)
 
-        if GYr[ii] < 2 + 20 * np.log10(K[ii]):
-            GYr[ii] = 2 + 20 * np.log10(K[ii])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        GYt = np.where(Bt > 2, 17.6 * (Bt - 1.1) ** 0.5 - 5 * np.log10(Bt - 1.1) - 8, 20 * np.log10(Bt + 0.1 * Bt**3))
+        GYr = np.where(Br > 2, 17.6 * (Br - 1.1) ** 0.5 - 5 * np.log10(Br - 1.1) - 8, 20 * np.log10(Br + 0.1 * Br**3))
 
-        if GYt[ii] < 2 + 20 * np.log10(K[ii]):
-            GYt[ii] = 2 + 20 * np.log10(K[ii])
+    GYmin = 2 + 20 * np.log10(K)
+
+    GYr = np.where(GYr < GYmin, GYmin, GYr)
+    GYt = np.where(GYt < GYmin, GYmin, GYt)
 
     Ldft = -Fx - GYt - GYr  # Eq (36)
 
     return Ldft
 
 
-def dl_se_ft(d, hte, hre, adft, f, omega):
+def dl_se_ft_batch(d, hte, hre, adft, f, omega):
     """
-    dl_se_ft First-term part of spherical-Earth diffraction according to ITU-R P.1812-6
-    This function computes the first-term part of Spherical-Earth diffraction
-    loss exceeded for p% time for antenna heights
-    as defined in Sec. 4.3.3 of the ITU-R P.1812-6
-
-    Input parameters:
-    d       -   Great-circle path distance (km)
-    hte     -   Effective height of interfering antenna (m)
-    hre     -   Effective height of interfered-with antenna (m)
-    adft    -   effective Earth radius (km)
-    f       -   frequency (GHz)
-    omega   -   fraction of the path over sea
-
-    Output parameters:
-    Ldft   -   The first-term spherical-Earth diffraction loss not exceeded for p% time
-                Ldft(1) is for the horizontal polarization
-                Ldft(2) is for the vertical polarization
-
-    Example:
-    Ldft = dl_se_ft(d, hte, hre, adft, f, omega)
+    dl_se_ft_batch First-term part of spherical-Earth diffraction for arrays of paths
+    Ldft = dl_se_ft_batch(d, hte, hre, adft, f, omega)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial implementation
+    Array counterpart of dl_se_ft, returns an (N x 2) array.
     """
 
     # First-term part of the spherical-Earth diffraction loss over land
 
-
-    Ldft_land = dl_se_ft_inner(22, 0.003, d, hte, hre, adft, f)
+    Ldft_land = dl_se_ft_inner_batch(22, 0.003, d, hte, hre, adft, f)
 
     # First-term part of the spherical-Earth diffraction loss over sea
 
-    Ldft_sea = dl_se_ft_inner(80, 5, d, hte, hre, adft, f)
+    Ldft_sea = dl_se_ft_inner_batch(80, 5, d, hte, hre, adft, f)
 
     # First-term spherical diffraction loss
 
+    omega = column(omega)
+
     Ldft = omega * Ldft_sea + (1 - omega) * Ldft_land  # Eq (28)
 
     return Ldft
 
 
-def dl_se(d, hte, hre, ap, f, omega):
+def dl_se_batch(d, hte, hre, ap, f, omega):
     """
-    dl_se spherical-Earth diffraction loss exceeded for p% time according to ITU-R P.1812-6
-    This function computes the Spherical-Earth diffraction loss exceeded
-    for p% time for antenna heights hte and hre (m)
-    as defined in Sec. 4.3.2 of the ITU-R P.1812-6
-
-    Input parameters:
-    d       -   Great-circle path distance (km)
-    hte     -   Effective height of interfering antenna (m)
-    hre     -   Effective height of interfered-with antenna (m)
-    ap      -   the effective Earth radius in kilometers
-    f       -   frequency expressed in GHz
-    omega   -   the fraction of the path over sea
-
-    Output parameters:
-    Ldsph   -   The spherical-Earth diffraction loss not exceeded for p% time
-                Ldsph(1) is for the horizontal polarization
-                Ldsph(2) is for the vertical polarization
-
-    Example:
-    Ldsph = dl_se(d, hte, hre, ap, f, omega)
+    dl_se_batch spherical-Earth diffraction loss exceeded for p% time for arrays of paths
+    Ldsph = dl_se_batch(d, hte, hre, ap, f, omega)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+    Array counterpart of dl_se. d, hte, hre, ap and omega are arrays of N
+    values, the output is an (N x 2) array with the horizontal (column 0)
+    and the vertical (column 1) polarization.
     """
 
     # Wavelength in meters
@@ -1392,17 +4043,15 @@ def dl_se(d, hte, hre, ap, f, omega):
 
     dlos = np.sqrt(2.0 * ap) * (np.sqrt(0.001 * hte) + np.sqrt(0.001 * hre))  # Eq (22)
 
-    if d >= dlos:
-        # calculate diffraction loss Ldft using the method in Sec. Sec. 4.3.3 for
-        # adft = ap and set Ldsph to Ldft
+    # d >= dlos: calculate diffraction loss Ldft using the method in Sec. 4.3.3 for
+    # adft = ap and set Ldsph to Ldft
 
-        Ldsph = dl_se_ft(d, hte, hre, ap, f, omega)
+    Ldsph_ft = dl_se_ft_batch(d, hte, hre, ap, f, omega)
 
-        return Ldsph
-    else:
-        # calculate the smallest clearance between the curved-Earth path and
-        # the ray between the antennas, hse
+    # d < dlos: calculate the smallest clearance between the curved-Earth path and
+    # the ray between the antennas, hse
 
+    with np.errstate(divide="ignore", invalid="ignore"):
         c = (hte - hre) / (hte + hre)  # Eq (24d)
         m = 250 * d * d / (ap * (hte + hre))  # Eq (24e)
 
@@ -1418,227 +4067,144 @@ def dl_se(d, hte, hre, ap, f, omega):
 
         hreq = 17.456 * np.sqrt(dse1 * dse2 * lam / d)  # Eq (25)
 
-        if hse > hreq:
-            Ldsph = np.zeros(2)
-            return Ldsph
-        else:
-            # calculate the modified effective Earth radius aem, which gives
-            # marginal LoS at distance d
+        # calculate the modified effective Earth radius aem, which gives
+        # marginal LoS at distance d
 
-            aem = 500 * (d / (np.sqrt(hte) + np.sqrt(hre))) ** 2  # Eq (26)
+        aem = 500 * (d / (np.sqrt(hte) + np.sqrt(hre))) ** 2  # Eq (26)
 
-            # Use the method in Sec. 4.2.2.1 for adft ) aem to obtain Ldft
+        # Use the method in Sec. 4.2.2.1 for adft ) aem to obtain Ldft
 
-            Ldft = dl_se_ft(d, hte, hre, aem, f, omega)
-            Ldft[Ldft < 0.0] = 0.0
-            Ldsph = (1 - hse / hreq) * Ldft  # Eq (27)
+        Ldft = dl_se_ft_batch(d, hte, hre, aem, f, omega)
+        Ldft[Ldft < 0.0] = 0.0
+        Ldsph_los = np.where((hse > hreq)[:, np.newaxis], 0.0, (1 - hse / hreq)[:, np.newaxis] * Ldft)  # Eq (27)
+
+    Ldsph = np.where((d >= dlos)[:, np.newaxis], Ldsph_ft, Ldsph_los)
 
     return Ldsph
 
 
-def dl_p(d, g, hts, hrs, hstd, hsrd, f, omega, p, b0, DN, flag4):
+def dl_bull_batch(d, g, hts, hrs, ap, f, n):
     """
-    dl_p Diffraction loss model not exceeded for p% of time according to P.1812-6
-
-    This function computes the diffraction loss not exceeded for p% of time
-    as defined in ITU-R P.1812-6 (Section 4.3-5) and Attachment 4 to Annex 1
-
-        Input parameters:
-        d       -   vector of distances di of the i-th profile point (km)
-        g       -   vector gi of heights of the i-th profile point (meters
-                    above mean sea level) + Representative clutter height.
-                    Both vectors g and d contain n+1 profile points
-        hts     -   transmitter antenna height in meters above sea level (i=0)
-        hrs     -   receiver antenna height in meters above sea level (i=n)
-        hstd    -   Effective height of interfering antenna (m amsl) c.f. 5.1.6.3
-        hsrd    -   Effective height of interfered-with antenna (m amsl) c.f. 5.1.6.3
-        f       -   frequency expressed in GHz
-        omega   -   the fraction of the path over sea
-        p       -   percentage of time
-        b0      -   the time percentage that the refractivity gradient (DELTA-N) exceeds 100 N-units/km in the first 100m of the lower atmosphere
-        DN      -   the average radio-refractivity lapse-rate through the
-                    lowest 1 km of the atmosphere. Note that DN is positive
-                    quantity in this procedure
-        flag4   -   Set to 1 if the alternative method is used to calculate Lbulls
-                    without using terrain profile analysis (Attachment 4 to Annex 1)
-
-        Output parameters:
-        Ldp      -   diffraction loss for the general path not exceeded for p % of the time
-                     according to Section 4.3.4 of ITU-R P.1812-6.
-                     Ldp(1) is for the horizontal polarization
-                     Ldp(2) is for the vertical polarization
-        Ldb      -   diffraction loss for p = beta_0%
-        Ld50     -   diffraction loss for p = 50%
-        Lbulla50 -   Bullington diffraction (4.3.1) for actual terrain profile g and antenna heights
-        Lbulls50 -   Bullington diffraction (4.3.1) with all profile heights g set to zero and modified antenna heights
-        Ldshp50  -   Spherical diffraction (4.3.2) for the actual path d and modified antenna heights
-
-        Example:
-        Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_p( d, h, hts, hrs, hstd, hsrd, ap, f, omega, p, b0, DN, flag4 )
-
-
-        Rev   Date        Author                          Description
-        -------------------------------------------------------------------------------
-        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
+    dl_bull_batch Bullington part of the diffraction loss for stacked profiles
+    Lbull = dl_bull_batch(d, g, hts, hrs, ap, f, n)
 
+    Array counterpart of dl_bull. d and g are 2D arrays (N x nmax) as returned
+    by stack_profiles, n are the profile lengths, hts, hrs and ap are arrays
+    of N values.
     """
-
-    # Use the method in 4.3.4 to calculate diffraction loss Ld for median effective
-    # Earth radius ap = ae as given by equation (7a). Set median diffraction
-    # loss to Ldp50
-
-    ae, ab = earth_rad_eff(DN)
-
-    ap = ae
-
-    Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4)
-
-    if p == 50:
-        Ldp = Ld50
-        ap = ab
-        Ldb, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4)
-        return Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50
-
-    if p < 50:
-        # Use the method in 4.3.4  to calculate diffraction loss Ld for effective
-        # Earth radius ap = abeta, as given in equation (7b). Set diffraction loss
-        # not exceeded for beta0# time Ldb = Ld
-
-        ap = ab
-
-        Ldb, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4)
-
-        # Compute the interpolation factor Fi
-
-        if p > b0:
-            Fi = inv_cum_norm(p / 100) / inv_cum_norm(b0 / 100)  # eq (40a)
-
-        else:
-            Fi = 1
-
-        # The diffraction loss Ldp not exceeded for p% of time is now given by
-
-        Ldp = Ld50 + Fi * (Ldb - Ld50)  # eq (41)
-
-    return Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50
+    return dl_bull_fused_batch(d, g, hts, hrs, ap, f, n)
 
 
-def dl_delta_bull(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4):
+def dl_bull_fused_batch(d, g, hts, hrs, ap, f, n):
     """
-    dl_delta_bull Complete 'delta-Bullington' diffraction loss model P.1812-6
+    dl_bull_fused_batch Bullington part of the diffraction loss for several variants of stacked profiles
+    Lbull = dl_bull_fused_batch(d, g, hts, hrs, ap, f, n)
+
+    Array counterpart of dl_bull_fused. d is a 2D array (N x nmax) as
+    returned by stack_profiles and n are the profile lengths. g (K x N x nmax),
+    hts, hrs and ap (K x N) describe K variants of the paths; they are
+    broadcast against each other, so that K may be omitted. The terms that
+    only depend on the distances are computed once for all variants.
+    """
+    NP, nmax = d.shape
+    inner = inner_mask(n, nmax)
 
-    This function computes the complete 'delta-Bullington' diffraction loss
-    as defined in ITU-R P.1812.6 (Section 4.3.4)
+    # Effective Earth curvature Ce (km^-1)
 
-        Input parameters:
-        d       -   vector of distances di of the i-th profile point (km)
-        g       -   vector of heights hi of the i-th profile point (meters
-                    above mean sea level) + Representative clutter height.
-                    Both vectors d, g contain n+1 profile points
-        hts     -   transmitter antenna height in meters above sea level (i=0)
-        hrs     -   receiver antenna height in meters above sea level (i=n)
-        hstd    -   Effective height of interfering antenna (m amsl) c.f. 5.1.6.3
-        hsrd    -   Effective height of interfered-with antenna (m amsl) c.f. 5.1.6.3
-        ap      -   the effective Earth radius in kilometers
-        f       -   frequency expressed in GHz
-        omega   -   the fraction of the path over sea
-        flag4   -   Set to 1 if the alternative method is used to calculate Lbulls
-                    without using terrain profile analysis (Attachment 4 to Annex 1)
+    Ce = 1.0 / (np.asarray(ap, dtype=float) * np.ones(NP))[..., np.newaxis]
+    hts = (np.asarray(hts, dtype=float) * np.ones(NP))[..., np.newaxis]
+    hrs = (np.asarray(hrs, dtype=float) * np.ones(NP))[..., np.newaxis]
 
-        Output parameters:
-        Ld     -   diffraction loss for the general path according to
-                   Section 4.3.3 of ITU-R P.1812-4.
-                   Ld(1) is for the horizontal polarization
-                   Ld(2) is for the vertical polarization
-        Lbulla -   Bullington diffraction (4.3.1) for actual terrain profile g and antenna heights
-        Lbulls -   Bullington diffraction (4.3.1) with all profile heights g set to zero and modified antenna heights
-        Ldshp  -   Spherical diffraction (4.3.2) for the actual path d and modified antenna heights
+    # Wavelength in meters
+    # speed of light as per ITU.R P.2001
+    lam = 0.2998 / f
 
-        Example:
-        Ld, Lbulla, Lbulls, Ldsph = dl_delta_bull( d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4)
+    # Complete path length
 
+    dtot = d[np.arange(NP), n - 1][:, np.newaxis]
 
-        Rev   Date        Author                          Description
-        -------------------------------------------------------------------------------
-        v0    29SEP22     Ivica Stevanovic, OFCOM         Initial version
-    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Terms shared by all variants
 
-    # Use the method in 4.3.1 for the actual terrain profile and antenna
-    # heights. Set the resulting Bullington diffraction loss for the actual
-    # path to Lbulla
+        ddi = dtot - d
+        dd = d * ddi
+        scale = np.sqrt(0.002 * dtot / (lam * dd))
 
-    Lbulla = dl_bull(d, g, hts, hrs, ap, f)
+        # Profile heights with the Earth curvature
 
-    # Use the method in 4.3.1 for a second time, with all profile heights hi
-    # set to zero and modified antenna heights given by
+        ge = g + 500 * Ce * dd
 
-    hts1 = hts - hstd  # eq (37a)
-    hrs1 = hrs - hsrd  # eq (7b)
-    h1 = np.zeros(g.shape)
-    dtot = d[-1] - d[0]
+        # Find the intermediate profile point with the highest slope of the line
+        # from the transmitter to the point
 
-    # where hstd and hsrd are given in 5.6.2 of Attachment 1. Set the
-    # resulting Bullington diffraction loss for this smooth path to Lbulls
+        Stim = masked_max((ge - hts) / d, inner)[..., np.newaxis]  # Eq (13)
 
-    if flag4 == 1:
-        # compute the spherical earth diffraction Lbuls using an
-        # alternative method w/o terrain profile analysis
-        # as defined in Attachment 4 to Annex 1 of ITU-R P.1812-6
+        # Calculate the slope of the line from transmitter to receiver assuming a
+        # LoS path
 
-        Lbulls = dl_bull_att4(dtot, hts1, hrs1, ap, f)
-    else:
-        # Compute Lbuls using §4.3.1
+        Str = (hrs - hts) / dtot  # Eq (14)
 
-        Lbulls = dl_bull(d, h1, hts1, hrs1, ap, f)
+        # Case 1, Path is LoS: find the intermediate profile point with the
+        # highest diffraction parameter nu
 
-    # Use the method in 4.3.2 to calculate the spherical-Earth diffraction loss
-    # for the actual path length (dtot) with
+        numax = masked_max((ge - (hts * ddi + hrs * d) / dtot) * scale, inner)[..., np.newaxis]  # Eq (15)
 
-    hte = hts1  # eq (38a)
-    hre = hrs1  # eq (38b)
+        # Path is transhorizon: find the intermediate profile point with the
+        # highest slope of the line from the receiver to the point
 
-    Ldsph = dl_se(dtot, hte, hre, ap, f, omega)
+        Srim = masked_max((ge - hrs) / ddi, inner)[..., np.newaxis]  # Eq (17)
 
-    # Diffraction loss for the general paht is now given by
+        # Calculate the distance of the Bullington point from the transmitter:
 
-    Ld = np.zeros(2)
+        dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)  # Eq (18)
 
-    Ld[0] = Lbulla + max(Ldsph[0] - Lbulls, 0)  # eq (39)
-    Ld[1] = Lbulla + max(Ldsph[1] - Lbulls, 0)  # eq (39)
+        # Calculate the diffraction parameter, nub, for the Bullington point
 
-    return Ld, Lbulla, Lbulls, Ldsph
+        nub = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * np.sqrt(0.002 * dtot / (lam * dbp * (dtot - dbp)))  # Eq (20)
 
+        nu = np.where(Stim < Str, numax, nub)
 
-def dl_bull(d, g, hts, hrs, ap, f):
-    """
-    dl_bull Bullington part of the diffraction loss according to P.1812-6
-    This function computes the Bullington part of the diffraction loss
-    as defined in ITU-R P.1812-6 in 4.3.1
+        # The knife-edge loss for the Bullington point is given by
 
-        Input parameters:
-        d       -   vector of distances di of the i-th profile point (km)
-        g       -   vector of heights hi of the i-th profile point (meters
-                    above mean sea level) + representative clutter height
-                    Both vectors d and g contain n+1 profile points
-        hts     -   transmitter antenna height in meters above sea level (i=0)
-        hrs     -   receiver antenna height in meters above sea level (i=n)
-        ap      -   the effective earth radius in kilometers
-        f       -   frequency expressed in GHz
+        Luc = np.where(nu > -0.78, 6.9 + 20 * np.log10(np.sqrt((nu - 0.1) ** 2 + 1) + nu - 0.1), 0)  # Eq (12), (16), (20)
 
-        Output parameters:
-        Lbull   -   Bullington diffraction loss for a given path
+    # For Luc calculated using either (16) or (20), Bullington diffraction loss
+    # for the path is given by
 
-        Example:
-        Lbull = dl_bull(d, g, hts, hrs, ap, f)
+    Lbull = Luc + (1 - np.exp(-Luc / 6.0)) * (10 + 0.02 * dtot)  # Eq (21)
 
-        Rev   Date        Author                          Description
-        -------------------------------------------------------------------------------
-        v0    29SEP22     Ivica Stevanovic, OFCOM         First implementation in matlab
+    return Lbull[..., 0]
+
+
+def dl_bull_radial(d, g, k, hts, hrs, ap, f, block=256):
     """
+    dl_bull_radial Bullington part of the diffraction loss for the paths from the transmitter to the points k
+    Lbull = dl_bull_radial(d, g, k, hts, hrs, ap, f)
+
+    Counterpart of dl_bull_batch for all paths d[0..k] along a single
+    profile d with heights g; hrs and ap are arrays with one value per path.
+
+    If g is the terrain profile, hts is the Tx height shared by all paths.
+    The point of the Tx slope Stim of Eq (13) is then found along the
+    profile with prefix_line_argmax, and that of the Rx slope Srim of
+    Eq (17) with prefix_curved_tangent, as ap may differ between the
+    paths. The diffraction parameter numax of Eq (15) of LoS paths is
+    evaluated over the points of each path in blocks of at most block
+    paths.
+
+    If g is None, the profile heights are zero, as in the second Bullington
+    evaluation of the delta-Bullington model, and hts may differ per path.
+    For hts, hrs > 0 the slopes of Eqs (13, 17) and the diffraction
+    parameter of Eq (15) over the curved Earth are then unimodal functions
+    of the distance and are found with unimodal_argmax.
+    """
+    NP = k.size
 
     # Effective Earth curvature Ce (km^-1)
 
-    Ce = 1.0 / ap
+    Ce = 1.0 / (np.asarray(ap, dtype=float) * np.ones(NP))
+    hts = np.asarray(hts, dtype=float) * np.ones(NP)
+    hrs = np.asarray(hrs, dtype=float) * np.ones(NP)
 
     # Wavelength in meters
     # speed of light as per ITU.R P.2001
@@ -1646,39 +4212,66 @@ def dl_bull(d, g, hts, hrs, ap, f):
 
     # Complete path length
 
-    dtot = d[-1] - d[0]
+    dtot = d[k]
 
-    # Find the intermediate profile point with the highest slope of the line
-    # from the transmitter to the point
+    # Profile heights with the Earth curvature, the slopes of Eqs (13, 17)
+    # and the diffraction parameter of Eq (15) at one point i per path
 
-    di = d[1:-1]
-    gi = g[1:-1]
+    def ge(i):
+        return (0.0 if g is None else g[i]) + 500 * Ce * (d[i] * (dtot - d[i]))
 
-    Stim = max((gi + 500 * Ce * di * (dtot - di) - hts) / di)  # Eq (13)
+    def Sti(i):
+        return (ge(i) - hts) / d[i]  # Eq (13)
 
-    # Calculate the slope of the line from transmitter to receiver assuming a
-    # LoS path
+    def Sri(i):
+        return (ge(i) - hrs) / (dtot - d[i])  # Eq (17)
 
-    Str = (hrs - hts) / dtot  # Eq (14)
+    def nui(i):
+        return (ge(i) - (hts * (dtot - d[i]) + hrs * d[i]) / dtot) * np.sqrt(0.002 * dtot / (lam * (d[i] * (dtot - d[i]))))  # Eq (15)
 
-    if Stim < Str:  # Case 1, Path is LoS
-        # Find the intermediate profile point with the highest diffraction
-        # parameter nu:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Find the intermediate profile point with the highest slope of the line
+        # from the transmitter to the point
 
-        numax = max((gi + 500 * Ce * di * (dtot - di) - (hts * (dtot - di) + hrs * di) / dtot) * np.sqrt(0.002 * dtot / (lam * di * (dtot - di))))  # Eq (15)
+        if g is None:
+            Stim = Sti(unimodal_argmax(Sti, k))
+        else:
+            Stim = Sti(prefix_line_argmax((g - hts[0]) / d, -500 * d, Ce, k))
 
-        Luc = 0
-        if numax > -0.78:
-            Luc = 6.9 + 20 * np.log10(np.sqrt((numax - 0.1) ** 2 + 1) + numax - 0.1)  # Eq (12), (16)
+        # Calculate the slope of the line from transmitter to receiver assuming a
+        # LoS path
 
-    else:
-        # Path is transhorizon
+        Str = (hrs - hts) / dtot  # Eq (14)
 
-        # Find the intermediate profile point with the highest slope of the
-        # line from the receiver to the point
+        los = Stim < Str
 
-        Srim = max((gi + 500 * Ce * di * (dtot - di) - hrs) / (dtot - di))  # Eq (17)
+        # Case 1, Path is LoS: find the intermediate profile point with the
+        # highest diffraction parameter nu
+
+        # Path is transhorizon: find the intermediate profile point with the
+        # highest slope of the line from the receiver to the point
+
+        if g is None:
+            numax = nui(unimodal_argmax(nui, k))
+            Srim = Sri(unimodal_argmax(Sri, k))
+        else:
+            # Eq (17) is (g_i - hrs)/(dtot - d_i) less 500*Ce*(dtot - d_i),
+            # plus 500*Ce*dtot, a curved-Earth slope from the Rx
+            def Srr(jj, i):
+                return (g[i] + 500 * column(Ce[jj]) * (d[i] * (column(dtot[jj]) - d[i])) - column(hrs[jj])) / (column(dtot[jj]) - d[i])  # Eq (17)
+
+            Srim = Sri(np.maximum(prefix_curved_tangent(d, g, k, hrs, Ce, Srr, ~los, block), 1))
+
+    if g is not None:
+        numax = np.zeros(NP)
+
+        for jj, dk, inner in prefix_blocks(d, k, los, block):
+            dt = column(dtot[jj])
+            ddi = dt - dk
+            with np.errstate(divide="ignore", invalid="ignore"):
+                numax[jj] = masked_max((g[np.newaxis, 0 : dk.shape[1]] + 500 * column(Ce[jj]) * (dk * ddi) - (column(hts[jj]) * ddi + column(hrs[jj]) * dk) / dt) * np.sqrt(0.002 * dt / (lam * (dk * ddi))), inner)  # Eq (15)
 
+    with np.errstate(divide="ignore", invalid="ignore"):
         # Calculate the distance of the Bullington point from the transmitter:
 
         dbp = (hrs - hts + Srim * dtot) / (Stim + Srim)  # Eq (18)
@@ -1687,41 +4280,26 @@ def dl_bull(d, g, hts, hrs, ap, f):
 
         nub = (hts + Stim * dbp - (hts * (dtot - dbp) + hrs * dbp) / dtot) * np.sqrt(0.002 * dtot / (lam * dbp * (dtot - dbp)))  # Eq (20)
 
+        nu = np.where(los, numax, nub)
+
         # The knife-edge loss for the Bullington point is given by
 
-        Luc = 0
-        if nub > -0.78:
-            Luc = 6.9 + 20 * np.log10(np.sqrt((nub - 0.1) ** 2 + 1) + nub - 0.1)  # Eq (12), (20)
+        Luc = np.where(nu > -0.78, 6.9 + 20 * np.log10(np.sqrt((nu - 0.1) ** 2 + 1) + nu - 0.1), 0)  # Eq (12), (16), (20)
 
     # For Luc calculated using either (16) or (20), Bullington diffraction loss
     # for the path is given by
 
     Lbull = Luc + (1 - np.exp(-Luc / 6.0)) * (10 + 0.02 * dtot)  # Eq (21)
+
     return Lbull
 
 
-def dl_bull_att4(dtot, hte, hre, ap, f):
-    """dl_bull_att4 Bullington part of the diffraction loss for smooth path according to Attachment 4 to Annex 1 of P.1812-6
-    %   This function computes the spherical earth diffraction Lbuls using an
-    %   alternative method w/o terrain profile analysis
-    %   as defined in Attachment 4 to Annex 1 of ITU-R P.1812-5
-    %
-    %     Input parameters:
-    %     dtot    -   Great-circle path distance (km)
-    %     hte     -   Effective height of interfering antenna (m)
-    %     hre     -   Effective height of interfered-with antenna (m)
-    %     ap      -   the effective earth radius in kilometers
-    %     f       -   frequency expressed in GHz
-    %
-    %     Output parameters:
-    %     Lbulls   -   Bullington diffraction loss for a given path
-    %
-    %     Example:
-    %     Lbulls = dl_bull_att4(d, hte, hre, ap, f)
-    %
-    %     Rev   Date        Author                          Description
-    %     -------------------------------------------------------------------------------
-    %     v1    28JUL20     Ivica Stevanovic, OFCOM         First implementation for P.1812-5
+def dl_bull_att4_batch(dtot, hte, hre, ap, f):
+    """
+    dl_bull_att4_batch Bullington part of the diffraction loss for smooth paths according to Attachment 4 for arrays of paths
+    Lbulls = dl_bull_att4_batch(dtot, hte, hre, ap, f)
+
+    Array counterpart of dl_bull_att4, all path parameters are arrays of N values.
     """
 
     # Effective Earth curvature Ce (km^-1)
@@ -1737,8 +4315,8 @@ def dl_bull_att4(dtot, hte, hre, ap, f):
 
     dlos = np.sqrt(2.0 * ap) * (np.sqrt(0.001 * hte) + np.sqrt(0.001 * hre))  # Eq (22)
 
-    if dtot < dlos:  # LoS
-        # calculate the smallest clearance between the curved-Earth path and
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # LoS: calculate the smallest clearance between the curved-Earth path and
         # the ray between the antennas, hse
 
         c = (hte - hre) / (hte + hre)  # Eq (24d)
@@ -1752,38 +4330,25 @@ def dl_bull_att4(dtot, hte, hre, ap, f):
         hse = (hte - 500 * dse1 * dse1 / ap) * dse2 + (hre - 500 * dse2 * dse2 / ap) * dse1
         hse = hse / dtot  # Eq (23)
 
-        # calculate the difraction parameter for the smallest clearance height hse
-        # between the curved-Earth path and the ray between the antennas with the
-        # distance dse1
-
         numax = -hse * np.sqrt(0.002 * dtot / (lam * dse1 * (dtot - dse1)))  # Eq (105)
 
-        Lus = 0
-        if numax > -0.78:
-            Lus = 6.9 + 20 * np.log10(np.sqrt((numax - 0.1) ** 2 + 1) + numax - 0.1)  # Eq (12), (106)
-
-    else:  # d>=dlos, NLoS
-        # Find the highest slope of the line from the transmitter antenna to the curved-Earth path.
+        # NLoS: find the highest slopes of the lines from the antennas to the curved-Earth path
 
         Stm = 500 * Ce * dtot - 2 * np.sqrt(500.0 * Ce * hte)  # Eq (107)
-
-        # find the highest slope of the line from the receiver antenna to the curved-Earth path
-
         Srm = 500 * Ce * dtot - 2 * np.sqrt(500.0 * Ce * hre)  # Eq (108)
 
         # Use these two slopes to calculate the Bullington point as:
 
-        ds = (hre - hte + Srm * dtot) / (Stm + Srm)
-        # Eq (109)
+        ds = (hre - hte + Srm * dtot) / (Stm + Srm)  # Eq (109)
 
         # Calculate the diffraction parameter nus for the Bullington point:
 
         nus = hte + Stm * ds - (hte * (dtot - ds) + hre * ds) / dtot
         nus = nus * np.sqrt(0.002 * dtot / (lam * ds * (dtot - ds)))  # Eq (110)
 
-        Lus = 0
-        if nus > -0.78:
-            Lus = 6.9 + 20 * np.log10(np.sqrt((nus - 0.1) ** 2 + 1) + nus - 0.1)  # Eq (12), (111)
+        nu = np.where(dtot < dlos, numax, nus)
+
+        Lus = np.where(nu > -0.78, 6.9 + 20 * np.log10(np.sqrt((nu - 0.1) ** 2 + 1) + nu - 0.1), 0)  # Eq (12), (106), (111)
 
     # For Luc calculated using either (106) or (111), Bullington diffraction loss
     # for the path is given by
@@ -1792,110 +4357,243 @@ def dl_bull_att4(dtot, hte, hre, ap, f):
     return Lbulls
 
 
-def beta0(phi, dtm, dlm):
+def dl_delta_bull_batch(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4, n, Lbulla=None, Lbulls=None):
     """
-    This function computes the time percentage for which refractivity
-    lapse-rates exceeding 100 N-units/km can be expected in the first 100
-    m of the lower atmosphere
-    as defined in ITU-R P.1812-6.
+    dl_delta_bull_batch Complete 'delta-Bullington' diffraction loss model for stacked profiles
+    Ld, Lbulla, Lbulls, Ldsph = dl_delta_bull_batch(d, g, hts, hrs, hstd, hsrd, ap, f, omega, flag4, n)
 
-    Input arguments:
-    phi     -   path centre latitude (deg)
-    dtm     -   the longest continuous land (inland + coastal) section of the great-circle path (km)
-    dlm     -   the longest continuous inland section of the great-circle path (km)
+    Array counterpart of dl_delta_bull. Ld and Ldsph are (N x 2) arrays,
+    Lbulla and Lbulls are arrays of N values, which may be passed in when
+    already computed (see dl_bull_fused_batch).
+    """
 
-    Output arguments:
-    b0      -   the time percentage that the refractivity gradient (DELTA-N) exceeds 100 N-units/km in the first 100 m of the lower atmosphere
+    # Use the method in 4.3.1 for the actual terrain profile and antenna
+    # heights. Set the resulting Bullington diffraction loss for the actual
+    # path to Lbulla
 
-    Example:
-    b0 = beta0(phi, dtm, dlm)
+    if Lbulla is None:
+        Lbulla = dl_bull_batch(d, g, hts, hrs, ap, f, n)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22     Ivica Stevanovic, OFCOM         Initial implementation
-    """
+    # Use the method in 4.3.1 for a second time, with all profile heights hi
+    # set to zero and modified antenna heights given by
 
-    tau = 1 - np.exp(-(4.12 * 1e-4 * dlm**2.41))  # (3)
+    hts1 = hts - hstd  # eq (37a)
+    hrs1 = hrs - hsrd  # eq (7b)
+    dtot = d[np.arange(d.shape[0]), n - 1] - d[:, 0]
 
-    mu1 = (10 ** (-dtm / (16 - 6.6 * tau)) + 10 ** (-5 * (0.496 + 0.354 * tau))) ** 0.2  # (2)
+    if Lbulls is None:
+        if flag4 == 1:
+            # compute the spherical earth diffraction Lbuls using an
+            # alternative method w/o terrain profile analysis
+            # as defined in Attachment 4 to Annex 1 of ITU-R P.1812-6
 
-    if mu1 > 1:
-        mu1 = 1
+            Lbulls = dl_bull_att4_batch(dtot, hts1, hrs1, ap, f)
+        else:
+            # Compute Lbuls using §4.3.1
 
-    if np.abs(phi) <= 70:
-        mu4 = mu1 ** (-0.935 + 0.0176 * abs(phi))
-        # (4)
-        b0 = 10 ** (-0.015 * abs(phi) + 1.67) * mu1 * mu4  # (5)
-    else:
-        mu4 = mu1 ^ (0.3)  # (4)
-        b0 = 4.17 * mu1 * mu4  # (5)
+            Lbulls = dl_bull_batch(d, np.zeros(g.shape), hts1, hrs1, ap, f, n)
 
-    return b0
+    # Use the method in 4.3.2 to calculate the spherical-Earth diffraction loss
+    # for the actual path length (dtot) with
 
+    Ldsph = dl_se_batch(dtot, hts1, hrs1, ap, f, omega)
 
-def stdDev(f, h, R, wa):
-    """stdDev computes standard deviation of location variability
-    sigmaLoc = stdDev(f, h, R, wa)
-    This function computes the standard deviation according to ITU-R
-    P.1812-6, Annex 1, §4.8 and §4.10
+    # Diffraction loss for the general paht is now given by
 
-    Input parameters:
-    f       -   Frequency (GHz)
-    h       -   receiver/mobile antenna height above the ground (m)
-    R       -   height of representative clutter at the receiver/mobile location (m)
-    wa      -   prediction resolution, i.e., the width of the square area over which the variability applies
+    Ld = Lbulla[:, np.newaxis] + np.maximum(Ldsph - Lbulls[:, np.newaxis], 0)  # eq (39)
 
-    Rev   Date        Author                          Description
-    -------------------------------------------------------------------------------
-    v0    29SEP22    Ivica Stevanovic, OFCOM         Initial version
+    return Ld, Lbulla, Lbulls, Ldsph
+
+
+def dl_50b_batch(d, g, hts, hrs, hstd, hsrd, f, omega, DN, flag4, n, Lbull=None):
+    """
+    dl_50b_batch Median and beta0 diffraction losses for stacked profiles
+    Ld50, Ldb, Lbulla50, Lbulls50, Ldsph50 = dl_50b_batch(d, g, hts, hrs, hstd, hsrd, f, omega, DN, flag4, n)
+
+    The part of dl_p_batch that does not depend on the time percentage p:
+    the delta-Bullington losses for the median effective Earth radius (Ld50)
+    and the effective Earth radius exceeded for b0% time (Ldb). As in dl_p,
+    Lbulla50, Lbulls50 and Ldsph50 are those of the latter evaluation.
+    The Bullington losses for the actual profile with ae and ab, followed
+    by those for the smooth profile with ae and ab if flag4 == 0, may be
+    passed as Lbull when they are already known (see bt_loss_radial); g is
+    then not used and d only for the path lengths.
     """
-    sigmaLoc = (0.52 + 0.024 * f) * wa**0.28
 
-    if h < R:
-        uh = 1
-    else:
-        if h >= R + 10:
-            uh = 0
+    ae, ab = earth_rad_eff(DN)
+
+    ab = ab * np.ones(np.shape(ae))
+
+    # Bullington losses for the actual terrain profile (Lbulla) and the
+    # smooth profile (Lbulls) for both ae and ab evaluated in one pass
+
+    if Lbull is None:
+        if flag4 == 1:
+            Lbull = dl_bull_fused_batch(d, g, [hts, hts], [hrs, hrs], [ae, ab], f, n)
         else:
-            uh = 1 - (h - R) / 10.0
+            h1 = np.zeros(g.shape)
+            Lbull = dl_bull_fused_batch(d, np.stack((g, g, h1, h1)), [hts, hts, hts - hstd, hts - hstd], [hrs, hrs, hrs - hsrd, hrs - hsrd], [ae, ab, ae, ab], f, n)
 
-    sigmaLoc = sigmaLoc * uh
+    Lbulla = Lbull[0:2]
+    Lbulls = [None, None] if flag4 == 1 else Lbull[2:4]
 
-    return sigmaLoc
+    Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull_batch(d, g, hts, hrs, hstd, hsrd, ae, f, omega, flag4, n, Lbulla=Lbulla[0], Lbulls=Lbulls[0])
 
-def interp2(matrix_map, lon, lat, lon_spacing, lat_spacing):
+    Ldb, Lbulla50, Lbulls50, Ldsph50 = dl_delta_bull_batch(d, g, hts, hrs, hstd, hsrd, ab, f, omega, flag4, n, Lbulla=Lbulla[1], Lbulls=Lbulls[1])
+
+    return Ld50, Ldb, Lbulla50, Lbulls50, Ldsph50
+
+
+def dl_p_batch(d, g, hts, hrs, hstd, hsrd, f, omega, p, b0, DN, flag4, n, diffraction=None):
     """
-    Bi-linear interpolation of data contained in 2D matrix map at point (lon,lat)
-    It assumes that the grid is rectangular with spacing of 1.5 deg in both lon and lat
-    It assumes that lon goes from 0 to 360 deg and lat goes from 90 to -90 deg
+    dl_p_batch Diffraction loss model not exceeded for p% of time for stacked profiles
+    Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_p_batch(d, g, hts, hrs, hstd, hsrd, f, omega, p, b0, DN, flag4, n)
+
+    Array counterpart of dl_p, p and f are shared scalars, the remaining
+    path parameters are arrays of N values. The output of dl_50b_batch may
+    be passed as diffraction when it is already known for the paths.
     """
 
-    
-    latitudeOffset = 90.0 - lat
-    longitudeOffset = lon
-    
-    if (lon < 0.0):
-        longitudeOffset = lon + 360.0
+    if diffraction is None:
+        diffraction = dl_50b_batch(d, g, hts, hrs, hstd, hsrd, f, omega, DN, flag4, n)
 
-    
-    sizeY, sizeX = matrix_map.shape
+    Ld50, Ldb, Lbulla50, Lbulls50, Ldsph50 = diffraction
 
-    latitudeIndex = int(latitudeOffset / lat_spacing)
-    longitudeIndex = int(longitudeOffset / lon_spacing)
+    if p == 50:
+        Ldp = Ld50
+        return Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50
 
-    latitudeFraction = (latitudeOffset / lat_spacing) - latitudeIndex
-    longitudeFraction = (longitudeOffset / lon_spacing) - longitudeIndex
+    # Compute the interpolation factor Fi
 
-    value_ul = matrix_map[latitudeIndex][longitudeIndex]
-    value_ur = matrix_map[latitudeIndex][(longitudeIndex + 1) % sizeX]
-    value_ll = matrix_map[(latitudeIndex + 1) % sizeY][longitudeIndex]
-    value_lr = matrix_map[(latitudeIndex + 1) % sizeY][(longitudeIndex + 1) % sizeX]
+    Fi = np.ones(np.shape(b0))
+    kk = p > b0
+    Fi[kk] = inv_cum_norm(p / 100) / inv_cum_norm(b0[kk] / 100)  # eq (40a)
 
-    interpolatedHeight1 = (longitudeFraction * (value_ur - value_ul)) + value_ul
-    interpolatedHeight2 = (longitudeFraction * (value_lr - value_ll)) + value_ll
-    interpolatedHeight3 = latitudeFraction * (interpolatedHeight2 - interpolatedHeight1) + interpolatedHeight1
+    # The diffraction loss Ldp not exceeded for p% of time is now given by
 
-    return interpolatedHeight3
+    Ldp = Ld50 + Fi[:, np.newaxis] * (Ldb - Ld50)  # eq (41)
+
+    return Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50
+
+
+def combine_losses_batch(f, p, d, g, dtot, hts, hrs, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, omega, b0, DN, N0, dct, dcr, dlm, zone_r, pol, pL, sigmaL, Ptx, flag4, n, diffraction=None, details=None):
+    """
+    combine_losses_batch Basic transmission loss from the path profile parameters of stacked profiles
+    Lb, Ep = combine_losses_batch(f, p, d, g, dtot, hts, hrs, hstd, hsrd, hte, hre, hm, dlt, dlr, theta_t, theta_r, theta, omega, b0, DN, N0, dct, dcr, dlm, zone_r, pol, pL, sigmaL, Ptx, flag4, n)
+
+    This function implements the part of bt_loss that follows the path
+    profile analysis (Sections 4.2 - 4.9) for N paths at once. d and g are
+    2D arrays (N x nmax) as returned by stack_profiles, zone_r is the zone at
+    the receiver and the remaining path parameters are arrays of N values.
+    If pol is a sequence of polarizations, e.g. (1, 2), Lb and Ep are
+    (N x len(pol)) arrays. The output of dl_50b_batch may be passed as
+    diffraction when it is already known for the paths. If a dictionary is
+    passed as details, the intermediate losses (see PathDetails) are stored in it.
+    """
+
+    ae, ab = earth_rad_eff(DN)
+
+    # Calculate an interpolation factor Fj to take account of the path angular
+    # distance Eq (57)
+
+    THETA = 0.3
+    KSI = 0.8
+
+    Fj = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * KSI * (theta - THETA) / THETA))
+
+    # Calculate an interpolation factor, Fk, to take account of the great
+    # circle path distance:
+
+    dsw = 20
+    kappa = 0.5
+
+    Fk = 1.0 - 0.5 * (1.0 + np.tanh(3.0 * kappa * (dtot - dsw) / dsw))  # eq (58)
+
+    Lbfs, Lb0p, Lb0b = pl_los(dtot, hts, hrs, f, p, b0, dlt, dlr)
+
+    Ldp, Ldb, Ld50, Lbulla50, Lbulls50, Ldsph50 = dl_p_batch(d, g, hts, hrs, hstd, hsrd, f, omega, p, b0, DN, flag4, n, diffraction)
+
+    # The median basic transmission loss associated with diffraction Eq (42)
+
+    Lbd50 = Lbfs[:, np.newaxis] + Ld50
+
+    # The basic tranmission loss associated with diffraction not exceeded for
+    # p% time Eq (43)
+
+    Lbd = Lb0p[:, np.newaxis] + Ldp
+
+    # A notional minimum basic transmission loss associated with LoS
+    # propagation and over-sea sub-path diffraction
+
+    Lminb0p = Lb0p[:, np.newaxis] + (1 - omega[:, np.newaxis]) * Ldp
+
+    # eq (40a)
+    Fi = np.ones(np.shape(b0))
+    kk = p >= b0
+    if np.any(kk):
+        Fi[kk] = inv_cum_norm(p / 100.0) / inv_cum_norm(b0[kk] / 100.0)
+
+        Lminb0p[kk] = Lbd50[kk] + (Lb0b[kk, np.newaxis] + (1 - omega[kk, np.newaxis]) * Ldp[kk] - Lbd50[kk]) * Fi[kk, np.newaxis]  # eq (59)
+
+    # Calculate a notional minimum basic transmission loss associated with LoS
+    # and transhorizon signal enhancements
+
+    eta = 2.5
+
+    Lba = tl_anomalous_batch(dtot, dlt, dlr, dct, dcr, dlm, hts, hrs, hte, hre, hm, theta_t, theta_r, f, p, omega, ae, b0)
+
+    Lminbap = (eta * np.log(np.exp(Lba / eta) + np.exp(Lb0p / eta)))[:, np.newaxis]  # eq (60)
+
+    # Calculate a notional basic transmission loss associated with diffraction
+    # and LoS or ducting/layer reflection enhancements
+
+    Lbda = np.where(Lminbap <= Lbd, Lminbap + (Lbd - Lminbap) * Fk[:, np.newaxis], Lbd)
+
+    # Calculate a modified basic transmission loss, which takes diffraction and
+    # LoS or ducting/layer-reflection enhancements into account
+
+    Lbam = Lbda + (Lminb0p - Lbda) * Fj[:, np.newaxis]  # eq (62)
+
+    # Calculate the basic transmission loss due to troposcatter not exceeded
+    # for any time percantage p
+
+    Lbs = tl_tropo(dtot, theta, f, p, N0)
+
+    # Calculate the final transmission loss not exceeded for p% time
+
+    Lbc_pol = -5 * np.log10(10 ** (-0.2 * Lbs[:, np.newaxis]) + 10 ** (-0.2 * Lbam))  # eq (63)
+
+    Lbc = Lbc_pol[:, np.asarray(pol, dtype=int) - 1]
+
+    # Location variability of losses (Section 4.8), outdoors only (67a)
+    Lloc = np.where(zone_r == 1, 0.0, -inv_cum_norm(pL / 100.0) * sigmaL)
+
+    if Lbc.ndim == 2:
+        Lloc = Lloc[:, np.newaxis]
+        Lb0p = Lb0p[:, np.newaxis]
+
+    # Basic transmission loss not exceeded for p% time and pL% locations
+    # (Sections 4.8 and 4.9) not implemented
+
+    Lb = np.maximum(Lb0p, Lbc + Lloc)  #  eq (69)
+
+    # The field strength exceeded for p% time and pL% locations
+
+    Ep = 199.36 + 20 * np.log10(f) - Lb  # eq (70)
+
+    # Scale to the transmitter power
+
+    Ep = Ep + 10 * np.log10(Ptx)
+
+    if details is not None:
+        k = np.asarray(pol, dtype=int) - 1
+        details.update(
+            Fi=Fi, Fj=Fj, Fk=Fk, Lbfs=Lbfs, Lb0p=Lb0p, Lb0b=Lb0b, Lbulla=Lbulla50, Lbulls=Lbulls50, Ldsph=Ldsph50[:, k],
+            Ld50=Ld50[:, k], Ldb=Ldb[:, k], Ldp=Ldp[:, k], Lbd50=Lbd50[:, k], Lbd=Lbd[:, k], Lminb0p=Lminb0p[:, k], Lba=Lba, Lminbap=Lminbap[:, 0],
+            Lbda=Lbda[:, k], Lbam=Lbam[:, k], Lbs=Lbs, Lbc=Lbc, Lloc=Lloc, Lb=Lb, Ep=Ep,
+        )
+
+    return Lb, Ep
 
 
 def isempty(x):
@@ -54,6 +54,12 @@ if (not failed):
       np.savez('P1812.npz', **maps)
 
       print("P1812.npz file created successfully.")
+
+      # Uncompressed copies that P1812.py memory maps when present
+      for key in maps:
+            np.save('P1812_' + key + '.npy', maps[key])
+
+      print("P1812_*.npy files created successfully.")
       
 else:
       print("The process failed.")
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Consistency of the array implementations of ITU-R P.1812 with the scalar
+Py1812.bt_loss() on the validation profiles used by validateP1812.py.
+
+bt_loss itself is checked against the reference field strengths of the
+profiles; the array functions are then checked against bt_loss.
+
+Run from this folder:  python -m pytest -q
+"""
+import os
+
+import numpy as np
+import pytest
+
+from Py1812 import P1812
+
+# deviation allowed from the scalar bt_loss (dB, dBuV/m)
+tol = 1e-8
+
+# path to the folder containing test profiles
+pathname = os.path.join(os.path.dirname(os.path.abspath(__file__)), "validation_profiles")
+
+
+def validation_cases():
+    """
+    One case per dataset of the validation profiles, set up as in
+    validateP1812.py: (name, args, kwargs, reference field strength),
+    where bt_loss(*args, **kwargs) is the prediction
+    """
+    cases = []
+    for filename in sorted(f for f in os.listdir(pathname) if f.endswith(".csv")):
+        sg3db = P1812.read_sg3_measurements2(os.path.join(pathname, filename), "Fryderyk_csv")
+
+        dct = 0 if sg3db.radio_met_code[0] == 1 else 500  # Tx at sea
+        dcr = 0 if sg3db.radio_met_code[-1] == 1 else 500  # Rx at sea
+
+        for measID in range(0, len(sg3db.hRx)):
+            PkW = 10.0 ** (sg3db.ERPMaxTotal[measID] / 10.0) * 1e-3  # kW
+            if np.isnan(PkW):
+                # Tx power + gain from the Basic Transmission Loss and the measured field strength
+                E = sg3db.MeasuredFieldStrength[measID]
+                PL = sg3db.BasicTransmissionLoss[measID]
+                PdBkW = -137.2217 + E - 20 * np.log10(sg3db.frequency[measID]) + PL
+                PkW = 10 ** (PdBkW / 10.0)
+
+            args = (
+                sg3db.frequency[measID] / 1e3,
+                sg3db.TimePercent[measID],
+                sg3db.x,
+                sg3db.h_gamsl,
+                sg3db.h_ground_cover,
+                sg3db.coveragecode,
+                sg3db.radio_met_code,
+                sg3db.hTx[measID],
+                sg3db.hRx[measID],
+                sg3db.polHVC[measID],
+                sg3db.TxLAT,
+                sg3db.RxLAT,
+                sg3db.TxLON,
+                sg3db.RxLON,
+            )
+            kwargs = dict(pL=50, sigmaL=0, Ptx=PkW, DN=sg3db.DN, N0=sg3db.N0, dct=dct, dcr=dcr, flag4=0)
+            cases.append(("%s_%d" % (filename[0:-4], measID), args, kwargs, sg3db.MeasuredFieldStrength[measID]))
+
+    return cases
+
+
+CASES = validation_cases()
+IDS = [case[0] for case in CASES]
+
+
+def scalar(args, kwargs, **changes):
+    """bt_loss for a case, with some of its arguments replaced by name"""
+    names = ("f", "p", "d", "h", "R", "Ct", "zone", "htg", "hrg", "pol", "phi_t", "phi_r", "lam_t", "lam_r")
+    values = dict(zip(names, args))
+    values.update({name: value for name, value in changes.items() if name in names})
+    kw = dict(kwargs)
+    kw.update({name: value for name, value in changes.items() if name not in names})
+    return P1812.bt_loss(*[values[name] for name in names], **kw)
+
+
+def test_validation_cases_found():
+    assert len(CASES) > 0
+
+
+@pytest.mark.parametrize("case", CASES, ids=IDS)
+def test_bt_loss_reference(case):
+    name, args, kwargs, reference = case
+    Lb, Ep = P1812.bt_loss(*args, **kwargs)
+    assert abs(Ep - reference) <= tol
+
+
+def test_bt_loss_batch_validation_groups():
+    # cases sharing f, p, antenna heights, pol and Ptx are evaluated as one batch
+    groups = {}
+    for name, args, kwargs, reference in CASES:
+        key = (args[0], args[1], args[7], args[8], args[9], kwargs["Ptx"])
+        groups.setdefault(key, []).append((args, kwargs))
+
+    for (f, p, htg, hrg, pol, Ptx), members in groups.items():
+        Lb, Ep = P1812.bt_loss_batch(
+            f, p,
+            [a[2] for a, k in members], [a[3] for a, k in members], [a[4] for a, k in members],
+            [a[5] for a, k in members], [a[6] for a, k in members],
+            htg, hrg, pol,
+            [a[10] for a, k in members], [a[11] for a, k in members], [a[12] for a, k in members], [a[13] for a, k in members],
+            pL=50, sigmaL=0, Ptx=Ptx, flag4=0,
+            DN=[k["DN"] for a, k in members], N0=[k["N0"] for a, k in members],
+            dct=[k["dct"] for a, k in members], dcr=[k["dcr"] for a, k in members],
+        )
+        assert Lb.shape == (len(members),)
+        for j, (args, kwargs) in enumerate(members):
+            Lb1, Ep1 = P1812.bt_loss(*args, **kwargs)
+            assert abs(Lb[j] - Lb1) <= tol
+            assert abs(Ep[j] - Ep1) <= tol
+
+
+@pytest.mark.parametrize("f, p, pol", [(0.1, 1, 1), (0.6, 10, 2), (2.1, 50, 1)])
+def test_bt_loss_batch_all_profiles(f, p, pol):
+    # all validation profiles (of different lengths) in one batch
+    profiles = [(args, kwargs) for name, args, kwargs, reference in CASES]
+    batch = P1812.ProfileBatch(
+        [a[2] for a, k in profiles], [a[3] for a, k in profiles], [a[4] for a, k in profiles],
+        [a[5] for a, k in profiles], [a[6] for a, k in profiles],
+        [a[10] for a, k in profiles], [a[11] for a, k in profiles], [a[12] for a, k in profiles], [a[13] for a, k in profiles],
+        dct=[k["dct"] for a, k in profiles], dcr=[k["dcr"] for a, k in profiles],
+    )
+    DN = [k["DN"] for a, k in profiles]
+    N0 = [k["N0"] for a, k in profiles]
+
+    Lb, Ep = P1812.bt_loss_batch(f, p, batch, [], [], [], [], 20, 10, pol, [], [], [], [], DN=DN, N0=N0, Ptx=2.0)
+
+    for j, (args, kwargs) in enumerate(profiles):
+        Lb1, Ep1 = scalar(args, kwargs, f=f, p=p, htg=20, hrg=10, pol=pol, Ptx=2.0)
+        assert abs(Lb[j] - Lb1) <= tol
+        assert abs(Ep[j] - Ep1) <= tol
+
+        # a single profile of the batch through bt_loss
+        Lb2, Ep2 = P1812.bt_loss(f, p, batch[j], [], [], [], [], 20, 10, pol, [], [], [], [], DN=DN[j], N0=N0[j], Ptx=2.0)
+        assert abs(Lb2 - Lb1) <= tol
+        assert abs(Ep2 - Ep1) <= tol
+
+
+@pytest.mark.parametrize("case", CASES, ids=IDS)
+def test_bt_loss_radial(case):
+    # every profile point from the 5th on as a receiver, against bt_loss on the truncated profile
+    name, args, kwargs, reference = case
+    f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r = args
+    kwargs = dict(kwargs, dcr=500)
+    n = len(d)
+
+    # receiver coordinates at every profile point, along the great circle to the end of the profile
+    lam = np.zeros(n)
+    phi = np.zeros(n)
+    for i in range(0, n):
+        lam[i], phi[i], _, _ = P1812.great_circle_path(lam_r, lam_t, phi_r, phi_t, 6371, d[i])
+
+    Lb, Ep = P1812.bt_loss_radial(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi, lam_t, lam, block=16, **kwargs)
+    assert Lb.shape == (n - 4,)
+
+    ks = range(4, n) if n <= 40 else np.unique(np.linspace(4, n - 1, 12).astype(int))
+    for k in ks:
+        Lb1, Ep1 = P1812.bt_loss(
+            f, p, d[: k + 1], h[: k + 1], R[: k + 1] if len(R) else R, Ct[: k + 1] if len(Ct) else Ct, zone[: k + 1],
+            htg, hrg, pol, phi_t, phi[k], lam_t, lam[k], **kwargs
+        )
+        assert abs(Lb[k - 4] - Lb1) <= tol
+        assert abs(Ep[k - 4] - Ep1) <= tol
+
+    # the last receiver is the full path
+    Lbn, Epn = P1812.bt_loss(*args, **kwargs)
+    assert abs(Lb[-1] - Lbn) <= tol
+
+
+@pytest.mark.parametrize("flag4", [0, 1])
+@pytest.mark.parametrize("case", CASES[::5], ids=IDS[::5])
+def test_bt_loss_radial_refractivity_per_receiver(case, flag4):
+    # DN and N0 different at every receiver, so that the effective Earth radius varies along the radial
+    name, args, kwargs, reference = case
+    f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r = args
+    n = len(d)
+    DN = np.linspace(30, 70, n - 4)
+    N0 = np.linspace(300, 340, n - 4)
+    kwargs = dict(kwargs, dcr=500, flag4=flag4, DN=DN, N0=N0)
+
+    Lb, Ep = P1812.bt_loss_radial(f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, block=16, **kwargs)
+
+    for k in range(4, n):
+        Lb1, Ep1 = P1812.bt_loss(
+            f, p, d[: k + 1], h[: k + 1], R[: k + 1] if len(R) else R, Ct[: k + 1] if len(Ct) else Ct, zone[: k + 1],
+            htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, **dict(kwargs, DN=DN[k - 4], N0=N0[k - 4])
+        )
+        assert abs(Lb[k - 4] - Lb1) <= tol
+        assert abs(Ep[k - 4] - Ep1) <= tol
+
+
+@pytest.mark.parametrize("case", CASES, ids=IDS)
+def test_prepared_path_sweep(case):
+    # f, p and pol sweep over one path analysis
+    name, args, kwargs, reference = case
+    f0 = args[0]
+    fs = [0.1, f0, 2.1]
+    ps = [1, 10, 50]
+    pols = (1, 2)
+
+    path = P1812.PreparedPath(*args[2:9], *args[10:14], DN=kwargs["DN"], N0=kwargs["N0"], dct=kwargs["dct"], dcr=kwargs["dcr"])
+    Lb, Ep = path.bt_loss(fs, ps, pols, Ptx=kwargs["Ptx"])
+    assert Lb.shape == (3, 3, 2)
+
+    for i, f in enumerate(fs):
+        for j, p in enumerate(ps):
+            for m, pol in enumerate(pols):
+                Lb1, Ep1 = scalar(args, kwargs, f=f, p=p, pol=pol)
+                assert abs(Lb[i, j, m] - Lb1) <= tol
+                assert abs(Ep[i, j, m] - Ep1) <= tol
+
+
+@pytest.mark.parametrize("case", CASES, ids=IDS)
+def test_bt_loss_heights(case):
+    # several antenna heights over one terrain analysis
+    name, args, kwargs, reference = case
+    htg = np.array([args[7], 10.0, 30.0, 150.0])
+    hrg = np.array([args[8], 1.5, 20.0, 10.0])
+
+    Lb, Ep = P1812.bt_loss_heights(*args[0:7], htg, hrg, *args[9:14], **kwargs)
+    assert Lb.shape == (4,)
+
+    for m in range(0, htg.size):
+        Lb1, Ep1 = scalar(args, kwargs, htg=htg[m], hrg=hrg[m])
+        assert abs(Lb[m] - Lb1) <= tol
+        assert abs(Ep[m] - Ep1) <= tol
+
+
+@pytest.mark.parametrize("case", CASES[::7], ids=IDS[::7])
+def test_details(case):
+    # intermediate results of bt_loss and bt_loss_batch, with f given as a 0-d array
+    name, args, kwargs, reference = case
+    f = np.array(args[0])
+
+    Lb, Ep, details = scalar(args, kwargs, f=f, return_details=True)
+    Lb1, Ep1 = P1812.bt_loss(*args, **kwargs)
+    assert abs(Lb - Lb1) <= tol
+    assert details.Ep == Ep  # w.r.t. Ptx
+
+    path = P1812.PreparedPath(*args[2:9], *args[10:14], DN=kwargs["DN"], N0=kwargs["N0"], dct=kwargs["dct"], dcr=kwargs["dcr"])
+    for _ in range(2):
+        Lb2, Ep2, columns = path.bt_loss(f, args[1], args[9], Ptx=kwargs["Ptx"], return_details=True)
+        assert list(path.geometry) == [float(f)]
+        assert abs(Lb2 - Lb1) <= tol
+        for field, value in details.as_dict().items():
+            a, b = np.ravel(columns[field]), np.ravel(value)
+            if b.dtype.kind in "fiu":
+                assert np.all(np.abs(a - b) <= tol), field
+            else:
+                assert np.array_equal(a, b), field
@@ -1,4 +1,3 @@
-import ast
 import csv
 import time
 import psutil
@@ -6,6 +5,7 @@ from pathlib import Path
 
 import Py1812.P1812
 import geojson
+from mst_gis.propagation.profile_parser import decode_list
 
 import numpy as np
 import matplotlib
@@ -28,14 +28,77 @@ import matplotlib
 
 
 def load_profiles():
+    return list(iter_profiles())
+
+
+def iter_profiles():
+    # Rows one at a time, so a whole site is never held in memory
     folder = Path(__file__).parent / 'profiles'
-    profiles = []
     for file in folder.glob("*.csv"):
 
         with file.open(newline="", encoding="utf-8") as f:
-            profiles += list(csv.reader(f, delimiter=";"))[1:]
-
-    return profiles
+            reader = csv.reader(f, delimiter=";")
+            next(reader, None)  # header
+            yield from reader
+
+
+class FeatureCollectionWriter:
+    # Writes a FeatureCollection to disk one feature at a time
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write('{"type": "FeatureCollection", "features": [')
+        self.count = 0
+
+    def write(self, feature):
+        if self.count:
+            self.file.write(", ")
+        self.file.write(geojson.dumps(feature))
+        self.count += 1
+
+    def close(self):
+        self.file.write("]}")
+        self.file.close()
+
+    def discard(self):
+        # Drop the unfinished file
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class PolygonWriter:
+    # Writes a single-polygon FeatureCollection to disk one vertex at a time
+
+    def __init__(self, path, properties):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write('{"type": "FeatureCollection", "features": [{"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [[')
+        self.properties = properties
+        self.first = None
+        self.last = None
+
+    def write(self, coordinates):
+        # Rounded like the coordinates of any geojson geometry
+        coordinates = geojson.Point(coordinates)["coordinates"]
+        if self.first is None:
+            self.first = coordinates
+        else:
+            self.file.write(", ")
+        self.file.write(geojson.dumps(coordinates))
+        self.last = coordinates
+
+    def close(self):
+        # Close ring (GeoJSON polygon should be closed)
+        if self.first is not None and self.first != self.last:
+            self.file.write(", " + geojson.dumps(self.first))
+        self.file.write("]]}, \"properties\": " + geojson.dumps(self.properties) + "}]}")
+        self.file.close()
+
+    def discard(self):
+        # Drop the unfinished file
+        self.file.close()
+        self.path.unlink(missing_ok=True)
 
 
 def generate_geojson_from_profile(profile):
@@ -71,22 +134,21 @@ def add_calculated_fields_from_profile(profile):
     print(str(round(basic_transmission_lost,3)) + "," + str(round(electric_field_strength,3)))
 
 def process_loss_parameters(profile):
-    parameters = [ast.literal_eval(parameter) for parameter in profile[0:15]]
     return [
-        float(parameters[0])
-        ,float(parameters[1])
-        ,np.array([float(value) for value in parameters[2]])
-        ,np.array([float(value) for value in parameters[3]])
-        ,np.array([float(value) for value in parameters[4]])
-        ,np.array([int(value) for value in parameters[5]])
-        ,np.array([int(value) for value in parameters[6]])
-        ,float(parameters[7])
-        ,float(parameters[8])
-        ,int(parameters[9])
-        ,float(parameters[10])
-        ,float(parameters[11])
-        ,float(parameters[12])
-        ,float(parameters[13])
+        float(profile[0])
+        ,float(profile[1])
+        ,decode_list(profile[2])
+        ,decode_list(profile[3])
+        ,decode_list(profile[4])
+        ,decode_list(profile[5], int)
+        ,decode_list(profile[6], int)
+        ,float(profile[7])
+        ,float(profile[8])
+        ,int(float(profile[9]))
+        ,float(profile[10])
+        ,float(profile[11])
+        ,float(profile[12])
+        ,float(profile[13])
     ]
 
 def generate_geojson_point_from_profile(parameters, number):
@@ -124,77 +186,72 @@ def main():
     out_dir = Path("./geojson")
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    points = []
-    lines = []
-    polygon_coords = []
-
-    for index, profile in enumerate(load_profiles()):
-        parameters = process_loss_parameters(profile)
-
-        # transmitter once
-        if index == 0:
-            points.append(generate_geojson_point_transmitter(parameters))
-
-        # receiver
-        points.append(generate_geojson_point_from_profile(parameters, index + 1))
-
-        # line TX->RX
-        tx_lon, tx_lat = parameters[12], parameters[10]
-        rx_lon, rx_lat = parameters[13], parameters[11]
-
-        lines.append(
-            geojson.Feature(
-                geometry=geojson.LineString([[tx_lon, tx_lat], [rx_lon, rx_lat]]),
-                properties={
-                    "name": f"Link_{index+1}",
-                    "rx_id": index+1,
-                    "tx_lon": tx_lon,
-                    "tx_lat": tx_lat,
-                    "rx_lon": rx_lon,
-                    "rx_lat": rx_lat,
-                    "distance_km": float(parameters[2][-1]),
-                },
-            )
-        )
-
-
-        polygon_coords.append([rx_lon, rx_lat])
+    ts = time.strftime("%Y%m%d_%H%M%S")
 
-    # Close ring (GeoJSON polygon should be closed)
-    if polygon_coords and polygon_coords[0] != polygon_coords[-1]:
-        polygon_coords.append(polygon_coords[0])
+    # Features are streamed to temporary files in a single pass over the
+    # profiles; the final names need the maximum distance, known at the end.
+    # On any error the temporary files are removed, so ./geojson never
+    # holds truncated output
+    writers = []
+    try:
+        points = FeatureCollectionWriter(out_dir / f"points_{ts}.geojson.part")
+        writers.append(points)
+        lines = FeatureCollectionWriter(out_dir / f"lines_{ts}.geojson.part")
+        writers.append(lines)
+        polygon = PolygonWriter(out_dir / f"polygon_{ts}.geojson.part", {"name": "Coverage area"})
+        writers.append(polygon)
+
+        # Use the maximum distance among profiles (km) for naming
+        # (usually identical across all profiles)
+        max_d_km = 0.0
+
+        for index, profile in enumerate(iter_profiles()):
+            parameters = process_loss_parameters(profile)
+
+            # transmitter once
+            if index == 0:
+                points.write(generate_geojson_point_transmitter(parameters))
+
+            # receiver
+            points.write(generate_geojson_point_from_profile(parameters, index + 1))
+
+            # line TX->RX
+            tx_lon, tx_lat = parameters[12], parameters[10]
+            rx_lon, rx_lat = parameters[13], parameters[11]
+            distance_km = float(parameters[2][-1])
+
+            lines.write(
+                geojson.Feature(
+                    geometry=geojson.LineString([[tx_lon, tx_lat], [rx_lon, rx_lat]]),
+                    properties={
+                        "name": f"Link_{index+1}",
+                        "rx_id": index+1,
+                        "tx_lon": tx_lon,
+                        "tx_lat": tx_lat,
+                        "rx_lon": rx_lon,
+                        "rx_lat": rx_lat,
+                        "distance_km": distance_km,
+                    },
+                )
+            )
 
-    polygon_fc = geojson.FeatureCollection([
-        geojson.Feature(
-            geometry=geojson.Polygon([polygon_coords]) if polygon_coords else geojson.Polygon([[]]),
-            properties={"name": "Coverage area"},
-        )
-    ])
 
-    ts = time.strftime("%Y%m%d_%H%M%S")
+            polygon.write([rx_lon, rx_lat])
+            max_d_km = max(max_d_km, distance_km)
 
-    # Use the maximum distance among profiles (km) for naming
-    # (usually identical across all profiles)
-    max_d_km = 0.0
-    for profile in load_profiles():
-        p = process_loss_parameters(profile)
-        max_d_km = max(max_d_km, float(p[2][-1]))
+        for writer in writers:
+            writer.close()
+    except BaseException:
+        for writer in writers:
+            writer.discard()
+        raise
 
     # Format for filename: 11.0 -> "11p0km"
     d_tag = f"{max_d_km:.1f}".replace(".", "p") + "km"
 
-    points_path  = out_dir / f"points_{d_tag}_{ts}.geojson"
-    lines_path   = out_dir / f"lines_{d_tag}_{ts}.geojson"
-    polygon_path = out_dir / f"polygon_{d_tag}_{ts}.geojson"
-
-    with open(points_path, "w", encoding="utf-8") as f:
-        geojson.dump(geojson.FeatureCollection(points), f)
-
-    with open(lines_path, "w", encoding="utf-8") as f:
-        geojson.dump(geojson.FeatureCollection(lines), f)
-
-    with open(polygon_path, "w", encoding="utf-8") as f:
-        geojson.dump(polygon_fc, f)
+    points_path  = points.path.rename(out_dir / f"points_{d_tag}_{ts}.geojson")
+    lines_path   = lines.path.rename(out_dir / f"lines_{d_tag}_{ts}.geojson")
+    polygon_path = polygon.path.rename(out_dir / f"polygon_{d_tag}_{ts}.geojson")
 
     print("Saved GeoJSON files:")
     print(" -", points_path.resolve())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Benchmark profile CSV parsing: ast.literal_eval vs the NumPy list decoder.
+
+Usage:
+    python scripts/benchmark_profile_parsing.py
+    python scripts/benchmark_profile_parsing.py --profiles-dir data/input/profiles --repeat 5
+    python scripts/benchmark_profile_parsing.py --points 367 --rows 2000
+"""
+
+import argparse
+import ast
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from mst_gis.propagation.profile_parser import load_profiles, process_loss_parameters
+
+
+def literal_eval_parameters(profile):
+    """Previous parser: ast.literal_eval on every column, then list comprehensions."""
+    parameters = [ast.literal_eval(parameter) for parameter in profile[0:15]]
+    return [
+        float(parameters[0]),
+        float(parameters[1]),
+        np.array([float(value) for value in parameters[2]]),
+        np.array([float(value) for value in parameters[3]]),
+        np.array([float(value) for value in parameters[4]]),
+        np.array([int(value) for value in parameters[5]]),
+        np.array([int(value) for value in parameters[6]]),
+        float(parameters[7]),
+        float(parameters[8]),
+        int(parameters[9]),
+        float(parameters[10]),
+        float(parameters[11]),
+        float(parameters[12]),
+        float(parameters[13]),
+    ]
+
+
+def synthetic_profiles(points, rows):
+    """Profile rows shaped like ProfileFormatter.export_csv output."""
+    rng = np.random.default_rng(0)
+    d = np.round(np.arange(points) * 0.03, 2).tolist()
+    profiles = []
+    for _ in range(rows):
+        h = rng.integers(0, 500, points).tolist()
+        R = rng.choice([0, 10, 15, 20], points).tolist()
+        Ct = rng.choice([2, 3, 4, 5], points).tolist()
+        zone = [4] * points
+        profiles.append([
+            "0.9", "50", str(d), str(h), str(R), str(Ct), str(zone), "57", "10", "1",
+            "9.345271242000774", "9.3", "-13.406938766672388", "-13.4", "0.0", "0",
+        ])
+    return profiles
+
+
+def best_time(parse, profiles, repeat):
+    """Best wall time of parsing all profiles, over repeat runs."""
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for profile in profiles:
+            parse(profile)
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the parse time of the ast.literal_eval parser and the NumPy list decoder."
+    )
+    parser.add_argument("--profiles-dir", type=Path, default=None, help="Directory containing profile CSV files (default: synthetic profiles)")
+    parser.add_argument("--points", type=int, default=367, help="Points per synthetic profile (default: 367)")
+    parser.add_argument("--rows", type=int, default=1000, help="Number of synthetic profiles (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions, the best is reported (default: 3)")
+    
+    args = parser.parse_args()
+    
+    if args.profiles_dir is not None:
+        profiles = load_profiles(args.profiles_dir)
+        source = str(args.profiles_dir)
+    else:
+        profiles = synthetic_profiles(args.points, args.rows)
+        source = f"{args.rows} synthetic profiles of {args.points} points"
+    
+    # Both parsers must give the same arrays
+    for profile in profiles:
+        for old, new in zip(literal_eval_parameters(profile), process_loss_parameters(profile)[0]):
+            if not np.array_equal(old, new):
+                raise SystemExit("Parsers disagree on profile: " + ";".join(profile)[:80])
+    
+    t_old = best_time(literal_eval_parameters, profiles, args.repeat)
+    t_new = best_time(process_loss_parameters, profiles, args.repeat)
+    
+    print(f"Profiles: {len(profiles)} ({source})")
+    print(f"  ast.literal_eval parser: {t_old:.3f}s ({1e6 * t_old / len(profiles):.1f} us/profile)")
+    print(f"  NumPy list decoder:      {t_new:.3f}s ({1e6 * t_new / len(profiles):.1f} us/profile)")
+    print(f"  Speed-up: {t_old / t_new:.1f}x")
@@ -1,6 +1,17 @@
 #!/usr/bin/env python
-"""Entry point for batch processor - Run P1812 propagation analysis on terrain profiles."""
+"""Entry point for batch processor - Run P1812 propagation analysis on terrain profiles.
 
+Usage:
+    python scripts/run_batch_processor.py
+    python scripts/run_batch_processor.py --workers 16 --batch-size 32
+    python scripts/run_batch_processor.py --profiles-dir data/input/profiles --cache-dir data/intermediate/p1812_cache
+    python scripts/run_batch_processor.py --results data/output/results.csv --flush-every 500
+    python scripts/run_batch_processor.py --results data/output/results.csv --resume
+    python scripts/run_batch_processor.py --shard 2/4 --results data/output/results_2of4.csv
+    python scripts/run_batch_processor.py merge -o data/output/results.csv data/output/results_*of4.csv
+"""
+
+import argparse
 import sys
 from pathlib import Path
 
@@ -10,9 +21,78 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 from mst_gis.propagation import batch_process
 
 
+def merge(argv):
+    """Merge subcommand: combine the results files of a sharded run."""
+    from mst_gis.propagation.sharding import merge_results
+    
+    parser = argparse.ArgumentParser(
+        prog="run_batch_processor.py merge",
+        description="Combine per-shard results files into one ordered file and verify that no profile is missing.",
+    )
+    parser.add_argument("shard_results", type=Path, nargs="+", help="Results files of the shard runs")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Merged CSV or Parquet (*.parquet) results file")
+    parser.add_argument("--profiles-dir", type=Path, default=None, help="Profile directory the shards were run on (default: data/input/profiles)")
+    
+    args = parser.parse_args(argv)
+    profiles_dir = args.profiles_dir or Path(__file__).parent.parent / "data" / "input" / "profiles"
+    
+    try:
+        rows = merge_results(args.shard_results, args.output, profiles_dir)
+    except ValueError as e:
+        parser.exit(1, f"Merge failed: {e}\n")
+    print(f"✅ Merged {rows} profiles from {len(args.shard_results)} files into {args.output}")
+
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["merge"]:
+        merge(sys.argv[2:])
+        sys.exit(0)
+    
+    parser = argparse.ArgumentParser(
+        description="Run P1812 propagation analysis on terrain profiles."
+    )
+    parser.add_argument("--profiles-dir", type=Path, default=None, help="Directory containing profile CSV files (default: data/input/profiles)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Profiles per batch, i.e. per task sent to a worker (default: 64)")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Directory of the on-disk result cache (default: no cache)")
+    parser.add_argument("--results", type=Path, default=None, help="Write results incrementally to this CSV or Parquet (*.parquet) file (default: console only)")
+    parser.add_argument("--flush-every", type=int, default=1000, help="Result rows buffered before each write to --results and checkpoint (default: 1000)")
+    parser.add_argument("--shard", type=str, default=None, help="Process only shard i of N (e.g. 2/4), combine the shard results with the merge subcommand")
+    parser.add_argument("--resume", action="store_true", help="Skip the profiles completed by an earlier run and append to its CSV --results file")
+    
+    args = parser.parse_args()
+    
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.flush_every < 1:
+        parser.error("--flush-every must be >= 1")
+    if args.resume and args.results is None:
+        parser.error("--resume requires --results")
+    
+    shard = None
+    if args.shard is not None:
+        from mst_gis.propagation.sharding import parse_shard
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    cache = None
+    if args.cache_dir is not None:
+        from mst_gis.propagation import ResultCache
+        cache = ResultCache(args.cache_dir)
+    
     print("Starting MST-GIS Batch Processor")
     print("=" * 50)
-    batch_process()
+    batch_process(
+        profiles_dir=args.profiles_dir,
+        batch_size=args.batch_size,
+        cache=cache,
+        workers=args.workers,
+        results_path=args.results,
+        flush_every=args.flush_every,
+        resume=args.resume,
+        shard=shard,
+    )
     print("=" * 50)
     print("✅ Batch processing complete")
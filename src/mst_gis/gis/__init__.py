@@ -15,6 +15,9 @@ def __getattr__(name):
             generate_geojson_polygon,
         )
         return locals()[name]
+    elif name in ("ProjectionContext", "get_projection_context"):
+        from .projection import ProjectionContext, get_projection_context
+        return locals()[name]
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
@@ -22,4 +25,6 @@ __all__ = [
     "generate_geojson_point_receiver",
     "generate_geojson_line",
     "generate_geojson_polygon",
+    "ProjectionContext",
+    "get_projection_context",
 ]
@@ -0,0 +1,147 @@
+"""Cached UTM projection contexts for geometry around a transmitter."""
+
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+from pyproj import Geod, Transformer
+from shapely.geometry import Point
+
+
+# Number of transmitter locations whose projection context is kept
+CONTEXT_CACHE_SIZE = 128
+
+# WGS84 ellipsoid for geodesic (forward/inverse) calculations on lon/lat
+WGS84_GEOD = Geod(ellps="WGS84")
+
+
+class ProjectionContext:
+    """UTM zone of a transmitter location with reusable transformers.
+    
+    Holds the UTM CRS estimated for the location and the forward
+    (WGS84 -> UTM) and inverse (UTM -> WGS84) pyproj Transformers, so
+    generating geometry around the same transmitter does not look up the
+    CRS or build transformers again. Both transformers use lon/lat (x/y)
+    axis order, as GeoDataFrame.to_crs() does, and accept NumPy arrays.
+    
+    Use get_projection_context() to obtain a shared, cached instance.
+    
+    Parameters:
+    -----------
+    lon : float
+        Transmitter longitude (degrees)
+    lat : float
+        Transmitter latitude (degrees)
+    
+    Attributes:
+    -----------
+    utm_crs : pyproj.CRS
+        UTM CRS of the location (GeoDataFrame.estimate_utm_crs())
+    to_utm : pyproj.Transformer
+        WGS84 -> UTM transformer
+    to_wgs84 : pyproj.Transformer
+        UTM -> WGS84 transformer
+    x, y : float
+        Transmitter position in UTM (m)
+    """
+    
+    def __init__(self, lon, lat):
+        self.lon = float(lon)
+        self.lat = float(lat)
+        
+        tx_gdf = gpd.GeoDataFrame(geometry=[Point(self.lon, self.lat)], crs="EPSG:4326")
+        self.utm_crs = tx_gdf.estimate_utm_crs()
+        
+        self.to_utm = Transformer.from_crs("EPSG:4326", self.utm_crs, always_xy=True)
+        self.to_wgs84 = Transformer.from_crs(self.utm_crs, "EPSG:4326", always_xy=True)
+        self.x, self.y = self.to_utm.transform(self.lon, self.lat)
+    
+    def forward(self, lon, lat):
+        """Project WGS84 lon/lat (scalars or arrays) to UTM x/y (m)."""
+        return self.to_utm.transform(lon, lat)
+    
+    def inverse(self, x, y):
+        """Project UTM x/y (m, scalars or arrays) to WGS84 lon/lat."""
+        return self.to_wgs84.transform(x, y)
+    
+    def __repr__(self):
+        return f"ProjectionContext(lon={self.lon}, lat={self.lat}, utm_crs={self.utm_crs.to_string()!r})"
+
+
+@lru_cache(maxsize=CONTEXT_CACHE_SIZE)
+def get_projection_context(lon, lat):
+    """Shared ProjectionContext of a transmitter location.
+    
+    Contexts are cached by location in a thread-safe LRU cache holding the
+    CONTEXT_CACHE_SIZE most recently used locations; pyproj (>= 3.1)
+    Transformers can be used from several threads.
+    Clear with get_projection_context.cache_clear().
+    
+    Parameters:
+    -----------
+    lon : float
+        Transmitter longitude (degrees)
+    lat : float
+        Transmitter latitude (degrees)
+    
+    Returns:
+    --------
+    ProjectionContext
+        Context of the location
+    """
+    return ProjectionContext(lon, lat)
+
+
+def radial_points(lon, lat, azimuth_deg, distance_m, method="utm"):
+    """WGS84 positions at given azimuths and distances from a transmitter.
+    
+    Parameters:
+    -----------
+    lon : float
+        Transmitter longitude (degrees)
+    lat : float
+        Transmitter latitude (degrees)
+    azimuth_deg : np.ndarray
+        Azimuth of every point (degrees clockwise from North)
+    distance_m : np.ndarray
+        Distance of every point (m), same shape as azimuth_deg
+    method : str, optional
+        "utm": offset in the transmitter's UTM zone (grid North) and
+        project back in one transform, or "geodesic": forward geodesics on
+        the WGS84 ellipsoid (true North), exact at any distance. Default: "utm"
+    
+    Returns:
+    --------
+    tuple
+        (lon, lat) arrays of the points, shaped like azimuth_deg
+    """
+    azimuth_deg = np.asarray(azimuth_deg, dtype=float)
+    distance_m = np.asarray(distance_m, dtype=float)
+    shape = np.broadcast(azimuth_deg, distance_m).shape
+    azimuth_deg = np.broadcast_to(azimuth_deg, shape).ravel()
+    distance_m = np.broadcast_to(distance_m, shape).ravel()
+    
+    if method == "geodesic":
+        # All radials in one vectorized forward geodesic call, directly in WGS84
+        rx_lon, rx_lat, _ = WGS84_GEOD.fwd(
+            np.full(distance_m.size, float(lon)),
+            np.full(distance_m.size, float(lat)),
+            azimuth_deg,
+            distance_m,
+        )
+    elif method == "utm":
+        # UTM zone and transformers of the transmitter (cached per location)
+        projection = get_projection_context(lon, lat)
+        
+        # Convert azimuth to radians (0° = North, 90° = East)
+        theta = np.radians(azimuth_deg)
+        
+        # Offsets in UTM, converted back to WGS84 (EPSG:4326) in one transform
+        rx_lon, rx_lat = projection.inverse(
+            projection.x + distance_m * np.sin(theta),
+            projection.y + distance_m * np.cos(theta),
+        )
+    else:
+        raise ValueError(f"Unknown radial method: {method!r}")
+    
+    return np.reshape(rx_lon, shape), np.reshape(rx_lat, shape)
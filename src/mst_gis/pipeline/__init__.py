@@ -1,3 +1,3 @@
 """Pipeline modules for processing."""
 
-__all__ = ["config", "data_preparation", "point_generation", "data_extraction", "formatting", "orchestration"]
+__all__ = ["config", "data_preparation", "point_generation", "receiver_grid", "data_extraction", "formatting", "orchestration"]
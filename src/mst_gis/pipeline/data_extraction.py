@@ -20,6 +20,7 @@ import pandas as pd
 import rasterio
 from rasterio.transform import rowcol
 
+from mst_gis.pipeline.receiver_grid import ReceiverGrid
 from mst_gis.utils.logging import Timer, print_success, print_warning, print_error
 from mst_gis.utils.validation import ValidationError, validate_geodataframe
 
@@ -122,6 +123,43 @@ class RasterPreloader:
             print_error(f"Error loading zones: {e}")
             return None
     
+    def sample_landcover(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """
+        Sample land cover codes at WGS84 positions.
+        
+        Args:
+            lon: Longitudes (any shape)
+            lat: Latitudes, same shape as lon
+            
+        Returns:
+            uint8 array of land cover codes, shaped like lon (254 outside the raster)
+        """
+        if self.lcm_array is None:
+            return np.full(np.shape(lon), 254, dtype=np.uint8)
+        
+        values, inside = _sample_raster(self.lcm_array, self.lcm_transform, lon, lat)
+        return np.where(inside, values, 254).astype(np.uint8)
+    
+    def sample_elevation(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """
+        Sample elevations at WGS84 positions.
+        
+        Args:
+            lon: Longitudes (any shape)
+            lat: Latitudes, same shape as lon
+            
+        Returns:
+            float32 array of elevations (m), shaped like lon (0 outside the
+            raster and for nodata)
+        """
+        if self.dem_array is None:
+            return np.zeros(np.shape(lon), dtype=np.float32)
+        
+        values, inside = _sample_raster(self.dem_array, self.dem_transform, lon, lat)
+        z = values.astype(np.float64)
+        # Handle nodata values (typically -32000 for SRTM)
+        return np.where(inside & (z > -32000), z, 0.0).astype(np.float32)
+    
     def extract_landcover_batch(self, gdf: gpd.GeoDataFrame) -> np.ndarray:
         """
         Extract land cover values for all points.
@@ -132,21 +170,8 @@ class RasterPreloader:
         Returns:
             Array of land cover codes
         """
-        if self.lcm_array is None:
-            return np.full(len(gdf), 254, dtype=np.uint8)
-        
-        lcm_values = np.full(len(gdf), 254, dtype=np.uint8)
-        
         with Timer("Extract land cover"):
-            for idx, (_, row) in enumerate(gdf.iterrows()):
-                geom = row.geometry
-                row_pix, col_pix = rowcol(self.lcm_transform, geom.x, geom.y)
-                row_pix, col_pix = int(row_pix), int(col_pix)
-                
-                if 0 <= row_pix < self.lcm_array.shape[0] and 0 <= col_pix < self.lcm_array.shape[1]:
-                    lcm_values[idx] = int(self.lcm_array[row_pix, col_pix])
-        
-        return lcm_values
+            return self.sample_landcover(gdf.geometry.x.to_numpy(), gdf.geometry.y.to_numpy())
     
     def extract_elevation_batch(self, gdf: gpd.GeoDataFrame) -> np.ndarray:
         """
@@ -158,23 +183,54 @@ class RasterPreloader:
         Returns:
             Array of elevation values
         """
-        if self.dem_array is None:
-            return np.zeros(len(gdf), dtype=np.float32)
-        
-        elevation = np.zeros(len(gdf), dtype=np.float32)
-        
         with Timer("Extract elevation"):
-            for idx, (_, row) in enumerate(gdf.iterrows()):
-                geom = row.geometry
-                row_pix, col_pix = rowcol(self.dem_transform, geom.x, geom.y)
-                row_pix, col_pix = int(row_pix), int(col_pix)
-                
-                if 0 <= row_pix < self.dem_array.shape[0] and 0 <= col_pix < self.dem_array.shape[1]:
-                    z = float(self.dem_array[row_pix, col_pix])
-                    # Handle nodata values (typically -32000 for SRTM)
-                    elevation[idx] = z if z > -32000 else 0.0
+            return self.sample_elevation(gdf.geometry.x.to_numpy(), gdf.geometry.y.to_numpy())
+
+
+def _sample_raster(
+    array: np.ndarray,
+    transform,
+    lon: np.ndarray,
+    lat: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Look up raster cells at positions in one vectorized rowcol() call.
+    
+    Args:
+        array: 2-D raster band
+        transform: Affine transform of the raster
+        lon: X coordinates (any shape)
+        lat: Y coordinates, same shape as lon
+        
+    Returns:
+        Tuple of (values, inside) arrays shaped like lon; values outside the
+        raster are those of cell [0, 0] and must be masked with inside
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    if lon.size == 0:
+        return np.zeros(lon.shape, dtype=array.dtype), np.zeros(lon.shape, dtype=bool)
+    
+    rows, cols = rowcol(transform, lon.ravel(), lat.ravel())
+    rows = np.asarray(rows, dtype=np.int64).reshape(lon.shape)
+    cols = np.asarray(cols, dtype=np.int64).reshape(lon.shape)
+    
+    inside = (rows >= 0) & (rows < array.shape[0]) & (cols >= 0) & (cols < array.shape[1])
+    values = array[np.where(inside, rows, 0), np.where(inside, cols, 0)]
+    return values, inside
+
+def read_raster_transform(path: Path):
+    """
+    Read the affine transform and CRS of a raster without loading its data.
+    
+    Args:
+        path: Path to a GeoTIFF or VRT
         
-        return elevation
+    Returns:
+        Tuple of (transform, crs)
+    """
+    with rasterio.open(str(path)) as ds:
+        return ds.transform, ds.crs
 
 
 def extract_zones_vectorized(
@@ -274,23 +330,47 @@ def map_landcover_codes(
     return categories, resistance
 
 
-def extract_data_for_receivers(
-    receivers_gdf: gpd.GeoDataFrame,
+def _check_points(points, kind: type, name: str) -> None:
+    """
+    Check the receivers passed to an extraction function.
+    
+    Args:
+        points: GeoDataFrame or ReceiverGrid of receiver points
+        kind: Expected type of points
+        name: Argument name, for the error messages
+        
+    Raises:
+        ValidationError: If points is not of the expected type or is empty
+    """
+    if not isinstance(points, kind):
+        raise ValidationError(f"{name} must be a {kind.__name__}")
+    
+    if len(points) == 0:
+        raise ValidationError(f"{name} is empty")
+
+
+def _extract_point_data(
+    lon: np.ndarray,
+    lat: np.ndarray,
+    crs,
     dem_path: Path,
     landcover_path: Path,
     zones_path: Path,
     lcm10_to_ct: Dict[int, int],
     ct_to_r: Dict[int, float],
     verbose: bool = True,
-) -> gpd.GeoDataFrame:
+) -> Dict[str, np.ndarray]:
     """
-    Batch extract elevation, land cover, and zone data for all receiver points.
+    Extract elevation, land cover, and zone data at receiver positions.
     
-    Uses Optimization A: pre-load rasters once, then batch extract.
-    Provides ~5-8x speedup compared to per-iteration file I/O.
+    Shared by extract_data_for_receivers and extract_data_for_grid, so both
+    paths sample, map and summarize the data the same way. Only the zone
+    spatial join builds (and drops) a temporary GeoDataFrame of the points.
     
     Args:
-        receivers_gdf: GeoDataFrame with receiver points (must have 'geometry' column)
+        lon: Receiver longitudes (any shape)
+        lat: Receiver latitudes, same shape as lon
+        crs: CRS of the positions, for the zone spatial join
         dem_path: Path to DEM VRT or GeoTIFF
         landcover_path: Path to land cover GeoTIFF
         zones_path: Path to zones GeoJSON
@@ -299,74 +379,158 @@ def extract_data_for_receivers(
         verbose: Print progress updates
         
     Returns:
-        Enriched GeoDataFrame with columns: h, ct, Ct, R, zone
-        
-    Raises:
-        ValidationError: If receivers_gdf is invalid
+        Dictionary of flat arrays h, ct, Ct, R, zone, in the order of lon.ravel()
     """
-    # Validate inputs
-    if not isinstance(receivers_gdf, gpd.GeoDataFrame):
-        raise ValidationError("receivers_gdf must be a GeoDataFrame")
-    
-    if len(receivers_gdf) == 0:
-        raise ValidationError("receivers_gdf is empty")
-    
-    validate_geodataframe(receivers_gdf, ["geometry"])
-    
-    # Make a copy to avoid modifying input
-    result_gdf = receivers_gdf.copy()
-    
-    # Initialize output columns
-    result_gdf["h"] = 0.0        # Elevation (m)
-    result_gdf["ct"] = 254       # Land cover code (0-254)
-    result_gdf["Ct"] = 2         # Land cover category (1-5)
-    result_gdf["R"] = 0.0        # Resistance (ohms)
-    result_gdf["zone"] = 4       # Zone (default Inland)
+    lon = np.asarray(lon, dtype=np.float64).ravel()
+    lat = np.asarray(lat, dtype=np.float64).ravel()
     
     if verbose:
         print("\n" + "=" * 60)
         print("PHASE 3: BATCH DATA EXTRACTION")
         print("=" * 60)
-        print(f"\nExtracting data for {len(result_gdf)} points...")
+        print(f"\nExtracting data for {lon.size} points...")
     
     # Pre-load rasters (Optimization A)
     preloader = RasterPreloader()
     preloader.load_landcover(landcover_path)
     preloader.load_dem(dem_path)
     
-    # Batch extract elevation
-    result_gdf["h"] = preloader.extract_elevation_batch(result_gdf)
+    with Timer("Extract elevation"):
+        h = preloader.sample_elevation(lon, lat)
     
-    # Batch extract land cover
-    result_gdf["ct"] = preloader.extract_landcover_batch(result_gdf)
+    with Timer("Extract land cover"):
+        ct = preloader.sample_landcover(lon, lat)
     
     # Map land cover codes to categories and resistance
-    result_gdf["Ct"], result_gdf["R"] = map_landcover_codes(
-        result_gdf["ct"].values,
-        lcm10_to_ct,
-        ct_to_r,
-    )
+    categories, resistance = map_landcover_codes(ct, lcm10_to_ct, ct_to_r)
     
     # Extract zones
+    zone = np.full(lon.size, 4, dtype=np.int32)
     zones_gdf = preloader.load_zones_geojson(zones_path)
     if zones_gdf is not None:
-        result_gdf["zone"] = extract_zones_vectorized(result_gdf, zones_gdf)
+        points_gdf = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lon, lat), crs=crs)
+        zone = extract_zones_vectorized(points_gdf, zones_gdf)
+        del points_gdf
     
     if verbose:
         print("\n" + "=" * 60)
         print("EXTRACTION SUMMARY")
         print("=" * 60)
         print(f"\nData extraction summary:")
-        print(f"  Total points: {len(result_gdf)}")
+        print(f"  Total points: {lon.size}")
         print(f"  Elevation (h):")
-        print(f"    Min: {result_gdf['h'].min():.1f}m")
-        print(f"    Max: {result_gdf['h'].max():.1f}m")
-        print(f"    Mean: {result_gdf['h'].mean():.1f}m")
+        print(f"    Min: {h.min():.1f}m")
+        print(f"    Max: {h.max():.1f}m")
+        print(f"    Mean: {h.mean():.1f}m")
         print(f"  Land cover codes (ct):")
-        print(f"    Unique: {result_gdf['ct'].nunique()}")
+        print(f"    Unique: {len(np.unique(ct))}")
         print(f"  Land cover categories (Ct):")
-        print(f"    {dict(result_gdf['Ct'].value_counts().sort_index())}")
+        print(f"    {dict(pd.Series(categories).value_counts().sort_index())}")
         print(f"  Zones:")
-        print(f"    {dict(result_gdf['zone'].value_counts().sort_index())}")
+        print(f"    {dict(pd.Series(zone).value_counts().sort_index())}")
+    
+    return {"h": h, "ct": ct, "Ct": categories, "R": resistance, "zone": zone}
+
+
+def extract_data_for_receivers(
+    receivers_gdf: gpd.GeoDataFrame,
+    dem_path: Path,
+    landcover_path: Path,
+    zones_path: Path,
+    lcm10_to_ct: Dict[int, int],
+    ct_to_r: Dict[int, float],
+    verbose: bool = True,
+) -> gpd.GeoDataFrame:
+    """
+    Batch extract elevation, land cover, and zone data for all receiver points.
+    
+    Uses Optimization A: pre-load rasters once, then batch extract.
+    Provides ~5-8x speedup compared to per-iteration file I/O.
+    
+    Args:
+        receivers_gdf: GeoDataFrame with receiver points (must have 'geometry' column)
+        dem_path: Path to DEM VRT or GeoTIFF
+        landcover_path: Path to land cover GeoTIFF
+        zones_path: Path to zones GeoJSON
+        lcm10_to_ct: Mapping LCM10 code → category
+        ct_to_r: Mapping category → resistance (ohms)
+        verbose: Print progress updates
+        
+    Returns:
+        Enriched GeoDataFrame with columns: h, ct, Ct, R, zone
+        
+    Raises:
+        ValidationError: If receivers_gdf is invalid
+    """
+    _check_points(receivers_gdf, gpd.GeoDataFrame, "receivers_gdf")
+    validate_geodataframe(receivers_gdf, ["geometry"])
+    
+    data = _extract_point_data(
+        receivers_gdf.geometry.x.to_numpy(),
+        receivers_gdf.geometry.y.to_numpy(),
+        receivers_gdf.crs,
+        dem_path,
+        landcover_path,
+        zones_path,
+        lcm10_to_ct,
+        ct_to_r,
+        verbose,
+    )
+    
+    # Make a copy to avoid modifying input
+    result_gdf = receivers_gdf.copy()
+    for name, values in data.items():
+        result_gdf[name] = values
     
     return result_gdf
+
+
+def extract_data_for_grid(
+    grid: ReceiverGrid,
+    dem_path: Path,
+    landcover_path: Path,
+    zones_path: Path,
+    lcm10_to_ct: Dict[int, int],
+    ct_to_r: Dict[int, float],
+    verbose: bool = True,
+) -> ReceiverGrid:
+    """
+    Batch extract elevation, land cover, and zone data for a ReceiverGrid.
+    
+    Same extraction as extract_data_for_receivers, sampled directly from
+    the grid's lon/lat arrays.
+    
+    Args:
+        grid: ReceiverGrid from Phase 2
+        dem_path: Path to DEM VRT or GeoTIFF
+        landcover_path: Path to land cover GeoTIFF
+        zones_path: Path to zones GeoJSON
+        lcm10_to_ct: Mapping LCM10 code → category
+        ct_to_r: Mapping category → resistance (ohms)
+        verbose: Print progress updates
+        
+    Returns:
+        New ReceiverGrid sharing the grid's positions, with attributes h, ct, Ct, R, zone
+        
+    Raises:
+        ValidationError: If grid is invalid
+    """
+    _check_points(grid, ReceiverGrid, "grid")
+    
+    data = _extract_point_data(
+        grid.lon,
+        grid.lat,
+        "EPSG:4326",
+        dem_path,
+        landcover_path,
+        zones_path,
+        lcm10_to_ct,
+        ct_to_r,
+        verbose,
+    )
+    result = grid.with_attributes(**data)
+    
+    if verbose:
+        print(f"  Grid memory: {result.nbytes / 1e6:.1f} MB")
+    
+    return result
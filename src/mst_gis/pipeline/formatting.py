@@ -5,15 +5,18 @@ Handles:
 - Formatting enriched receiver data for P.1812-6 model input
 - Grouping points by azimuth into profiles
 - CSV export with semicolon delimiter
+- Binary columnar profile store export (see mst_gis.propagation.profile_store)
 """
 
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Union
 
 import geopandas as gpd
 import pandas as pd
 import numpy as np
 
+from mst_gis.pipeline.receiver_grid import ReceiverGrid
+from mst_gis.propagation.profile_store import STORE_SUFFIX
 from mst_gis.utils.logging import Timer, print_success, print_warning
 from mst_gis.utils.validation import ValidationError, validate_geodataframe
 
@@ -21,12 +24,13 @@ from mst_gis.utils.validation import ValidationError, validate_geodataframe
 class ProfileFormatter:
     """Format and export P.1812-6 profiles."""
     
-    def __init__(self, receivers_gdf: gpd.GeoDataFrame):
+    def __init__(self, receivers_gdf: Union[gpd.GeoDataFrame, ReceiverGrid]):
         """
         Initialize formatter.
         
         Args:
-            receivers_gdf: Enriched GeoDataFrame with elevation, landcover, zone data
+            receivers_gdf: Enriched GeoDataFrame or ReceiverGrid with
+                elevation, landcover, zone data
         """
         self.receivers_gdf = receivers_gdf
         self.profiles = []
@@ -59,11 +63,15 @@ class ProfileFormatter:
             ValidationError: If inputs are invalid
         """
         # Validate inputs
-        if not isinstance(self.receivers_gdf, gpd.GeoDataFrame):
-            raise ValidationError("receivers_gdf must be a GeoDataFrame")
-        
-        required_cols = ["geometry", "azimuth_deg", "distance_km", "h", "Ct", "R", "zone"]
-        validate_geodataframe(self.receivers_gdf, required_cols)
+        if isinstance(self.receivers_gdf, ReceiverGrid):
+            missing = {"h", "Ct", "R", "zone"} - set(self.receivers_gdf.attributes)
+            if missing:
+                raise ValidationError(f"ReceiverGrid missing attributes: {sorted(missing)}")
+        elif isinstance(self.receivers_gdf, gpd.GeoDataFrame):
+            required_cols = ["geometry", "azimuth_deg", "distance_km", "h", "Ct", "R", "zone"]
+            validate_geodataframe(self.receivers_gdf, required_cols)
+        else:
+            raise ValidationError("receivers_gdf must be a GeoDataFrame or ReceiverGrid")
         
         if not 0.03 <= frequency_ghz <= 6:
             raise ValidationError(f"Frequency must be 0.03-6 GHz, got {frequency_ghz}")
@@ -74,6 +82,11 @@ class ProfileFormatter:
         if polarization not in (1, 2):
             raise ValidationError(f"Polarization must be 1 or 2, got {polarization}")
         
+        if isinstance(self.receivers_gdf, ReceiverGrid):
+            profiles = self._format_grid_profiles(frequency_ghz, time_percentage, polarization, htg, hrg)
+            self.profiles = profiles
+            return profiles
+        
         profiles = []
         
         # Get unique azimuths (excluding NaN for transmitter point)
@@ -130,6 +143,57 @@ class ProfileFormatter:
         self.profiles = profiles
         return profiles
     
+    def _format_grid_profiles(
+        self,
+        frequency_ghz: float,
+        time_percentage: int,
+        polarization: int,
+        htg: float,
+        hrg: float,
+    ) -> List[Dict[str, Any]]:
+        """
+        Format a ReceiverGrid, one profile per row (azimuth).
+        
+        Rows are already in distance order, so each profile is a row slice
+        of the grid arrays; the output is the same as for the equivalent
+        GeoDataFrame.
+        """
+        grid = self.receivers_gdf
+        distances = [0] + grid.distances_km.tolist()
+        profiles = []
+        
+        for k in np.argsort(grid.azimuths_deg, kind="stable"):
+            radial = grid.profile(k)
+            
+            h = radial['h'].astype(np.float64)
+            heights = np.where(np.isnan(h), 0, np.rint(h)).astype(np.int64).tolist()
+            r_values = radial['R'].tolist()
+            ct_values = radial['Ct'].tolist()
+            zones = radial['zone'].tolist()
+            
+            # Prepend TX point with properties from first receiver point
+            profile = {
+                'f': frequency_ghz,
+                'p': time_percentage,
+                'd': list(distances),
+                'h': [heights[0]] + heights,
+                'R': [r_values[0]] + r_values,
+                'Ct': [ct_values[0]] + ct_values,
+                'zone': [zones[0]] + zones,
+                'htg': htg,
+                'hrg': hrg,
+                'pol': polarization,
+                'phi_t': float(radial['lat'][0]),
+                'phi_r': float(radial['lat'][-1]),
+                'lam_t': float(radial['lon'][0]),
+                'lam_r': float(radial['lon'][-1]),
+                'azimuth': float(radial['azimuth_deg']),
+            }
+            
+            profiles.append(profile)
+        
+        return profiles
+    
     def to_dataframe(self) -> pd.DataFrame:
         """
         Convert profiles to DataFrame.
@@ -169,9 +233,29 @@ class ProfileFormatter:
         
         return output_path
 
+    def export_store(self, output_path: Path) -> Path:
+        """
+        Export profiles to a binary columnar profile store.
+        
+        The store is memory-mapped by the batch processor, which slices the
+        profiles from it instead of parsing list columns.
+        
+        Args:
+            output_path: Path to the store directory (conventionally *.profiles)
+        
+        Returns:
+            Path to saved store
+        """
+        from mst_gis.propagation.profile_store import write_profile_store
+        
+        if not self.profiles:
+            raise ValidationError("No profiles formatted yet. Call format_profiles() first.")
+        
+        return write_profile_store(output_path, self.profiles)
+
 
 def format_and_export_profiles(
-    receivers_gdf: gpd.GeoDataFrame,
+    receivers_gdf: Union[gpd.GeoDataFrame, ReceiverGrid],
     output_path: Path,
     frequency_ghz: float,
     time_percentage: int,
@@ -185,11 +269,12 @@ def format_and_export_profiles(
     
     Groups all points by azimuth, creating one profile per azimuth direction.
     Each profile contains all distance points along that azimuth, formatted
-    as semicolon-delimited CSV.
+    as semicolon-delimited CSV, or written to a binary columnar profile store
+    when output_path has the .profiles suffix.
     
     Args:
-        receivers_gdf: Enriched GeoDataFrame (from Phase 3)
-        output_path: Path to output CSV file
+        receivers_gdf: Enriched GeoDataFrame or ReceiverGrid (from Phase 3)
+        output_path: Path to output CSV file or profile store (*.profiles)
         frequency_ghz: Frequency in GHz
         time_percentage: Time percentage (%)
         polarization: Polarization (1=horizontal, 2=vertical)
@@ -221,17 +306,27 @@ def format_and_export_profiles(
         )
     
     if verbose:
-        azimuths = sorted(receivers_gdf['azimuth_deg'].dropna().unique())
-        print(f"\nProcessing {len(azimuths)} azimuths...")
+        if isinstance(receivers_gdf, ReceiverGrid):
+            num_azimuths = receivers_gdf.shape[0]
+        else:
+            num_azimuths = receivers_gdf['azimuth_deg'].dropna().nunique()
+        print(f"\nProcessing {num_azimuths} azimuths...")
         print(f"✓ Formatted {len(profiles)} profiles")
     
-    # Export to CSV
-    with Timer("Export to CSV"):
-        output_path = formatter.export_csv(output_path)
+    # Export to CSV or profile store
+    as_store = Path(output_path).suffix == STORE_SUFFIX
+    with Timer("Export to profile store" if as_store else "Export to CSV"):
+        if as_store:
+            output_path = formatter.export_store(output_path)
+        else:
+            output_path = formatter.export_csv(output_path)
     
     if verbose:
-        file_size = output_path.stat().st_size / 1024
-        print(f"\nExporting profiles to CSV...")
+        if as_store:
+            file_size = sum(path.stat().st_size for path in output_path.iterdir()) / 1024
+        else:
+            file_size = output_path.stat().st_size / 1024
+        print(f"\nExporting profiles to {'profile store' if as_store else 'CSV'}...")
         print(f"✓ Saved {len(profiles)} profiles to {output_path}")
         print(f"\nFile size: {file_size:.1f} KB")
         print(f"Columns: {list(formatter.to_dataframe().columns)}")
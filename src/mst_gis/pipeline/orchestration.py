@@ -1,12 +1,13 @@
 """
 Orchestration module for the radio propagation pipeline.
 
-Coordinates execution of all pipeline phases (0-4):
+Coordinates execution of all pipeline phases (0-5):
 - Phase 0: Setup and configuration
 - Phase 1: Land cover data preparation
 - Phase 2: Batch receiver point generation
 - Phase 3: Batch data extraction (elevation, landcover, zones)
 - Phase 4: Formatting and CSV export
+- Phase 5: P.1812 propagation loss calculation
 
 Provides a unified entry point for running the complete workflow.
 """
@@ -16,15 +17,19 @@ from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 
 from mst_gis.pipeline.config import ConfigManager
 from mst_gis.pipeline.data_preparation import prepare_landcover
 from mst_gis.pipeline.point_generation import (
     Transmitter,
-    generate_receiver_grid,
+    generate_distance_array,
+    generate_adaptive_distance_array,
+    generate_azimuth_array,
 )
-from mst_gis.pipeline.data_extraction import extract_data_for_receivers
+from mst_gis.pipeline.receiver_grid import ReceiverGrid
+from mst_gis.pipeline.data_extraction import extract_data_for_grid, read_raster_transform
 from mst_gis.pipeline.formatting import format_and_export_profiles
 
 from mst_gis.utils.logging import Timer, ProgressTracker, print_success, print_warning
@@ -59,15 +64,31 @@ class PipelineOrchestrator:
             'phase2_complete': False,
             'phase3_complete': False,
             'phase4_complete': False,
+            'phase5_complete': False,
         }
         
         # Store phase outputs
         self.phase0_paths = None
         self.phase1_landcover_path = None
-        self.phase2_receivers_gdf = None
-        self.phase3_enriched_gdf = None
+        self.phase2_receiver_grid = None
+        self.phase3_receiver_grid = None
         self.phase4_profiles_df = None
         self.phase4_csv_path = None
+        self.phase5_results = None
+    
+    @property
+    def phase2_receivers_gdf(self) -> Optional[gpd.GeoDataFrame]:
+        """Phase 2 receivers as a GeoDataFrame (built on access from the ReceiverGrid)."""
+        if self.phase2_receiver_grid is None:
+            return None
+        return self.phase2_receiver_grid.to_geodataframe(include_tx_point=True)
+    
+    @property
+    def phase3_enriched_gdf(self) -> Optional[gpd.GeoDataFrame]:
+        """Phase 3 enriched receivers as a GeoDataFrame (built on access from the ReceiverGrid)."""
+        if self.phase3_receiver_grid is None:
+            return None
+        return self.phase3_receiver_grid.to_geodataframe(include_tx_point=True)
     
     def run_phase0_setup(
         self,
@@ -167,12 +188,68 @@ class PipelineOrchestrator:
             print_warning(f"Phase 1 failed: {e}")
             raise
     
-    def run_phase2_generation(self) -> gpd.GeoDataFrame:
+    @staticmethod
+    def _default_dem_path() -> Path:
+        """SRTM1 VRT in the elevation cache."""
+        return Path.home() / '.cache' / 'elevation' / 'SRTM1' / 'SRTM1.vrt'
+    
+    def _receiver_distances(self, lat: float, dem_path: Optional[Path] = None) -> np.ndarray:
+        """
+        Distances of the receiver rings, uniform or adaptive to the DEM.
+        
+        With RECEIVER_GENERATION 'distance_sampling': 'adaptive' the
+        distances follow the DEM resolution (see
+        generate_adaptive_distance_array), using the optional keys
+        'near_distance_km' (default 1.0) and 'terrain_roughness_m';
+        'distance_step_km' is then the step near the transmitter.
+        
+        Args:
+            lat: Transmitter latitude (degrees)
+            dem_path: Path to DEM VRT (auto-detected in cache if None)
+            
+        Returns:
+            Array of distances in km
+        """
+        rx_config = self.config['RECEIVER_GENERATION']
+        uniform = generate_distance_array(
+            min_km=0.0,
+            max_km=rx_config['max_distance_km'],
+            step_km=rx_config['distance_step_km'],
+        )
+        
+        if rx_config.get('distance_sampling', 'uniform') != 'adaptive':
+            return uniform
+        
+        dem_path = Path(dem_path) if dem_path else self._default_dem_path()
+        if not dem_path.exists():
+            print_warning(f"DEM not found at {dem_path}; using uniform distances")
+            return uniform
+        
+        dem_transform, dem_crs = read_raster_transform(dem_path)
+        distances = generate_adaptive_distance_array(
+            max_km=rx_config['max_distance_km'],
+            dem_transform=dem_transform,
+            lat=lat,
+            roughness_m=rx_config.get('terrain_roughness_m'),
+            near_km=rx_config.get('near_distance_km', 1.0),
+            near_step_km=rx_config['distance_step_km'],
+            geographic=dem_crs is None or dem_crs.is_geographic,
+        )
+        print(f"  Adaptive distances: {len(distances)} per radial (uniform: {len(uniform)})")
+        
+        return distances
+    
+    def run_phase2_generation(self, dem_path: Optional[Path] = None) -> ReceiverGrid:
         """
         Phase 2: Generate receiver points.
         
+        Args:
+            dem_path: Path to DEM VRT for adaptive distance sampling
+                (auto-detected in cache if None)
+            
         Returns:
-            GeoDataFrame with receiver points
+            ReceiverGrid with receiver points (see phase2_receivers_gdf for
+            a GeoDataFrame)
         """
         if not self.state['phase0_complete']:
             raise ValidationError("Phase 0 must complete before Phase 2")
@@ -198,22 +275,21 @@ class PipelineOrchestrator:
         )
         
         with Timer("Generate receiver grid"):
-            receivers_gdf = generate_receiver_grid(
-                tx=transmitter,
-                max_distance_km=rx_config['max_distance_km'],
-                distance_step_km=rx_config['distance_step_km'],
-                num_azimuths=rx_config['num_azimuths'],
-                include_tx_point=True,
+            receiver_grid = ReceiverGrid.from_transmitter(
+                transmitter,
+                distances_km=self._receiver_distances(transmitter.lat, dem_path),
+                azimuths_deg=generate_azimuth_array(num_azimuths=rx_config['num_azimuths']),
+                method=rx_config.get('method', 'utm'),
             )
         
-        print(f"\n✓ Generated {len(receivers_gdf)} receiver points")
+        print(f"\n✓ Generated {len(receiver_grid)} receiver points ({receiver_grid.nbytes / 1e6:.1f} MB)")
         
-        self.phase2_receivers_gdf = receivers_gdf
+        self.phase2_receiver_grid = receiver_grid
         self.state['phase2_complete'] = True
         
-        return receivers_gdf
+        return receiver_grid
     
-    def run_phase3_extraction(self, dem_path: Optional[Path] = None) -> gpd.GeoDataFrame:
+    def run_phase3_extraction(self, dem_path: Optional[Path] = None) -> ReceiverGrid:
         """
         Phase 3: Extract elevation, land cover, and zone data.
         
@@ -221,7 +297,8 @@ class PipelineOrchestrator:
             dem_path: Path to DEM VRT (auto-detected in cache if None)
             
         Returns:
-            Enriched GeoDataFrame with extracted data
+            ReceiverGrid with extracted data (see phase3_enriched_gdf for a
+            GeoDataFrame)
         """
         if not self.state['phase2_complete']:
             raise ValidationError("Phase 2 must complete before Phase 3")
@@ -232,8 +309,7 @@ class PipelineOrchestrator:
         
         # Locate DEM
         if not dem_path:
-            cache_dir = Path.home() / '.cache' / 'elevation'
-            dem_path = cache_dir / 'SRTM1' / 'SRTM1.vrt'
+            dem_path = self._default_dem_path()
         
         # Use Phase 1 landcover if available
         landcover_path = self.phase1_landcover_path
@@ -255,8 +331,8 @@ class PipelineOrchestrator:
         zones_path = self.phase0_paths['reference_dir'] / 'zones_map_BR.json'
         
         # Extract data
-        enriched_gdf = extract_data_for_receivers(
-            receivers_gdf=self.phase2_receivers_gdf,
+        enriched_grid = extract_data_for_grid(
+            grid=self.phase2_receiver_grid,
             dem_path=dem_path,
             landcover_path=landcover_path,
             zones_path=zones_path,
@@ -265,10 +341,10 @@ class PipelineOrchestrator:
             verbose=True,
         )
         
-        self.phase3_enriched_gdf = enriched_gdf
+        self.phase3_receiver_grid = enriched_grid
         self.state['phase3_complete'] = True
         
-        return enriched_gdf
+        return enriched_grid
     
     def run_phase4_export(self, output_path: Optional[Path] = None) -> Tuple[pd.DataFrame, Path]:
         """
@@ -292,7 +368,7 @@ class PipelineOrchestrator:
             output_path = self.phase0_paths['profiles_dir'] / f"paths_oneTx_manyRx_{max_dist}km.csv"
         
         df_profiles, csv_path = format_and_export_profiles(
-            receivers_gdf=self.phase3_enriched_gdf,
+            receivers_gdf=self.phase3_receiver_grid,
             output_path=output_path,
             frequency_ghz=self.config['P1812']['frequency_ghz'],
             time_percentage=self.config['P1812']['time_percentage'],
@@ -308,6 +384,53 @@ class PipelineOrchestrator:
         
         return df_profiles, csv_path
     
+    def run_phase5_propagation(
+        self,
+        profiles_dir: Optional[Path] = None,
+        use_cache: bool = True,
+        cache_dir: Optional[Path] = None,
+    ) -> list:
+        """
+        Phase 5: Calculate P.1812 loss and field strength for the exported profiles.
+        
+        Results are kept in an on-disk cache keyed by the P.1812 inputs, so
+        profiles left unchanged by a re-run of Phases 1-4 are not recalculated.
+        
+        Args:
+            profiles_dir: Directory with profile CSV files (Phase 0 profiles dir if None)
+            use_cache: Serve unchanged profiles from the result cache
+            cache_dir: Result cache directory (data/intermediate/p1812_cache if None)
+            
+        Returns:
+            List of per-profile result dictionaries (see batch_processor.main)
+        """
+        if not self.state['phase0_complete']:
+            raise ValidationError("Phase 0 must complete before Phase 5")
+        
+        from mst_gis.propagation.batch_processor import main as batch_process
+        from mst_gis.propagation.result_cache import ResultCache
+        
+        print("\n" + "=" * 60)
+        print("PHASE 5: P.1812 PROPAGATION CALCULATION")
+        print("=" * 60)
+        
+        if not profiles_dir:
+            profiles_dir = self.phase0_paths['profiles_dir']
+        
+        cache = None
+        if use_cache:
+            if not cache_dir:
+                cache_dir = self.phase0_paths['intermediate_dir'] / 'p1812_cache'
+            cache = ResultCache(cache_dir)
+        
+        with Timer("Calculate P.1812 losses"):
+            results = batch_process(profiles_dir=profiles_dir, cache=cache)
+        
+        self.phase5_results = results
+        self.state['phase5_complete'] = True
+        
+        return results
+    
     def run_full_pipeline(
         self,
         project_root: Optional[Path] = None,
@@ -356,8 +479,8 @@ class PipelineOrchestrator:
             print("=" * 70)
             print(f"\nTotal execution time: {total_time:.1f}s")
             print(f"\nOutputs:")
-            print(f"  • Receivers GeoDataFrame: {len(self.phase2_receivers_gdf)} points")
-            print(f"  • Enriched GeoDataFrame: {len(self.phase3_enriched_gdf)} points")
+            print(f"  • Receiver grid: {len(self.phase2_receiver_grid)} points")
+            print(f"  • Enriched grid: {len(self.phase3_receiver_grid)} points")
             print(f"  • Profiles CSV: {self.phase4_csv_path}")
             print(f"\nNext: Run P.1812-6 batch processor on {self.phase4_csv_path}")
             
@@ -365,6 +488,7 @@ class PipelineOrchestrator:
                 'success': True,
                 'total_time': total_time,
                 'paths': paths,
+                'receiver_grid': self.phase3_receiver_grid,
                 'receivers_gdf': self.phase2_receivers_gdf,
                 'enriched_gdf': self.phase3_enriched_gdf,
                 'profiles_df': self.phase4_profiles_df,
@@ -3,22 +3,32 @@ Point generation module for the radio propagation pipeline.
 
 Handles:
 - Batch generation of receiver points at multiple distances and azimuths
-- Radial distribution around a transmitter
+- Radial distribution around a transmitter (UTM offsets or geodesics)
 - GeoDataFrame construction with metadata
 """
 
-import math
 from pathlib import Path
 from typing import List, Tuple, Optional, NamedTuple
 
 import geopandas as gpd
 import numpy as np
+import pandas as pd
 from shapely.geometry import Point
 
+from mst_gis.gis.projection import radial_points
 from mst_gis.utils.logging import Timer, print_success, print_warning
 from mst_gis.utils.validation import ValidationError
 
 
+# Methods of placing receivers around the transmitter (see generate_receivers_radial_multi)
+GRID_METHODS = ("utm", "geodesic")
+
+# Adaptive distance sampling (see generate_adaptive_distance_array)
+METERS_PER_DEGREE = 111320.0  # Length of one degree of latitude (m)
+ROUGH_TERRAIN_M = 50.0        # Roughness (interdecile height range) sampled at the DEM resolution
+MAX_STEP_STRETCH = 4.0        # Largest step increase for flat terrain, in DEM pixels
+
+
 class Transmitter(NamedTuple):
     """Transmitter specification."""
     tx_id: str
@@ -31,11 +41,52 @@ class Transmitter(NamedTuple):
     hrg: float  # Receiver height above ground (m)
 
 
+def validate_radial_axes(
+    distances_km: List[float],
+    azimuths_deg: List[float],
+    method: str = "utm",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Validate the distances, azimuths and method of a radial receiver grid.
+    
+    Shared by generate_receivers_radial_multi and
+    ReceiverGrid.from_transmitter, so both accept the same inputs.
+    
+    Args:
+        distances_km: Array/list of distances in km
+        azimuths_deg: Array/list of azimuths in degrees (0-360)
+        method: "utm" or "geodesic" (see GRID_METHODS)
+        
+    Returns:
+        Tuple of (distances, azimuths) as float64 arrays
+        
+    Raises:
+        ValidationError: If inputs are invalid
+    """
+    distances = np.asarray(distances_km, dtype=np.float64)
+    azimuths = np.asarray(azimuths_deg, dtype=np.float64)
+    
+    if distances.size == 0 or azimuths.size == 0:
+        raise ValidationError("distances_km and azimuths_deg cannot be empty")
+    
+    if (distances < 0).any():
+        raise ValidationError("All distances must be >= 0")
+    
+    if ((azimuths < 0) | (azimuths >= 360)).any():
+        raise ValidationError("All azimuths must be in [0, 360)")
+    
+    if method not in GRID_METHODS:
+        raise ValidationError(f"method must be one of {GRID_METHODS}, got {method!r}")
+    
+    return distances, azimuths
+
+
 def generate_receivers_radial_multi(
     tx: Transmitter,
     distances_km: List[float],
     azimuths_deg: List[float],
     include_tx_point: bool = False,
+    method: str = "utm",
 ) -> gpd.GeoDataFrame:
     """
     Generate receiver points on multiple rings around transmitter.
@@ -43,11 +94,18 @@ def generate_receivers_radial_multi(
     Creates uniformly distributed receiver points at each distance × azimuth
     combination, with proper coordinate transformation.
     
+    With method="utm" the points are offset in the transmitter's UTM zone
+    and projected back to WGS84, which distorts for distances far beyond
+    ~10 km or near zone edges. With method="geodesic" they are placed by
+    forward geodesic calculations on the WGS84 ellipsoid, exact for any
+    distance and azimuth (measured from true North).
+    
     Args:
         tx: Transmitter with lon, lat, tx_id
         distances_km: Array/list of distances in km
         azimuths_deg: Array/list of azimuths in degrees (0-360)
         include_tx_point: If True, include transmitter as rx_id=0
+        method: "utm" (default) or "geodesic"
         
     Returns:
         GeoDataFrame with columns: tx_id, rx_id, distance_km, azimuth_deg, geometry
@@ -57,67 +115,31 @@ def generate_receivers_radial_multi(
     Raises:
         ValidationError: If inputs are invalid
     """
-    # Validate inputs
-    if not distances_km or not azimuths_deg:
-        raise ValidationError("distances_km and azimuths_deg cannot be empty")
+    distances, azimuths = validate_radial_axes(distances_km, azimuths_deg, method)
     
-    if any(d < 0 for d in distances_km):
-        raise ValidationError("All distances must be >= 0")
+    # Distance × azimuth grid, distance-major as rx_id counts (1, 2, ...)
+    d_grid, az_grid = np.meshgrid(distances, azimuths, indexing="ij")
+    radius_m = d_grid.ravel() * 1000.0
     
-    if any(0 > az or az >= 360 for az in azimuths_deg):
-        raise ValidationError("All azimuths must be in [0, 360)")
-    
-    # Create transmitter point and get UTM CRS
-    tx_gdf = gpd.GeoDataFrame(
-        {"tx_id": [tx.tx_id]},
-        geometry=[Point(tx.lon, tx.lat)],
-        crs="EPSG:4326",
-    )
-    utm_crs = tx_gdf.estimate_utm_crs()
-    tx_utm = tx_gdf.to_crs(utm_crs)
-    tx_pt = tx_utm.geometry.iloc[0]
+    # All points in one vectorized UTM transform or geodesic call
+    rx_lon, rx_lat = radial_points(tx.lon, tx.lat, az_grid.ravel(), radius_m, method)
     
-    rows = []
-    rx_id = 1
+    columns = {
+        "tx_id": tx.tx_id,
+        "rx_id": np.arange(1, radius_m.size + 1),
+        "distance_km": d_grid.ravel(),
+        "azimuth_deg": az_grid.ravel(),
+    }
+    gdf = gpd.GeoDataFrame(columns, geometry=gpd.points_from_xy(rx_lon, rx_lat), crs="EPSG:4326")
     
     # Optional: add transmitter point at distance=0
     if include_tx_point:
-        rows.append({
-            "tx_id": tx.tx_id,
-            "rx_id": 0,
-            "distance_km": 0.0,
-            "azimuth_deg": np.nan,
-            "geometry": Point(tx.lon, tx.lat),
-        })
-    
-    # Generate receivers at each distance × azimuth combination
-    for d_km in distances_km:
-        radius_m = float(d_km) * 1000.0
-        
-        for az in azimuths_deg:
-            # Convert azimuth to radians (0° = North, 90° = East)
-            theta = math.radians(float(az))
-            
-            # Calculate offset in UTM
-            dx = radius_m * math.sin(theta)
-            dy = radius_m * math.cos(theta)
-            
-            rx_utm = Point(tx_pt.x + dx, tx_pt.y + dy)
-            
-            # Convert back to WGS84 (EPSG:4326)
-            rx_ll = gpd.GeoSeries([rx_utm], crs=utm_crs).to_crs("EPSG:4326").iloc[0]
-            
-            rows.append({
-                "tx_id": tx.tx_id,
-                "rx_id": rx_id,
-                "distance_km": float(d_km),
-                "azimuth_deg": float(az),
-                "geometry": rx_ll,
-            })
-            rx_id += 1
-    
-    # Create GeoDataFrame with proper column order
-    gdf = gpd.GeoDataFrame(rows, geometry="geometry", crs="EPSG:4326")
+        tx_row = gpd.GeoDataFrame(
+            {"tx_id": [tx.tx_id], "rx_id": [0], "distance_km": [0.0], "azimuth_deg": [np.nan]},
+            geometry=[Point(tx.lon, tx.lat)],
+            crs="EPSG:4326",
+        )
+        gdf = pd.concat([tx_row, gdf], ignore_index=True)
     
     # Sort by distance, then azimuth
     gdf = gdf.sort_values(["distance_km", "azimuth_deg"]).reset_index(drop=True)
@@ -162,6 +184,107 @@ def generate_distance_array(
     return distances
 
 
+def dem_pixel_size_m(dem_transform, lat: float, geographic: bool = True) -> float:
+    """
+    Ground size of a DEM pixel: the larger of its width and height.
+    
+    Args:
+        dem_transform: Affine transform of the DEM (rasterio dataset.transform)
+        lat: Latitude at which the pixel size is evaluated (degrees)
+        geographic: True if the DEM is in degrees (e.g. SRTM in EPSG:4326),
+            False if it is projected in meters
+        
+    Returns:
+        Pixel size in meters
+    """
+    width, height = abs(dem_transform.a), abs(dem_transform.e)
+    if geographic:
+        width *= METERS_PER_DEGREE * np.cos(np.radians(lat))
+        height *= METERS_PER_DEGREE
+    return float(max(width, height))
+
+
+def estimate_terrain_roughness(heights: np.ndarray) -> float:
+    """
+    Terrain roughness as the interdecile range of heights (Δh, as in P.1812).
+    
+    Args:
+        heights: Terrain heights (m), e.g. Phase 3 'h' of an earlier run;
+            NaN values are ignored
+        
+    Returns:
+        Height difference between the 90th and 10th percentile (m)
+    """
+    heights = np.asarray(heights, dtype=float)
+    heights = heights[~np.isnan(heights)]
+    if heights.size == 0:
+        raise ValidationError("heights cannot be empty")
+    
+    return float(np.percentile(heights, 90) - np.percentile(heights, 10))
+
+
+def generate_adaptive_distance_array(
+    max_km: float,
+    dem_transform,
+    lat: float,
+    roughness_m: Optional[float] = None,
+    near_km: float = 1.0,
+    near_step_km: float = 0.03,
+    geographic: bool = True,
+) -> np.ndarray:
+    """
+    Generate array of distances matched to the DEM resolution.
+    
+    Up to near_km the distances are uniform at near_step_km, the minimum
+    density near the transmitter. Beyond, the step is the DEM pixel size,
+    so a radial does not sample the same pixel several times; over flat
+    terrain (roughness_m below ROUGH_TERRAIN_M) it is stretched by
+    ROUGH_TERRAIN_M / roughness_m, at most MAX_STEP_STRETCH times. The far
+    step is never smaller than near_step_km, and max_km is always the
+    last distance.
+    
+    Args:
+        max_km: Maximum distance (km)
+        dem_transform: Affine transform of the DEM (rasterio dataset.transform)
+        lat: Transmitter latitude (degrees), for the pixel size of geographic DEMs
+        roughness_m: Optional terrain roughness (m), see estimate_terrain_roughness
+        near_km: Extent of the dense region around the transmitter (km)
+        near_step_km: Distance step in the dense region (km)
+        geographic: True if the DEM is in degrees, False if projected in meters
+        
+    Returns:
+        Array of ascending distances in km, starting at 0
+        
+    Raises:
+        ValidationError: If inputs are invalid
+    """
+    if max_km <= 0:
+        raise ValidationError("max_km must be > 0")
+    
+    if near_km < 0 or near_step_km <= 0:
+        raise ValidationError("near_km must be >= 0 and near_step_km > 0")
+    
+    if roughness_m is not None and roughness_m < 0:
+        raise ValidationError("roughness_m must be >= 0")
+    
+    step_km = dem_pixel_size_m(dem_transform, lat, geographic) / 1000.0
+    if roughness_m is not None:
+        step_km *= min(MAX_STEP_STRETCH, max(1.0, ROUGH_TERRAIN_M / max(roughness_m, 1e-9)))
+    step_km = max(step_km, near_step_km)
+    
+    near = generate_distance_array(0.0, min(near_km, max_km), near_step_km)
+    
+    # Whole far steps after the dense region, then max_km itself
+    num_far = int(np.floor((max_km - near[-1]) / step_km + 1e-9))
+    far = near[-1] + step_km * np.arange(1, num_far + 1)
+    distances = np.concatenate([near, far])
+    
+    if max_km - distances[-1] > 1e-6:
+        distances = np.append(distances, max_km)
+    
+    return distances
+
+
 def generate_azimuth_array(
     num_azimuths: int = 36,
     start_deg: float = 0.0,
@@ -199,6 +322,7 @@ def generate_receiver_grid(
     distance_step_km: float = 0.03,
     num_azimuths: int = 36,
     include_tx_point: bool = True,
+    method: str = "utm",
 ) -> gpd.GeoDataFrame:
     """
     Generate complete receiver grid around transmitter.
@@ -212,6 +336,8 @@ def generate_receiver_grid(
         distance_step_km: Distance step in km
         num_azimuths: Number of azimuth angles
         include_tx_point: Include transmitter as rx_id=0
+        method: "utm" (default) or "geodesic", use "geodesic" for radials
+            far beyond ~10 km (see generate_receivers_radial_multi)
         
     Returns:
         GeoDataFrame with all receiver points
@@ -229,9 +355,10 @@ def generate_receiver_grid(
     
     return generate_receivers_radial_multi(
         tx,
-        distances.tolist(),
-        azimuths.tolist(),
+        distances,
+        azimuths,
         include_tx_point=include_tx_point,
+        method=method,
     )
 
 
@@ -0,0 +1,302 @@
+"""
+Structure-of-arrays receiver grid for the radio propagation pipeline.
+
+Phases 2-4 work on a ReceiverGrid instead of a GeoDataFrame of shapely
+Points: contiguous arrays laid out as (azimuth, distance) blocks, so a
+profile is a row slice. GeoDataFrames are only built at the edges
+(to_geodataframe / from_geodataframe).
+"""
+
+from typing import Dict, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point
+
+from mst_gis.gis.projection import radial_points
+from mst_gis.pipeline.point_generation import validate_radial_axes
+from mst_gis.utils.validation import ValidationError
+
+
+# Phase 3 attributes: dtype and value before extraction (as in extract_data_for_receivers)
+ATTRIBUTE_DTYPES = {
+    "h": np.float32,    # Elevation (m)
+    "ct": np.uint8,     # Land cover code (0-254)
+    "Ct": np.int8,      # Land cover category (1-5)
+    "R": np.float32,    # Resistance (ohms)
+    "zone": np.int8,    # Zone
+}
+
+ATTRIBUTE_DEFAULTS = {"h": 0.0, "ct": 254, "Ct": 2, "R": 0.0, "zone": 4}
+
+
+class ReceiverGrid:
+    """
+    Receivers on a distance × azimuth grid around one transmitter.
+    
+    Positions and attributes are 2-D arrays of shape (n_azimuths,
+    n_distances): row k is the radial at azimuths_deg[k], column j the ring
+    at distances_km[j]. Azimuths are unique and distances ascending, so
+    every radial is already a profile in distance order.
+    
+    Attributes:
+        tx_id: Transmitter identifier
+        tx_lon, tx_lat: Transmitter position (degrees)
+        azimuths_deg: (n_azimuths,) float64 azimuth of every row
+        distances_km: (n_distances,) float64 distance of every column
+        lon, lat: (n_azimuths, n_distances) float64 receiver positions
+        attributes: Phase 3 arrays by name (see ATTRIBUTE_DTYPES), same shape
+    """
+    
+    def __init__(
+        self,
+        tx_id: str,
+        tx_lon: float,
+        tx_lat: float,
+        azimuths_deg: np.ndarray,
+        distances_km: np.ndarray,
+        lon: np.ndarray,
+        lat: np.ndarray,
+        attributes: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """
+        Initialize grid from its arrays.
+        
+        Args:
+            tx_id: Transmitter identifier
+            tx_lon: Transmitter longitude (degrees)
+            tx_lat: Transmitter latitude (degrees)
+            azimuths_deg: Unique azimuths (degrees), one per row
+            distances_km: Ascending distances (km), one per column
+            lon: Receiver longitudes, shape (n_azimuths, n_distances)
+            lat: Receiver latitudes, shape (n_azimuths, n_distances)
+            attributes: Optional Phase 3 arrays by name
+        
+        Raises:
+            ValidationError: If the axes or array shapes are invalid
+        """
+        self.tx_id = tx_id
+        self.tx_lon = float(tx_lon)
+        self.tx_lat = float(tx_lat)
+        self.azimuths_deg = np.asarray(azimuths_deg, dtype=np.float64)
+        self.distances_km = np.asarray(distances_km, dtype=np.float64)
+        
+        if self.azimuths_deg.ndim != 1 or self.distances_km.ndim != 1:
+            raise ValidationError("azimuths_deg and distances_km must be 1-D")
+        
+        if len(np.unique(self.azimuths_deg)) != len(self.azimuths_deg):
+            raise ValidationError("azimuths_deg must be unique")
+        
+        if (np.diff(self.distances_km) <= 0).any():
+            raise ValidationError("distances_km must be strictly ascending")
+        
+        self.lon = self._grid_array(lon, np.float64, "lon")
+        self.lat = self._grid_array(lat, np.float64, "lat")
+        
+        self.attributes = {}
+        for name, values in (attributes or {}).items():
+            self.set_attribute(name, values)
+    
+    @classmethod
+    def from_transmitter(
+        cls,
+        tx,
+        distances_km: np.ndarray,
+        azimuths_deg: np.ndarray,
+        method: str = "utm",
+    ) -> "ReceiverGrid":
+        """
+        Generate the grid of receivers around a transmitter.
+        
+        Args:
+            tx: Transmitter with tx_id, lon, lat
+            distances_km: Ascending distances in km
+            azimuths_deg: Unique azimuths in degrees [0, 360)
+            method: "utm" (default) or "geodesic" (see gis.projection.radial_points)
+        
+        Returns:
+            ReceiverGrid without attributes
+        
+        Raises:
+            ValidationError: If inputs are invalid
+        """
+        distances, azimuths = validate_radial_axes(distances_km, azimuths_deg, method)
+        
+        # All points in one call, on the (azimuth, distance) layout
+        lon, lat = radial_points(tx.lon, tx.lat, azimuths[:, None], distances[None, :] * 1000.0, method)
+        
+        return cls(tx.tx_id, tx.lon, tx.lat, azimuths, distances, lon, lat)
+    
+    @classmethod
+    def from_geodataframe(cls, gdf: gpd.GeoDataFrame) -> "ReceiverGrid":
+        """
+        Build a grid from a receivers GeoDataFrame (Phase 2 or Phase 3 output).
+        
+        The transmitter row (azimuth NaN) gives the transmitter position and
+        is not part of the grid. Phase 3 columns (h, ct, Ct, R, zone) are
+        taken over as attributes.
+        
+        Args:
+            gdf: GeoDataFrame with tx_id, distance_km, azimuth_deg, geometry
+        
+        Returns:
+            ReceiverGrid
+        
+        Raises:
+            ValidationError: If the points do not form a complete distance × azimuth grid
+        """
+        tx_rows = gdf['azimuth_deg'].isna().to_numpy()
+        receivers = gdf[~tx_rows]
+        if len(receivers) == 0:
+            raise ValidationError("GeoDataFrame has no receiver points")
+        
+        azimuths = np.unique(receivers['azimuth_deg'].to_numpy(dtype=np.float64))
+        distances = np.unique(receivers['distance_km'].to_numpy(dtype=np.float64))
+        row = np.searchsorted(azimuths, receivers['azimuth_deg'].to_numpy(dtype=np.float64))
+        col = np.searchsorted(distances, receivers['distance_km'].to_numpy(dtype=np.float64))
+        
+        flat = row * len(distances) + col
+        if len(receivers) != azimuths.size * distances.size or len(np.unique(flat)) != len(flat):
+            raise ValidationError("Receivers do not form a complete distance × azimuth grid")
+        
+        def to_grid(values, dtype):
+            grid = np.empty(azimuths.size * distances.size, dtype=dtype)
+            grid[flat] = values
+            return grid.reshape(azimuths.size, distances.size)
+        
+        if tx_rows.any():
+            tx_point = gdf.geometry[tx_rows].iloc[0]
+        else:
+            tx_point = receivers.geometry.iloc[int(np.argmin(col))]
+        
+        attributes = {
+            name: to_grid(receivers[name].to_numpy(), dtype)
+            for name, dtype in ATTRIBUTE_DTYPES.items()
+            if name in receivers.columns
+        }
+        
+        return cls(
+            receivers['tx_id'].iloc[0],
+            tx_point.x,
+            tx_point.y,
+            azimuths,
+            distances,
+            to_grid(receivers.geometry.x.to_numpy(), np.float64),
+            to_grid(receivers.geometry.y.to_numpy(), np.float64),
+            attributes,
+        )
+    
+    def _grid_array(self, values, dtype, name: str) -> np.ndarray:
+        """Convert values (grid-shaped or flat in row order) to a grid array."""
+        values = np.asarray(values)
+        if values.size != self.shape[0] * self.shape[1]:
+            raise ValidationError(f"{name} must have {self.shape[0]} × {self.shape[1]} values, got {values.size}")
+        return np.ascontiguousarray(values, dtype=dtype).reshape(self.shape)
+    
+    @property
+    def shape(self):
+        """(n_azimuths, n_distances)"""
+        return (len(self.azimuths_deg), len(self.distances_km))
+    
+    def __len__(self) -> int:
+        return self.shape[0] * self.shape[1]
+    
+    @property
+    def azimuth_index(self) -> np.ndarray:
+        """int16 azimuth (row) index of every point, as a read-only broadcast view."""
+        return np.broadcast_to(np.arange(self.shape[0], dtype=np.int16)[:, None], self.shape)
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the grid arrays (bytes)."""
+        arrays = [self.azimuths_deg, self.distances_km, self.lon, self.lat, *self.attributes.values()]
+        return sum(array.nbytes for array in arrays)
+    
+    def set_attribute(self, name: str, values) -> None:
+        """
+        Set a Phase 3 attribute.
+        
+        Args:
+            name: Attribute name; known names are stored in ATTRIBUTE_DTYPES dtypes
+            values: Grid-shaped array, or flat array in row (azimuth-major) order
+        """
+        values = np.asarray(values)
+        self.attributes[name] = self._grid_array(values, ATTRIBUTE_DTYPES.get(name, values.dtype), name)
+    
+    def with_attributes(self, **attributes) -> "ReceiverGrid":
+        """New grid sharing this grid's positions, with additional attributes."""
+        grid = ReceiverGrid.__new__(ReceiverGrid)
+        grid.__dict__.update(self.__dict__)
+        grid.attributes = dict(self.attributes)
+        for name, values in attributes.items():
+            grid.set_attribute(name, values)
+        return grid
+    
+    def profile(self, k: int) -> Dict[str, np.ndarray]:
+        """
+        Radial k as array views, in distance order.
+        
+        Args:
+            k: Azimuth (row) index
+        
+        Returns:
+            Dictionary with azimuth_deg, distance_km, lon, lat and the attributes
+        """
+        profile = {
+            "azimuth_deg": self.azimuths_deg[k],
+            "distance_km": self.distances_km,
+            "lon": self.lon[k],
+            "lat": self.lat[k],
+        }
+        for name, values in self.attributes.items():
+            profile[name] = values[k]
+        return profile
+    
+    def to_geodataframe(self, include_tx_point: bool = False) -> gpd.GeoDataFrame:
+        """
+        Convert to a receivers GeoDataFrame, as generate_receivers_radial_multi returns.
+        
+        Args:
+            include_tx_point: Include transmitter as rx_id=0; its attributes
+                are those of the distance-0 point of the first radial if the
+                grid has one, else the defaults (ATTRIBUTE_DEFAULTS)
+        
+        Returns:
+            GeoDataFrame with columns tx_id, rx_id, distance_km, azimuth_deg,
+            geometry and the attributes, sorted by distance and azimuth
+        """
+        n_az, n_dist = self.shape
+        
+        # Points in distance-major order, as rx_id counts (1, 2, ...)
+        columns = {
+            "tx_id": self.tx_id,
+            "rx_id": np.arange(1, n_az * n_dist + 1),
+            "distance_km": np.repeat(self.distances_km, n_az),
+            "azimuth_deg": np.tile(self.azimuths_deg, n_dist),
+        }
+        for name, values in self.attributes.items():
+            columns[name] = values.T.ravel()
+        
+        gdf = gpd.GeoDataFrame(
+            columns,
+            geometry=gpd.points_from_xy(self.lon.T.ravel(), self.lat.T.ravel()),
+            crs="EPSG:4326",
+        )
+        
+        if include_tx_point:
+            tx_columns = {"tx_id": [self.tx_id], "rx_id": [0], "distance_km": [0.0], "azimuth_deg": [np.nan]}
+            for name, values in self.attributes.items():
+                value = values[0, 0] if self.distances_km[0] == 0 else ATTRIBUTE_DEFAULTS.get(name, 0)
+                tx_columns[name] = np.array([value], dtype=values.dtype)
+            tx_row = gpd.GeoDataFrame(tx_columns, geometry=[Point(self.tx_lon, self.tx_lat)], crs="EPSG:4326")
+            gdf = pd.concat([tx_row, gdf], ignore_index=True)
+        
+        # Sort by distance, then azimuth
+        return gdf.sort_values(["distance_km", "azimuth_deg"]).reset_index(drop=True)
+    
+    def __repr__(self) -> str:
+        return (
+            f"ReceiverGrid(tx_id={self.tx_id!r}, azimuths={self.shape[0]}, distances={self.shape[1]}, "
+            f"attributes={list(self.attributes)}, {self.nbytes / 1e6:.1f} MB)"
+        )
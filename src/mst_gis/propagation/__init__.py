@@ -8,12 +8,24 @@ def __getattr__(name):
     elif name == "load_profiles":
         from .profile_parser import load_profiles
         return load_profiles
+    elif name == "iter_profiles":
+        from .profile_parser import iter_profiles
+        return iter_profiles
     elif name == "process_loss_parameters":
         from .profile_parser import process_loss_parameters
         return process_loss_parameters
+    elif name == "ResultCache":
+        from .result_cache import ResultCache
+        return ResultCache
+    elif name == "ProfileStore":
+        from .profile_store import ProfileStore
+        return ProfileStore
+    elif name == "open_results_sink":
+        from .results_sink import open_results_sink
+        return open_results_sink
     elif name == "generate_phyllotaxis":
         from .point_generator import generate_phyllotaxis
         return generate_phyllotaxis
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ["batch_process", "load_profiles", "process_loss_parameters", "generate_phyllotaxis"]
+__all__ = ["batch_process", "load_profiles", "iter_profiles", "process_loss_parameters", "generate_phyllotaxis", "ResultCache", "ProfileStore", "open_results_sink"]
@@ -1,21 +1,259 @@
 """Batch processor for P1812 radio propagation calculations."""
 
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from .profile_parser import load_profiles, process_loss_parameters
+import numpy as np
 
+from .checkpoint import CheckpointJournal, journal_path, profile_entry
+from .profile_parser import iter_profile_records
+from .result_cache import input_key
+from .results_sink import open_results_sink, results_sink_class
+from .sharding import shard_selector
 
-def main(profiles_dir=None):
+
+# Parameters that P1812.bt_loss_batch() shares across all profiles of one call
+# (indices into the list returned by process_loss_parameters)
+SHARED_PARAMETERS = (0, 1, 7, 8, 9)  # f, p, htg, hrg, pol
+
+
+def iter_batches(parsed_profiles, batch_size=64):
+    """Group consecutive parsed profiles into batches for P1812.bt_loss_batch().
+    
+    A batch holds at most batch_size profiles, all sharing the same
+    frequency, time percentage, antenna heights and polarization.
+    
+    Parameters:
+    -----------
+    parsed_profiles : iterable
+        (parameters, tx_id) tuples from process_loss_parameters()
+    batch_size : int, optional
+        Maximum number of profiles per batch. Default: 64
+    
+    Yields:
+    -------
+    list
+        List of (parameters, tx_id) tuples
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    
+    batch = []
+    batch_key = None
+    for parameters, tx_id in parsed_profiles:
+        key = tuple(parameters[i] for i in SHARED_PARAMETERS)
+        if batch and (key != batch_key or len(batch) >= batch_size):
+            yield batch
+            batch = []
+        batch_key = key
+        batch.append((parameters, tx_id))
+    
+    if batch:
+        yield batch
+
+
+def calculate_batch(batch, refractivity=None, cache=None):
+    """Calculate P1812 loss and field strength for a batch of profiles.
+    
+    Parameters:
+    -----------
+    batch : list
+        (parameters, tx_id) tuples sharing f, p, htg, hrg and pol (see iter_batches)
+    refractivity : Py1812.P1812.RefractivityCache, optional
+        Cache serving the path-centre DN/N0 values. Default: interpolate the maps
+    cache : ResultCache, optional
+        On-disk result cache; only the profiles missing from it are calculated
+    
+    Returns:
+    --------
+    tuple
+        (Lb, Ep) arrays with one value per profile
+    """
+    if cache is None:
+        return _bt_loss_batch(batch, refractivity)
+    
+    keys, results, missing = _cache_lookup(batch, refractivity, cache)
+    if missing:
+        Lb_missing, Ep_missing = _bt_loss_batch([batch[i] for i in missing], refractivity)
+        _cache_store(cache, keys, results, missing, Lb_missing, Ep_missing)
+    
+    Lb, Ep = (np.array(values, dtype=float) for values in zip(*results))
+    return Lb, Ep
+
+
+def _cache_lookup(batch, refractivity, cache):
+    """Look up a batch in the result cache.
+    
+    Returns the cache keys, the cached (Lb, Ep) results (None for a miss)
+    and the indices of the profiles that still have to be calculated.
+    """
+    # DN/N0 from a RefractivityCache are rounded to its resolution
+    options = {} if refractivity is None else {'refractivity': refractivity.resolution}
+    keys = [input_key(parameters, options) for parameters, _ in batch]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    return keys, results, missing
+
+
+def _cache_store(cache, keys, results, missing, Lb_missing, Ep_missing):
+    """Fill the misses of _cache_lookup() with calculated values and store them."""
+    for i, Lb, Ep in zip(missing, Lb_missing, Ep_missing):
+        cache.put(keys[i], Lb, Ep)
+        results[i] = (Lb, Ep)
+
+
+def _bt_loss_batch(batch, refractivity):
+    """Run P1812.bt_loss_batch() on a batch of (parameters, tx_id) tuples."""
+    import Py1812.P1812
+    
+    columns = list(zip(*(parameters for parameters, _ in batch)))
+    f, p, htg, hrg, pol = (columns[i][0] for i in SHARED_PARAMETERS)
+    
+    return Py1812.P1812.bt_loss_batch(
+        f, p,
+        list(columns[2]), list(columns[3]), list(columns[4]), list(columns[5]), list(columns[6]),
+        htg, hrg, pol,
+        list(columns[10]), list(columns[11]), list(columns[12]), list(columns[13]),
+        refractivity=refractivity,
+    )
+
+
+# State of a worker process of the parallel batch processor (see _init_worker)
+_worker_state = {}
+
+
+def _init_worker(refractivity):
+    """Import Py1812 and load the DN50/N050 maps once per worker process."""
+    import Py1812.P1812
+    
+    Py1812.P1812.digital_maps()
+    _worker_state['refractivity'] = refractivity
+
+
+def _calculate_in_worker(batch):
+    """Calculate a batch in a worker process, returning (Lb, Ep, elapsed)."""
+    start_time = time.perf_counter()
+    Lb, Ep = _bt_loss_batch(batch, _worker_state['refractivity'])
+    return Lb, Ep, time.perf_counter() - start_time
+
+
+def calculate_batches(batches, refractivity=None, cache=None, workers=1):
+    """Calculate batches of profiles, serially or in a process pool.
+    
+    With workers > 1 the batches are dispatched to a ProcessPoolExecutor
+    whose workers import Py1812 and load the digital maps once. At most
+    2 * workers batches are in flight, so batches can be produced lazily.
+    Result cache lookups and updates are done in the calling process.
+    
+    Parameters:
+    -----------
+    batches : iterable
+        Batches of (parameters, tx_id) tuples (see iter_batches)
+    refractivity : Py1812.P1812.RefractivityCache, optional
+        Cache serving the path-centre DN/N0 values. With workers > 1 each
+        worker uses its own copy, so its statistics stay at zero here
+    cache : ResultCache, optional
+        On-disk result cache; only the profiles missing from it are calculated
+    workers : int, optional
+        Number of worker processes, 1 calculates in this process. Default: 1
+    
+    Yields:
+    -------
+    tuple
+        (batch, Lb, Ep, elapsed) in input order, where elapsed is the time
+        spent calculating the batch (s)
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    
+    if workers == 1:
+        for batch in batches:
+            start_time = time.perf_counter()
+            Lb, Ep = calculate_batch(batch, refractivity, cache)
+            yield batch, Lb, Ep, time.perf_counter() - start_time
+        return
+    
+    def submit(batch):
+        if cache is None:
+            keys, results, missing = None, None, list(range(len(batch)))
+        else:
+            keys, results, missing = _cache_lookup(batch, refractivity, cache)
+        future = executor.submit(_calculate_in_worker, [batch[i] for i in missing]) if missing else None
+        return batch, keys, results, missing, future
+    
+    def collect(batch, keys, results, missing, future):
+        if future is None:
+            Lb, Ep, elapsed = None, None, 0.0
+        else:
+            Lb, Ep, elapsed = future.result()
+        if cache is not None:
+            if missing:
+                _cache_store(cache, keys, results, missing, Lb, Ep)
+            Lb, Ep = (np.array(values, dtype=float) for values in zip(*results))
+        return batch, Lb, Ep, elapsed
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(refractivity,)) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(submit(batch))
+            if len(pending) >= 2 * workers:
+                yield collect(*pending.popleft())
+        
+        while pending:
+            yield collect(*pending.popleft())
+
+
+def main(profiles_dir=None, batch_size=64, refractivity=None, cache=None, workers=1,
+         results_path=None, flush_every=1000, resume=False, shard=None):
     """Main batch processor function.
     
-    Loads profiles from CSV and calculates P1812 propagation loss/field strength.
-    Results are printed to console with tx_id tracking.
+    Streams profiles from CSV and calculates P1812 propagation loss/field strength.
+    Profiles are evaluated in batches with P1812.bt_loss_batch(), which runs
+    the P.1812 path analysis as array operations across the batch, and the
+    batches are spread over worker processes when workers > 1.
+    Results are printed to console with tx_id tracking and, when
+    results_path is given, appended to a CSV or Parquet file as they are
+    calculated instead of being collected in memory. CSV results are
+    checkpointed, so an interrupted run can be continued with resume=True.
     
     Parameters:
     -----------
     profiles_dir : Path or str, optional
         Directory containing profile CSV files. Defaults to data/input/profiles/
+    batch_size : int, optional
+        Maximum number of profiles per bt_loss_batch() call, i.e. per task
+        sent to a worker process. Default: 64
+    refractivity : Py1812.P1812.RefractivityCache, optional
+        Cache serving the path-centre DN/N0 values, shared by all batches.
+        Its hit rate is reported at the end of the run.
+    cache : ResultCache, optional
+        On-disk result cache; profiles whose inputs are unchanged since an
+        earlier run are not recalculated. Its statistics are reported at the end.
+    workers : int, optional
+        Number of worker processes (see calculate_batches). Default: 1
+    results_path : Path or str, optional
+        Results file, Parquet for *.parquet / *.pq, semicolon-delimited CSV
+        otherwise (see results_sink). Default: keep the results in memory
+    flush_every : int, optional
+        Number of result rows buffered before they are written to
+        results_path, which is also the checkpoint interval. Default: 1000
+    resume : bool, optional
+        Continue an earlier run writing to the same CSV results_path: the
+        profiles recorded in its checkpoint journal (results_path +
+        .checkpoint) with unchanged inputs are skipped and the new rows are
+        appended. Default: False
+    shard : tuple, optional
+        (i, N) to process only the i-th of N disjoint shards of the
+        profiles (see sharding); the shard results are combined with
+        sharding.merge_results(). Default: all profiles
+    
+    Returns:
+    --------
+    list or Path
+        List of result dicts, or the path of the results file when
+        results_path is given
     """
     # Import Py1812 at runtime (not available in all environments)
     try:
@@ -29,52 +267,134 @@ def main(profiles_dir=None):
     else:
         profiles_dir = Path(profiles_dir)
     
-    profiles = load_profiles(profiles_dir)
-    
     print(f"\n{'='*70}")
-    print(f"P1812 BATCH PROCESSOR - Processing {len(profiles)} profiles")
+    shard_text = f", shard {shard[0]}/{shard[1]}" if shard is not None else ""
+    print(f"P1812 BATCH PROCESSOR - Processing {profiles_dir} ({workers} worker{'s' if workers > 1 else ''}{shard_text})")
     print(f"{'='*70}\n")
     
     results = []
+    count = 0
+    processed = 0
+    skipped = 0
     total_time = 0.0
+    sink = None
+    journal = None
     
-    for index, profile in enumerate(profiles):
-        parameters, tx_id = process_loss_parameters(profile)
-        
-        # Calculate propagation loss
-        start_time = time.perf_counter()
-        Lb, Ep = Py1812.P1812.bt_loss(*parameters)
-        elapsed = time.perf_counter() - start_time
-        total_time += elapsed
-        
-        # Extract key info
-        distance_km = float(parameters[2][-1])
-        frequency_ghz = float(parameters[0])
-        
-        # Store result
-        result = {
-            'index': index + 1,
-            'tx_id': tx_id,
-            'distance_km': distance_km,
-            'frequency_ghz': frequency_ghz,
-            'Lb': Lb,
-            'Ep': Ep,
-            'elapsed_s': elapsed,
-        }
-        results.append(result)
-        
-        # Print result
-        print(f"Profile {index+1:4d}: TX={tx_id:8} | D={distance_km:6.2f}km | F={frequency_ghz:.2f}GHz | Lb={Lb:7.2f}dB | Ep={Ep:7.2f}dBμV/m ({elapsed:.3f}s)")
+    if resume and (results_path is None or not results_sink_class(results_path).supports_append):
+        raise ValueError("resume requires a CSV results_path")
+    
+    if results_path is not None:
+        if results_sink_class(results_path).supports_append:
+            journal = CheckpointJournal(journal_path(results_path), resume=resume)
+            if resume:
+                # Drop rows written after the last checkpoint, they are calculated again
+                journal.truncate_results(results_path)
+                count = journal.rows
+                print(f"Resuming after {journal.rows} completed profiles ({journal_path(results_path)})\n")
+        sink = open_results_sink(results_path, flush_every=flush_every, append=resume)
+    
+    wall_start = time.perf_counter()
+    
+    # Source, row and journal entry of the profiles in flight, in input order
+    in_flight = deque()
+    completed = []
+    
+    def unfinished_profiles():
+        nonlocal skipped
+        select = shard_selector(shard) if shard is not None else None
+        for source, row, parameters, tx_id in iter_profile_records(profiles_dir, select):
+            entry = None
+            if journal is not None:
+                entry = profile_entry(source, row, parameters)
+                if entry in journal:
+                    skipped += 1
+                    continue
+            in_flight.append((source, row, entry))
+            yield parameters, tx_id
+    
+    # Profiles are read and parsed lazily, one batch at a time
+    batches = iter_batches(unfinished_profiles(), batch_size)
+    
+    # Calculate propagation loss, results come back in input order
+    try:
+        for batch, Lb_batch, Ep_batch, batch_elapsed in calculate_batches(batches, refractivity, cache, workers):
+            total_time += batch_elapsed
+            
+            # Time per profile is the batch time shared evenly
+            elapsed = batch_elapsed / len(batch)
+            
+            batch_results = []
+            batch_entries = [in_flight.popleft() for _ in batch]
+            for (parameters, tx_id), (source, row, _), Lb, Ep in zip(batch, batch_entries, Lb_batch, Ep_batch):
+                index = count
+                count += 1
+                processed += 1
+                
+                # Extract key info
+                distance_km = float(parameters[2][-1])
+                frequency_ghz = float(parameters[0])
+                
+                # Store result
+                result = {
+                    'index': index + 1,
+                    'source': source,
+                    'row': row,
+                    'tx_id': tx_id,
+                    'distance_km': distance_km,
+                    'frequency_ghz': frequency_ghz,
+                    'Lb': float(Lb),
+                    'Ep': float(Ep),
+                    'elapsed_s': elapsed,
+                }
+                batch_results.append(result)
+                
+                # Print result
+                print(f"Profile {index+1:4d}: TX={tx_id:8} | D={distance_km:6.2f}km | F={frequency_ghz:.2f}GHz | Lb={Lb:7.2f}dB | Ep={Ep:7.2f}dBμV/m ({elapsed:.3f}s)")
+            
+            # Rows are stored a whole batch at a time, and a batch only counts
+            # as completed once all its rows are in the sink, so a checkpoint
+            # never holds part of a batch
+            if sink is None:
+                results.extend(batch_results)
+            else:
+                sink.write_rows(batch_results)
+            
+            if journal is not None:
+                completed.extend(entry for _, _, entry in batch_entries)
+                if len(completed) >= flush_every:
+                    journal.commit(completed, sink)
+                    completed = []
+    finally:
+        # Rows of the batches completed before an error or interruption are kept
+        try:
+            if journal is not None:
+                journal.commit(completed, sink)
+        finally:
+            if journal is not None:
+                journal.close()
+            if sink is not None:
+                sink.close()
     
     print(f"\n{'='*70}")
     print(f"✅ PROCESSING COMPLETE")
     print(f"{'='*70}")
-    print(f"  Total profiles: {len(results)}")
+    print(f"  Total profiles: {count}")
+    if skipped:
+        print(f"  Skipped (completed in an earlier run): {skipped}")
     print(f"  Total time: {total_time:.2f}s")
-    print(f"  Average time per profile: {total_time/len(results):.3f}s")
-    print(f"\nResults available in console output above.")
+    print(f"  Wall time: {time.perf_counter() - wall_start:.2f}s")
+    if processed:
+        print(f"  Average time per profile: {total_time/processed:.3f}s")
+    if refractivity is not None and workers == 1:
+        print(f"  DN/N0 cache hit rate: {refractivity.hit_rate:.1%} ({refractivity.hits} hits, {refractivity.misses} misses)")
+    if cache is not None:
+        print(f"  Result cache hit rate: {cache.hit_rate:.1%} ({cache.hits} hits, {cache.misses} misses, {cache.evictions} evictions)")
+    if sink is None:
+        print(f"\nResults available in console output above.")
+        return results
     
-    return results
+    print(f"\nResults written to {sink.path}")
+    return sink.path
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+"""Checkpoint journal for resumable batch processor runs."""
+
+import os
+from pathlib import Path
+
+from .result_cache import input_key
+
+
+JOURNAL_SUFFIX = ".checkpoint"
+
+# Hex digits of the input hash kept per journal entry
+KEY_LENGTH = 16
+
+
+def journal_path(results_path):
+    """Checkpoint journal belonging to a results file (results.csv -> results.csv.checkpoint)."""
+    results_path = Path(results_path)
+    return results_path.with_name(results_path.name + JOURNAL_SUFFIX)
+
+
+def profile_entry(source, row, parameters):
+    """Journal entry of one profile: its file, row and a hash of its inputs.
+    
+    Parameters:
+    -----------
+    source : str
+        Name of the profile CSV file or store
+    row : int
+        Index of the profile in the source
+    parameters : list
+        Profile as returned by process_loss_parameters()
+    
+    Returns:
+    --------
+    str
+        Entry, tab separated
+    """
+    return f"{source}\t{row}\t{input_key(parameters)[:KEY_LENGTH]}"
+
+
+class CheckpointJournal:
+    """Append-only journal of the profiles whose results are safely on disk.
+    
+    The journal is a text file of profile entries (see profile_entry),
+    each group of them followed by a commit line holding the number of
+    result rows and the size of the results file at that point:
+    
+        P<TAB>source<TAB>row<TAB>hash
+        C<TAB>rows<TAB>results_size
+    
+    commit() syncs the results file before it appends and syncs a group,
+    so a commit line is only on disk once the rows it covers are. Entries
+    after the last commit line (e.g. a write cut short by a crash) are
+    discarded when the journal is loaded, and the results file is cut
+    back to the committed size by truncate_results().
+    
+    Parameters:
+    -----------
+    path : Path or str
+        Journal file
+    resume : bool, optional
+        Load an existing journal and append to it, otherwise start a new
+        one. Default: False
+    """
+    
+    def __init__(self, path, resume=False):
+        self.path = Path(path)
+        self.completed = set()
+        self.rows = 0
+        self.results_size = None
+        self.commits = 0
+        
+        if resume and self.path.exists():
+            self._load()
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a" if resume else "w", encoding="utf-8")
+    
+    def _load(self):
+        """Read the committed entries and cut off anything after the last commit."""
+        group = []
+        committed_size = 0
+        with self.path.open("rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                fields = line.decode("utf-8").rstrip("\n").split("\t")
+                if fields[0] == "P" and len(fields) == 4:
+                    group.append("\t".join(fields[1:]))
+                elif fields[0] == "C" and len(fields) == 3:
+                    self.completed.update(group)
+                    group = []
+                    self.rows = int(fields[1])
+                    self.results_size = int(fields[2])
+                    committed_size = f.tell()
+                else:
+                    break
+        
+        os.truncate(self.path, committed_size)
+    
+    def __contains__(self, entry):
+        return entry in self.completed
+    
+    def __len__(self):
+        return len(self.completed)
+    
+    def truncate_results(self, results_path):
+        """Cut a results file back to its size at the last commit.
+        
+        Rows written after the last commit are not covered by the journal
+        and will be calculated again, so they are removed. Without any
+        commit the file is emptied.
+        """
+        results_path = Path(results_path)
+        if results_path.exists():
+            os.truncate(results_path, self.results_size or 0)
+    
+    def commit(self, entries, sink):
+        """Sync the results sink, then record entries as completed.
+        
+        Parameters:
+        -----------
+        entries : list
+            Entries (see profile_entry) of the profiles whose rows have been
+            written to sink
+        sink : ResultsSink
+            Results sink supporting sync()
+        """
+        if not entries:
+            return
+        
+        self.results_size = sink.sync()
+        self.rows += len(entries)
+        
+        lines = [f"P\t{entry}\n" for entry in entries]
+        lines.append(f"C\t{self.rows}\t{self.results_size}\n")
+        self._file.writelines(lines)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        
+        self.completed.update(entries)
+        self.commits += 1
+    
+    def close(self):
+        self._file.close()
@@ -17,6 +17,8 @@ from pathlib import Path
 from rasterio.io import MemoryFile
 from shapely.geometry import Point
 
+from mst_gis.gis.projection import get_projection_context
+
 # Initialize SRTM data handler (lazy-loaded on first use)
 _srtm_data = None
 _srtm_cache_dir = None
@@ -353,13 +355,8 @@ def generate_profile_points(
         except Exception as seed_err:
             print(f"Warning: Could not initialize SRTM data ({seed_err}), will use fallback")
 
-    # Create transmitter point in WGS84
-    tx_gdf = gpd.GeoDataFrame(geometry=[Point(tx_lon, tx_lat)], crs="EPSG:4326")
-
-    # Project to UTM for metric distances
-    utm_crs = tx_gdf.estimate_utm_crs()
-    tx_utm = tx_gdf.to_crs(utm_crs)
-    center = tx_utm.geometry.iloc[0]
+    # Project to UTM for metric distances (zone and transformers cached per TX)
+    projection = get_projection_context(tx_lon, tx_lat)
 
     # Compute step distance
     max_m = max_distance_km * 1000.0
@@ -371,24 +368,17 @@ def generate_profile_points(
     dy_unit = math.cos(theta)
 
     # Generate points along path in UTM
-    points_utm = []
-    distances_km = []
-
-    for i in range(n_points):
-        d_m = i * step_m
-        x = center.x + d_m * dx_unit
-        y = center.y + d_m * dy_unit
-        points_utm.append(Point(x, y))
-        distances_km.append(d_m / 1000.0)
-
-    gdf_utm = gpd.GeoDataFrame(
-        {"id": range(n_points), "d": distances_km, "azimuth": azimuth_deg},
-        geometry=points_utm,
-        crs=utm_crs,
-    )
+    d_m = np.arange(n_points) * step_m
+    x = projection.x + d_m * dx_unit
+    y = projection.y + d_m * dy_unit
 
     # Convert back to WGS84 for elevation sampling
-    gdf = gdf_utm.to_crs("EPSG:4326")
+    lon, lat = projection.inverse(x, y)
+    gdf = gpd.GeoDataFrame(
+        {"id": range(n_points), "d": d_m / 1000.0, "azimuth": azimuth_deg},
+        geometry=gpd.points_from_xy(lon, lat),
+        crs="EPSG:4326",
+    )
 
     # Load zones if available
     if zones_path and Path(zones_path).exists():
@@ -1,10 +1,11 @@
 """Terrain profile parsing from CSV files."""
 
-import ast
 import csv
 from pathlib import Path
 import numpy as np
 
+from .profile_store import STORE_SUFFIX, ProfileStore, is_profile_store
+
 
 def load_profiles(profiles_dir):
     """Load all CSV profile files from a directory.
@@ -13,19 +14,144 @@ def load_profiles(profiles_dir):
     -----------
     profiles_dir : Path or str
         Directory containing profile CSV files
-        
+    
     Returns:
     --------
     list
         List of parsed profile rows
     """
-    folder = Path(profiles_dir)
-    profiles = []
-    for file in folder.glob("*.csv"):
+    return list(iter_profile_rows(profiles_dir))
+
+
+def iter_profile_rows(profiles_dir):
+    """Yield the profile rows of all CSV files in a directory, one at a time.
+    
+    Files are read in name order and row by row, so only the current row is
+    held in memory.
+    
+    Parameters:
+    -----------
+    profiles_dir : Path or str
+        Directory containing profile CSV files
+    
+    Yields:
+    -------
+    list
+        Raw profile row (header rows are skipped)
+    """
+    for file in sorted(Path(profiles_dir).glob("*.csv")):
         with file.open(newline="", encoding="utf-8") as f:
-            profiles += list(csv.reader(f, delimiter=";"))[1:]
+            reader = csv.reader(f, delimiter=";")
+            next(reader, None)  # header
+            yield from reader
+
+
+def profile_sources(profiles_dir):
+    """List the profile CSV files and binary profile stores of a directory.
     
-    return profiles
+    Parameters:
+    -----------
+    profiles_dir : Path or str
+        Directory containing profile CSV files and/or profile stores
+        (see profile_store), or a single profile store
+    
+    Returns:
+    --------
+    list
+        Paths of the CSV files and stores, in name order
+    """
+    path = Path(profiles_dir)
+    if is_profile_store(path):
+        return [path]
+    
+    stores = [store for store in path.glob("*" + STORE_SUFFIX) if is_profile_store(store)]
+    return sorted(list(path.glob("*.csv")) + stores)
+
+
+def iter_profiles(profiles_dir):
+    """Yield parsed profiles from all profile files in a directory, one at a time.
+    
+    Streaming counterpart of load_profiles() followed by
+    process_loss_parameters(), with memory use independent of the number
+    of profiles. Profile stores are memory-mapped and sliced instead of parsed.
+    
+    Parameters:
+    -----------
+    profiles_dir : Path or str
+        Directory containing profile CSV files and/or profile stores,
+        or a single profile store
+    
+    Yields:
+    -------
+    tuple
+        (parameters_list, tx_id) as returned by process_loss_parameters()
+    """
+    for _, _, parameters, tx_id in iter_profile_records(profiles_dir):
+        yield parameters, tx_id
+
+
+def iter_profile_records(profiles_dir, select=None):
+    """Yield parsed profiles together with their position in the profile files.
+    
+    Same profiles and order as iter_profiles(), for callers that need to
+    identify a profile across runs (e.g. checkpointing or sharding).
+    
+    Parameters:
+    -----------
+    profiles_dir : Path or str
+        Directory containing profile CSV files and/or profile stores,
+        or a single profile store
+    select : callable, optional
+        select(source, row, tx_id) -> bool, called before a profile is
+        parsed; profiles for which it returns False are skipped. Default: all
+    
+    Yields:
+    -------
+    tuple
+        (source, row, parameters_list, tx_id) where source is the name of
+        the CSV file or store and row the 0-based index of the profile in it
+    """
+    for source in profile_sources(profiles_dir):
+        if is_profile_store(source):
+            store = ProfileStore(source)
+            for row in range(len(store)):
+                if select is None or select(source.name, row, str(store.meta['tx_id'][row]) or None):
+                    parameters, tx_id = store[row]
+                    yield source.name, row, parameters, tx_id
+        else:
+            with source.open(newline="", encoding="utf-8") as f:
+                reader = csv.reader(f, delimiter=";")
+                next(reader, None)  # header
+                for row, profile in enumerate(reader):
+                    if select is None or select(source.name, row, profile[15] if len(profile) > 15 else None):
+                        parameters, tx_id = process_loss_parameters(profile)
+                        yield source.name, row, parameters, tx_id
+
+
+def profile_counts(profiles_dir):
+    """Count the profiles of every CSV file and profile store, without parsing them.
+    
+    Parameters:
+    -----------
+    profiles_dir : Path or str
+        Directory containing profile CSV files and/or profile stores,
+        or a single profile store
+    
+    Returns:
+    --------
+    dict
+        Number of profiles per source name, in source order
+    """
+    counts = {}
+    for source in profile_sources(profiles_dir):
+        if is_profile_store(source):
+            counts[source.name] = len(ProfileStore(source))
+        else:
+            with source.open(newline="", encoding="utf-8") as f:
+                reader = csv.reader(f, delimiter=";")
+                next(reader, None)  # header
+                counts[source.name] = sum(1 for _ in reader)
+    return counts
 
 
 def process_loss_parameters(profile):
@@ -35,15 +161,13 @@ def process_loss_parameters(profile):
     -----------
     profile : list
         Raw profile row from CSV
-        
+    
     Returns:
     --------
     tuple
         (parameters_list, tx_id) where parameters_list is ready for P1812.bt_loss()
         and tx_id tracks which transmitter generated this profile
     """
-    parameters = [ast.literal_eval(parameter) for parameter in profile[0:15]]
-    
     # Extract tx_id if present (column 16 in CSV, index 15)
     tx_id = None
     if len(profile) > 15:
@@ -53,20 +177,53 @@ def process_loss_parameters(profile):
             tx_id = None
     
     params_list = [
-        float(parameters[0]),   # f (frequency)
-        float(parameters[1]),   # p (time percentage)
-        np.array([float(value) for value in parameters[2]]),  # d (distances)
-        np.array([float(value) for value in parameters[3]]),  # h (heights)
-        np.array([float(value) for value in parameters[4]]),  # R (clutter)
-        np.array([int(value) for value in parameters[5]]),    # Ct (clutter type)
-        np.array([int(value) for value in parameters[6]]),    # zone
-        float(parameters[7]),   # htg (TX height)
-        float(parameters[8]),   # hrg (RX height)
-        int(parameters[9]),     # pol (polarization)
-        float(parameters[10]),  # phi_t (TX latitude)
-        float(parameters[11]),  # phi_r (RX latitude)
-        float(parameters[12]),  # lam_t (TX longitude)
-        float(parameters[13]),  # lam_r (RX longitude)
+        float(profile[0]),   # f (frequency)
+        float(profile[1]),   # p (time percentage)
+        decode_list(profile[2]),  # d (distances)
+        decode_list(profile[3]),  # h (heights)
+        decode_list(profile[4]),  # R (clutter)
+        decode_list(profile[5], int),  # Ct (clutter type)
+        decode_list(profile[6], int),  # zone
+        float(profile[7]),   # htg (TX height)
+        float(profile[8]),   # hrg (RX height)
+        int(float(profile[9])),  # pol (polarization)
+        float(profile[10]),  # phi_t (TX latitude)
+        float(profile[11]),  # phi_r (RX latitude)
+        float(profile[12]),  # lam_t (TX longitude)
+        float(profile[13]),  # lam_r (RX longitude)
     ]
     
     return params_list, tx_id
+
+
+def decode_list(text, dtype=float):
+    """Decode a list column such as "[0, 0.03, 0.06]" into a NumPy array.
+    
+    The list columns written by ProfileFormatter.export_csv are parsed
+    directly by NumPy instead of through ast.literal_eval and a Python list.
+    
+    Parameters:
+    -----------
+    text : str
+        Comma-separated numbers enclosed in square brackets
+    dtype : type, optional
+        dtype of the result; values are truncated for integer types. Default: float
+    
+    Returns:
+    --------
+    np.ndarray
+        1D array of the decoded values
+    """
+    body = text.strip()
+    if not (body.startswith("[") and body.endswith("]")):
+        raise ValueError(f"Not a list column: {text[:40]!r}")
+    
+    body = body[1:-1]
+    if not body.strip():
+        return np.empty(0, dtype=dtype)
+    
+    values = np.fromstring(body, sep=",")
+    if values.size != body.count(",") + 1:
+        raise ValueError(f"Malformed list column: {text[:40]!r}")
+    
+    return values.astype(dtype, copy=False)
@@ -0,0 +1,233 @@
+"""Binary columnar profile store, a memory-mapped alternative to profile CSV files.
+
+A store is a directory (by convention with the .profiles suffix) holding
+one .npy file per column:
+
+- d: the distinct distance axes, concatenated
+- h, R, Ct, zone: the distinct terrain runs, concatenated
+- index: per profile the start of its terrain in h/R/Ct/zone, the start of
+  its distance axis in d and its number of points
+- meta: structured array with one row of scalar parameters per profile
+
+Profiles share storage: all radials from a site with the same point spacing
+share one distance axis, and a profile whose terrain is the beginning of a
+longer profile of the same radial (e.g. one receiver ring of a radial) is
+stored as a prefix of it. The arrays are memory-mapped when the store is
+opened and every profile column is a slice of them, so reading a profile
+neither parses nor copies anything. h, R, Ct and zone keep the compact
+dtype they are stored in (see COLUMN_DTYPES) and are converted to float
+where P1812 stacks the profiles of a batch.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+STORE_SUFFIX = ".profiles"
+STORE_VERSION = 2
+
+PROFILE_COLUMNS = ("d", "h", "R", "Ct", "zone")
+
+# Candidate dtypes per profile column, the first one holding all values exactly is stored
+COLUMN_DTYPES = {
+    "d": ("<f8",),
+    "h": ("<i2", "<f4", "<f8"),
+    "R": ("<i2", "<f4", "<f8"),
+    "Ct": ("i1", "<i8"),
+    "zone": ("i1", "<i8"),
+}
+
+METADATA_FIELDS = (
+    ("f", "<f8"),
+    ("p", "<f8"),
+    ("htg", "<f8"),
+    ("hrg", "<f8"),
+    ("pol", "i1"),
+    ("phi_t", "<f8"),
+    ("phi_r", "<f8"),
+    ("lam_t", "<f8"),
+    ("lam_r", "<f8"),
+    ("azimuth", "<f8"),
+)
+
+INDEX_DTYPE = np.dtype([("start", "<i8"), ("axis", "<i8"), ("points", "<i8")])
+
+
+def _compact(values, candidates):
+    """Cast values to the first candidate dtype that holds them exactly."""
+    values = np.asarray(values)
+    for dtype in candidates[:-1]:
+        with np.errstate(invalid="ignore", over="ignore"):
+            compact = values.astype(dtype)
+        if np.array_equal(compact, values):
+            return compact
+    return values.astype(candidates[-1])
+
+
+def _share_prefixes(profiles, keys):
+    """Concatenate profile arrays, storing each profile as a prefix of a longer one where possible.
+
+    Profiles are visited from the longest to the shortest, and a profile
+    whose arrays are the beginning of an already stored run with the same
+    key is not stored again.
+
+    Parameters:
+    -----------
+    profiles : list
+        Per profile a tuple of equally long 1D arrays
+    keys : list
+        Per profile a hashable, only runs with the same key are compared
+
+    Returns:
+    --------
+    tuple
+        (starts, columns) where starts holds the position of every profile
+        in the concatenated columns
+    """
+    starts = np.zeros(len(profiles), dtype=np.int64)
+    runs = {}
+    stored = []
+    position = 0
+    for k in sorted(range(len(profiles)), key=lambda k: -len(profiles[k][0])):
+        values = profiles[k]
+        n = len(values[0])
+        for start, run in runs.get(keys[k], []):
+            if all(np.array_equal(r[:n], v) for r, v in zip(run, values)):
+                starts[k] = start
+                break
+        else:
+            starts[k] = position
+            runs.setdefault(keys[k], []).append((position, values))
+            stored.append(values)
+            position += n
+
+    columns = [np.concatenate(column) for column in zip(*stored)]
+    return starts, columns
+
+
+def write_profile_store(path, profiles):
+    """Write profiles to a binary columnar profile store.
+
+    Parameters:
+    -----------
+    path : Path or str
+        Store directory to create (an existing store is overwritten)
+    profiles : list
+        Profile dictionaries with the ProfileFormatter keys
+        (f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r,
+        and optionally azimuth and tx_id)
+
+    Returns:
+    --------
+    Path
+        Path to the store directory
+    """
+    for profile in profiles:
+        for name in PROFILE_COLUMNS[1:]:
+            if len(profile[name]) != len(profile['d']):
+                raise ValueError(f"Profile column {name} must have as many points as d")
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    index = np.zeros(len(profiles), dtype=INDEX_DTYPE)
+    index['points'] = [len(profile['d']) for profile in profiles]
+
+    # Distance axes are shared by all profiles with the same point spacing,
+    # terrain only within a radial (same Tx and azimuth)
+    axes = [(np.asarray(profile['d'], dtype=float),) for profile in profiles]
+    index['axis'], columns = _share_prefixes(axes, [float(d[1]) if len(d) > 1 else None for d, in axes])
+    terrain = [tuple(np.asarray(profile[name]) for name in PROFILE_COLUMNS[1:]) for profile in profiles]
+    radials = [(profile['phi_t'], profile['lam_t'], str(profile.get('azimuth')), profile.get('tx_id')) for profile in profiles]
+    index['start'], terrain_columns = _share_prefixes(terrain, radials)
+    columns += terrain_columns
+
+    for name, values in zip(PROFILE_COLUMNS, columns or [np.empty(0)] * len(PROFILE_COLUMNS)):
+        np.save(path / f"{name}.npy", _compact(values, COLUMN_DTYPES[name]))
+
+    tx_ids = [str(profile.get('tx_id') or '') for profile in profiles]
+    meta_dtype = np.dtype(list(METADATA_FIELDS) + [("tx_id", f"<U{max([1] + [len(tx_id) for tx_id in tx_ids])}")])
+    meta = np.zeros(len(profiles), dtype=meta_dtype)
+    for name, _ in METADATA_FIELDS:
+        default = np.nan if name == 'azimuth' else None
+        meta[name] = [profile.get(name, default) for profile in profiles]
+    meta['tx_id'] = tx_ids
+
+    np.save(path / "index.npy", index)
+    np.save(path / "meta.npy", meta)
+
+    with open(path / "store.json", "w") as f:
+        json.dump({
+            'version': STORE_VERSION,
+            'profiles': len(profiles),
+            'points': int(index['points'].sum()),
+            'stored_points': len(columns[1]) if columns else 0,
+        }, f)
+
+    return path
+
+
+def is_profile_store(path):
+    """True if path is a profile store directory."""
+    return (Path(path) / "store.json").is_file()
+
+
+class ProfileStore:
+    """Read-only, memory-mapped view of a binary columnar profile store.
+
+    Profiles are returned in the layout of process_loss_parameters(), with
+    the profile arrays as read-only views of the memory-mapped columns in
+    their stored dtype: d is float64, h, R, Ct and zone are as compact as
+    their values allow. P1812.bt_loss_batch() converts them while stacking
+    the batch.
+
+    Parameters:
+    -----------
+    path : Path or str
+        Store directory written by write_profile_store()
+
+    Example:
+    --------
+    >>> store = ProfileStore("data/input/profiles/paths_oneTx_manyRx_11km.profiles")
+    >>> parameters, tx_id = store[0]
+    >>> Lb, Ep = Py1812.P1812.bt_loss(*parameters)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if not is_profile_store(self.path):
+            raise FileNotFoundError(f"Not a profile store: {self.path}")
+
+        with open(self.path / "store.json") as f:
+            info = json.load(f)
+        if info['version'] != STORE_VERSION:
+            raise ValueError(f"Unsupported profile store version: {info['version']}")
+
+        self.index = np.load(self.path / "index.npy")
+        self.meta = np.load(self.path / "meta.npy", mmap_mode="r")
+        # Plain ndarray views of the maps, slicing an np.memmap costs several times more
+        self.columns = {name: np.asarray(np.load(self.path / f"{name}.npy", mmap_mode="r")) for name in PROFILE_COLUMNS}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, k):
+        """Profile k as (parameters_list, tx_id), see process_loss_parameters()."""
+        if not -len(self) <= k < len(self):
+            raise IndexError(f"Profile index {k} out of range")
+        k = k % len(self)
+
+        start, axis, points = self.index[k].item()
+        d = self.columns['d'][axis:axis + points]
+        h, R, Ct, zone = (self.columns[name][start:start + points] for name in PROFILE_COLUMNS[1:])
+        f, p, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r, _, tx_id = self.meta[k].item()
+
+        parameters = [f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r]
+
+        return parameters, tx_id or None
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
@@ -0,0 +1,305 @@
+"""On-disk content-addressed cache of P1812 propagation results."""
+
+import functools
+import hashlib
+import importlib.util
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+# Version of the key material and entry layout, bump to invalidate old caches
+CACHE_FORMAT = 2
+
+# Each entry is a fixed-size record of a shard file: the hexadecimal key,
+# (Lb, Ep) and the time the entry was last used
+ENTRY_DTYPE = np.dtype([("key", "S64"), ("Lb", "<f8"), ("Ep", "<f8"), ("used", "<f8")])
+ENTRY_SIZE = ENTRY_DTYPE.itemsize
+
+# Entries are spread over up to 256 shard files by the first two digits of their key
+SHARD_SUFFIX = ".shard"
+
+
+# Files of the Py1812 package whose contents determine the results
+ENGINE_FILES = ("P1812.py", "P1812.npz")
+
+
+@functools.lru_cache(maxsize=None)
+def _engine_version():
+    """Version of the installed Py1812 package, part of every cache key.
+    
+    Besides the package version, this is a hash of the P.1812 code and its
+    digital maps, so that results calculated by a different implementation
+    are never served even if the version was not bumped. Computed once per
+    process.
+    """
+    spec = importlib.util.find_spec("Py1812")
+    if spec is None or not spec.submodule_search_locations:
+        return "unknown"
+    
+    digest = hashlib.sha256()
+    for location in spec.submodule_search_locations:
+        for name in ENGINE_FILES:
+            path = Path(location) / name
+            if path.is_file():
+                digest.update(f"{name};".encode())
+                digest.update(path.read_bytes())
+    
+    import Py1812
+    
+    return f"{getattr(Py1812, '__version__', 'unknown')}/{digest.hexdigest()[:16]}"
+
+
+def _update_digest(digest, value):
+    """Feed one bt_loss input into the hash in a type-stable way."""
+    if isinstance(value, (list, tuple)):
+        value = np.asarray(value, dtype=float)
+    
+    if isinstance(value, np.ndarray):
+        # numeric arrays hash the same whatever dtype they are stored in
+        value = np.ascontiguousarray(value, dtype=float if value.dtype.kind in "biuf" else None)
+        digest.update(f"a{value.dtype.str}{value.shape};".encode())
+        digest.update(value.tobytes())
+    elif isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        digest.update(f"s{float(value)!r};".encode())
+    else:
+        digest.update(f"o{value!r};".encode())
+
+
+def input_key(parameters, options=None):
+    """Hash the inputs of one P1812 calculation into a cache key.
+    
+    The key covers the exact values and shape of every input array (as
+    float64 for numeric arrays), the values of the scalar inputs, the
+    options that change the result and the Py1812 version and code (see
+    _engine_version), so any change to the inputs gives a different key.
+    
+    Parameters:
+    -----------
+    parameters : sequence
+        Positional arguments of P1812.bt_loss() (as returned by process_loss_parameters)
+    options : dict, optional
+        Keyword arguments or settings that change the result (e.g. DN, N0, pL)
+    
+    Returns:
+    --------
+    str
+        Hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"P1812/{_engine_version()}/{CACHE_FORMAT};".encode())
+    
+    for value in parameters:
+        _update_digest(digest, value)
+    
+    for name in sorted(options or {}):
+        digest.update(f"k{name}=".encode())
+        _update_digest(digest, options[name])
+    
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of P1812 (Lb, Ep) results keyed by input_key().
+    
+    Results are appended as fixed-size records (see ENTRY_DTYPE) to one of
+    up to 256 shard files, so that unchanged paths return without running
+    P.1812 across runs and processes, and an entry takes ENTRY_SIZE bytes
+    of disk instead of a file system block. Every hit refreshes the last
+    use time of the entry in place; when the shard files grow beyond
+    max_bytes the least recently used entries are removed by rewriting the
+    shards.
+    
+    Each process keeps an index of the shards it has read and only reads
+    what other processes appended since. Shards are rewritten atomically,
+    an entry appended by another process while a shard is rewritten may be
+    lost, which only costs its recalculation.
+    
+    Parameters:
+    -----------
+    cache_dir : Path or str
+        Directory holding the shard files (created if missing)
+    max_bytes : int, optional
+        Maximum total size of the shard files, which also bounds their disk
+        use up to the partly filled last block of each shard. Default: 256 MiB
+    
+    Example:
+    --------
+    >>> cache = ResultCache("data/intermediate/p1812_cache")
+    >>> Lb, Ep = cache.bt_loss(*parameters)
+    >>> print(f"{cache.hit_rate:.1%}")
+    """
+    
+    def __init__(self, cache_dir, max_bytes=256 * 2**20):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        
+        # shard name -> (inode, bytes read, {key: record number})
+        self._index = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = sum(path.stat().st_size for path in self._shards())
+    
+    def _path(self, key):
+        return self.cache_dir / (key[:2] + SHARD_SUFFIX)
+    
+    def _shards(self):
+        """Paths of the shard files."""
+        return sorted(self.cache_dir.glob("??" + SHARD_SUFFIX))
+    
+    def _shard_index(self, path, stat):
+        """Index of a shard file, brought up to date with the file described by stat."""
+        inode, read, keys = self._index.get(path.name, (None, 0, {}))
+        if inode != stat.st_ino or stat.st_size < read:
+            inode, read, keys = stat.st_ino, 0, {}  # rewritten since it was read
+        
+        end = stat.st_size - stat.st_size % ENTRY_SIZE  # skip a record being appended
+        if end > read:
+            with path.open("rb") as f:
+                f.seek(read)
+                records = np.frombuffer(f.read(end - read), dtype=ENTRY_DTYPE)
+            first = read // ENTRY_SIZE
+            keys.update((key.decode(), first + i) for i, key in enumerate(records['key'].tolist()))
+            read = end
+        
+        self._index[path.name] = (inode, read, keys)
+        return keys
+    
+    def get(self, key):
+        """Return the cached (Lb, Ep) for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            f = path.open("r+b", buffering=0)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        
+        with f:
+            record = self._shard_index(path, os.fstat(f.fileno())).get(key)
+            if record is None:
+                self.misses += 1
+                return None
+            
+            f.seek(record * ENTRY_SIZE)
+            entry = np.frombuffer(f.read(ENTRY_SIZE), dtype=ENTRY_DTYPE)
+            if len(entry) != 1 or entry['key'][0].decode() != key:
+                self._index.pop(path.name, None)  # stale, read the shard again next time
+                self.misses += 1
+                return None
+            
+            # mark as recently used
+            f.seek(record * ENTRY_SIZE + ENTRY_DTYPE.fields['used'][1])
+            f.write(np.array(time.time(), dtype=ENTRY_DTYPE['used']).tobytes())
+        
+        self.hits += 1
+        return float(entry['Lb'][0]), float(entry['Ep'][0])
+    
+    def put(self, key, Lb, Ep):
+        """Store the (Lb, Ep) result for key."""
+        entry = np.array([(key, Lb, Ep, time.time())], dtype=ENTRY_DTYPE)
+        
+        # a single unbuffered append, so that concurrent writers do not interleave records
+        with self._path(key).open("ab", buffering=0) as f:
+            f.write(entry.tobytes())
+        self.size += ENTRY_SIZE
+        
+        if self.size > self.max_bytes:
+            self.evict()
+    
+    def _read_shard(self, path):
+        """All complete records of a shard file, the latest one per key."""
+        try:
+            records = np.fromfile(path, dtype=np.uint8)
+        except FileNotFoundError:
+            return np.empty(0, dtype=ENTRY_DTYPE)
+        records = records[:len(records) - len(records) % ENTRY_SIZE].view(ENTRY_DTYPE)
+        
+        # a key stored again (e.g. by two processes) keeps its last record
+        _, last = np.unique(records['key'][::-1], return_index=True)
+        return records[np.sort(len(records) - 1 - last)]
+    
+    def evict(self, target_bytes=None):
+        """Remove least recently used entries down to target_bytes.
+        
+        Parameters:
+        -----------
+        target_bytes : int, optional
+            Size to shrink the cache to. Default: 90% of max_bytes, so that
+            the shards are not rewritten again on the next insertion
+        """
+        if target_bytes is None:
+            target_bytes = int(0.9 * self.max_bytes)
+        
+        shards = {path: self._read_shard(path) for path in self._shards()}
+        used = np.concatenate([records['used'] for records in shards.values()] + [np.empty(0)])
+        
+        keep = max(0, min(len(used), target_bytes // ENTRY_SIZE))
+        if keep == len(used):
+            cutoff = -np.inf
+        elif keep == 0:
+            cutoff = np.inf
+        else:
+            cutoff = np.partition(used, len(used) - keep)[len(used) - keep]
+        
+        self.size = 0
+        for path, records in shards.items():
+            kept = records[records['used'] >= cutoff]
+            self.evictions += len(records) - len(kept)
+            if len(kept):
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(kept.tobytes())
+                os.replace(tmp_path, path)
+                self.size += path.stat().st_size
+            else:
+                path.unlink(missing_ok=True)
+            self._index.pop(path.name, None)
+    
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        for path in self._shards():
+            path.unlink(missing_ok=True)
+        self._index.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def bt_loss(self, *parameters, **kwargs):
+        """Cached P1812.bt_loss(): same arguments, returns (Lb, Ep).
+        
+        With return_details=True the call is passed through to
+        P1812.bt_loss() and its details are returned, without caching.
+        """
+        if kwargs.get("return_details", False):
+            import Py1812.P1812
+            
+            return Py1812.P1812.bt_loss(*parameters, **kwargs)
+        
+        key = input_key(parameters, kwargs)
+        result = self.get(key)
+        if result is None:
+            import Py1812.P1812
+            
+            Lb, Ep = Py1812.P1812.bt_loss(*parameters, **kwargs)
+            self.put(key, Lb, Ep)
+            result = (float(Lb), float(Ep))
+        return result
+    
+    @property
+    def hit_rate(self):
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def __len__(self):
+        return sum(len(self._read_shard(path)) for path in self._shards())
@@ -0,0 +1,286 @@
+"""Incremental writers for batch processor results (CSV or Parquet)."""
+
+import csv
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+
+# Columns of one result row, as produced by batch_processor.main()
+RESULT_FIELDS = ("index", "source", "row", "tx_id", "distance_km", "frequency_ghz", "Lb", "Ep", "elapsed_s")
+
+# Parquet column types of RESULT_FIELDS, other columns are inferred from the first rows
+RESULT_TYPES = {
+    "index": "int64",
+    "source": "string",
+    "row": "int64",
+    "tx_id": "string",
+    "distance_km": "float64",
+    "frequency_ghz": "float64",
+    "Lb": "float64",
+    "Ep": "float64",
+    "elapsed_s": "float64",
+}
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+class ResultsSink(ABC):
+    """Buffered writer appending result rows to a file in fixed-size batches.
+    
+    Rows are collected in memory and written every flush_every rows, so a
+    run holds at most flush_every rows and everything up to the last flush
+    is on disk if it is interrupted. Subclasses implement _open(),
+    _write_rows() and _close(), and _sync() if they set supports_append;
+    a subclass missing one of the first three cannot be instantiated.
+    
+    Parameters:
+    -----------
+    path : Path or str
+        Output file (an existing file is overwritten unless append is set)
+    fields : sequence, optional
+        Column names, in file order. Default: RESULT_FIELDS
+    flush_every : int, optional
+        Number of buffered rows that triggers a write. Default: 1000
+    append : bool, optional
+        Append to an existing file (see supports_append). Default: False
+    """
+    
+    # Whether the format can be appended to and synced to a known size
+    supports_append = False
+    
+    def __init__(self, path, fields=RESULT_FIELDS, flush_every=1000, append=False):
+        if flush_every < 1:
+            raise ValueError("flush_every must be >= 1")
+        if self.supports_append and not hasattr(self, "_sync"):
+            raise TypeError(f"{type(self).__name__} sets supports_append but does not implement _sync()")
+        if append and not self.supports_append:
+            raise ValueError(f"{type(self).__name__} cannot append to an existing file")
+        
+        self.path = Path(path)
+        self.fields = tuple(fields)
+        self.flush_every = flush_every
+        self.append = append
+        self.rows_written = 0
+        self._buffer = []
+        self._closed = False
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+    
+    def write(self, row):
+        """Buffer one result row (dict with the sink's fields)."""
+        if self._closed:
+            raise ValueError(f"Results sink {self.path} is closed")
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+    
+    def write_rows(self, rows):
+        """Buffer a group of result rows that is written completely or not at all.
+        
+        If writing the group fails, none of its rows stay buffered, and
+        sinks that support append leave no part of it in the file, so the
+        sink holds exactly the groups for which write_rows() returned.
+        """
+        if self._closed:
+            raise ValueError(f"Results sink {self.path} is closed")
+        buffered = len(self._buffer)
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.flush_every:
+            try:
+                self.flush()
+            except BaseException:
+                del self._buffer[buffered:]
+                raise
+    
+    def flush(self):
+        """Write the buffered rows to the file."""
+        if self._buffer:
+            self._write_rows(self._buffer)
+            self.rows_written += len(self._buffer)
+            self._buffer = []
+    
+    def sync(self):
+        """Write the buffered rows and force the file to disk.
+        
+        Returns:
+        --------
+        int
+            Size of the file (bytes) holding all rows written so far
+        """
+        if not self.supports_append:
+            raise NotImplementedError(f"{type(self).__name__} does not support sync()")
+        self.flush()
+        return self._sync()
+    
+    def close(self):
+        """Flush the remaining rows and close the file."""
+        if not self._closed:
+            self.flush()
+            self._close()
+            self._closed = True
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    @abstractmethod
+    def _open(self):
+        """Open the file (self.path, honoring self.append)."""
+    
+    @abstractmethod
+    def _write_rows(self, rows):
+        """Write rows to the file, all of them or, for append sinks, none."""
+    
+    @abstractmethod
+    def _close(self):
+        """Close the file, leaving it readable."""
+
+
+class CsvResultsSink(ResultsSink):
+    """Results sink writing semicolon-delimited CSV, flushed to the OS on every write.
+    
+    The file is valid after every flush, so partial output of an
+    interrupted run can be read as is, and can be appended to.
+    """
+    
+    supports_append = True
+    
+    def _open(self):
+        self._file = self.path.open("a" if self.append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields, delimiter=";", extrasaction="ignore")
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+            self._file.flush()
+    
+    def _write_rows(self, rows):
+        start = self._file.tell()
+        try:
+            self._writer.writerows(rows)
+            self._file.flush()
+        except BaseException:
+            # Cut off the rows written before the error, a write is all or nothing
+            self._file.seek(start)
+            self._file.truncate()
+            raise
+    
+    def _close(self):
+        self._file.close()
+    
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+
+class ParquetResultsSink(ResultsSink):
+    """Results sink writing Parquet, one row group per flush (requires pyarrow).
+    
+    The Parquet footer is only written by close(), so unlike CSV the file
+    of an interrupted run is not readable.
+    """
+    
+    def _open(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet results. Install with: pip install pyarrow")
+        
+        self._pa = pa
+        self._pq = pq
+        self._writer = None
+    
+    def _schema(self, table):
+        """Schema of the file, from RESULT_TYPES and the types of the first rows."""
+        pa = self._pa
+        types = []
+        for name, inferred in zip(table.column_names, table.schema.types):
+            if name in RESULT_TYPES:
+                types.append(pa.type_for_alias(RESULT_TYPES[name]))
+            else:
+                # A column of only None has no type yet
+                types.append(pa.string() if pa.types.is_null(inferred) else inferred)
+        return pa.schema(list(zip(table.column_names, types)))
+    
+    def _write_rows(self, rows):
+        table = self._pa.Table.from_pylist([{name: row.get(name) for name in self.fields} for row in rows])
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self._schema(table))
+        self._writer.write_table(table.cast(self._writer.schema))
+    
+    def _close(self):
+        if self._writer is None:
+            # No rows, still leave a readable file with the columns
+            empty = self._pa.Table.from_pylist([{name: None for name in self.fields}]).slice(0, 0)
+            self._pq.write_table(empty.cast(self._schema(empty)), self.path)
+        else:
+            self._writer.close()
+
+
+def open_results_sink(path, fields=RESULT_FIELDS, flush_every=1000, append=False):
+    """Open a results sink, Parquet for *.parquet / *.pq paths, CSV otherwise.
+    
+    Parameters:
+    -----------
+    path : Path or str
+        Output file
+    fields : sequence, optional
+        Column names, in file order. Default: RESULT_FIELDS
+    flush_every : int, optional
+        Number of buffered rows that triggers a write. Default: 1000
+    append : bool, optional
+        Append to an existing file (CSV only). Default: False
+    
+    Returns:
+    --------
+    ResultsSink
+        CsvResultsSink or ParquetResultsSink
+    """
+    return results_sink_class(path)(path, fields, flush_every, append)
+
+
+def results_sink_class(path):
+    """Results sink class for a file, ParquetResultsSink for *.parquet / *.pq, CsvResultsSink otherwise."""
+    if Path(path).suffix.lower() in PARQUET_SUFFIXES:
+        return ParquetResultsSink
+    return CsvResultsSink
+
+
+def read_results(path):
+    """Read the rows of a results file written by a results sink.
+    
+    Values of the RESULT_FIELDS columns are converted back to their type
+    (see RESULT_TYPES), empty CSV values to None.
+    
+    Parameters:
+    -----------
+    path : Path or str
+        CSV or Parquet (*.parquet / *.pq) results file
+    
+    Returns:
+    --------
+    list
+        Result rows as dicts
+    """
+    if results_sink_class(path) is ParquetResultsSink:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet results. Install with: pip install pyarrow")
+        return pq.read_table(path).to_pylist()
+    
+    converters = {"int64": int, "float64": float, "string": str}
+    rows = []
+    with Path(path).open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter=";"):
+            for name, value in row.items():
+                if value == "":
+                    row[name] = None
+                elif name in RESULT_TYPES:
+                    row[name] = converters[RESULT_TYPES[name]](value)
+            rows.append(row)
+    return rows
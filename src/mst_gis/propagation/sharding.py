@@ -0,0 +1,133 @@
+"""Deterministic sharding of profiles across independent batch processor runs.
+
+Every profile is assigned to one of N shards by a stable hash of its
+source file, tx_id and row, so N runs with --shard 1/N ... N/N (on any
+machines, without coordination) cover all profiles exactly once. The
+per-shard results files are combined with merge_results().
+"""
+
+import hashlib
+from pathlib import Path
+
+from .profile_parser import profile_counts
+from .results_sink import RESULT_FIELDS, open_results_sink, read_results
+
+
+def parse_shard(text):
+    """Parse a shard specification "i/N" (1 <= i <= N) into (i, N)."""
+    try:
+        index, shards = (int(part) for part in str(text).split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must be given as i/N, got {text!r}")
+    if not 1 <= index <= shards:
+        raise ValueError(f"Shard index must be in 1..{shards}, got {text!r}")
+    return index, shards
+
+
+def shard_of(source, row, tx_id, shards):
+    """Shard (1..shards) of a profile.
+    
+    The hash only depends on the profile's source name, row and tx_id, so
+    the assignment is the same on every machine and every run.
+    
+    Parameters:
+    -----------
+    source : str
+        Name of the profile CSV file or store
+    row : int
+        Index of the profile in the source
+    tx_id : str or None
+        Transmitter identifier of the profile
+    shards : int
+        Number of shards
+    
+    Returns:
+    --------
+    int
+        Shard index, 1 to shards
+    """
+    digest = hashlib.sha256(f"{source}\t{tx_id}\t{row}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shards + 1
+
+
+def shard_selector(shard):
+    """Profile filter for iter_profile_records() keeping the profiles of shard (i, N)."""
+    index, shards = shard
+    
+    def select(source, row, tx_id):
+        return shard_of(source, row, tx_id, shards) == index
+    
+    return select
+
+
+def merge_results(result_paths, output_path, profiles_dir=None, flush_every=1000):
+    """Combine per-shard results files into one file in profile order.
+    
+    Rows are ordered by source and row, and renumbered. A profile found in
+    more than one file is an error (the shards overlap); within one file
+    the last row of a profile wins (e.g. recalculated after a resume).
+    With profiles_dir, the merged rows must cover every profile in it.
+    
+    Parameters:
+    -----------
+    result_paths : list
+        Results files (CSV or Parquet) of the shard runs
+    output_path : Path or str
+        Merged results file, Parquet for *.parquet / *.pq, CSV otherwise
+    profiles_dir : Path or str, optional
+        Profile directory the shards were run on, to verify completeness
+    flush_every : int, optional
+        Number of rows buffered before each write. Default: 1000
+    
+    Returns:
+    --------
+    int
+        Number of merged rows
+    
+    Raises:
+    -------
+    ValueError
+        If the shards overlap, or miss profiles of profiles_dir
+    """
+    merged = {}
+    origin = {}
+    for path in result_paths:
+        rows = {}
+        for row in read_results(path):
+            if row.get("source") is None or row.get("row") is None:
+                raise ValueError(f"{path} has no source/row columns, it cannot be merged")
+            rows[(row["source"], row["row"])] = row
+        
+        overlap = merged.keys() & rows.keys()
+        if overlap:
+            source, row = min(overlap)
+            raise ValueError(
+                f"{len(overlap)} profiles are in more than one shard, e.g. {source} row {row} "
+                f"in {origin[(source, row)]} and {path}"
+            )
+        merged.update(rows)
+        origin.update(dict.fromkeys(rows, path))
+    
+    if profiles_dir is None:
+        order = {source: rank for rank, source in enumerate(sorted({source for source, _ in merged}))}
+    else:
+        counts = profile_counts(profiles_dir)
+        expected = {(source, row) for source, count in counts.items() for row in range(count)}
+        missing = expected - merged.keys()
+        unknown = merged.keys() - expected
+        if missing:
+            source, row = min(missing)
+            raise ValueError(f"{len(missing)} of {len(expected)} profiles are missing, e.g. {source} row {row}")
+        if unknown:
+            source, row = min(unknown)
+            raise ValueError(f"{len(unknown)} rows are not profiles of {profiles_dir}, e.g. {source} row {row}")
+        order = {source: rank for rank, source in enumerate(counts)}
+    
+    keys = sorted(merged, key=lambda key: (order[key[0]], key[1]))
+    
+    output_path = Path(output_path)
+    with open_results_sink(output_path, RESULT_FIELDS, flush_every) as sink:
+        for index, key in enumerate(keys, start=1):
+            sink.write(dict(merged[key], index=index))
+    
+    return len(keys)
@@ -0,0 +1,87 @@
+"""
+Checkpointing of the batch processor: an interrupted run continued with
+resume=True leaves every profile in the results exactly once.
+
+Run from the repository root:  python -m pytest -q
+"""
+import csv
+from pathlib import Path
+
+import pytest
+
+from mst_gis.propagation import batch_processor
+from mst_gis.propagation.results_sink import read_results
+
+pytest.importorskip("Py1812")
+
+# bundled profiles, the first rows of each ring are too short for P.1812
+PROFILES = Path(__file__).parent.parent / "data" / "input" / "profiles" / "paths_oneTx_manyRx_11km.csv"
+
+
+@pytest.fixture
+def profiles_dir(tmp_path):
+    """Directory with 40 profiles of the bundled CSV."""
+    with PROFILES.open(newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    header, rows = rows[0], [row for row in rows[1:] if row[2].count(",") >= 4]
+
+    directory = tmp_path / "profiles"
+    directory.mkdir()
+    with (directory / "profiles.csv").open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(header)
+        writer.writerows(rows[:40])
+    return directory
+
+
+class Interrupt(Exception):
+    pass
+
+
+@pytest.mark.parametrize("flush_every, fail_at", [(1, 1), (1, 6), (3, 6), (3, 13), (5, 22)])
+def test_resume_after_failed_write(profiles_dir, tmp_path, monkeypatch, flush_every, fail_at):
+    results_path = tmp_path / "results.csv"
+
+    # Fail while writing the fail_at-th row, e.g. the second row of the second batch
+    dict_to_list = csv.DictWriter._dict_to_list
+    written = []
+
+    def failing_dict_to_list(self, row):
+        written.append(row)
+        if len(written) == fail_at:
+            raise Interrupt()
+        return dict_to_list(self, row)
+
+    monkeypatch.setattr(csv.DictWriter, "_dict_to_list", failing_dict_to_list)
+    with pytest.raises(Interrupt):
+        batch_processor.main(profiles_dir, batch_size=4, results_path=results_path, flush_every=flush_every)
+    monkeypatch.undo()
+
+    batch_processor.main(profiles_dir, batch_size=4, results_path=results_path, flush_every=flush_every, resume=True)
+
+    rows = [(row["source"], row["row"]) for row in read_results(results_path)]
+    assert sorted(rows) == [("profiles.csv", row) for row in range(40)]
+
+
+def test_resume_after_interrupted_calculation(profiles_dir, tmp_path, monkeypatch):
+    results_path = tmp_path / "results.csv"
+
+    # Interrupt the calculation of the fourth batch
+    calculate_batch = batch_processor.calculate_batch
+    calls = []
+
+    def interrupted_calculate_batch(*args):
+        calls.append(args)
+        if len(calls) == 4:
+            raise KeyboardInterrupt()
+        return calculate_batch(*args)
+
+    monkeypatch.setattr(batch_processor, "calculate_batch", interrupted_calculate_batch)
+    with pytest.raises(KeyboardInterrupt):
+        batch_processor.main(profiles_dir, batch_size=4, results_path=results_path, flush_every=5)
+    monkeypatch.undo()
+
+    batch_processor.main(profiles_dir, batch_size=4, results_path=results_path, flush_every=5, resume=True)
+
+    rows = [(row["source"], row["row"]) for row in read_results(results_path)]
+    assert sorted(rows) == [("profiles.csv", row) for row in range(40)]
@@ -0,0 +1,70 @@
+"""Tests for the resolution-aware distance sampling of Phase 2."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from mst_gis.pipeline.point_generation import (
+    MAX_STEP_STRETCH,
+    METERS_PER_DEGREE,
+    ROUGH_TERRAIN_M,
+    dem_pixel_size_m,
+    estimate_terrain_roughness,
+    generate_adaptive_distance_array,
+)
+from mst_gis.utils.validation import ValidationError
+
+
+# Only the pixel sizes a and e of the affine transform are read
+SRTM1 = SimpleNamespace(a=1 / 3600, e=-1 / 3600)
+PROJECTED_100M = SimpleNamespace(a=100.0, e=-100.0)
+
+
+def test_pixel_size_of_geographic_and_projected_dems():
+    assert dem_pixel_size_m(SRTM1, 0.0) == pytest.approx(METERS_PER_DEGREE / 3600)
+    assert dem_pixel_size_m(SRTM1, 60.0) == pytest.approx(METERS_PER_DEGREE / 3600)  # height is the larger side
+    assert dem_pixel_size_m(PROJECTED_100M, 45.0, geographic=False) == 100.0
+
+
+def test_rough_terrain_steps_at_the_dem_resolution():
+    distances = generate_adaptive_distance_array(11.0, PROJECTED_100M, 45.0, roughness_m=200.0, geographic=False)
+
+    near = distances[distances <= 1.0 + 1e-9]
+    np.testing.assert_allclose(np.diff(near), 0.03, atol=1e-9)
+    np.testing.assert_allclose(np.diff(distances[near.size - 1 : -1]), 0.1, atol=1e-9)
+    assert distances[0] == 0.0
+    assert distances[-1] == pytest.approx(11.0)
+    assert (np.diff(distances) > 0).all()
+
+
+@pytest.mark.parametrize("roughness_m, stretch", [(ROUGH_TERRAIN_M, 1.0), (ROUGH_TERRAIN_M / 2, 2.0), (0.0, MAX_STEP_STRETCH)])
+def test_flat_terrain_stretches_the_far_step(roughness_m, stretch):
+    distances = generate_adaptive_distance_array(20.0, PROJECTED_100M, 45.0, roughness_m=roughness_m, geographic=False)
+
+    far = np.diff(distances[distances >= 1.0 - 1e-9])[:-1]
+    np.testing.assert_allclose(far, 0.1 * stretch, atol=1e-9)
+
+
+def test_far_step_is_never_below_the_near_step():
+    fine = SimpleNamespace(a=5.0, e=-5.0)
+    distances = generate_adaptive_distance_array(3.0, fine, 45.0, geographic=False)
+
+    assert np.diff(distances).min() >= 0.03 - 1e-9
+
+
+def test_terrain_roughness_ignores_nan():
+    heights = np.concatenate([np.arange(101, dtype=float), [np.nan]])
+
+    assert estimate_terrain_roughness(heights) == pytest.approx(80.0)
+    with pytest.raises(ValidationError):
+        estimate_terrain_roughness([np.nan])
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValidationError):
+        generate_adaptive_distance_array(0.0, SRTM1, 45.0)
+    with pytest.raises(ValidationError):
+        generate_adaptive_distance_array(5.0, SRTM1, 45.0, near_step_km=0.0)
+    with pytest.raises(ValidationError):
+        generate_adaptive_distance_array(5.0, SRTM1, 45.0, roughness_m=-1.0)
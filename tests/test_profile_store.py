@@ -0,0 +1,108 @@
+"""Tests for the binary columnar profile store."""
+
+import json
+
+import numpy as np
+import pytest
+
+from mst_gis.propagation.profile_store import ProfileStore, is_profile_store, write_profile_store
+
+
+def radial_profiles(azimuth, points, tx_id="TX_0001", spacing=0.03, seed=0):
+    """Profiles of the rings 2..points of one radial, as ProfileFormatter builds them."""
+    rng = np.random.default_rng(seed)
+    d = spacing * np.arange(points)
+    h = np.round(200 + np.cumsum(rng.normal(0, 2, points)))
+    R = rng.choice([0.0, 10.0, 15.0], points)
+    Ct = np.where(R > 0, 4, 2)
+    zone = np.full(points, 4)
+    return [
+        {
+            "f": 0.9, "p": 50.0, "d": d[:n], "h": h[:n], "R": R[:n], "Ct": Ct[:n], "zone": zone[:n],
+            "htg": 30.0, "hrg": 1.5, "pol": 1, "phi_t": 45.0, "phi_r": 45.0 + n * 1e-4,
+            "lam_t": 7.0, "lam_r": 7.0 + n * 1e-4, "azimuth": azimuth, "tx_id": tx_id,
+        }
+        for n in range(2, points + 1)
+    ]
+
+
+def test_round_trip(tmp_path):
+    profiles = radial_profiles(0.0, 6) + radial_profiles(90.0, 4, seed=1)
+    store = ProfileStore(write_profile_store(tmp_path / "a.profiles", profiles))
+
+    assert is_profile_store(store.path)
+    assert len(store) == len(profiles)
+    for profile, (parameters, tx_id) in zip(profiles, store):
+        f, p, d, h, R, Ct, zone, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r = parameters
+        assert (f, p, htg, hrg, pol, phi_t, phi_r, lam_t, lam_r) == tuple(
+            profile[name] for name in ("f", "p", "htg", "hrg", "pol", "phi_t", "phi_r", "lam_t", "lam_r")
+        )
+        for name, values in zip(("d", "h", "R", "Ct", "zone"), (d, h, R, Ct, zone)):
+            np.testing.assert_array_equal(values, profile[name])
+        assert tx_id == "TX_0001"
+
+    parameters, _ = store[-1]
+    np.testing.assert_array_equal(parameters[2], profiles[-1]["d"])
+    with pytest.raises(IndexError):
+        store[len(profiles)]
+
+
+def test_axes_and_radial_prefixes_are_shared(tmp_path):
+    profiles = radial_profiles(0.0, 8) + radial_profiles(90.0, 8, seed=1)
+    path = write_profile_store(tmp_path / "a.profiles", profiles)
+    store = ProfileStore(path)
+
+    # One distance axis for all profiles, one terrain run per radial
+    assert len(store.columns["d"]) == 8
+    assert len(store.columns["h"]) == 16
+    assert json.loads((path / "store.json").read_text())["stored_points"] == 16
+
+
+def test_terrain_is_not_shared_across_radials(tmp_path):
+    # Same terrain on two azimuths is still stored per radial
+    profiles = radial_profiles(0.0, 5) + radial_profiles(90.0, 5)
+    store = ProfileStore(write_profile_store(tmp_path / "a.profiles", profiles))
+
+    assert len(store.columns["h"]) == 10
+
+
+def test_columns_are_compact_read_only_views(tmp_path):
+    store = ProfileStore(write_profile_store(tmp_path / "a.profiles", radial_profiles(0.0, 5)))
+    (f, p, d, h, R, Ct, zone, *_), _ = store[2]
+
+    assert d.dtype == np.float64
+    assert h.dtype == np.int16
+    assert Ct.dtype == zone.dtype == np.int8
+    for name, values in zip(("d", "h", "R", "Ct", "zone"), (d, h, R, Ct, zone)):
+        assert np.shares_memory(values, store.columns[name])
+        assert not values.flags.writeable
+
+
+def test_missing_tx_id_and_azimuth(tmp_path):
+    profiles = radial_profiles(0.0, 3)
+    for profile in profiles:
+        del profile["tx_id"], profile["azimuth"]
+    store = ProfileStore(write_profile_store(tmp_path / "a.profiles", profiles))
+
+    assert [tx_id for _, tx_id in store] == [None, None]
+    assert np.isnan(store.meta["azimuth"]).all()
+
+
+def test_empty_store(tmp_path):
+    store = ProfileStore(write_profile_store(tmp_path / "empty.profiles", []))
+
+    assert len(store) == 0
+    assert list(store) == []
+
+
+def test_column_length_mismatch_is_rejected(tmp_path):
+    profiles = radial_profiles(0.0, 4)
+    profiles[1]["h"] = profiles[1]["h"][:-1]
+
+    with pytest.raises(ValueError):
+        write_profile_store(tmp_path / "a.profiles", profiles)
+
+
+def test_not_a_store(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ProfileStore(tmp_path)
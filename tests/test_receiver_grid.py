@@ -0,0 +1,94 @@
+"""Tests for ReceiverGrid against the GeoDataFrame receivers of Phase 2."""
+
+import numpy as np
+import pytest
+
+from mst_gis.pipeline.point_generation import Transmitter, generate_receivers_radial_multi
+from mst_gis.pipeline.receiver_grid import ReceiverGrid
+from mst_gis.utils.validation import ValidationError
+
+
+TX = Transmitter("TX_0001", 7.0, 45.0, 30.0, 0.9, 1, 50, 1.5)
+
+DISTANCES = np.array([0.0, 0.03, 0.06, 0.5, 2.0])
+AZIMUTHS = np.array([0.0, 90.0, 180.0, 270.0])
+
+
+@pytest.mark.parametrize("method", ["utm", "geodesic"])
+def test_from_transmitter_matches_geodataframe(method):
+    grid = ReceiverGrid.from_transmitter(TX, DISTANCES, AZIMUTHS, method)
+    gdf = generate_receivers_radial_multi(TX, DISTANCES, AZIMUTHS, include_tx_point=True, method=method)
+
+    assert grid.shape == (AZIMUTHS.size, DISTANCES.size)
+
+    converted = grid.to_geodataframe(include_tx_point=True)
+    np.testing.assert_array_equal(converted["rx_id"], gdf["rx_id"])
+    np.testing.assert_array_equal(converted["distance_km"], gdf["distance_km"])
+    np.testing.assert_array_equal(converted["azimuth_deg"], gdf["azimuth_deg"])
+    np.testing.assert_allclose(converted.geometry.x, gdf.geometry.x, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(converted.geometry.y, gdf.geometry.y, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "distances, azimuths, method",
+    [
+        ([], AZIMUTHS, "utm"),
+        (DISTANCES, [], "utm"),
+        ([-0.1, 1.0], AZIMUTHS, "utm"),
+        (DISTANCES, [0.0, 360.0], "utm"),
+        (DISTANCES, [-1.0], "utm"),
+        (DISTANCES, AZIMUTHS, "mercator"),
+    ],
+)
+def test_both_paths_reject_the_same_inputs(distances, azimuths, method):
+    with pytest.raises(ValidationError) as grid_error:
+        ReceiverGrid.from_transmitter(TX, distances, azimuths, method)
+    with pytest.raises(ValidationError) as gdf_error:
+        generate_receivers_radial_multi(TX, distances, azimuths, method=method)
+
+    assert str(grid_error.value) == str(gdf_error.value)
+
+
+def test_geodataframe_round_trip_keeps_attributes():
+    grid = ReceiverGrid.from_transmitter(TX, DISTANCES, AZIMUTHS)
+    h = np.arange(len(grid), dtype=np.float32).reshape(grid.shape)
+    grid = grid.with_attributes(h=h, zone=np.full(grid.shape, 3))
+
+    gdf = grid.to_geodataframe(include_tx_point=True)
+    back = ReceiverGrid.from_geodataframe(gdf.sample(frac=1.0, random_state=0))
+
+    np.testing.assert_array_equal(back.azimuths_deg, AZIMUTHS)
+    np.testing.assert_array_equal(back.distances_km, DISTANCES)
+    np.testing.assert_array_equal(back.lon, grid.lon)
+    np.testing.assert_array_equal(back.lat, grid.lat)
+    np.testing.assert_array_equal(back.attributes["h"], h)
+    assert back.attributes["zone"].dtype == np.int8
+    assert (back.tx_lon, back.tx_lat) == (TX.lon, TX.lat)
+
+
+def test_from_geodataframe_rejects_incomplete_grid():
+    gdf = generate_receivers_radial_multi(TX, DISTANCES, AZIMUTHS)
+
+    with pytest.raises(ValidationError):
+        ReceiverGrid.from_geodataframe(gdf.iloc[1:])
+
+
+def test_profile_is_a_view_of_the_grid():
+    grid = ReceiverGrid.from_transmitter(TX, DISTANCES, AZIMUTHS)
+    grid.set_attribute("h", np.zeros(len(grid)))
+
+    profile = grid.profile(2)
+    grid.attributes["h"][2, 1] = 12.5
+
+    assert profile["azimuth_deg"] == 180.0
+    assert profile["h"][1] == 12.5
+    assert np.shares_memory(profile["lon"], grid.lon)
+
+
+def test_with_attributes_leaves_the_grid_unchanged():
+    grid = ReceiverGrid.from_transmitter(TX, DISTANCES, AZIMUTHS)
+    enriched = grid.with_attributes(R=np.ones(len(grid)))
+
+    assert grid.attributes == {}
+    assert enriched.lon is grid.lon
+    assert enriched.attributes["R"].dtype == np.float32
@@ -0,0 +1,115 @@
+"""
+On-disk result cache: entries shared through the shard files, LRU
+eviction and recovery from partly written or repeated records.
+
+Run from the repository root:  python -m pytest -q
+"""
+import hashlib
+
+import numpy as np
+import pytest
+
+from mst_gis.propagation.result_cache import ENTRY_DTYPE, ENTRY_SIZE, ResultCache
+
+
+def key(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def test_hit_in_new_instance(tmp_path):
+    cache = ResultCache(tmp_path)
+    assert cache.get(key(1)) is None
+    cache.put(key(1), 120.5, 35.25)
+
+    reopened = ResultCache(tmp_path)
+    assert reopened.get(key(1)) == (120.5, 35.25)
+    assert (reopened.hits, reopened.misses) == (1, 0)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # entries appended by another instance are found by one that has read the shard
+    for i in range(2, 300):
+        reopened.put(key(i), i, -i)
+    assert all(cache.get(key(i)) == (i, -i) for i in range(2, 300))
+    assert len(cache) == 299
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=1000 * ENTRY_SIZE)
+    for i in range(500):
+        cache.put(key(i), i, i)
+
+    # entries are used in a known order, the oldest use is evicted first
+    for i in range(500):
+        assert cache.get(key(i)) == (i, i)
+
+    cache.evict(target_bytes=200 * ENTRY_SIZE)
+
+    assert cache.size <= 200 * ENTRY_SIZE
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.shard")) == cache.size
+    assert len(cache) == 200
+    assert cache.evictions == 300
+    kept = [i for i in range(500) if ResultCache(tmp_path).get(key(i)) is not None]
+    assert kept == list(range(300, 500))
+
+
+def test_evict_when_over_budget(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=100 * ENTRY_SIZE)
+    for i in range(250):
+        cache.put(key(i), i, i)
+
+    assert cache.size <= 100 * ENTRY_SIZE
+    assert cache.evictions > 0
+    assert cache.get(key(249)) == (249, 249)
+
+
+def test_truncated_record_is_skipped(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put(key(1), 1.0, 2.0)
+
+    # another entry of the same shard, cut short while it was appended
+    other = next(key(i) for i in range(2, 10000) if key(i)[:2] == key(1)[:2])
+    shard = tmp_path / (key(1)[:2] + ".shard")
+    record = np.array([(other, 3.0, 4.0, 0.0)], dtype=ENTRY_DTYPE).tobytes()
+    with shard.open("ab") as f:
+        f.write(record[: ENTRY_SIZE // 2])
+
+    reopened = ResultCache(tmp_path)
+    assert reopened.get(key(1)) == (1.0, 2.0)
+    assert reopened.get(other) is None
+    assert len(reopened) == 1
+
+    # eviction rewrites the shard without the partial record
+    reopened.evict(target_bytes=10 * ENTRY_SIZE)
+    assert shard.stat().st_size == ENTRY_SIZE
+
+
+def test_key_stored_twice_keeps_last_record(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put(key(1), 1.0, 2.0)
+    ResultCache(tmp_path).put(key(1), 5.0, 6.0)
+
+    assert cache.get(key(1)) == (5.0, 6.0)
+    assert ResultCache(tmp_path).get(key(1)) == (5.0, 6.0)
+    assert len(cache) == 1
+
+    cache.evict(target_bytes=10 * ENTRY_SIZE)
+    assert cache.size == ENTRY_SIZE
+    assert ResultCache(tmp_path).get(key(1)) == (5.0, 6.0)
+
+
+def test_bt_loss_with_details_is_not_cached(tmp_path):
+    P1812 = pytest.importorskip("Py1812.P1812")
+
+    d = np.linspace(0, 10, 50)
+    h = np.zeros(50)
+    parameters = [0.9, 50, d, h, h, 2 * np.ones(50, dtype=int), 4 * np.ones(50, dtype=int),
+                  20, 10, 1, 45.0, 45.05, 7.0, 7.1]
+
+    cache = ResultCache(tmp_path)
+    assert len(cache.bt_loss(*parameters, return_details=True)) == 3
+    assert len(cache) == 0
+
+    Lb, Ep = cache.bt_loss(*parameters)
+    assert cache.bt_loss(*parameters) == (Lb, Ep)
+    assert (Lb, Ep) == tuple(float(x) for x in P1812.bt_loss(*parameters))
+    assert (cache.hits, cache.misses) == (1, 1)
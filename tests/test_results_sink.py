@@ -0,0 +1,149 @@
+"""Tests for the CSV and Parquet results sinks."""
+
+import csv
+
+import pytest
+
+from mst_gis.propagation.results_sink import (
+    CsvResultsSink,
+    ParquetResultsSink,
+    ResultsSink,
+    open_results_sink,
+    read_results,
+)
+
+
+def result_row(index):
+    return {
+        "index": index,
+        "source": "profiles.csv",
+        "row": index - 1,
+        "tx_id": "TX_0001",
+        "distance_km": 0.03 * index,
+        "frequency_ghz": 0.9,
+        "Lb": 120.5 + index,
+        "Ep": 40.25 - index,
+        "elapsed_s": 0.001,
+    }
+
+
+@pytest.fixture(params=["results.csv", "results.parquet"])
+def results_path(request, tmp_path):
+    if request.param.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    return tmp_path / request.param
+
+
+@pytest.mark.parametrize("flush_every", [1, 3, 1000])
+def test_round_trip(results_path, flush_every):
+    rows = [result_row(i) for i in range(1, 8)]
+    rows[2]["tx_id"] = None
+
+    with open_results_sink(results_path, flush_every=flush_every) as sink:
+        for row in rows:
+            sink.write(row)
+
+    assert sink.rows_written == len(rows)
+    assert read_results(results_path) == rows
+
+
+def test_empty_file_is_readable(results_path):
+    open_results_sink(results_path).close()
+
+    assert read_results(results_path) == []
+
+
+def test_extra_keys_are_not_written(results_path):
+    with open_results_sink(results_path) as sink:
+        sink.write(dict(result_row(1), details="ignored"))
+
+    assert read_results(results_path) == [result_row(1)]
+
+
+def test_sink_class_follows_the_suffix(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    for name, cls in [("a.csv", CsvResultsSink), ("a.parquet", ParquetResultsSink), ("a.PQ", ParquetResultsSink)]:
+        sink = open_results_sink(tmp_path / name)
+        sink.close()
+        assert type(sink) is cls
+
+
+def test_csv_append_and_sync(tmp_path):
+    path = tmp_path / "results.csv"
+
+    with CsvResultsSink(path) as sink:
+        sink.write(result_row(1))
+        size = sink.sync()
+        assert size == path.stat().st_size
+    with CsvResultsSink(path, append=True) as sink:
+        sink.write(result_row(2))
+
+    assert read_results(path) == [result_row(1), result_row(2)]
+
+
+def test_parquet_cannot_append(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    with pytest.raises(ValueError):
+        ParquetResultsSink(tmp_path / "results.parquet", append=True)
+
+
+def test_failed_group_write_leaves_no_rows(tmp_path, monkeypatch):
+    path = tmp_path / "results.csv"
+    sink = CsvResultsSink(path, flush_every=2)
+    sink.write_rows([result_row(1), result_row(2)])
+
+    def fail(self, rowdict):
+        if rowdict["index"] == 4:
+            raise OSError("disk full")
+        return original(self, rowdict)
+
+    original = csv.DictWriter._dict_to_list
+    monkeypatch.setattr(csv.DictWriter, "_dict_to_list", fail)
+    with pytest.raises(OSError):
+        sink.write_rows([result_row(3), result_row(4)])
+    monkeypatch.undo()
+
+    sink.write_rows([result_row(5)])
+    sink.close()
+
+    assert [row["index"] for row in read_results(path)] == [1, 2, 5]
+
+
+def test_incomplete_sink_fails_at_creation(tmp_path):
+    class NoClose(ResultsSink):
+        def _open(self):
+            pass
+
+        def _write_rows(self, rows):
+            pass
+
+    with pytest.raises(TypeError):
+        NoClose(tmp_path / "results.csv")
+    assert not (tmp_path / "results.csv").exists()
+
+
+def test_append_sink_without_sync_fails_at_creation(tmp_path):
+    class AppendOnly(ResultsSink):
+        supports_append = True
+
+        def _open(self):
+            pass
+
+        def _write_rows(self, rows):
+            pass
+
+        def _close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        AppendOnly(tmp_path / "results.csv")
+
+
+def test_closed_sink_rejects_rows(tmp_path):
+    sink = CsvResultsSink(tmp_path / "results.csv")
+    sink.close()
+
+    with pytest.raises(ValueError):
+        sink.write(result_row(1))
@@ -0,0 +1,132 @@
+"""Tests for the deterministic sharding of profiles and merge_results."""
+
+import pytest
+
+from mst_gis.propagation.results_sink import open_results_sink, read_results
+from mst_gis.propagation.sharding import merge_results, parse_shard, shard_of, shard_selector
+
+
+SOURCES = {"a.csv": 7, "b.csv": 5}
+
+
+def result_row(source, row, Lb=100.0):
+    return {
+        "index": 0,
+        "source": source,
+        "row": row,
+        "tx_id": "TX_0001",
+        "distance_km": 0.03 * (row + 1),
+        "frequency_ghz": 0.9,
+        "Lb": Lb + row,
+        "Ep": 50.0 - row,
+        "elapsed_s": 0.001,
+    }
+
+
+@pytest.fixture
+def profiles_dir(tmp_path):
+    # merge_results only counts the data lines of the profile files
+    folder = tmp_path / "profiles"
+    folder.mkdir()
+    for source, count in SOURCES.items():
+        lines = ["f;p;d;h"] + ["0.9;50;[0];[0]"] * count
+        (folder / source).write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return folder
+
+
+def write_shards(folder, shards, suffix=".csv"):
+    """Results of every profile of SOURCES, written to one file per shard in reverse order."""
+    paths = []
+    for index in range(1, shards + 1):
+        select = shard_selector((index, shards))
+        path = folder / f"shard_{index}{suffix}"
+        with open_results_sink(path) as sink:
+            for source, count in reversed(list(SOURCES.items())):
+                for row in reversed(range(count)):
+                    if select(source, row, "TX_0001"):
+                        sink.write(result_row(source, row))
+        paths.append(path)
+    return paths
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for text in ["0/4", "5/4", "2", "a/b"]:
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+
+def test_shards_partition_the_profiles():
+    keys = [(f"p{n}.csv", row, "TX_0001") for n in range(5) for row in range(200)]
+    assigned = {key: shard_of(*key, 4) for key in keys}
+
+    assert set(assigned.values()) == {1, 2, 3, 4}
+    for index in range(1, 5):
+        select = shard_selector((index, 4))
+        assert {key for key in keys if select(*key)} == {key for key, shard in assigned.items() if shard == index}
+
+    # The assignment only depends on the profile
+    assert shard_of("p0.csv", 17, "TX_0001", 4) == assigned[("p0.csv", 17, "TX_0001")]
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_merge_round_trip(tmp_path, profiles_dir, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    paths = write_shards(tmp_path, 3)
+    output = tmp_path / f"merged{suffix}"
+
+    assert merge_results(paths, output, profiles_dir, flush_every=4) == sum(SOURCES.values())
+
+    expected = [
+        dict(result_row(source, row), index=index)
+        for index, (source, row) in enumerate(
+            ((source, row) for source, count in SOURCES.items() for row in range(count)), start=1
+        )
+    ]
+    assert read_results(output) == expected
+
+
+def test_merge_of_parquet_shards(tmp_path):
+    pytest.importorskip("pyarrow")
+    paths = write_shards(tmp_path, 2, ".parquet")
+
+    merge_results(paths, tmp_path / "merged.csv")
+
+    rows = read_results(tmp_path / "merged.csv")
+    assert [(row["source"], row["row"]) for row in rows] == [
+        (source, row) for source, count in SOURCES.items() for row in range(count)
+    ]
+
+
+def test_last_row_of_a_profile_wins_within_a_file(tmp_path):
+    path = tmp_path / "shard.csv"
+    with open_results_sink(path) as sink:
+        sink.write(result_row("a.csv", 0, Lb=100.0))
+        sink.write(result_row("a.csv", 0, Lb=200.0))
+
+    merge_results([path], tmp_path / "merged.csv")
+
+    assert [row["Lb"] for row in read_results(tmp_path / "merged.csv")] == [200.0]
+
+
+def test_overlapping_shards_are_rejected(tmp_path):
+    paths = write_shards(tmp_path, 2)
+    with open_results_sink(paths[1], append=True) as sink:
+        sink.write(read_results(paths[0])[0])
+
+    with pytest.raises(ValueError, match="more than one shard"):
+        merge_results(paths, tmp_path / "merged.csv")
+    assert not (tmp_path / "merged.csv").exists()
+
+
+def test_missing_and_unknown_profiles_are_rejected(tmp_path, profiles_dir):
+    paths = write_shards(tmp_path, 3)
+
+    with pytest.raises(ValueError, match="missing"):
+        merge_results(paths[:2], tmp_path / "merged.csv", profiles_dir)
+
+    with open_results_sink(paths[0], append=True) as sink:
+        sink.write(result_row("c.csv", 0))
+    with pytest.raises(ValueError, match="not profiles"):
+        merge_results(paths, tmp_path / "merged.csv", profiles_dir)